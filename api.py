@@ -3,7 +3,7 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse
-from typing import List, Dict
+from typing import List, Dict, Optional
 import asyncio
 import json
 import time
@@ -12,8 +12,9 @@ from monitor import ArbitrageMonitor
 from arbitrage import ArbitrageOpportunity
 from exchanges.base import Market
 from paper_trading import PaperTradingEngine
-from market_validator import MarketValidator
 from arbitrage_expert import ArbitrageExpert, ArbitrageOpportunityV2
+from opportunity_lifecycle import identify
+from config import TOP_K_SCORE
 
 app = FastAPI(title="Prediction Market Arbitrage API")
 
@@ -56,7 +57,7 @@ _expert_last_update = None
 
 # Engine de paper trading
 paper_trading = PaperTradingEngine(initial_balance=10000.0)
-validator = MarketValidator()
+validator = monitor.engine.validator  # Mesmo cache de veredictos da detecção
 
 
 async def broadcast_update():
@@ -64,9 +65,16 @@ async def broadcast_update():
     if not connected_clients:
         return
     
+    snapshot = monitor.registry.snapshot
     data = {
         "opportunities": [serialize_opportunity(opp) for opp in monitor.opportunities],
         "last_update": monitor.last_update.isoformat() if monitor.last_update else None,
+        # Delta de mercados do último ciclo (versão permite ao cliente ignorar repetidos)
+        "snapshot_version": snapshot.version,
+        "market_changes": None if snapshot.diff.initial else snapshot.diff.to_dict(),
+        # Só transições do último ciclo (oportunidades abertas/fechadas)
+        "lifecycle_version": monitor.lifecycle.version,
+        "lifecycle_events": [event.to_dict() for event in monitor.lifecycle_events],
     }
     
     message = json.dumps(data)
@@ -84,17 +92,35 @@ async def broadcast_update():
             connected_clients.remove(client)
 
 
+def lifecycle_fields(kind: str, opp) -> Dict:
+    """ID estável e idade da oportunidade (registro do ciclo de vida, se houver)"""
+    opp_id = identify(kind, opp)
+    record = monitor.lifecycle.get(opp_id)
+    return {
+        "id": opp_id,
+        "first_seen": record.to_dict()["first_seen"] if record else None,
+        "age_seconds": record.age_seconds if record else 0.0,
+        "peak_profit_pct": record.peak_profit_pct if record else None,
+    }
+
+
 def serialize_opportunity(opp: ArbitrageOpportunity) -> Dict:
     """Serializa oportunidade para JSON"""
-    # Valida equivalência
-    equivalent, validation = validator.validate_equivalence(opp.market_buy, opp.market_sell)
+    # Reusa o veredicto da detecção; sem ele, valida (memoizado)
+    if opp.validation is not None:
+        equivalent, validation = opp.validation["equivalent"], opp.validation
+    else:
+        equivalent, validation = validator.validate_equivalence(opp.market_buy, opp.market_sell)
     
     return {
+        **lifecycle_fields("traditional", opp),
         "profit_pct": opp.profit_pct,
         "profit_abs": opp.profit_abs,
         "net_profit": opp.net_profit,
         "fees": opp.fees,
         "confidence": opp.confidence,
+        "executable": opp.executable,
+        "sizing": opp.sizing.to_dict() if opp.sizing is not None else None,
         "validated": equivalent,
         "validation_details": {
             "confidence": validation.get("confidence", 0),
@@ -120,6 +146,7 @@ def serialize_opportunity(opp: ArbitrageOpportunity) -> Dict:
 def serialize_combinatorial_opportunity(opp) -> Dict:
     """Serializa oportunidade combinatória para JSON"""
     return {
+        **lifecycle_fields("combinatorial", opp),
         "type": "combinatorial",
         "strategy": opp.strategy,
         "profit_pct": opp.expected_profit_pct,
@@ -151,6 +178,7 @@ def serialize_combinatorial_opportunity(opp) -> Dict:
 def serialize_probability_opportunity(opp) -> Dict:
     """Serializa oportunidade de arbitragem por probabilidade para JSON"""
     return {
+        **lifecycle_fields("probability", opp),
         "type": "probability",
         "strategy": "probability_spread",
         "profit_pct": opp.profit_pct,
@@ -216,6 +244,7 @@ def serialize_probability_opportunity(opp) -> Dict:
 def serialize_short_term_opportunity(opp) -> Dict:
     """Serializa oportunidade de arbitragem de curto prazo para JSON"""
     return {
+        **lifecycle_fields("short_term", opp),
         "type": "short_term",
         "strategy": "short_term_trade",
         "profit_pct": opp.profit_pct,
@@ -281,6 +310,14 @@ def serialize_short_term_opportunity(opp) -> Dict:
     }
 
 
+SERIALIZERS = {
+    "traditional": serialize_opportunity,
+    "combinatorial": serialize_combinatorial_opportunity,
+    "probability": serialize_probability_opportunity,
+    "short_term": serialize_short_term_opportunity,
+}
+
+
 def serialize_expert_opportunity(opp: ArbitrageOpportunityV2) -> Dict:
     """Serializa oportunidade do sistema especialista para JSON"""
     return {
@@ -386,11 +423,13 @@ async def root():
         "cache_size": len(monitor._cached_markets) if hasattr(monitor, '_cached_markets') and monitor._cached_markets else 0,
         "endpoints": {
             "/opportunities": "Lista oportunidades de arbitragem",
+            "/opportunities/lifecycle": "Ciclo de vida das oportunidades (IDs estáveis, idade, pico e transições)",
             "/markets": "Lista todos os mercados",
             "/stats": "Estatísticas gerais",
             "/health": "Health check rápido",
             "/paper-trading": "Estatísticas de paper trading",
             "/validate": "Valida equivalência de mercados",
+            "/history": "Histórico de preços e volatilidade/drift/z-score por mercado",
             "/ws": "WebSocket para atualizações em tempo real"
         }
     }
@@ -401,13 +440,38 @@ async def health_check():
     return {
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
-        "cached_markets": len(monitor._cached_markets) if hasattr(monitor, '_cached_markets') and monitor._cached_markets else 0
+        "cached_markets": len(monitor._cached_markets) if hasattr(monitor, '_cached_markets') and monitor._cached_markets else 0,
+        "exchanges": monitor.get_exchange_health(),
+        "scheduler": monitor.scheduler.status() if monitor.scheduler else None,
+        "orderbooks": monitor.orderbooks.status() if monitor.orderbooks else None,
+        "history": monitor.history.status(),
+        "validation_cache": validator.cache_info(),
+        "lifecycle": monitor.lifecycle.status(),
+        "engines": monitor.engine_pool.status()
     }
 
 
 @app.get("/opportunities")
-async def get_opportunities():
-    """Retorna oportunidades de arbitragem (sistema otimizado)"""
+async def get_opportunities(top: Optional[int] = None, score: str = TOP_K_SCORE):
+    """
+    Retorna oportunidades de arbitragem (sistema otimizado)
+    
+    top: só as N melhores entre todas as engines, ordenadas por `score`
+        (profit_pct, quality_score ou net_dollars)
+    """
+    if top:
+        try:
+            best = monitor.top_opportunities(top, score)
+        except ValueError as e:
+            return {"error": str(e)}
+        serialized = [SERIALIZERS[kind](opp) for kind, opp in best]
+        return {
+            "opportunities": serialized,
+            "count": len(serialized),
+            "last_update": monitor.last_update.isoformat() if monitor.last_update else None,
+            "system": "optimized",
+            "score": score
+        }
     
     # Usa cache do sistema combinatório (mais rápido)
     serialized_opportunities = []
@@ -454,6 +518,32 @@ async def get_opportunities():
     }
 
 
+@app.get("/opportunities/lifecycle")
+async def get_opportunity_lifecycle(status: str = "active", since: Optional[int] = None, limit: int = 200):
+    """
+    Registros do ciclo de vida das oportunidades
+    
+    status: "active", "closed" ou "all"
+    since: versão já vista pelo cliente; retorna só os eventos (opened/closed)
+        de ciclos posteriores
+    limit: máximo de registros retornados
+    """
+    lifecycle = monitor.lifecycle
+    records = []
+    if status in ("active", "all"):
+        records.extend(lifecycle.active())
+    if status in ("closed", "all"):
+        records.extend(reversed(list(lifecycle.closed.values())))  # Fechadas mais recentes primeiro
+    
+    return {
+        "version": lifecycle.version,
+        "records": [record.to_dict() for record in records[:limit]],
+        "count": len(records),
+        "events": [event.to_dict() for event in lifecycle.events_since(since)] if since is not None else None,
+        "status": lifecycle.status()
+    }
+
+
 @app.get("/opportunities/legacy")
 async def get_opportunities_legacy():
     """Retorna oportunidades do sistema antigo (compatibilidade)"""
@@ -476,8 +566,13 @@ async def get_opportunities_legacy():
 
 
 @app.get("/markets")
-async def get_markets():
-    """Retorna todos os mercados (usa cache do monitor)"""
+async def get_markets(exchange: Optional[str] = None, outcome: Optional[str] = None, expiry: Optional[str] = None):
+    """
+    Retorna mercados do cache do monitor
+    
+    Filtros opcionais pelos índices do registro: exchange, outcome (YES/NO) e
+    expiry (24h, 7d, 30d, 90d, later, expired, none).
+    """
     try:
         print(f"[API] GET /markets - Buscando mercados do cache...")
         
@@ -485,12 +580,11 @@ async def get_markets():
         # O monitor atualiza a cada 30s no background
         if not hasattr(monitor, '_cached_markets') or not monitor._cached_markets or len(monitor._cached_markets) == 0:
             print(f"[API] GET /markets - Cache vazio, buscando...")
-            markets = await monitor.fetch_all_markets()
-            monitor._cached_markets = markets
-            print(f"[API] GET /markets - Buscado {len(markets)} mercados, cache atualizado")
+            monitor.registry.publish(await monitor.fetch_all_markets())
+            print(f"[API] GET /markets - Buscado {len(monitor.registry.snapshot)} mercados, cache atualizado")
         else:
-            markets = monitor._cached_markets
-            print(f"[API] GET /markets - Usando cache ({len(markets)} mercados)")
+            print(f"[API] GET /markets - Usando cache ({len(monitor.registry.snapshot)} mercados)")
+        markets = monitor.registry.snapshot.filter(exchange=exchange, outcome=outcome, expiry=expiry)
         
         serialized = [serialize_market(m) for m in markets]
         exchanges = list(set(m.exchange for m in markets))
@@ -540,7 +634,8 @@ async def get_stats():
             "message": "Aguardando primeiro carregamento..."
         }
     
-    markets = monitor._cached_markets
+    snapshot = monitor.registry.snapshot  # Uma referência: números consistentes entre si
+    markets = snapshot.markets
     print(f"[API] GET /stats - Usando {len(markets)} mercados do cache")
     
     # NÃO CHAMA await monitor.update() aqui - isso trava!
@@ -549,13 +644,14 @@ async def get_stats():
     total_volume = sum(m.volume_24h for m in markets)
     total_liquidity = sum(m.liquidity for m in markets)
     
-    by_exchange = {}
-    for market in markets:
-        if market.exchange not in by_exchange:
-            by_exchange[market.exchange] = {"count": 0, "volume": 0, "liquidity": 0}
-        by_exchange[market.exchange]["count"] += 1
-        by_exchange[market.exchange]["volume"] += market.volume_24h
-        by_exchange[market.exchange]["liquidity"] += market.liquidity
+    by_exchange = {
+        exchange: {
+            "count": len(group),
+            "volume": sum(m.volume_24h for m in group),
+            "liquidity": sum(m.liquidity for m in group)
+        }
+        for exchange, group in snapshot.by_exchange.items()
+    }
     
     # Estatísticas de paper trading
     paper_stats = paper_trading.get_statistics()
@@ -620,11 +716,10 @@ async def simulate_trade(opportunity_index: int, amount: float = None):
 @app.get("/validate")
 async def validate_markets(market1_id: str, market2_id: str, exchange1: str, exchange2: str):
     """Valida equivalência entre dois mercados"""
-    # USA CACHE ao invés de fetch_all_markets()
-    markets = monitor._cached_markets if hasattr(monitor, '_cached_markets') and monitor._cached_markets else []
-    
-    market1 = next((m for m in markets if m.market_id == market1_id and m.exchange == exchange1), None)
-    market2 = next((m for m in markets if m.market_id == market2_id and m.exchange == exchange2), None)
+    # USA CACHE ao invés de fetch_all_markets() - índice por (exchange, market_id)
+    snapshot = monitor.registry.snapshot
+    market1 = snapshot.get(exchange1, market1_id)
+    market2 = snapshot.get(exchange2, market2_id)
     
     if not market1 or not market2:
         return {"error": "Mercado não encontrado"}
@@ -633,6 +728,27 @@ async def validate_markets(market1_id: str, market2_id: str, exchange1: str, exc
     return validation
 
 
+@app.get("/history")
+async def get_price_history(exchange: str, market_id: str, window: Optional[int] = None, limit: int = 200):
+    """
+    Histórico de preços de um mercado com métricas da janela
+    
+    window: observações usadas em volatilidade/drift/z-score (padrão VOLATILITY_WINDOW)
+    limit: máximo de pontos retornados (os mais recentes)
+    """
+    key = (exchange, market_id)
+    if key not in monitor.history:
+        return {"error": "Mercado sem histórico"}
+    
+    timestamps, prices, liquidity = monitor.history.series(key)
+    stats = monitor.history.stats([key], window) if window else monitor.history.stats([key])
+    points = [
+        {"timestamp": datetime.fromtimestamp(t).isoformat(), "price": p, "liquidity": l}
+        for t, p, l in zip(timestamps[-limit:].tolist(), prices[-limit:].tolist(), liquidity[-limit:].tolist())
+    ]
+    return {"exchange": exchange, "market_id": market_id, **stats[key], "points": points}
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket para atualizações em tempo real"""
@@ -672,6 +788,12 @@ async def startup_event():
 
 async def background_updates():
     """Atualizações em background (OTIMIZADO - sem sistema especialista pesado)"""
+    from config import USE_SCHEDULER
+    if USE_SCHEDULER:
+        # Polling independente por exchange + análise com debounce
+        print("[Background] Usando scheduler por exchange (USE_SCHEDULER=true)")
+        await monitor.run_scheduled(on_update=broadcast_update)
+        return
     
     # Primeira atualização imediata
     print("[Background] Iniciando primeira atualização...")
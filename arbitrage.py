@@ -1,9 +1,14 @@
 """Engine de detecção de arbitragem"""
-from typing import List, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional
+import numpy as np
 from exchanges.base import Market
-from config import MIN_ARBITRAGE_PROFIT, MIN_LIQUIDITY, EXCHANGE_FEES, GAS_FEES
+from config import MIN_ARBITRAGE_PROFIT, MIN_LIQUIDITY, EXCHANGE_FEES, GAS_FEES, TOP_K
 from dataclasses import dataclass
 from market_validator import MarketValidator
+from market_frame import MarketFrame
+from pair_kernel import PairLegs, pair_profit_kernel
+from trade_sizing import TradeSize, optimal_trade_size
+from topk import TopK, merge_top_k
 
 
 @dataclass
@@ -18,6 +23,14 @@ class ArbitrageOpportunity:
     fees: float
     net_profit: float
     confidence: float       # Confiança no matching (0-1)
+    executable: bool = False  # Preços vêm da profundidade dos order books (não do mid)
+    validation: Optional[Dict] = None  # Veredicto do MarketValidator na detecção (reusado na serialização)
+    sizing: Optional[TradeSize] = None  # Tamanho ótimo pela profundidade dos books (só com order books)
+    
+    @property
+    def dollar_profit(self) -> float:
+        """Lucro em USD usado no ranking: do tamanho ótimo com books, senão dos $100 de referência"""
+        return self.sizing.net_profit if self.sizing is not None else self.net_profit
     
     def __str__(self):
         return (
@@ -29,13 +42,21 @@ class ArbitrageOpportunity:
         )
 
 
+def _dollar_profit(opp: ArbitrageOpportunity) -> float:
+    return opp.dollar_profit
+
+
 class ArbitrageEngine:
     """Detecta oportunidades de arbitragem"""
     
-    def __init__(self):
+    def __init__(self, orderbooks=None, top_k: Optional[int] = TOP_K):
         self.min_profit = MIN_ARBITRAGE_PROFIT
         self.min_liquidity = MIN_LIQUIDITY
         self.validator = MarketValidator()
+        # OrderBookService opcional: com books válidos, precifica pela profundidade
+        self.orderbooks = orderbooks
+        # Só as top_k melhores por lucro em USD (heap limitado); None/0 = todas
+        self.top_k = top_k
     
     def calculate_arbitrage(
         self, 
@@ -70,6 +91,23 @@ class ArbitrageEngine:
             buy_price = market2.price
             sell_price = market1.price
         
+        # Assume investimento de $100 para cálculo
+        investment = 100.0
+        
+        # Com order books, usa preço médio executável para o tamanho do trade
+        executable = False
+        book_buy = book_sell = None
+        if self.orderbooks is not None:
+            book_buy = self.orderbooks.get(market_buy)
+            book_sell = self.orderbooks.get(market_sell)
+            if book_buy is not None and book_sell is not None:
+                fill_buy = book_buy.average_buy_price(investment)
+                fill_sell = book_sell.average_sell_price(investment / fill_buy) if fill_buy else None
+                if fill_buy is None or fill_sell is None:
+                    return None  # Sem profundidade para o tamanho do trade
+                buy_price, sell_price = fill_buy, fill_sell
+                executable = True
+        
         # Calcula lucro bruto
         profit_abs = sell_price - buy_price
         
@@ -81,8 +119,6 @@ class ArbitrageEngine:
         gas_buy = GAS_FEES.get(market_buy.exchange.lower(), 0)
         gas_sell = GAS_FEES.get(market_sell.exchange.lower(), 0)
         
-        # Assume investimento de $100 para cálculo
-        investment = 100.0
         shares_buy = investment / buy_price
         revenue = shares_buy * sell_price
         
@@ -94,6 +130,11 @@ class ArbitrageEngine:
         if profit_pct < self.min_profit:
             return None
         
+        # Com books, procura o tamanho que maximiza o lucro em USD
+        sizing = None
+        if executable:
+            sizing = optimal_trade_size(book_buy, book_sell, fee_buy, fee_sell, (gas_buy + gas_sell) * 3000)
+        
         return ArbitrageOpportunity(
             market_buy=market_buy,
             market_sell=market_sell,
@@ -103,15 +144,32 @@ class ArbitrageEngine:
             profit_abs=profit_abs,
             fees=fees,
             net_profit=net_profit,
-            confidence=confidence
+            confidence=confidence,
+            executable=executable,
+            validation=validation,
+            sizing=sizing
         )
     
     def find_opportunities(
         self, 
-        market_pairs: List[Tuple[Market, Market, float]]
+        market_pairs: List[Tuple[Market, Market, float]],
+        frame: Optional[MarketFrame] = None
     ) -> List[ArbitrageOpportunity]:
-        """Encontra todas as oportunidades de arbitragem"""
-        opportunities = []
+        """
+        Encontra todas as oportunidades de arbitragem
+        
+        Sem order books, liquidez e lucro a preço de mercado são calculados
+        para todos os pares de uma vez (pair_kernel, usando as colunas de
+        `frame` quando o snapshot do ciclo é informado) e só os que passam vão
+        para a validação (cara) de calculate_arbitrage.
+        
+        Com `top_k`, guarda só as K melhores em um heap limitado em vez de
+        ordenar a lista inteira.
+        """
+        opportunities = TopK(self.top_k, key=_dollar_profit)
+        
+        if self.orderbooks is None and market_pairs:
+            market_pairs = self._prescreen(market_pairs, frame)
         
         for market1, market2, confidence in market_pairs:
             # Verifica se são outcomes opostos (YES vs NO)
@@ -119,15 +177,74 @@ class ArbitrageEngine:
                 # Mesmo outcome - arbitragem direta
                 opp = self.calculate_arbitrage(market1, market2, confidence)
                 if opp:
-                    opportunities.append(opp)
+                    opportunities.push(opp)
             else:
                 # Outcomes opostos - pode fazer arbitragem combinada
                 # Comprar YES barato + comprar NO barato, vender ambos caros
                 # (implementação mais complexa, deixando para versão futura)
                 pass
         
-        # Ordena por lucro
-        opportunities.sort(key=lambda x: x.profit_pct, reverse=True)
+        # Ordena por lucro em USD (tamanho ótimo quando há books; senão equivale ao lucro %)
+        return opportunities.items()
+    
+    def update_opportunities(
+        self,
+        previous: List[ArbitrageOpportunity],
+        market_pairs: List[Tuple[Market, Market, float]],
+        changed_keys: Set[Tuple[str, str]],
+        frame: Optional[MarketFrame] = None
+    ) -> List[ArbitrageOpportunity]:
+        """
+        Recalcula só os pares com algum mercado alterado no ciclo
+        
+        Oportunidades anteriores cujos dois mercados não mudaram (e cujo par
+        continua casado) são mantidas; pares sem mudança que não eram
+        oportunidade continuam não sendo. Com order books, cujos preços mudam
+        independentemente do snapshot, recalcula tudo.
+        
+        Com `top_k`, as mantidas e as recalculadas (ambas ordenadas) são
+        intercaladas e cortadas em K. Se a lista anterior estava cheia e perdeu
+        alguma, a K+1-ésima pode ter sido descartada antes: recalcula tudo.
+        """
+        if self.orderbooks is not None:
+            return self.find_opportunities(market_pairs, frame)
+        
+        def key(market: Market) -> Tuple[str, str]:
+            return (market.exchange, market.market_id)
+        
+        matched = {frozenset((key(m1), key(m2))) for m1, m2, _ in market_pairs}
+        kept = [
+            opp for opp in previous
+            if key(opp.market_buy) not in changed_keys and key(opp.market_sell) not in changed_keys
+            and frozenset((key(opp.market_buy), key(opp.market_sell))) in matched
+        ]
+        if self.top_k and len(previous) >= self.top_k and len(kept) < len(previous):
+            return self.find_opportunities(market_pairs, frame)
+        affected = [pair for pair in market_pairs if key(pair[0]) in changed_keys or key(pair[1]) in changed_keys]
+        
+        return merge_top_k([kept, self.find_opportunities(affected, frame)], self.top_k, key=_dollar_profit)
+    
+    def _prescreen(
+        self,
+        market_pairs: List[Tuple[Market, Market, float]],
+        frame: Optional[MarketFrame] = None
+    ) -> List[Tuple[Market, Market, float]]:
+        """Descarta pares que calculate_arbitrage rejeitaria por liquidez ou lucro"""
+        legs = None
+        if frame is not None:
+            try:
+                first = frame.positions([pair[0] for pair in market_pairs])
+                second = frame.positions([pair[1] for pair in market_pairs])
+                legs = PairLegs.from_frame(frame, first, second)
+            except KeyError:
+                pass  # Pares fora do snapshot: lê dos próprios mercados
+        if legs is None:
+            legs = PairLegs.from_pairs(market_pairs)
+        result = pair_profit_kernel(legs, min_profit=self.min_profit, min_liquidity=self.min_liquidity,
+                                    normalize_outcomes=False)
         
-        return opportunities
+        # Lucro NaN/inf (preço zero) segue para a engine, que decide como antes
+        liquid = (legs.liquidity_a >= self.min_liquidity) & (legs.liquidity_b >= self.min_liquidity)
+        keep = result.passed | (liquid & ~np.isfinite(result.profit_pct))
+        return [pair for pair, ok in zip(market_pairs, keep) if ok]
 
@@ -7,19 +7,20 @@ Dois tipos principais:
 
 Referência: Estudo empírico mostra ~$40 milhões extraídos via arbitragem
 """
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from exchanges.base import Market
 from dataclasses import dataclass, field
 from config import EXCHANGE_FEES
 from scoring_utils import calculate_liquidity_score, calculate_risk_score, calculate_quality_score, get_risk_level
-import re
+from constraint_graph import ConstraintGraph, extract_facts, implication, is_event_market
+from ladder_arbitrage import LadderTrade, find_ladder_arbitrage
 
 
 @dataclass
 class CombinatorialOpportunity:
     """Oportunidade de arbitragem combinatória"""
     markets: List[Market]
-    strategy: str  # "complementary" ou "related"
+    strategy: str  # "complementary_buy"/"_sell", "logical_implication" ou "ladder_monotonicity"/"_butterfly"
     total_probability: float  # Soma das probabilidades
     expected_profit_pct: float
     confidence: float
@@ -40,6 +41,7 @@ class CombinatorialArbitrage:
     
     def __init__(self):
         self.min_profit = 0.01  # 1% lucro mínimo
+        self.constraints = ConstraintGraph()  # Implicações entre mercados, mantido entre ciclos
         
     def find_complementary_markets(self, markets: List[Market]) -> List[Tuple[Market, Market]]:
         """
@@ -47,26 +49,29 @@ class CombinatorialArbitrage:
         
         Exemplo: "Will X happen? - Yes" e "Will X happen? - No"
         Idealmente P(Yes) + P(No) = 1.0
+        
+        Agrupa em uma passada por (exchange, pergunta sem o outcome) e só
+        compara outcomes dentro de cada grupo (tipicamente 2 mercados), em vez
+        de todos os pares. Pares saem na ordem da lista de entrada.
         """
-        complementary_pairs = []
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, market in enumerate(markets):
+            # Pergunta sem o outcome: YES/NO do mesmo evento caem no mesmo grupo
+            q_clean = market.question.lower().replace(market.outcome.lower(), "").strip()
+            groups.setdefault((market.exchange, q_clean), []).append(i)
         
-        for i, m1 in enumerate(markets):
-            for m2 in markets[i+1:]:
-                # Mesmo exchange e mercado base
-                if m1.exchange != m2.exchange:
-                    continue
-                
-                # Verifica se são YES/NO do mesmo evento
-                q1_clean = m1.question.lower().replace(m1.outcome.lower(), "").strip()
-                q2_clean = m2.question.lower().replace(m2.outcome.lower(), "").strip()
-                
-                # Se as perguntas são iguais (sem o outcome)
-                if q1_clean == q2_clean:
+        pair_indices = []
+        for indices in groups.values():
+            if len(indices) < 2:
+                continue
+            for position, i in enumerate(indices):
+                for j in indices[position + 1:]:
                     # E os outcomes são opostos
-                    if self._are_complementary_outcomes(m1.outcome, m2.outcome):
-                        complementary_pairs.append((m1, m2))
+                    if self._are_complementary_outcomes(markets[i].outcome, markets[j].outcome):
+                        pair_indices.append((i, j))
         
-        return complementary_pairs
+        pair_indices.sort()
+        return [(markets[i], markets[j]) for i, j in pair_indices]
     
     def _are_complementary_outcomes(self, outcome1: str, outcome2: str) -> bool:
         """Verifica se dois outcomes são complementares (Yes/No)"""
@@ -195,45 +200,22 @@ class CombinatorialArbitrage:
         
         Exemplo: "A vence eleição" vs "Partido de A vence eleição"
         Se P(A vence) > P(Partido de A vence), há incoerência lógica
-        """
-        opportunities = []
         
-        # Agrupa mercados por tema/ano
-        themed_groups = self._group_by_theme(markets)
+        O grafo de implicações é atualizado incrementalmente com os mercados do
+        ciclo e checado em uma passada topológica (pega também cadeias A -> C -> B).
+        """
+        self.constraints.update(markets)
         
-        for theme, group_markets in themed_groups.items():
-            if len(group_markets) < 2:
-                continue
-            
-            # Procura relações lógicas
-            for i, m1 in enumerate(group_markets):
-                for m2 in group_markets[i+1:]:
-                    opp = self._check_logical_consistency(m1, m2)
-                    if opp:
-                        opportunities.append(opp)
+        opportunities = []
+        for violation in self.constraints.violations():
+            opp = self._build_implication_opportunity(
+                violation.antecedent, violation.consequent, " -> ".join(violation.kinds)
+            )
+            if opp:
+                opportunities.append(opp)
         
         return opportunities
     
-    def _group_by_theme(self, markets: List[Market]) -> dict:
-        """Agrupa mercados por tema (extrai palavras-chave)"""
-        groups = {}
-        
-        for market in markets:
-            # Extrai ano
-            years = re.findall(r'\b(202[4-9]|203[0-9])\b', market.question)
-            year = years[0] if years else "no_year"
-            
-            # Extrai tema principal (primeiras 3 palavras significativas)
-            words = market.question.lower().split()
-            significant_words = [w for w in words if len(w) > 3][:3]
-            theme = f"{year}_{' '.join(significant_words)}"
-            
-            if theme not in groups:
-                groups[theme] = []
-            groups[theme].append(market)
-        
-        return groups
-    
     def _check_logical_consistency(
         self,
         market1: Market,
@@ -245,13 +227,120 @@ class CombinatorialArbitrage:
         Exemplo: Se "Biden vence" tem P=0.6 mas "Democrata vence" tem P=0.4,
         há incoerência (Biden é democrata, então P(Biden) <= P(Democrata))
         """
-        # Esta é uma versão simplificada
-        # Versão completa requer ontologia de relações lógicas
+        if not (is_event_market(market1) and is_event_market(market2)):
+            return None
         
-        # Por ora, apenas detecta inconsistências óbvias de probabilidade
-        # quando mercados têm overlap temático
+        facts1 = extract_facts(market1)
+        facts2 = extract_facts(market2)
+        for antecedent, consequent, kind in (
+            (market1, market2, implication(facts1, facts2)),
+            (market2, market1, implication(facts2, facts1)),
+        ):
+            if kind and antecedent.price > consequent.price:
+                return self._build_implication_opportunity(antecedent, consequent, kind)
         
-        return None  # Implementação futura
+        return None
+    
+    def _build_implication_opportunity(
+        self,
+        antecedent: Market,
+        consequent: Market,
+        relation: str
+    ) -> Optional[CombinatorialOpportunity]:
+        """
+        Oportunidade para A -> B com P(A) > P(B)
+        
+        Comprar YES em B (pB) e NO em A (1 - pA) custa 1 - gap e paga ao menos
+        $1.00 em qualquer cenário (A implica B: nunca perdem os dois).
+        """
+        gap = antecedent.price - consequent.price
+        if gap <= 0:
+            return None
+        
+        investment = 1.0 - gap
+        profit_pct = gap / investment
+        
+        fees = EXCHANGE_FEES.get(antecedent.exchange, 0.02) + EXCHANGE_FEES.get(consequent.exchange, 0.02)
+        net_profit_pct = profit_pct - fees
+        if net_profit_pct <= self.min_profit:
+            return None
+        
+        markets_list = [antecedent, consequent]
+        liquidity_score = calculate_liquidity_score(markets_list)
+        risk_score = calculate_risk_score(
+            markets_list,
+            net_profit_pct,
+            confidence=0.9,
+            strategy="logical_implication"
+        )
+        quality_score = calculate_quality_score(
+            net_profit_pct,
+            confidence=0.9,
+            liquidity_score=liquidity_score,
+            risk_score=risk_score,
+            spread_pct=gap
+        )
+        
+        return CombinatorialOpportunity(
+            markets=markets_list,
+            strategy="logical_implication",
+            total_probability=investment,  # Soma dos preços pagos (YES em B + NO em A)
+            expected_profit_pct=net_profit_pct,
+            confidence=0.9,  # Depende da leitura correta da relação entre as perguntas
+            explanation=(
+                f"{relation}: P({antecedent.question}) = {antecedent.price:.4f} > "
+                f"P({consequent.question}) = {consequent.price:.4f}. "
+                f"Comprar NO no primeiro e YES no segundo: ${investment:.4f} garante $1.00"
+            ),
+            risk_score=risk_score,
+            liquidity_score=liquidity_score,
+            quality_score=quality_score,
+            risk_level=get_risk_level(risk_score)
+        )
+    
+    def find_ladder_opportunities(
+        self,
+        markets: List[Market]
+    ) -> List[CombinatorialOpportunity]:
+        """
+        Escadas de strikes (Kalshi "Acima de X" / faixas) fora de ordem
+        
+        Cada evento é avaliado como uma escada ordenada (ver ladder_arbitrage),
+        sem comparar strikes par a par.
+        """
+        return [self._build_ladder_opportunity(trade) for trade in find_ladder_arbitrage(markets, self.min_profit)]
+    
+    def _build_ladder_opportunity(self, trade: LadderTrade) -> CombinatorialOpportunity:
+        """Converte um trade de escada (lucro garantido) em oportunidade"""
+        markets_list = trade.markets
+        liquidity_score = calculate_liquidity_score(markets_list)
+        risk_score = calculate_risk_score(
+            markets_list,
+            trade.profit_pct,
+            confidence=0.95,
+            strategy=trade.strategy
+        )
+        quality_score = calculate_quality_score(
+            trade.profit_pct,
+            confidence=0.95,
+            liquidity_score=liquidity_score,
+            risk_score=risk_score,
+            spread_pct=trade.payout - trade.cost
+        )
+        legs = ", ".join(f"{leg.outcome} {leg.market.question} @ {leg.price:.4f}" for leg in trade.legs)
+        
+        return CombinatorialOpportunity(
+            markets=markets_list,
+            strategy=trade.strategy,
+            total_probability=trade.cost,
+            expected_profit_pct=trade.profit_pct,
+            confidence=0.95,  # Alta confiança - arbitragem matemática
+            explanation=f"{trade.explanation}. Comprar: {legs}",
+            risk_score=risk_score,
+            liquidity_score=liquidity_score,
+            quality_score=quality_score,
+            risk_level=get_risk_level(risk_score)
+        )
     
     def find_all_opportunities(
         self,
@@ -274,6 +363,10 @@ class CombinatorialArbitrage:
         related_opps = self.find_related_arbitrage(markets)
         opportunities.extend(related_opps)
         
+        # 3. Escadas de strikes (monotonicidade e butterfly)
+        ladder_opps = self.find_ladder_opportunities(markets)
+        opportunities.extend(ladder_opps)
+        
         print(f"[Combinatorial] Total: {len(opportunities)} oportunidades\n")
         
         return opportunities
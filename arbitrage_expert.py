@@ -20,11 +20,14 @@ Data: 09/12/2025
 from typing import List, Tuple, Optional, Dict, Set
 from dataclasses import dataclass, field
 from exchanges.base import Market
-from config import EXCHANGE_FEES
+from config import EXCHANGE_FEES, TOP_K
 from datetime import datetime, timedelta
 import re
 from collections import defaultdict
-import hashlib
+from lp_solver import solve_mutex_groups
+from constraint_graph import ConstraintGraph, Violation
+from opportunity_lifecycle import opportunity_id
+from topk import TopK
 
 
 @dataclass
@@ -79,11 +82,12 @@ class ArbitrageExpert:
     - Validação de equivalência entre mercados
     """
     
-    def __init__(self):
+    def __init__(self, top_k: Optional[int] = TOP_K):
         # Configurações
         self.min_profit_pct = 0.01  # 1% mínimo após taxas
         self.min_liquidity = 50     # $50 mínimo
         self.max_risk_score = 0.7   # Máximo risco aceitável
+        self.top_k = top_k          # Só as K melhores por quality_score (None/0 = todas)
         
         # Cache para evitar duplicatas
         self._seen_opportunities: Set[str] = set()
@@ -93,14 +97,14 @@ class ArbitrageExpert:
         
         # Aliases de candidatos/entidades
         self._entity_aliases = self._build_entity_aliases()
+        
+        # Grafo de implicações (candidato -> partido, limiares, estado -> nacional)
+        self.constraints = ConstraintGraph()
     
     def _build_logical_relations(self) -> Dict:
         """Constrói base de conhecimento de relações lógicas"""
+        # Partido -> candidatos fica em constraint_graph.CANDIDATE_PARTIES
         return {
-            # Partido -> Candidatos (2024 US Election)
-            "democratic": ["biden", "harris", "newsom", "whitmer", "buttigieg"],
-            "republican": ["trump", "desantis", "haley", "ramaswamy", "pence"],
-            
             # Hierarquias lógicas
             "president": ["vice_president", "cabinet"],
             "federal": ["state", "local"],
@@ -121,11 +125,8 @@ class ArbitrageExpert:
         }
     
     def _generate_opportunity_id(self, markets: List[Market], strategy: str) -> str:
-        """Gera ID único para oportunidade (evita duplicatas)"""
-        # Ordena market_ids para consistência
-        market_ids = sorted([m.market_id for m in markets])
-        key = f"{strategy}:{':'.join(market_ids)}"
-        return hashlib.md5(key.encode()).hexdigest()[:12]
+        """Gera ID único e estável entre ciclos (evita duplicatas; base do ciclo de vida)"""
+        return opportunity_id(markets, strategy)
     
     def _calculate_fees(self, markets: List[Market]) -> float:
         """Calcula taxas totais para uma operação"""
@@ -517,8 +518,12 @@ class ArbitrageExpert:
         """
         opportunities = []
         
+        # Grafo atualizado uma vez; uma passada topológica serve às checagens 1 e 3
+        self.constraints.update(markets)
+        violations = self.constraints.violations()
+        
         # 1. Verifica inconsistências partido-candidato
-        party_candidate_opps = self._find_party_candidate_inconsistencies(markets)
+        party_candidate_opps = self._find_party_candidate_inconsistencies(violations)
         opportunities.extend(party_candidate_opps)
         
         # 2. Verifica mercados mutuamente exclusivos
@@ -526,7 +531,7 @@ class ArbitrageExpert:
         opportunities.extend(mutex_opps)
         
         # 3. Verifica hierarquias lógicas
-        hierarchy_opps = self._find_hierarchy_inconsistencies(markets)
+        hierarchy_opps = self._find_hierarchy_inconsistencies(violations)
         opportunities.extend(hierarchy_opps)
         
         # Remove duplicatas
@@ -540,7 +545,7 @@ class ArbitrageExpert:
     
     def _find_party_candidate_inconsistencies(
         self,
-        markets: List[Market]
+        violations: List[Violation]
     ) -> List[ArbitrageOpportunityV2]:
         """
         Encontra inconsistências entre probabilidades de partido e candidato
@@ -549,36 +554,16 @@ class ArbitrageExpert:
         """
         opportunities = []
         
-        # Encontra mercados de eleição
-        election_markets = [m for m in markets if self._is_election_market(m)]
-        
-        # Agrupa por eleição (ano + cargo)
-        election_groups = self._group_by_election(election_markets)
-        
-        for election_key, group in election_groups.items():
-            # Separa mercados de partido e candidato
-            party_markets = [m for m in group if self._is_party_market(m)]
-            candidate_markets = [m for m in group if self._is_candidate_market(m)]
-            
-            for candidate_market in candidate_markets:
-                candidate_name = self._extract_candidate(candidate_market.question)
-                candidate_party = self._get_candidate_party(candidate_name)
-                
-                if not candidate_party:
-                    continue
-                
-                # Encontra mercado do partido correspondente
-                for party_market in party_markets:
-                    if candidate_party.lower() in party_market.question.lower():
-                        # Verifica inconsistência
-                        if candidate_market.price > party_market.price:
-                            opp = self._create_logical_inconsistency_opp(
-                                candidate_market, 
-                                party_market,
-                                f"P({candidate_name} vence) > P({candidate_party} vence)"
-                            )
-                            if opp:
-                                opportunities.append(opp)
+        for violation in violations:
+            if violation.kinds != ("candidate_party",):
+                continue
+            opp = self._create_logical_inconsistency_opp(
+                violation.antecedent,
+                violation.consequent,
+                f"P({violation.antecedent.question}) > P({violation.consequent.question})"
+            )
+            if opp:
+                opportunities.append(opp)
         
         return opportunities
     
@@ -589,160 +574,112 @@ class ArbitrageExpert:
         """
         Encontra arbitragem em mercados mutuamente exclusivos
         
-        Regra: Σ P(outcomes) = 1.0 para eventos mutuamente exclusivos
+        Regra: Σ P(outcomes) = 1.0 para eventos mutuamente exclusivos. Em vez
+        de só olhar a soma dos preços, cada conjunto (em uma ou mais
+        exchanges) vira um LP com taxas e teto de liquidez por perna, e o
+        portfólio de lucro garantido é resolvido para todos os grupos de uma
+        vez (lp_solver).
         """
         opportunities = []
         
-        # Agrupa mercados pelo mesmo evento base
-        event_groups = self._group_by_base_event(markets)
+        # Conjuntos mutex: pergunta base comum, pelo menos 3 outcomes
+        groups = [
+            legs for legs in self._group_mutex_sets(markets).values()
+            if len({outcome for outcome, _ in legs}) >= 3
+        ]
         
-        for event_key, group in event_groups.items():
-            if len(group) < 3:  # Precisa de pelo menos 3 outcomes
+        for legs, portfolio in zip(groups, solve_mutex_groups(groups)):
+            if portfolio is None or portfolio.profit_pct <= self.min_profit_pct:
                 continue
             
-            # Soma probabilidades
-            total_prob = sum(m.price for m in group if m.price)
+            traded = list({id(p.market): p.market for p in portfolio.positions}.values())
+            strategy = portfolio.strategy
+            opp_id = self._generate_opportunity_id(traded, strategy)
+            if opp_id in self._seen_opportunities:
+                continue
             
-            if total_prob > 1.05:  # >5% acima de 1.0
-                # Arbitragem de venda
-                fees = self._calculate_fees(group)
-                net_profit_pct = (total_prob - 1.0) / total_prob - fees
-                
-                if net_profit_pct > self.min_profit_pct:
-                    opp_id = self._generate_opportunity_id(group, "mutex_sell")
-                    
-                    if opp_id not in self._seen_opportunities:
-                        opportunities.append(ArbitrageOpportunityV2(
-                            id=opp_id,
-                            type="combinatorial",
-                            strategy="mutex_sell",
-                            markets=group,
-                            gross_profit_pct=(total_prob - 1.0) / total_prob,
-                            net_profit_pct=net_profit_pct,
-                            total_investment=1.0,
-                            expected_return=total_prob,
-                            risk_score=0.5,
-                            confidence=0.85,
-                            liquidity_score=self._calculate_liquidity_score(group),
-                            explanation=f"Vender todos os {len(group)} outcomes: Σ = {total_prob:.3f} > 1.0",
-                            execution_steps=[f"Vender {m.outcome} por ${m.price:.3f}" for m in group],
-                            warnings=["⚠️ Requer margem para venda"]
-                        ))
+            exchanges = sorted({m.exchange for m in traded})
+            warnings = []
+            if len(exchanges) > 1:
+                warnings.append(f"⚠️ Conjunto em {len(exchanges)} exchanges: regras de resolução podem diferir")
             
-            elif total_prob < 0.95:  # <5% abaixo de 1.0
-                # Arbitragem de compra
-                fees = self._calculate_fees(group)
-                net_profit_pct = (1.0 - total_prob) / total_prob - fees
-                
-                if net_profit_pct > self.min_profit_pct:
-                    opp_id = self._generate_opportunity_id(group, "mutex_buy")
-                    
-                    if opp_id not in self._seen_opportunities:
-                        opportunities.append(ArbitrageOpportunityV2(
-                            id=opp_id,
-                            type="combinatorial",
-                            strategy="mutex_buy",
-                            markets=group,
-                            gross_profit_pct=(1.0 - total_prob) / total_prob,
-                            net_profit_pct=net_profit_pct,
-                            total_investment=total_prob,
-                            expected_return=1.0,
-                            risk_score=0.3,
-                            confidence=0.90,
-                            liquidity_score=self._calculate_liquidity_score(group),
-                            explanation=f"Comprar todos os {len(group)} outcomes: Σ = {total_prob:.3f} < 1.0",
-                            execution_steps=[f"Comprar {m.outcome} por ${m.price:.3f}" for m in group],
-                            warnings=[]
-                        ))
+            steps = []
+            for position in portfolio.positions:
+                outcome = position.market.outcome
+                if position.side == "buy":
+                    steps.append(f"Comprar {position.contracts:.1f} {outcome} em {position.market.exchange} por ${position.price:.3f}")
+                else:
+                    steps.append(f"Vender {position.contracts:.1f} {outcome} em {position.market.exchange} "
+                                 f"(comprar NO por ${position.price:.3f})")
+            
+            opportunities.append(ArbitrageOpportunityV2(
+                id=opp_id,
+                type="combinatorial",
+                strategy=strategy,
+                markets=traded,
+                gross_profit_pct=(portfolio.profit + portfolio.fees) / portfolio.cost,
+                net_profit_pct=portfolio.profit_pct,
+                total_investment=portfolio.cost,
+                expected_return=portfolio.guaranteed_payout,
+                risk_score=0.3 if len(exchanges) == 1 else 0.45,
+                confidence=0.90 if strategy == "mutex_buy" else 0.85,
+                liquidity_score=self._calculate_liquidity_score(traded),
+                explanation=(
+                    f"Portfólio em {len(portfolio.outcomes)} outcomes ({', '.join(exchanges)}): "
+                    f"paga no mínimo ${portfolio.guaranteed_payout:.2f} com custo de ${portfolio.cost:.2f}"
+                ),
+                execution_steps=steps,
+                warnings=warnings
+            ))
         
         return opportunities
     
     def _find_hierarchy_inconsistencies(
         self,
-        markets: List[Market]
+        violations: List[Violation]
     ) -> List[ArbitrageOpportunityV2]:
         """
         Encontra inconsistências em hierarquias lógicas
         
-        Exemplo: P(evento específico) > P(evento geral que o contém)
+        Exemplo: P(BTC acima de 120k) > P(BTC acima de 100k), ou
+        P(casos no Texas > N) > P(casos nos EUA > N). Inclui cadeias (A -> C -> B).
         """
-        # Implementação simplificada - expandir conforme necessário
-        return []
+        opportunities = []
+        
+        for violation in violations:
+            if violation.kinds == ("candidate_party",):
+                continue
+            opp = self._create_logical_inconsistency_opp(
+                violation.antecedent,
+                violation.consequent,
+                f"P({violation.antecedent.question}) > P({violation.consequent.question}) "
+                f"({' -> '.join(violation.kinds)})"
+            )
+            if opp:
+                opportunities.append(opp)
+        
+        return opportunities
     
     # =========================================================================
     # HELPERS
     # =========================================================================
     
-    def _is_election_market(self, market: Market) -> bool:
-        """Verifica se é mercado de eleição"""
-        keywords = ["election", "win", "president", "senate", "governor", "house"]
-        return any(kw in market.question.lower() for kw in keywords)
-    
-    def _is_party_market(self, market: Market) -> bool:
-        """Verifica se é mercado de partido"""
-        return any(party in market.question.lower() for party in ["democratic", "republican", "democrat", "gop"])
-    
-    def _is_candidate_market(self, market: Market) -> bool:
-        """Verifica se menciona candidato específico"""
-        candidates = ["biden", "trump", "harris", "desantis", "haley", "newsom"]
-        return any(c in market.question.lower() for c in candidates)
-    
-    def _extract_candidate(self, question: str) -> str:
-        """Extrai nome do candidato da pergunta"""
-        candidates = ["biden", "trump", "harris", "desantis", "haley", "newsom"]
-        for c in candidates:
-            if c in question.lower():
-                return c.title()
-        return ""
-    
-    def _get_candidate_party(self, candidate: str) -> Optional[str]:
-        """Retorna partido do candidato"""
-        democrat_candidates = ["biden", "harris", "newsom", "whitmer"]
-        republican_candidates = ["trump", "desantis", "haley", "ramaswamy"]
-        
-        c = candidate.lower()
-        if c in democrat_candidates:
-            return "Democratic"
-        elif c in republican_candidates:
-            return "Republican"
-        return None
-    
-    def _group_by_election(self, markets: List[Market]) -> Dict[str, List[Market]]:
-        """Agrupa mercados por eleição (ano + cargo)"""
-        groups = defaultdict(list)
-        
-        for market in markets:
-            # Extrai ano
-            years = re.findall(r'\b(202[4-9]|203[0-9])\b', market.question)
-            year = years[0] if years else "unknown"
-            
-            # Extrai cargo
-            position = "president"
-            if "senate" in market.question.lower():
-                position = "senate"
-            elif "house" in market.question.lower():
-                position = "house"
-            elif "governor" in market.question.lower():
-                position = "governor"
-            
-            key = f"{year}_{position}"
-            groups[key].append(market)
+    def _group_mutex_sets(self, markets: List[Market]) -> Dict[str, List[Tuple[str, Market]]]:
+        """
+        Agrupa (outcome, mercado) pelo evento base, sem separar por exchange
         
-        return groups
-    
-    def _group_by_base_event(self, markets: List[Market]) -> Dict[str, List[Market]]:
-        """Agrupa mercados pelo evento base"""
+        O outcome de cada cotação é o rótulo normalizado, para que o mesmo
+        candidato cotado em duas exchanges seja o mesmo outcome do conjunto.
+        """
         groups = defaultdict(list)
         
         for market in markets:
-            # Usa exchange + pergunta principal (sem outcome específico)
+            # Pergunta principal (sem outcome específico)
             question = market.question.lower()
-            # Remove outcomes comuns
             for outcome in ["yes", "no", "above", "below", "over", "under"]:
                 question = question.replace(outcome, "")
             
-            key = f"{market.exchange}:{question.strip()[:50]}"
-            groups[key].append(market)
+            groups[question.strip()[:50]].append((market.outcome.lower().strip(), market))
         
         return groups
     
@@ -826,7 +763,7 @@ class ArbitrageExpert:
         """
         Encontra todas as oportunidades de arbitragem
         
-        Retorna lista ordenada por quality_score
+        Retorna lista ordenada por quality_score (as `top_k` melhores, se definido)
         """
         self._seen_opportunities.clear()  # Reset cache
         
@@ -848,11 +785,10 @@ class ArbitrageExpert:
         all_opportunities.extend(combinatorial)
         print(f"[Expert] Combinatorial: {len(combinatorial)} oportunidades")
         
-        # Ordena por quality_score
-        all_opportunities.sort(key=lambda x: x.quality_score, reverse=True)
-        
-        # Filtra por risco máximo
-        filtered = [o for o in all_opportunities if o.risk_score <= self.max_risk_score]
+        # Filtra por risco máximo e ordena por quality_score (heap limitado com top_k)
+        filtered = TopK(self.top_k, key="quality_score").extend(
+            o for o in all_opportunities if o.risk_score <= self.max_risk_score
+        ).items()
         
         print(f"[Expert] TOTAL: {len(filtered)} oportunidades válidas (de {len(all_opportunities)} encontradas)")
         
@@ -12,8 +12,9 @@ Exemplo:
 from typing import List, Optional, Tuple
 from exchanges.base import Market
 from dataclasses import dataclass, field
-from config import MIN_ARBITRAGE_PROFIT, MIN_LIQUIDITY, EXCHANGE_FEES, GAS_FEES
+from config import MIN_ARBITRAGE_PROFIT, MIN_LIQUIDITY
 from matcher_improved import ImprovedEventMatcher
+from pair_kernel import PairLegs, PairProfit, pair_profit_kernel
 from scoring_utils import calculate_liquidity_score, calculate_risk_score, calculate_quality_score, get_risk_level
 
 
@@ -74,34 +75,48 @@ class ProbabilityArbitrageEngine:
         Returns:
             Lista de oportunidades de arbitragem
         """
-        opportunities = []
-        
         # Encontra pares de mercados equivalentes entre exchanges diferentes
         matches = self.matcher.find_matching_events(markets)
         
         print(f"[Probability Arbitrage] Analisando {len(matches)} matches entre exchanges...")
         
-        for market1, market2 in matches:
-            # Só compara mercados de exchanges diferentes
-            if market1.exchange == market2.exchange:
-                continue
-            
-            # Calcula confiança do matching
-            confidence = self.matcher.calculate_enhanced_similarity(
-                market1.question,
-                market2.question
-            )
-            
-            # Verifica se são outcomes compatíveis
-            # Pode ser mesmo outcome (YES vs YES) ou opostos (YES vs NO)
-            opp = self._calculate_probability_arbitrage(market1, market2, confidence)
-            
-            if opp:
-                opportunities.append(opp)
+        # Só compara mercados de exchanges diferentes
+        pairs = [(market1, market2) for market1, market2 in matches if market1.exchange != market2.exchange]
+        opportunities = self._evaluate_pairs(pairs)
         
         print(f"[Probability Arbitrage] {len(opportunities)} oportunidades encontradas")
         return opportunities
     
+    def _evaluate_pairs(
+        self,
+        pairs: List[Tuple[Market, Market]],
+        confidences: Optional[List[float]] = None
+    ) -> List[ProbabilityArbitrageOpportunity]:
+        """
+        Roda o kernel vetorizado sobre todos os pares e monta só os aprovados
+        
+        A confiança do matching (cara) só é calculada para os sobreviventes
+        quando não é informada.
+        """
+        if not pairs:
+            return []
+        result = pair_profit_kernel(
+            PairLegs.from_pairs(pairs),
+            min_profit=self.min_profit,
+            min_spread=self.min_spread,
+            min_liquidity=self.min_liquidity
+        )
+        
+        opportunities = []
+        for i in result.survivors():
+            market1, market2 = pairs[i]
+            if confidences is not None:
+                confidence = confidences[i]
+            else:
+                confidence = self.matcher.calculate_enhanced_similarity(market1.question, market2.question)
+            opportunities.append(self._build_opportunity(market1, market2, result, i, confidence))
+        return opportunities
+    
     def _calculate_probability_arbitrage(
         self,
         market1: Market,
@@ -115,68 +130,26 @@ class ProbabilityArbitrageEngine:
         1. Mesmo outcome (YES vs YES): Compara probabilidades diretamente
         2. Outcomes opostos (YES vs NO): Compara YES com (1 - NO)
         """
-        
-        # Verifica liquidez mínima
-        if market1.liquidity < self.min_liquidity or market2.liquidity < self.min_liquidity:
-            return None
-        
-        # Normaliza probabilidades para o mesmo outcome
-        prob1 = market1.price
-        prob2 = market2.price
-        
-        # Se outcomes são opostos, ajusta
-        if market1.outcome != market2.outcome:
-            # Se um é YES e outro NO, compara YES com (1 - NO)
-            if market1.outcome.upper() == "YES":
-                prob2 = 1.0 - prob2  # Converte NO para YES
-            else:
-                prob1 = 1.0 - prob1  # Converte NO para YES
-        
-        # Calcula spread
-        spread = abs(prob1 - prob2)
-        spread_pct = spread
-        
-        # Se spread é muito pequeno, não há oportunidade
-        if spread_pct < self.min_spread:
-            return None
-        
-        # Identifica qual tem probabilidade menor (comprar) e maior (vender)
-        if prob1 < prob2:
-            market_low = market1
-            market_high = market2
-            prob_low = prob1
-            prob_high = prob2
-        else:
-            market_low = market2
-            market_high = market1
-            prob_low = prob2
-            prob_high = prob1
-        
-        # Calcula lucro bruto
-        # Estratégia: Comprar no mercado com menor probabilidade, vender no maior
-        investment = 100.0  # Assume $100 de investimento
-        
-        # Compra no mercado com menor probabilidade
-        shares_buy = investment / prob_low
-        
-        # Vende no mercado com maior probabilidade
-        revenue = shares_buy * prob_high
-        
-        # Calcula taxas
-        fee_buy = EXCHANGE_FEES.get(market_low.exchange.lower(), 0.05)
-        fee_sell = EXCHANGE_FEES.get(market_high.exchange.lower(), 0.05)
-        
-        # Taxas de gas (se aplicável)
-        gas_buy = GAS_FEES.get(market_low.exchange.lower(), 0)
-        gas_sell = GAS_FEES.get(market_high.exchange.lower(), 0)
-        
-        fees = (investment * fee_buy) + (revenue * fee_sell) + (gas_buy + gas_sell) * 3000
-        net_profit = revenue - investment - fees
-        profit_pct = net_profit / investment
-        
-        # Verifica se o lucro é suficiente
-        if profit_pct < self.min_profit:
-            return None
+        opportunities = self._evaluate_pairs([(market1, market2)], [confidence])
+        return opportunities[0] if opportunities else None
+    
+    def _build_opportunity(
+        self,
+        market1: Market,
+        market2: Market,
+        result: PairProfit,
+        i: int,
+        confidence: float
+    ) -> ProbabilityArbitrageOpportunity:
+        """Materializa a oportunidade do par `i` aprovado pelo kernel"""
+        # Comprar no mercado com menor probabilidade, vender no maior
+        market_low, market_high = (market1, market2) if result.low_is_a[i] else (market2, market1)
+        prob_low = float(result.prob_low[i])
+        prob_high = float(result.prob_high[i])
+        spread_pct = float(result.spread[i])
+        profit_pct = float(result.profit_pct[i])
+        fees = float(result.fees[i])
+        net_profit = float(result.net_profit[i])
         
         # Calcula scores usando funções melhoradas
         markets_list = [market_low, market_high]
@@ -14,12 +14,17 @@ Estratégia:
 - Prioriza mercados com alta liquidez para execução rápida
 """
 from typing import List, Optional, Tuple, Dict
+import numpy as np
 from exchanges.base import Market
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from config import MIN_ARBITRAGE_PROFIT, MIN_LIQUIDITY, EXCHANGE_FEES, GAS_FEES
+from config import MIN_ARBITRAGE_PROFIT, MIN_LIQUIDITY, VOLATILITY_SCALE, TOP_K
 from matcher_improved import ImprovedEventMatcher
+from market_frame import MarketFrame
+from pair_kernel import PairLegs, PairProfit, pair_profit_kernel
+from price_history import PriceHistory, market_key
 from scoring_utils import calculate_liquidity_score, calculate_risk_score, calculate_quality_score, get_risk_level
+from topk import top_k
 
 
 @dataclass
@@ -69,28 +74,34 @@ class ShortTermArbitrageEngine:
     - Alta liquidez para execução rápida
     """
     
-    def __init__(self, matcher: ImprovedEventMatcher):
+    def __init__(self, matcher: ImprovedEventMatcher, history: Optional[PriceHistory] = None,
+                 top_k: Optional[int] = TOP_K):
         self.matcher = matcher
+        self.history = history  # Histórico de preços para volatilidade medida
         self.min_profit = MIN_ARBITRAGE_PROFIT
         self.min_liquidity = MIN_LIQUIDITY * 2  # Maior liquidez para trades rápidos
         self.min_spread = 0.03  # Spread mínimo de 3% para considerar
         self.max_expiry_hours = 48  # Máximo 48h até expiração (foco em curto prazo)
         self.min_expiry_hours = 1  # Mínimo 1h (evita mercados que expiram muito em breve)
+        self.top_k = top_k  # Só as K melhores (heap limitado); None/0 = todas
     
-    def find_opportunities(self, markets: List[Market]) -> List[ShortTermArbitrageOpportunity]:
+    def find_opportunities(
+        self,
+        markets: List[Market],
+        frame: Optional[MarketFrame] = None
+    ) -> List[ShortTermArbitrageOpportunity]:
         """
         Encontra oportunidades de arbitragem de curto prazo
         
         Args:
             markets: Lista de todos os mercados de todas as exchanges
+            frame: Snapshot colunar dos mesmos mercados (montado se omitido)
             
         Returns:
             Lista de oportunidades de curto prazo
         """
-        opportunities = []
-        
         # Filtra mercados com expiração próxima (curto prazo)
-        short_term_markets = self._filter_short_term_markets(markets)
+        short_term_markets = self._filter_short_term_markets(markets, frame)
         
         print(f"[Short-Term Arbitrage] Analisando {len(short_term_markets)} mercados de curto prazo...")
         
@@ -99,76 +110,74 @@ class ShortTermArbitrageEngine:
         
         print(f"[Short-Term Arbitrage] {len(matches)} matches encontrados...")
         
-        for market1, market2 in matches:
-            # Só compara mercados de exchanges diferentes
-            if market1.exchange == market2.exchange:
-                continue
-            
-            # Calcula confiança do matching
-            confidence = self.matcher.calculate_enhanced_similarity(
-                market1.question,
-                market2.question
-            )
-            
-            # Verifica se são outcomes compatíveis e se há oportunidade
-            opp = self._calculate_short_term_arbitrage(market1, market2, confidence)
-            
-            if opp:
-                opportunities.append(opp)
-        
-        # Ordena por lucro e velocidade de execução
-        opportunities.sort(key=lambda x: (x.profit_pct, -x.time_to_expiry_hours), reverse=True)
+        # Só compara mercados de exchanges diferentes
+        pairs = [(market1, market2) for market1, market2 in matches if market1.exchange != market2.exchange]
+        opportunities = self._evaluate_pairs(pairs)
         
         print(f"[Short-Term Arbitrage] {len(opportunities)} oportunidades de curto prazo encontradas")
+        
+        # Ordena por lucro e velocidade de execução (com top_k, só as K melhores)
+        opportunities = top_k(opportunities, self.top_k, key=lambda x: (x.profit_pct, -x.time_to_expiry_hours))
         return opportunities
     
-    def _filter_short_term_markets(self, markets: List[Market]) -> List[Market]:
-        """Filtra mercados com expiração em curto prazo (1-48h)"""
-        now = datetime.now()
-        
-        filtered = []
-        for market in markets:
-            if not market.expires_at:
-                continue
-            
-            # Garante timezone-aware
-            expiry = market.expires_at
-            if expiry.tzinfo is None and now.tzinfo:
-                expiry = expiry.replace(tzinfo=now.tzinfo)
-            elif expiry.tzinfo and now.tzinfo is None:
-                now = now.replace(tzinfo=expiry.tzinfo)
-            
-            hours_to_expiry = (expiry - now).total_seconds() / 3600
-            
-            # Filtra por janela de tempo
-            if self.min_expiry_hours <= hours_to_expiry <= self.max_expiry_hours:
-                # Prioriza alta liquidez
-                if market.liquidity >= self.min_liquidity:
-                    filtered.append(market)
+    def _filter_short_term_markets(self, markets: List[Market], frame: Optional[MarketFrame] = None) -> List[Market]:
+        """Filtra mercados com expiração em curto prazo (1-48h) e alta liquidez"""
+        if frame is None or len(frame) != len(markets):
+            frame = MarketFrame(markets)
+        
+        # Janela de tempo e liquidez em uma passada vetorizada (sem expiração = NaN, fica fora)
+        mask = frame.expiring_between(self.min_expiry_hours, self.max_expiry_hours)
+        mask &= frame.liquidity >= self.min_liquidity
+        return frame.select(mask)
+    
+    def _volatility_score(self, market_low: Market, market_high: Market, spread_pct: float) -> float:
+        """
+        Score 0-1 pela maior volatilidade medida entre os dois mercados
         
-        return filtered
+        Sem histórico suficiente (primeiros ciclos), estima pelo spread.
+        """
+        if self.history is not None:
+            volatility = self.history.volatility([market_key(market_low), market_key(market_high)])
+            measured = volatility[~np.isnan(volatility)]
+            if len(measured):
+                return min(float(measured.max()) / VOLATILITY_SCALE, 1.0)
+        return min(spread_pct * 2, 1.0)  # Spread maior = mais volatilidade
     
-    def _calculate_short_term_arbitrage(
+    def _evaluate_pairs(
         self,
-        market1: Market,
-        market2: Market,
-        confidence: float
-    ) -> Optional[ShortTermArbitrageOpportunity]:
+        pairs: List[Tuple[Market, Market]],
+        confidences: Optional[List[float]] = None
+    ) -> List[ShortTermArbitrageOpportunity]:
         """
-        Calcula oportunidade de arbitragem de curto prazo
+        Roda o kernel vetorizado sobre todos os pares e monta só os aprovados
         
-        Considera:
-        - Spread de probabilidade
-        - Tempo até expiração
-        - Liquidez (para execução rápida)
-        - Volatilidade estimada
+        Expiração e confiança do matching só são calculadas para os
+        sobreviventes de liquidez, spread e lucro.
         """
+        if not pairs:
+            return []
+        result = pair_profit_kernel(
+            PairLegs.from_pairs(pairs),
+            min_profit=self.min_profit,
+            min_spread=self.min_spread,
+            min_liquidity=self.min_liquidity
+        )
         
-        # Verifica liquidez mínima (maior para trades rápidos)
-        if market1.liquidity < self.min_liquidity or market2.liquidity < self.min_liquidity:
-            return None
-        
-        # Verifica tempo até expiração
+        opportunities = []
+        for i in result.survivors():
+            market1, market2 = pairs[i]
+            time_to_expiry_hours = self._hours_to_expiry(market1, market2)
+            if time_to_expiry_hours is None:
+                continue
+            if confidences is not None:
+                confidence = confidences[i]
+            else:
+                confidence = self.matcher.calculate_enhanced_similarity(market1.question, market2.question)
+            opportunities.append(self._build_opportunity(market1, market2, result, i, confidence, time_to_expiry_hours))
+        return opportunities
+    
+    def _hours_to_expiry(self, market1: Market, market2: Market) -> Optional[float]:
+        """Menor tempo até expiração do par (None fora da janela de curto prazo)"""
         now = datetime.now()
         
         expiry1 = market1.expires_at
@@ -195,62 +204,44 @@ class ShortTermArbitrageEngine:
         # Verifica se está na janela de tempo
         if not (self.min_expiry_hours <= time_to_expiry_hours <= self.max_expiry_hours):
             return None
+        return time_to_expiry_hours
+    
+    def _calculate_short_term_arbitrage(
+        self,
+        market1: Market,
+        market2: Market,
+        confidence: float
+    ) -> Optional[ShortTermArbitrageOpportunity]:
+        """
+        Calcula oportunidade de arbitragem de curto prazo
         
-        # Normaliza probabilidades para o mesmo outcome
-        prob1 = market1.price
-        prob2 = market2.price
-        
-        # Se outcomes são opostos, ajusta
-        if market1.outcome != market2.outcome:
-            if market1.outcome.upper() == "YES":
-                prob2 = 1.0 - prob2
-            else:
-                prob1 = 1.0 - prob1
-        
-        # Calcula spread
-        spread = abs(prob1 - prob2)
-        spread_pct = spread
-        
-        # Se spread é muito pequeno, não há oportunidade
-        if spread_pct < self.min_spread:
-            return None
-        
-        # Identifica qual tem probabilidade menor (comprar) e maior (vender)
-        if prob1 < prob2:
-            market_low = market1
-            market_high = market2
-            prob_low = prob1
-            prob_high = prob2
-        else:
-            market_low = market2
-            market_high = market1
-            prob_low = prob2
-            prob_high = prob1
-        
-        # Calcula lucro bruto
-        investment = 100.0  # Assume $100 de investimento
-        
-        # Compra no mercado com menor probabilidade
-        shares_buy = investment / prob_low
-        
-        # Vende no mercado com maior probabilidade
-        revenue = shares_buy * prob_high
-        
-        # Calcula taxas
-        fee_buy = EXCHANGE_FEES.get(market_low.exchange.lower(), 0.05)
-        fee_sell = EXCHANGE_FEES.get(market_high.exchange.lower(), 0.05)
-        
-        # Taxas de gas (se aplicável)
-        gas_buy = GAS_FEES.get(market_low.exchange.lower(), 0)
-        gas_sell = GAS_FEES.get(market_high.exchange.lower(), 0)
-        
-        fees = (investment * fee_buy) + (revenue * fee_sell) + (gas_buy + gas_sell) * 3000
-        net_profit = revenue - investment - fees
-        profit_pct = net_profit / investment
-        
-        # Verifica se o lucro é suficiente
-        if profit_pct < self.min_profit:
-            return None
+        Considera:
+        - Spread de probabilidade
+        - Tempo até expiração
+        - Liquidez (para execução rápida)
+        - Volatilidade estimada
+        """
+        opportunities = self._evaluate_pairs([(market1, market2)], [confidence])
+        return opportunities[0] if opportunities else None
+    
+    def _build_opportunity(
+        self,
+        market1: Market,
+        market2: Market,
+        result: PairProfit,
+        i: int,
+        confidence: float,
+        time_to_expiry_hours: float
+    ) -> ShortTermArbitrageOpportunity:
+        """Materializa a oportunidade do par `i` aprovado pelo kernel"""
+        # Comprar no mercado com menor probabilidade, vender no maior
+        market_low, market_high = (market1, market2) if result.low_is_a[i] else (market2, market1)
+        prob_low = float(result.prob_low[i])
+        prob_high = float(result.prob_high[i])
+        spread_pct = float(result.spread[i])
+        profit_pct = float(result.profit_pct[i])
+        fees = float(result.fees[i])
+        net_profit = float(result.net_profit[i])
         
         # Calcula scores usando funções melhoradas
         markets_list = [market_low, market_high]
@@ -263,9 +254,9 @@ class ShortTermArbitrageEngine:
             time_to_expiry_hours=time_to_expiry_hours
         )
         
-        # Calcula score de volatilidade (baseado em spread e liquidez)
+        # Calcula score de volatilidade (medida no histórico quando houver)
         avg_liquidity = (market_low.liquidity + market_high.liquidity) / 2
-        volatility_score = min(spread_pct * 2, 1.0)  # Spread maior = mais volatilidade
+        volatility_score = self._volatility_score(market_low, market_high, spread_pct)
         
         # Calcula quality_score
         quality_score = calculate_quality_score(
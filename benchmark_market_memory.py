@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memória e velocidade de Market (slots + strings internadas)
+
+Compara a classe atual com a dataclass anterior (com __dict__ por instância)
+num universo no formato da Kalshi: dois Markets (YES e NO) por contrato, com
+pergunta, URL e expiração repetidas. As strings são geradas via JSON, como
+nos adapters, para que cada instância receba cópias próprias.
+
+Uso:
+    python benchmark_market_memory.py --contracts 10000
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from exchanges.base import Market, FrozenMarket
+
+
+@dataclass
+class LegacyMarket:
+    """Market como era antes (dataclass comum, hash calculado a cada chamada)"""
+    exchange: str
+    market_id: str
+    question: str
+    outcome: str
+    price: float
+    volume_24h: float
+    liquidity: float
+    expires_at: Optional[datetime]
+    url: Optional[str] = None
+
+    def __hash__(self):
+        return hash((self.exchange, self.market_id, self.outcome))
+
+    def __eq__(self, other):
+        if not isinstance(other, LegacyMarket):
+            return False
+        return (self.exchange == other.exchange and
+                self.market_id == other.market_id and
+                self.outcome == other.outcome)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de memória de Market")
+    parser.add_argument("--contracts", type=int, default=10000, help="Contratos (2 Markets cada)")
+    parser.add_argument("--lookups", type=int, default=5, help="Passadas de set/dict por classe")
+    return parser.parse_args()
+
+
+def _payload(contracts: int) -> str:
+    expires = datetime(2026, 12, 31)
+    return json.dumps([{
+        "ticker": f"KXEVENT-{i:06d}",
+        "title": f"Will event number {i} happen before the end of the year? - Above {i % 97}%",
+        "url": f"https://kalshi.com/markets/kxevent/kxevent-{i:06d}",
+        "close_time": (expires + timedelta(hours=i % 48)).isoformat(),
+        "yes": 0.01 + (i % 98) / 100.0,
+    } for i in range(contracts)])
+
+
+def build(cls, payload: str) -> list:
+    """Cria YES e NO por contrato como o adapter da Kalshi"""
+    markets = []
+    for item in json.loads(payload):
+        for outcome, price in (("YES", item["yes"]), ("NO", 1.0 - item["yes"])):
+            # Cada campo lido de novo do JSON: strings não compartilhadas entre YES e NO
+            markets.append(cls(
+                exchange="".join(["kal", "shi"]),
+                market_id=f"{item['ticker']}_{outcome}",
+                question=f"{item['title']}",
+                outcome="".join(outcome),
+                price=price,
+                volume_24h=1000.0,
+                liquidity=5000.0,
+                expires_at=datetime.fromisoformat(item["close_time"]),
+                url=f"{item['url']}"
+            ))
+    return markets
+
+
+CLASSES = {cls.__name__: cls for cls in (LegacyMarket, Market, FrozenMarket)}
+
+
+def measure(class_name: str, payload: str, lookups: int) -> dict:
+    cls = CLASSES[class_name]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    markets = build(cls, payload)
+    built = time.perf_counter()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Uso típico: sets/dicts de mercados (matching, deduplicação, oportunidades)
+    lookup_start = time.perf_counter()
+    for _ in range(lookups):
+        index = {m: i for i, m in enumerate(markets)}
+        assert all(m in index for m in markets)
+    lookup = time.perf_counter() - lookup_start
+
+    result = {
+        "class": cls.__name__,
+        "markets": len(markets),
+        "bytes": current,
+        "per_market": current / len(markets),
+        "build": built - start,
+        "lookup": lookup
+    }
+    del markets
+    return result
+
+
+def main():
+    args = parse_args()
+    payload = _payload(args.contracts)
+
+    # Processo novo por classe: tabela de strings internadas e alocador limpos
+    results = []
+    for class_name in CLASSES:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(measure, class_name, payload, args.lookups).result())
+    baseline = results[0]
+
+    print(f"{'Classe':<14}{'Mercados':>10}{'MB':>10}{'B/mercado':>12}{'Criação':>10}{'Lookups':>10}")
+    for r in results:
+        print(f"{r['class']:<14}{r['markets']:>10}{r['bytes'] / 1e6:>10.2f}{r['per_market']:>12.0f}"
+              f"{r['build']:>9.2f}s{r['lookup']:>9.2f}s")
+    for r in results[1:]:
+        print(f"{r['class']}: {100 * (1 - r['bytes'] / baseline['bytes']):.0f}% menos memória, "
+              f"lookups {baseline['lookup'] / r['lookup']:.1f}x mais rápidos que {baseline['class']}")
+
+
+if __name__ == "__main__":
+    main()
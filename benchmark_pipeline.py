@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark reprodutível do pipeline fetch -> parse -> match -> score
+
+Uso:
+    python benchmark_pipeline.py --mode record           # grava fixtures com rede
+    python benchmark_pipeline.py --mode replay --runs 5  # roda offline com as fixtures
+    python benchmark_pipeline.py --mode replay --latency 1.0  # reproduz latência gravada
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline com fixtures HTTP")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--runs", type=int, default=3, help="Número de execuções (replay)")
+    parser.add_argument("--fixture-dir", default=None, help="Diretório das fixtures (padrão: HTTP_FIXTURE_DIR)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Escala da latência gravada (0 = instantâneo)")
+    return parser.parse_args()
+
+
+async def run_once(monitor) -> dict:
+    """Executa um ciclo completo e mede fetch e análise separadamente"""
+    start = time.perf_counter()
+    markets = await monitor.fetch_all_markets()
+    fetched = time.perf_counter()
+    monitor.analyze(markets)
+    done = time.perf_counter()
+    return {
+        "markets": len(markets),
+        "opportunities": len(monitor.opportunities),
+        "fetch": fetched - start,
+        "analyze": done - fetched,
+        "total": done - start
+    }
+
+
+def main():
+    args = parse_args()
+
+    # Config lê o ambiente na importação: precisa ser definido antes
+    os.environ["HTTP_FIXTURE_MODE"] = args.mode
+    os.environ["HTTP_FIXTURE_LATENCY"] = str(args.latency)
+    if args.fixture_dir:
+        os.environ["HTTP_FIXTURE_DIR"] = args.fixture_dir
+
+    from monitor import ArbitrageMonitor
+
+    runs = 1 if args.mode == "record" else args.runs
+    results = []
+    for i in range(runs):
+        # Monitor novo a cada execução para não reaproveitar caches
+        monitor = ArbitrageMonitor()
+        result = asyncio.run(run_once(monitor))
+        results.append(result)
+        print(f"Execução {i + 1}: {result['markets']} mercados, {result['opportunities']} oportunidades, "
+              f"fetch {result['fetch']:.2f}s, análise {result['analyze']:.2f}s, total {result['total']:.2f}s")
+
+    if len(results) > 1:
+        for key in ("fetch", "analyze", "total"):
+            values = [r[key] for r in results]
+            print(f"{key}: mediana {statistics.median(values):.3f}s, min {min(values):.3f}s, max {max(values):.3f}s")
+
+        if len({(r["markets"], r["opportunities"]) for r in results}) > 1:
+            print("AVISO: resultados diferentes entre execuções (replay deveria ser determinístico)")
+
+
+if __name__ == "__main__":
+    main()
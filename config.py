@@ -36,3 +36,110 @@ API_ENDPOINTS = {
     "kalshi": "https://trading-api.kalshi.com/trade-api/v2",
 }
 
+
+# Circuit breaker por exchange
+CIRCUIT_BREAKER_WINDOW = float(os.getenv("CIRCUIT_BREAKER_WINDOW", 300))  # segundos
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", 3))
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", 0.5))  # 50%
+CIRCUIT_BREAKER_CONSECUTIVE_FAILURES = int(os.getenv("CIRCUIT_BREAKER_CONSECUTIVE_FAILURES", 3))
+CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", 60))  # segundos
+CIRCUIT_BREAKER_MAX_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_MAX_COOLDOWN", 900))  # segundos
+CIRCUIT_BREAKER_SLOW_CALL = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL", 10))  # segundos
+EXCHANGE_FETCH_TIMEOUT = float(os.getenv("EXCHANGE_FETCH_TIMEOUT", 20))  # segundos por exchange (limite do ciclo)
+
+# Scheduler por exchange (cadência de polling independente, em segundos)
+# Ex: POLL_INTERVAL_KALSHI=5 para mercados de curto prazo
+POLL_INTERVALS = {
+    "polymarket": float(os.getenv("POLL_INTERVAL_POLYMARKET", 15)),
+    "manifold": float(os.getenv("POLL_INTERVAL_MANIFOLD", 10)),
+    "predictit": float(os.getenv("POLL_INTERVAL_PREDICTIT", 60)),  # PredictIt atualiza ~1x/min
+    "kalshi": float(os.getenv("POLL_INTERVAL_KALSHI", 8)),         # Curto prazo precisa < 10s
+}
+DEFAULT_POLL_INTERVAL = float(os.getenv("DEFAULT_POLL_INTERVAL", UPDATE_INTERVAL))
+ANALYSIS_DEBOUNCE = float(os.getenv("ANALYSIS_DEBOUNCE", 2))    # espera mudanças "assentarem"
+ANALYSIS_MAX_DELAY = float(os.getenv("ANALYSIS_MAX_DELAY", 10))  # atraso máximo da análise
+USE_SCHEDULER = os.getenv("USE_SCHEDULER", "false").lower() == "true"
+
+# Streaming WebSocket (Kalshi e Polymarket)
+STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "false").lower() == "true"
+KALSHI_WS_URL = os.getenv(
+    "KALSHI_WS_URL",
+    "wss://demo-api.kalshi.co/trade-api/ws/v2" if os.getenv("KALSHI_USE_DEMO", "true").lower() == "true"
+    else "wss://api.elections.kalshi.com/trade-api/ws/v2"
+)
+POLYMARKET_WS_URL = os.getenv("POLYMARKET_WS_URL", "wss://ws-subscriptions-clob.polymarket.com/ws/market")
+STREAM_REPLAY_DIR = os.getenv("STREAM_REPLAY_DIR")  # Feeds gravados (<exchange>.jsonl) para uso offline
+STREAM_RECORD_DIR = os.getenv("STREAM_RECORD_DIR")  # Grava feeds recebidos para replay
+STREAM_MAX_AGE = float(os.getenv("STREAM_MAX_AGE", 60))  # segundos - books mais antigos são ignorados
+
+# Fixtures HTTP (record/replay) - permite rodar o pipeline completo sem rede
+# off: requisições reais | record: grava respostas | replay: usa só fixtures gravadas
+HTTP_FIXTURE_MODE = os.getenv("HTTP_FIXTURE_MODE", "off").lower()
+HTTP_FIXTURE_DIR = os.getenv("HTTP_FIXTURE_DIR", "fixtures/http")
+HTTP_FIXTURE_LATENCY = float(os.getenv("HTTP_FIXTURE_LATENCY", 0))  # 1.0 = latência gravada, 0 = instantâneo
+
+# Override de base URL dos adapters (ex: fake_exchange_server.py para testes de carga)
+POLYMARKET_BASE_URL = os.getenv("POLYMARKET_BASE_URL")
+KALSHI_BASE_URL = os.getenv("KALSHI_BASE_URL")
+PREDICTIT_BASE_URL = os.getenv("PREDICTIT_BASE_URL")
+MANIFOLD_BASE_URL = os.getenv("MANIFOLD_BASE_URL")
+
+# Descoberta de endpoints (PolyRouter, FinFeed, Seer): endpoint vencedor é persistido
+DISCOVERY_CACHE_PATH = os.getenv("DISCOVERY_CACHE_PATH", ".cache/endpoint_discovery.json")
+
+# Subgraphs (Omen, Azuro): paginação por cursor id_gt com páginas concorrentes
+SUBGRAPH_PAGE_SIZE = int(os.getenv("SUBGRAPH_PAGE_SIZE", 1000))   # máximo do The Graph
+SUBGRAPH_MAX_PAGES = int(os.getenv("SUBGRAPH_MAX_PAGES", 20))     # por shard
+SUBGRAPH_CONCURRENCY = int(os.getenv("SUBGRAPH_CONCURRENCY", 4))
+SUBGRAPH_RATE_LIMIT = float(os.getenv("SUBGRAPH_RATE_LIMIT", 8))  # requisições/segundo
+SUBGRAPH_FULL_REFRESH = float(os.getenv("SUBGRAPH_FULL_REFRESH", 3600))  # segundos entre buscas completas
+
+# Order books (preço executável em vez de mid price)
+ORDERBOOK_ENABLED = os.getenv("ORDERBOOK_ENABLED", "false").lower() == "true"
+ORDERBOOK_TTL = float(os.getenv("ORDERBOOK_TTL", 10))  # segundos de validade por mercado
+ORDERBOOK_CONCURRENCY = int(os.getenv("ORDERBOOK_CONCURRENCY", 8))
+ORDERBOOK_TIMEOUT = float(os.getenv("ORDERBOOK_TIMEOUT", 15))  # segundos para o lote todo
+ORDERBOOK_RATE_LIMITS = {  # requisições/segundo por exchange
+    "kalshi": float(os.getenv("ORDERBOOK_RATE_KALSHI", 10)),
+    "polymarket": float(os.getenv("ORDERBOOK_RATE_POLYMARKET", 20)),
+    "polyrouter": float(os.getenv("ORDERBOOK_RATE_POLYROUTER", 5)),
+}
+
+# Histórico de preços por mercado (ring buffers em memória)
+PRICE_HISTORY_SIZE = int(os.getenv("PRICE_HISTORY_SIZE", 64))  # observações por mercado
+PRICE_HISTORY_MAX_MARKETS = int(os.getenv("PRICE_HISTORY_MAX_MARKETS", 20000))
+VOLATILITY_WINDOW = int(os.getenv("VOLATILITY_WINDOW", 30))  # observações usadas nas métricas
+VOLATILITY_SCALE = float(os.getenv("VOLATILITY_SCALE", 0.05))  # desvio por observação que vale score 1.0
+
+# Análise incremental entre ciclos (diff de snapshots)
+MARKET_DIFF_PRICE_EPSILON = float(os.getenv("MARKET_DIFF_PRICE_EPSILON", 0.0001))  # variação mínima de preço
+MARKET_DIFF_LIQUIDITY_PCT = float(os.getenv("MARKET_DIFF_LIQUIDITY_PCT", 0.01))  # variação relativa mínima de liquidez
+INCREMENTAL_FULL_EVERY = int(os.getenv("INCREMENTAL_FULL_EVERY", 10))  # ciclos entre análises completas (0 = sempre completa)
+
+# Cache de veredictos do MarketValidator (pares por versão de preço/texto)
+VALIDATION_CACHE_SIZE = int(os.getenv("VALIDATION_CACHE_SIZE", 50000))
+
+# Dimensionamento de trades pela profundidade dos order books
+MAX_TRADE_INVESTMENT = float(os.getenv("MAX_TRADE_INVESTMENT", 1000))  # USD máximo por perna de compra
+
+# Solver LP de arbitragem mutex: "auto" (SciPy se instalado), "simplex" ou "scipy"
+LP_BACKEND = os.getenv("LP_BACKEND", "auto")
+
+# Ciclo de vida das oportunidades (IDs estáveis entre ciclos)
+LIFECYCLE_CLOSE_AFTER = int(os.getenv("LIFECYCLE_CLOSE_AFTER", 2))  # ciclos seguidos ausente até fechar
+LIFECYCLE_HISTORY_SIZE = int(os.getenv("LIFECYCLE_HISTORY_SIZE", 1000))  # eventos e registros fechados guardados
+
+# Seleção top-K das engines (heap limitado em vez de ordenar todos os candidatos)
+TOP_K = int(os.getenv("TOP_K", 0))  # oportunidades mantidas por engine (0 = todas)
+TOP_K_SCORE = os.getenv("TOP_K_SCORE", "profit_pct")  # score do ranking entre engines: profit_pct, quality_score ou net_dollars
+
+# Execução das engines de arbitragem: "serial", "thread" ou "process"
+ENGINE_EXECUTOR = os.getenv("ENGINE_EXECUTOR", "serial")
+ENGINE_WORKERS = int(os.getenv("ENGINE_WORKERS", 0))  # 0 = uma vaga por engine
+ENGINE_TIMEOUT = float(os.getenv("ENGINE_TIMEOUT", 60))  # segundos por engine (modos concorrentes)
+ENGINE_TIMEOUTS = {
+    "traditional": float(os.getenv("ENGINE_TIMEOUT_TRADITIONAL", ENGINE_TIMEOUT)),
+    "combinatorial": float(os.getenv("ENGINE_TIMEOUT_COMBINATORIAL", ENGINE_TIMEOUT)),
+    "probability": float(os.getenv("ENGINE_TIMEOUT_PROBABILITY", ENGINE_TIMEOUT)),
+    "short_term": float(os.getenv("ENGINE_TIMEOUT_SHORT_TERM", ENGINE_TIMEOUT)),
+}
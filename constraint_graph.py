@@ -0,0 +1,314 @@
+"""
+Grafo de restrições lógicas entre mercados
+
+Mantém um grafo dirigido de implicações A -> B ("se A acontece, B acontece"),
+que exige P(A) <= P(B). As relações são extraídas do texto das perguntas:
+
+- candidato -> partido: "Trump vence a eleição de 2028" -> "Republicanos vencem
+  a eleição de 2028" (mesmo ano, cargo e disputa: eleição geral, um estado ou
+  o voto popular; nomeação/primárias nunca implicam a vitória do partido)
+- limiares: "BTC acima de 120k" -> "BTC acima de 100k" (e o inverso para
+  "abaixo de")
+- estado -> nacional: "casos em Texas acima de N" -> "casos nos EUA acima de N"
+  (contagens: o total nacional inclui o estadual)
+
+O grafo é atualizado incrementalmente: cada mercado novo só é comparado com
+os mercados do mesmo balde (mesmo molde de pergunta ou mesma eleição), e os
+mercados que somem são removidos. A checagem percorre o grafo inteiro uma vez
+em ordem topológica, levando o maior P(ancestral) de cada nó: se ele passa
+P(nó), há violação (inclusive por cadeias A -> C -> B).
+
+Só entram mercados de outcome YES (o preço é a probabilidade do evento da
+pergunta).
+"""
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from exchanges.base import Market
+
+NodeKey = Tuple[str, str]  # (exchange, market_id)
+
+# Base de conhecimento candidato -> partido (estendida com register_candidate)
+CANDIDATE_PARTIES: Dict[str, str] = {
+    "biden": "democratic", "harris": "democratic", "newsom": "democratic",
+    "whitmer": "democratic", "buttigieg": "democratic", "shapiro": "democratic",
+    "trump": "republican", "desantis": "republican", "haley": "republican",
+    "ramaswamy": "republican", "pence": "republican", "vance": "republican",
+}
+PARTY_WORDS: Dict[str, Tuple[str, ...]] = {
+    "democratic": ("democratic", "democrat", "democrats"),
+    "republican": ("republican", "republicans", "gop"),
+}
+
+US_STATES = (
+    "alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+    "florida", "georgia", "hawaii", "idaho", "illinois", "indiana", "iowa", "kansas", "kentucky",
+    "louisiana", "maine", "maryland", "massachusetts", "michigan", "minnesota", "mississippi",
+    "missouri", "montana", "nebraska", "nevada", "new hampshire", "new jersey", "new mexico",
+    "new york", "north carolina", "north dakota", "ohio", "oklahoma", "oregon", "pennsylvania",
+    "rhode island", "south carolina", "south dakota", "tennessee", "texas", "utah", "vermont",
+    "virginia", "washington", "west virginia", "wisconsin", "wyoming",
+)
+NATIONAL = "national"
+NOMINATION = "nomination"
+
+_UP = r"above|over|greater than|more than|higher than|exceeds?|exceeding|at least|reach(?:es)?|hits?|>=?|≥"
+_DOWN = r"below|under|less than|fewer than|lower than|at most|<=?|≤"
+_NUMBER = r"\$?\s*([\d][\d,]*(?:\.\d+)?)(?:\s?(k|m|bn|b)\b|%)?"
+_THRESHOLD_RE = re.compile(rf"(?<!\w)({_UP}|{_DOWN})\s*{_NUMBER}")
+_DOWN_RE = re.compile(rf"^(?:{_DOWN})$")
+_STATE_RE = re.compile(r"\b(" + "|".join(sorted(US_STATES, key=len, reverse=True)) + r")\b")
+_NATIONAL_RE = re.compile(r"\b(the united states|united states|the u\.s\.|the us|u\.s\.|usa|nationwide|nationally)\b")
+_YEAR_RE = re.compile(r"\b(20[2-9]\d)\b")
+_WIN_RE = re.compile(r"\b(wins?|winning|winner|election)\b")
+_NOMINATION_RE = re.compile(r"\b(nomination|nominee|nominated|primary|primaries|caucus(?:es)?|convention)\b")
+_MULTIPLIERS = {"k": 1e3, "m": 1e6, "b": 1e9, "bn": 1e9, None: 1.0}
+
+
+@dataclass
+class _Facts:
+    """O que a pergunta diz, para procurar implicações"""
+    template: Optional[Tuple[str, str]] = None  # (molde sem número/região, "up"/"down")
+    threshold: Optional[float] = None
+    region: Optional[str] = None                # nome do estado, NATIONAL ou None
+    election: Optional[Tuple[str, str, str]] = None  # (ano, cargo, disputa)
+    candidate_party: Optional[str] = None       # Partido do candidato citado
+    party: Optional[str] = None                 # Partido citado sem candidato
+
+
+@dataclass
+class Violation:
+    """P(antecedente) > P(consequente) com antecedente -> consequente"""
+    antecedent: Market
+    consequent: Market
+    kinds: Tuple[str, ...]  # Relações do caminho (ex: ("threshold",) ou ("state", "threshold"))
+    gap: float              # P(antecedente) - P(consequente)
+
+
+def _election(question: str) -> Tuple[str, str, str]:
+    years = _YEAR_RE.findall(question)
+    office = "president"
+    for name in ("senate", "house", "governor"):
+        if name in question:
+            office = name
+            break
+    # Disputa: vencer a nomeação, um estado ou o voto popular não é vencer a eleição
+    if _NOMINATION_RE.search(question):
+        scope = NOMINATION
+    elif "popular vote" in question:
+        scope = "popular_vote"
+    else:
+        state = _STATE_RE.search(question)
+        scope = state.group(1) if state else "general"
+    return (years[0] if years else "unknown", office, scope)
+
+
+def extract_facts(market: Market) -> _Facts:
+    """Classifica a pergunta de um mercado (minúsculas, uma vez por mercado)"""
+    question = " ".join(market.question.lower().split())
+    facts = _Facts()
+
+    match = _THRESHOLD_RE.search(question)
+    if match:
+        direction = "down" if _DOWN_RE.match(match.group(1)) else "up"
+        try:
+            facts.threshold = float(match.group(2).replace(",", "")) * _MULTIPLIERS[match.group(3)]
+        except ValueError:
+            facts.threshold = None
+        if facts.threshold is not None:
+            template = question[:match.start()] + "{cmp} {n}" + question[match.end():]
+            state = _STATE_RE.search(template)
+            national = _NATIONAL_RE.search(template)
+            if state and not national:
+                facts.region = state.group(1)
+                template = template[:state.start()] + "{region}" + template[state.end():]
+            elif national and not state:
+                facts.region = NATIONAL
+                template = template[:national.start()] + "{region}" + template[national.end():]
+            facts.template = (template, direction)
+
+    if _WIN_RE.search(question):
+        candidates = [name for name in CANDIDATE_PARTIES if re.search(rf"\b{name}\b", question)]
+        if len(candidates) == 1:
+            facts.candidate_party = CANDIDATE_PARTIES[candidates[0]]
+            facts.election = _election(question)
+        elif not candidates:
+            parties = [party for party, words in PARTY_WORDS.items()
+                       if any(re.search(rf"\b{w}\b", question) for w in words)]
+            if len(parties) == 1:
+                facts.party = parties[0]
+                facts.election = _election(question)
+    return facts
+
+
+def _region_within(inner: Optional[str], outer: Optional[str]) -> bool:
+    return inner == outer or (outer == NATIONAL and inner not in (None, NATIONAL))
+
+
+def implication(a: _Facts, b: _Facts) -> Optional[str]:
+    """Tipo da relação se o evento de `a` implica o de `b` (None se não implica)"""
+    if (a.election is not None and a.election == b.election and a.election[2] != NOMINATION
+            and a.candidate_party and b.party == a.candidate_party):
+        return "candidate_party"
+
+    if a.template is None or a.template != b.template:
+        return None
+    direction = a.template[1]
+    if direction == "up":
+        # Mais alto implica mais baixo; contagem estadual implica a nacional
+        if not (a.threshold >= b.threshold and _region_within(a.region, b.region)):
+            return None
+    else:
+        # Mais baixo implica mais alto; total nacional baixo implica o estadual
+        if not (a.threshold <= b.threshold and _region_within(b.region, a.region)):
+            return None
+    if a.threshold == b.threshold and a.region == b.region:
+        return None  # Mesmo evento (outra exchange): não é hierarquia
+    return "state" if a.region != b.region else "threshold"
+
+
+def is_event_market(market: Market) -> bool:
+    return market.outcome.upper() == "YES" and market.price is not None
+
+
+class ConstraintGraph:
+    """Grafo de implicações mantido entre ciclos"""
+
+    def __init__(self):
+        self.markets: Dict[NodeKey, Market] = {}
+        self.facts: Dict[NodeKey, _Facts] = {}
+        self.successors: Dict[NodeKey, Dict[NodeKey, str]] = {}    # origem -> {destino: tipo}
+        self.predecessors: Dict[NodeKey, Dict[NodeKey, str]] = {}
+        # Baldes: só mercados do mesmo balde podem se relacionar
+        self._by_template: Dict[Tuple[str, str], Set[NodeKey]] = {}
+        self._by_election: Dict[Tuple[str, str, str], Set[NodeKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.successors.values())
+
+    def update(self, markets: Iterable[Market], prune: bool = True) -> int:
+        """
+        Sincroniza o grafo com os mercados do ciclo
+
+        Mercados novos (ou com pergunta alterada) são classificados e ligados
+        aos do mesmo balde; os demais só têm o preço atualizado. Com `prune`,
+        mercados ausentes saem do grafo. Retorna quantos nós foram (re)inseridos.
+        """
+        seen: Set[NodeKey] = set()
+        inserted = 0
+        for market in markets:
+            if not is_event_market(market):
+                continue
+            key = (market.exchange, market.market_id)
+            seen.add(key)
+            old = self.markets.get(key)
+            self.markets[key] = market
+            if old is not None and old.question == market.question:
+                continue
+            if old is not None:
+                self._unlink(key)
+            self._insert(key, market)
+            inserted += 1
+        if prune:
+            for key in [k for k in self.markets if k not in seen]:
+                self.remove(key)
+        return inserted
+
+    def remove(self, key: NodeKey):
+        self._unlink(key)
+        self.markets.pop(key, None)
+
+    def add_relation(self, antecedent: Market, consequent: Market, kind: str = "manual"):
+        """Relação explícita antecedente -> consequente (ex: vinda de curadoria)"""
+        for market in (antecedent, consequent):
+            key = (market.exchange, market.market_id)
+            if key not in self.markets:
+                self.markets[key] = market
+                self._insert(key, market)
+        self._add_edge((antecedent.exchange, antecedent.market_id), (consequent.exchange, consequent.market_id), kind)
+
+    def _insert(self, key: NodeKey, market: Market):
+        facts = extract_facts(market)
+        self.facts[key] = facts
+        self.successors.setdefault(key, {})
+        self.predecessors.setdefault(key, {})
+
+        candidates: Set[NodeKey] = set()
+        if facts.template is not None:
+            bucket = self._by_template.setdefault(facts.template, set())
+            candidates |= bucket
+            bucket.add(key)
+        if facts.election is not None:
+            bucket = self._by_election.setdefault(facts.election, set())
+            candidates |= bucket
+            bucket.add(key)
+
+        for other in candidates:
+            other_facts = self.facts[other]
+            kind = implication(facts, other_facts)
+            if kind:
+                self._add_edge(key, other, kind)
+            kind = implication(other_facts, facts)
+            if kind:
+                self._add_edge(other, key, kind)
+
+    def _add_edge(self, source: NodeKey, target: NodeKey, kind: str):
+        self.successors.setdefault(source, {})[target] = kind
+        self.predecessors.setdefault(target, {})[source] = kind
+
+    def _unlink(self, key: NodeKey):
+        facts = self.facts.pop(key, None)
+        if facts is not None:
+            if facts.template is not None:
+                self._by_template.get(facts.template, set()).discard(key)
+            if facts.election is not None:
+                self._by_election.get(facts.election, set()).discard(key)
+        for target in self.successors.pop(key, {}):
+            self.predecessors.get(target, {}).pop(key, None)
+        for source in self.predecessors.pop(key, {}):
+            self.successors.get(source, {}).pop(key, None)
+
+    def violations(self, tolerance: float = 0.0) -> List[Violation]:
+        """
+        Uma passada topológica: para cada nó, o ancestral de maior preço
+
+        Retorna, por consequente, a violação de maior gap acima de `tolerance`.
+        Nós em ciclos (relações contraditórias) ficam de fora.
+        """
+        indegree = {key: len(self.predecessors.get(key, {})) for key in self.markets}
+        queue = deque(key for key, degree in indegree.items() if degree == 0)
+        # Melhor ancestral: (preço, chave, tipos do caminho)
+        best: Dict[NodeKey, Tuple[float, NodeKey, Tuple[str, ...]]] = {}
+        found: List[Violation] = []
+
+        while queue:
+            key = queue.popleft()
+            price = self.markets[key].price
+            inherited = best.get(key)
+            if inherited is not None and inherited[0] - price > tolerance:
+                found.append(Violation(self.markets[inherited[1]], self.markets[key], inherited[2],
+                                       inherited[0] - price))
+
+            for target, kind in self.successors.get(key, {}).items():
+                candidate = (price, key, (kind,))
+                if inherited is not None and inherited[0] > price:
+                    candidate = (inherited[0], inherited[1], inherited[2] + (kind,))
+                current = best.get(target)
+                if current is None or candidate[0] > current[0]:
+                    best[target] = candidate
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    queue.append(target)
+
+        found.sort(key=lambda v: v.gap, reverse=True)
+        return found
+
+
+def register_candidate(name: str, party: str):
+    """Acrescenta candidato à base (vale para mercados inseridos depois)"""
+    CANDIDATE_PARTIES[name.lower()] = party.lower()
@@ -5,6 +5,8 @@ import time
 from datetime import datetime
 from monitor import ArbitrageMonitor
 from arbitrage import ArbitrageEngine
+from topk import top_k
+from opportunity_lifecycle import OpportunityLifecycle, OPENED, CLOSED
 from rich.console import Console
 from rich.table import Table
 import json
@@ -12,6 +14,9 @@ import os
 
 console = Console()
 
+# Mantido entre verificações: só oportunidades que abriram/fecharam viram alerta
+lifecycle = OpportunityLifecycle()
+
 
 async def check_opportunities():
     """Verifica oportunidades e salva em log"""
@@ -51,7 +56,11 @@ async def check_opportunities():
         if opp:
             opportunities.append(opp)
     
-    console.print(f"[bold green]✓ Encontradas {len(opportunities)} oportunidades![/bold green]\n")
+    events = lifecycle.update({"traditional": opportunities})
+    opened = [event.record for event in events if event.type == OPENED]
+    closed = [event.record for event in events if event.type == CLOSED]
+    console.print(f"[bold green]✓ Encontradas {len(opportunities)} oportunidades "
+                  f"({len(opened)} novas, {len(closed)} fechadas)![/bold green]\n")
     
     # Log detalhado
     log_entry = {
@@ -60,19 +69,25 @@ async def check_opportunities():
         "by_exchange": {ex: len(mkts) for ex, mkts in by_exchange.items()},
         "similar_pairs": len(matches),
         "opportunities": len(opportunities),
+        "opened": len(opened),
+        "closed": [record.to_dict() for record in closed],
         "details": []
     }
     
-    if opportunities:
+    if opened:
+        # Alerta só as novas desde a verificação anterior (heap limitado em vez de ordenar todas)
+        best = top_k(opened, 10, key=lambda record: record.current_profit_pct)
+        
         # Mostra oportunidades
-        table = Table(title=f"🚀 {len(opportunities)} Oportunidades Encontradas!")
+        table = Table(title=f"🚀 {len(opened)} Oportunidades Novas!")
         table.add_column("Lucro %", style="green bold")
         table.add_column("Lucro $", style="green")
         table.add_column("Comprar", style="cyan")
         table.add_column("Vender", style="yellow")
         table.add_column("Preços", style="white")
         
-        for opp in sorted(opportunities, key=lambda x: x.profit_pct, reverse=True)[:10]:
+        for record in best:
+            opp = record.opportunity
             table.add_row(
                 f"{opp.profit_pct:.2%}",
                 f"${opp.net_profit:.2f}",
@@ -83,6 +98,7 @@ async def check_opportunities():
             
             # Adiciona ao log
             log_entry["details"].append({
+                "id": record.id,
                 "profit_pct": opp.profit_pct,
                 "profit_abs": opp.net_profit,
                 "buy_exchange": opp.market_buy.exchange,
@@ -93,7 +109,9 @@ async def check_opportunities():
             })
         
         console.print(table)
-        console.print(f"\n[bold green]💰 Melhor oportunidade: {opportunities[0].profit_pct:.2%} de lucro![/bold green]\n")
+        console.print(f"\n[bold green]💰 Melhor oportunidade nova: {best[0].current_profit_pct:.2%} de lucro![/bold green]\n")
+    elif opportunities:
+        console.print(f"[yellow]Nenhuma oportunidade nova ({len(lifecycle)} ainda abertas).[/yellow]\n")
     else:
         console.print("[yellow]⚠️  Nenhuma oportunidade encontrada no momento.[/yellow]\n")
     
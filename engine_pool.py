@@ -0,0 +1,179 @@
+"""
+Execução concorrente das engines de arbitragem
+
+Dado o snapshot de mercados e os matches do ciclo, as engines (tradicional,
+combinatória, probabilidade e curto prazo) são independentes. EnginePool
+despacha cada uma para um pool de threads ou processos e recolhe os
+resultados com timeout por engine, medindo tempo de parede e de CPU de cada
+uma: a latência do ciclo passa a ser a da engine mais lenta, não a soma.
+
+Modos:
+- "serial": roda na thread chamadora, em ordem (comportamento original)
+- "thread": ThreadPoolExecutor; engines compartilham o estado (caches,
+  grafo de restrições), então o chamador deve entregar mercados imutáveis
+- "process": ProcessPoolExecutor; engine e argumentos são serializados a cada
+  ciclo (precisam ser picklable) e mudanças de estado dentro do worker não
+  voltam para o processo principal. Não combina com ORDERBOOK_ENABLED (o
+  serviço de books é assíncrono e compartilhado): a combinação é recusada
+
+Uma engine que estoura o timeout continua rodando no worker (threads não são
+interrompíveis); até ela terminar, novos despachos dela são recusados com
+status "busy" para que duas execuções nunca mexam no mesmo estado.
+"""
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from config import ENGINE_EXECUTOR, ENGINE_WORKERS, ENGINE_TIMEOUT, ENGINE_TIMEOUTS, ORDERBOOK_ENABLED
+
+MODES = ("serial", "thread", "process")
+
+OK = "ok"
+TIMEOUT = "timeout"
+ERROR = "error"
+BUSY = "busy"
+
+Task = Tuple[Callable, Sequence[Any]]  # (função, argumentos)
+
+
+@dataclass
+class EngineRun:
+    """Resultado e tempos de uma engine em um ciclo"""
+    name: str
+    result: Any = None
+    status: str = OK        # OK, TIMEOUT, ERROR ou BUSY
+    wall_time: float = 0.0  # Segundos dentro do worker (até o timeout, se estourou)
+    cpu_time: float = 0.0   # Segundos de CPU da thread/processo do worker
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+    def to_dict(self) -> Dict:
+        return {
+            "status": self.status,
+            "wall_time": round(self.wall_time, 4),
+            "cpu_time": round(self.cpu_time, 4),
+            "error": self.error,
+        }
+
+
+def _timed_call(fn: Callable, args: Sequence[Any], process: bool) -> Tuple[Any, float, float]:
+    """Executa `fn(*args)` medindo parede e CPU (nível de módulo para ser picklable)"""
+    cpu_clock = time.process_time if process else time.thread_time
+    wall_start, cpu_start = time.perf_counter(), cpu_clock()
+    result = fn(*args)
+    return result, time.perf_counter() - wall_start, cpu_clock() - cpu_start
+
+
+class EnginePool:
+    """
+    Pool de execução das engines
+
+    Args:
+        mode: "serial", "thread" ou "process"
+        workers: Tamanho do pool (padrão: uma vaga por engine despachada)
+        timeouts: Timeout em segundos por nome de engine
+        default_timeout: Timeout das engines sem valor próprio
+        orderbooks: Se as engines usam order books (ORDERBOOK_ENABLED)
+    """
+
+    def __init__(
+        self,
+        mode: str = ENGINE_EXECUTOR,
+        workers: Optional[int] = ENGINE_WORKERS,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = ENGINE_TIMEOUT,
+        orderbooks: bool = ORDERBOOK_ENABLED
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Modo de execução inválido: {mode} (use {', '.join(MODES)})")
+        if mode == "process" and orderbooks:
+            raise ValueError("ENGINE_EXECUTOR=process não combina com ORDERBOOK_ENABLED "
+                             "(use thread ou desative os order books)")
+        self.mode = mode
+        self.workers = workers or None
+        self.timeouts = dict(ENGINE_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = default_timeout
+        self._executor = None
+        self._running: Dict[str, Future] = {}  # Engines que estouraram o timeout e ainda rodam
+        self.last_runs: Dict[str, EngineRun] = {}
+
+    @property
+    def concurrent(self) -> bool:
+        return self.mode != "serial"
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout)
+
+    def _get_executor(self, size: int):
+        if self._executor is None:
+            workers = self.workers or max(size, 1)
+            executor_class = ProcessPoolExecutor if self.mode == "process" else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=workers)
+        return self._executor
+
+    def run(self, tasks: Dict[str, Task]) -> Dict[str, EngineRun]:
+        """
+        Executa as engines e espera cada uma até o seu timeout
+
+        Todas são despachadas juntas; o prazo de cada engine conta a partir do
+        despacho. Exceções da engine viram status ERROR (o ciclo continua).
+        """
+        if not self.concurrent:
+            runs = {name: self._run_inline(name, fn, args) for name, (fn, args) in tasks.items()}
+            self.last_runs = runs
+            return runs
+
+        process = self.mode == "process"
+        executor = self._get_executor(len(tasks))
+        runs: Dict[str, EngineRun] = {}
+        futures: Dict[str, Future] = {}
+        start = time.perf_counter()
+        for name, (fn, args) in tasks.items():
+            previous = self._running.get(name)
+            if previous is not None and not previous.done():
+                runs[name] = EngineRun(name, status=BUSY, error="execução anterior ainda em andamento")
+                continue
+            self._running.pop(name, None)
+            futures[name] = executor.submit(_timed_call, fn, args, process)
+
+        # Espera na ordem dos prazos: cada engine tem até start + timeout
+        for name in sorted(futures, key=self.timeout_for):
+            future = futures[name]
+            remaining = start + self.timeout_for(name) - time.perf_counter()
+            try:
+                result, wall, cpu = future.result(timeout=max(remaining, 0.0))
+                runs[name] = EngineRun(name, result=result, wall_time=wall, cpu_time=cpu)
+            except FutureTimeoutError:
+                self._running[name] = future
+                runs[name] = EngineRun(name, status=TIMEOUT, wall_time=time.perf_counter() - start,
+                                       error=f"timeout de {self.timeout_for(name):.1f}s")
+            except Exception as e:
+                runs[name] = EngineRun(name, status=ERROR, error=f"{type(e).__name__}: {e}")
+
+        runs = {name: runs[name] for name in tasks}  # Ordem de despacho
+        self.last_runs = runs
+        return runs
+
+    def _run_inline(self, name: str, fn: Callable, args: Sequence[Any]) -> EngineRun:
+        try:
+            result, wall, cpu = _timed_call(fn, args, process=False)
+        except Exception as e:
+            return EngineRun(name, status=ERROR, error=f"{type(e).__name__}: {e}")
+        return EngineRun(name, result=result, wall_time=wall, cpu_time=cpu)
+
+    def status(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "running": sorted(name for name, future in self._running.items() if not future.done()),
+            "engines": {name: run.to_dict() for name, run in self.last_runs.items()},
+        }
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
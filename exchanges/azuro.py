@@ -1,7 +1,9 @@
 """Integração com Azuro - Prediction markets focado em esportes"""
-import httpx
+import time
 from typing import List
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
+from exchanges.subgraph import SubgraphPaginator
 from datetime import datetime
 import re
 
@@ -14,6 +16,23 @@ class AzuroExchange(ExchangeBase):
         # Azuro usa The Graph para queries
         self.base_url = "https://thegraph.azuro.org/subgraphs/name/azuro-protocol/azuro-api-polygon-v3"
         
+        # IDs de jogos não são uniformes (prefixo do contrato): um shard só,
+        # páginas sequenciais por id_gt
+        self.paginator = SubgraphPaginator(
+            self.base_url,
+            entity="games",
+            filter_type="Game_filter",
+            fields=[
+                "id",
+                "sport { name }",
+                "league { name }",
+                "participants { name }",
+                "startsAt",
+                "conditions { id outcomes { id odds } }",
+            ],
+            where={"status_in": ["Created", "Paused"]}
+        )
+        
     def normalize_question(self, question: str) -> str:
         """Normaliza pergunta"""
         normalized = re.sub(r'[^\w\s]', '', question.lower())
@@ -25,53 +44,13 @@ class AzuroExchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # GraphQL query para buscar jogos ativos
-                query = """
-                {
-                  games(
-                    first: 100
-                    where: {
-                      status: Paused_or_Created
-                      startsAt_gt: "1735689600"
-                    }
-                    orderBy: startsAt
-                    orderDirection: asc
-                  ) {
-                    id
-                    sport {
-                      name
-                    }
-                    league {
-                      name
-                    }
-                    participants {
-                      name
-                    }
-                    startsAt
-                    conditions {
-                      id
-                      outcomes {
-                        id
-                        odds
-                      }
-                    }
-                  }
-                }
-                """
-                
-                response = await client.post(
-                    self.base_url,
-                    json={"query": query},
-                    headers={"Content-Type": "application/json"}
+            async with create_client(timeout=15.0) as client:
+                # Jogos ainda não iniciados; o filtro de data muda a cada ciclo
+                games = await self.paginator.fetch(
+                    client,
+                    where={"startsAt_gt": str(int(time.time()))}
                 )
                 
-                if response.status_code != 200:
-                    return markets
-                
-                data = response.json()
-                games = data.get("data", {}).get("games", [])
-                
                 for game in games:
                     try:
                         game_id = game.get("id", "")
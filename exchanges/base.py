@@ -1,13 +1,85 @@
 """Classe base para integrações com exchanges"""
+import asyncio
+import sys
+import time
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
+from exchanges.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitOpenError
+from exchanges.orderbook import OrderBook
 
 
-@dataclass
-class Market:
-    """Representa um mercado de previsão"""
+def _slotted(cls):
+    """
+    Recria a dataclass com __slots__ (sem __dict__ por instância)
+    
+    Equivalente ao dataclass(slots=True) do Python 3.10+, mantendo suporte ao
+    3.8. Inclui também os slots extras declarados em `_extra_slots`.
+    """
+    names = tuple(f.name for f in fields(cls)) + tuple(getattr(cls, "_extra_slots", ()))
+    cls_dict = dict(cls.__dict__)
+    for name in names:
+        # Defaults ficam no __init__ gerado; atributo de classe conflitaria com o slot
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class _MarketIdentity:
+    """
+    Hash e igualdade por (exchange, market_id, outcome), calculados uma vez
+    
+    Strings repetidas entre instâncias (exchange, outcome, pergunta e URL, que
+    a Kalshi duplica no YES e no NO) são internadas para ocupar memória uma vez.
+    """
+    __slots__ = ()
+    _extra_slots = ("_hash",)
+    
+    def _init_identity(self):
+        set_attr = object.__setattr__  # Funciona também na variante frozen
+        set_attr(self, "exchange", _intern(self.exchange))
+        set_attr(self, "outcome", _intern(self.outcome))
+        set_attr(self, "question", _intern(self.question))
+        set_attr(self, "url", _intern(self.url))
+        set_attr(self, "_hash", hash((self.exchange, self.market_id, self.outcome)))
+    
+    def __hash__(self):
+        return self._hash
+    
+    def __eq__(self, other):
+        if not isinstance(other, _MarketIdentity):
+            return False
+        return (self._hash == other._hash and
+                self.exchange == other.exchange and
+                self.market_id == other.market_id and
+                self.outcome == other.outcome)
+    
+    # Pickle/copy de classes com slots (e frozen) sem passar por __setattr__
+    def __getstate__(self):
+        return tuple(getattr(self, f.name) for f in fields(self))
+    
+    def __setstate__(self, state):
+        for f, value in zip(fields(self), state):
+            object.__setattr__(self, f.name, value)
+        self._init_identity()
+
+
+@_slotted
+@dataclass(eq=False)
+class Market(_MarketIdentity):
+    """
+    Representa um mercado de previsão
+    
+    Usa __slots__ e hash pré-calculado na criação: exchange, market_id e
+    outcome não devem ser alterados depois (use dataclasses.replace).
+    """
     exchange: str
     market_id: str
     question: str
@@ -18,28 +90,112 @@ class Market:
     expires_at: Optional[datetime]
     url: Optional[str] = None
     
-    def __hash__(self):
-        return hash((self.exchange, self.market_id, self.outcome))
+    def __post_init__(self):
+        self._init_identity()
     
-    def __eq__(self, other):
-        if not isinstance(other, Market):
-            return False
-        return (self.exchange == other.exchange and 
-                self.market_id == other.market_id and 
-                self.outcome == other.outcome)
+    def freeze(self) -> "FrozenMarket":
+        """Cópia imutável (para snapshots compartilhados entre threads)"""
+        return FrozenMarket(*(getattr(self, f.name) for f in fields(self)))
+
+
+@_slotted
+@dataclass(eq=False, frozen=True)
+class FrozenMarket(_MarketIdentity):
+    """Variante imutável de Market (mesmos campos, hash e igualdade)"""
+    exchange: str
+    market_id: str
+    question: str
+    outcome: str
+    price: float
+    volume_24h: float
+    liquidity: float
+    expires_at: Optional[datetime]
+    url: Optional[str] = None
+    
+    def __post_init__(self):
+        self._init_identity()
+    
+    def thaw(self) -> Market:
+        """Cópia mutável"""
+        return Market(*(getattr(self, f.name) for f in fields(self)))
 
 
 class ExchangeBase(ABC):
     """Interface base para exchanges de prediction markets"""
     
+    # Adapters que implementam fetch_orderbook marcam True
+    supports_orderbooks = False
+    
     def __init__(self, name: str):
         self.name = name
+        self.circuit_breaker = CircuitBreaker(name, CircuitBreakerConfig.from_config())
     
     @abstractmethod
     async def fetch_markets(self) -> List[Market]:
         """Busca todos os mercados ativos"""
         pass
     
+    async def fetch_markets_guarded(self, timeout: Optional[float] = None) -> List[Market]:
+        """
+        Busca mercados passando pelo circuit breaker
+        
+        - Circuito aberto: falha imediatamente com CircuitOpenError (sem pagar timeout)
+        - Exceção, timeout ou lista vazia contam como falha (os adapters
+          engolem erros de HTTP e retornam [])
+        - Cancelamento não conta, e devolve a vaga de teste do half-open
+        """
+        breaker = self.circuit_breaker
+        if not breaker.allow_request():
+            raise CircuitOpenError(self.name, breaker.retry_in())
+        
+        start = time.monotonic()
+        try:
+            if timeout:
+                markets = await asyncio.wait_for(self.fetch_markets(), timeout=timeout)
+            else:
+                markets = await self.fetch_markets()
+        except asyncio.TimeoutError:
+            breaker.record_failure(time.monotonic() - start, f"timeout apos {timeout:.0f}s")
+            raise
+        except Exception as e:
+            breaker.record_failure(time.monotonic() - start, e)
+            raise
+        except asyncio.CancelledError:
+            # Cancelada (stop do scheduler, ciclo cancelado): não é falha, mas libera a vaga de teste
+            breaker.release_probe()
+            raise
+        
+        latency = time.monotonic() - start
+        if markets:
+            breaker.record_success(latency)
+        else:
+            breaker.record_failure(latency, "nenhum mercado retornado")
+        
+        return markets
+    
+    @property
+    def health_score(self) -> float:
+        """Score de saúde da exchange (0-1), usado para priorizar/pular venues"""
+        return self.circuit_breaker.health_score
+    
+    def orderbook_key(self, market: Market) -> Optional[str]:
+        """
+        Chave da requisição de order book do mercado
+        
+        Outcomes que compartilham o mesmo book (ex: YES/NO de um ticker Kalshi)
+        retornam a mesma chave, para uma única requisição. None = sem book.
+        """
+        return market.market_id
+    
+    async def fetch_orderbook(self, market: Market, client) -> Dict[str, OrderBook]:
+        """
+        Busca order book usando o client compartilhado
+        
+        Retorna {market_id: OrderBook} para todos os outcomes cobertos pela
+        requisição (o mercado pedido e, quando houver, o complementar).
+        """
+        return {}
+    
     @abstractmethod
     def normalize_question(self, question: str) -> str:
         """Normaliza a pergunta para facilitar matching"""
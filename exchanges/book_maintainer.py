@@ -0,0 +1,240 @@
+"""
+Manutenção incremental de order books a partir de deltas do stream
+
+Aplica deltas de nível (inserir, alterar ou remover um preço) sobre
+ArrayOrderBook sem reconstruir o book, valida números de sequência por canal
+e, ao detectar lacuna, marca os books afetados como inválidos e pede novo
+snapshot. Emite BestPriceChange quando o melhor bid/ask muda, para que as
+verificações de arbitragem reajam só aos mercados que se moveram em vez de
+reprocessar todos a cada ciclo.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from exchanges.orderbook import ArrayOrderBook
+
+Level = Tuple[float, float]  # (preço, quantidade)
+
+
+@dataclass
+class BestPriceChange:
+    """Evento de mudança no topo do book (preços em 0-1)"""
+    exchange: str
+    key: str
+    best_bid: Optional[float]
+    best_ask: Optional[float]
+    previous_bid: Optional[float]
+    previous_ask: Optional[float]
+    bid_size: Optional[float] = None
+    ask_size: Optional[float] = None
+    sequence: Optional[int] = None
+    timestamp: float = 0.0
+
+
+class BookMaintainer:
+    """
+    Mantém books de uma exchange atualizados por snapshot + deltas
+
+    - apply_snapshot substitui o book inteiro e reinicia a sequência do canal
+    - apply_delta / apply_deltas alteram níveis no lugar (size 0 remove)
+    - Sequência fora de ordem: duplicada/antiga é descartada; lacuna invalida
+      todos os books do canal e chama `resnapshot(key)` para cada um
+    - Deltas de books inválidos (ou sem snapshot) são ignorados até o próximo
+      snapshot
+
+    Args:
+        exchange: Nome da exchange (vai nos eventos)
+        resnapshot: Callback chamado com a chave de cada book que precisa de
+            novo snapshot (ex: re-assinar o mercado no websocket)
+    """
+
+    def __init__(self, exchange: str, resnapshot: Optional[Callable[[str], None]] = None):
+        self.exchange = exchange
+        self.resnapshot = resnapshot
+        self.books: Dict[str, ArrayOrderBook] = {}
+        self.sequences: Dict[str, int] = {}  # canal -> última sequência aplicada
+        self.book_channels: Dict[str, str] = {}  # chave -> canal do último snapshot
+        self.stale: Set[str] = set()
+        self._tops: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        self._listeners: List[Callable[[BestPriceChange], None]] = []
+        self.stats = {"snapshots": 0, "deltas": 0, "duplicates": 0, "gaps": 0, "resnapshots": 0}
+
+    def on_best_change(self, callback: Callable[[BestPriceChange], None]):
+        """Registra callback chamado quando melhor bid ou ask muda"""
+        self._listeners.append(callback)
+
+    def get(self, key: str) -> Optional[ArrayOrderBook]:
+        """Book confiável (None se ausente ou aguardando snapshot)"""
+        if key in self.stale:
+            return None
+        return self.books.get(key)
+
+    # ------------------------------------------------------------------
+    # Snapshots e deltas
+    # ------------------------------------------------------------------
+
+    def apply_snapshot(
+        self,
+        key: str,
+        bids: Iterable[Level],
+        asks: Iterable[Level],
+        sequence: Optional[int] = None,
+        channel: Optional[str] = None
+    ) -> Optional[BestPriceChange]:
+        """Substitui o book da chave (e reinicia a sequência do canal)"""
+        bids, asks = list(bids), list(asks)
+        self.books[key] = ArrayOrderBook(
+            key, self.exchange,
+            [p for p, _ in bids], [s for _, s in bids],
+            [p for p, _ in asks], [s for _, s in asks]
+        )
+        channel = channel or key
+        self.book_channels[key] = channel
+        if sequence is not None:
+            self.sequences[channel] = sequence
+        self.stale.discard(key)
+        self.stats["snapshots"] += 1
+        return self._emit_if_changed(key, sequence)
+
+    def apply_delta(
+        self,
+        key: str,
+        side: str,
+        price: float,
+        size: float,
+        sequence: Optional[int] = None,
+        channel: Optional[str] = None,
+        relative: bool = False
+    ) -> Optional[BestPriceChange]:
+        """
+        Aplica um delta de nível (side = "bid" ou "ask")
+
+        Com relative=True, `size` é a variação da quantidade no nível (formato
+        da Kalshi); senão é a quantidade nova (formato da Polymarket).
+        """
+        return self.apply_deltas(key, [(side, price, size)], sequence, channel, relative)
+
+    def apply_deltas(
+        self,
+        key: str,
+        changes: Iterable[Tuple[str, float, float]],
+        sequence: Optional[int] = None,
+        channel: Optional[str] = None,
+        relative: bool = False
+    ) -> Optional[BestPriceChange]:
+        """Aplica vários deltas (side, preço, quantidade) com um único evento"""
+        channel = channel or key
+        if not self._check_sequence(key, channel, sequence):
+            return None
+
+        book = self.books.get(key)
+        if book is None or key in self.stale or self.book_channels.get(key) != channel:
+            # Delta sem snapshot de base (ou de uma assinatura antiga)
+            if book is None:
+                self._invalidate(key)
+            return None
+
+        for side, price, size in changes:
+            if relative:
+                size = book.size_at(side, price) + size
+            book.update_level(side, price, max(size, 0.0))
+            self.stats["deltas"] += 1
+        return self._emit_if_changed(key, sequence)
+
+    def set_top(
+        self,
+        key: str,
+        best_bid: Optional[float],
+        best_ask: Optional[float],
+        sequence: Optional[int] = None
+    ) -> Optional[BestPriceChange]:
+        """
+        Topo do book vindo de canais sem profundidade (ex: ticker)
+
+        Ignorado quando há book mantido para a chave, que é mais preciso.
+        """
+        if key in self.books and key not in self.stale:
+            return None
+        previous_bid, previous_ask = self._tops.get(key, (None, None))
+        best_bid = previous_bid if best_bid is None else best_bid
+        best_ask = previous_ask if best_ask is None else best_ask
+        return self._emit(key, best_bid, best_ask, None, None, sequence)
+
+    # ------------------------------------------------------------------
+    # Sequência e lacunas
+    # ------------------------------------------------------------------
+
+    def _check_sequence(self, key: str, channel: str, sequence: Optional[int]) -> bool:
+        if sequence is None:
+            return True
+        last = self.sequences.get(channel)
+        if last is None or sequence == last + 1:
+            self.sequences[channel] = sequence
+            return True
+        if sequence <= last:
+            self.stats["duplicates"] += 1
+            return False
+
+        # Lacuna: books do canal perderam deltas
+        self.stats["gaps"] += 1
+        self.sequences[channel] = sequence
+        affected = {k for k, c in self.book_channels.items() if c == channel}
+        affected.add(key)
+        for affected_key in sorted(affected):
+            self._invalidate(affected_key)
+        return False
+
+    def _invalidate(self, key: str):
+        if key in self.stale:
+            return
+        self.stale.add(key)
+        self.stats["resnapshots"] += 1
+        if self.resnapshot is not None:
+            try:
+                self.resnapshot(key)
+            except Exception as e:
+                print(f"[Books {self.exchange}] erro ao pedir snapshot de {key}: {e}")
+
+    # ------------------------------------------------------------------
+    # Eventos
+    # ------------------------------------------------------------------
+
+    def _emit_if_changed(self, key: str, sequence: Optional[int]) -> Optional[BestPriceChange]:
+        book = self.books[key]
+        best_bid, best_ask = book.get_best_bid(), book.get_best_ask()
+        return self._emit(
+            key,
+            best_bid.price if best_bid else None,
+            best_ask.price if best_ask else None,
+            best_bid.size if best_bid else None,
+            best_ask.size if best_ask else None,
+            sequence
+        )
+
+    def _emit(self, key, best_bid, best_ask, bid_size, ask_size, sequence) -> Optional[BestPriceChange]:
+        previous = self._tops.get(key, (None, None))
+        if (best_bid, best_ask) == previous:
+            return None
+        self._tops[key] = (best_bid, best_ask)
+
+        change = BestPriceChange(
+            exchange=self.exchange,
+            key=key,
+            best_bid=best_bid,
+            best_ask=best_ask,
+            previous_bid=previous[0],
+            previous_ask=previous[1],
+            bid_size=bid_size,
+            ask_size=ask_size,
+            sequence=sequence,
+            timestamp=time.time()
+        )
+        for listener in self._listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                print(f"[Books {self.exchange}] erro no listener: {e}")
+        return change
+
+    def status(self) -> Dict:
+        return {**self.stats, "books": len(self.books), "stale": len(self.stale)}
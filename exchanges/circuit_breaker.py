@@ -0,0 +1,245 @@
+"""Circuit breaker e score de saúde para adapters de exchanges
+
+Evita que uma API fora do ar custe o timeout completo em todo ciclo:
+- CLOSED: requisições passam normalmente, falhas são contadas numa janela
+- OPEN: requisições são bloqueadas até o fim do cooldown
+- HALF_OPEN: uma requisição de teste decide se fecha ou reabre o circuito
+
+O health score (0-1) é usado pelo monitor/scheduler para pular ou
+despriorizar exchanges doentes.
+"""
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+class CircuitState(str, Enum):
+    """Estados do circuit breaker"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Requisição bloqueada porque o circuito da exchange está aberto"""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"circuito aberto para {name} (nova tentativa em {retry_in:.0f}s)")
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """Parâmetros do circuit breaker"""
+    window_seconds: float = 300.0        # Janela para cálculo da taxa de falhas
+    min_calls: int = 3                   # Mínimo de chamadas na janela para avaliar taxa
+    failure_rate_threshold: float = 0.5  # Abre se taxa de falhas >= 50%
+    consecutive_failures: int = 3        # Abre após N falhas seguidas
+    cooldown_seconds: float = 60.0       # Tempo inicial em OPEN
+    max_cooldown_seconds: float = 900.0  # Cooldown máximo (backoff exponencial)
+    half_open_max_calls: int = 1         # Chamadas de teste permitidas em HALF_OPEN
+    slow_call_seconds: float = 10.0      # Latência considerada lenta (reduz health score)
+
+    @classmethod
+    def from_config(cls) -> "CircuitBreakerConfig":
+        """Cria configuração a partir do config.py (variáveis de ambiente)"""
+        from config import (CIRCUIT_BREAKER_WINDOW, CIRCUIT_BREAKER_MIN_CALLS,
+                            CIRCUIT_BREAKER_FAILURE_RATE, CIRCUIT_BREAKER_CONSECUTIVE_FAILURES,
+                            CIRCUIT_BREAKER_COOLDOWN, CIRCUIT_BREAKER_MAX_COOLDOWN,
+                            CIRCUIT_BREAKER_SLOW_CALL)
+        return cls(
+            window_seconds=CIRCUIT_BREAKER_WINDOW,
+            min_calls=CIRCUIT_BREAKER_MIN_CALLS,
+            failure_rate_threshold=CIRCUIT_BREAKER_FAILURE_RATE,
+            consecutive_failures=CIRCUIT_BREAKER_CONSECUTIVE_FAILURES,
+            cooldown_seconds=CIRCUIT_BREAKER_COOLDOWN,
+            max_cooldown_seconds=CIRCUIT_BREAKER_MAX_COOLDOWN,
+            slow_call_seconds=CIRCUIT_BREAKER_SLOW_CALL,
+        )
+
+
+class CircuitBreaker:
+    """Circuit breaker por instância de exchange"""
+
+    def __init__(
+        self,
+        name: str,
+        config: Optional[CircuitBreakerConfig] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.config = config or CircuitBreakerConfig()
+        self._clock = clock
+
+        self._state = CircuitState.CLOSED
+        # Janela de resultados: (timestamp, sucesso, latência)
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._cooldown = self.config.cooldown_seconds
+        self._half_open_calls = 0
+        self._last_error: Optional[str] = None
+        self._total_calls = 0
+        self._total_failures = 0
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    @property
+    def state(self) -> CircuitState:
+        """Estado atual (OPEN vira HALF_OPEN quando o cooldown termina)"""
+        if self._state == CircuitState.OPEN and self.retry_in() <= 0:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def retry_in(self) -> float:
+        """Segundos até a próxima tentativa permitida (0 se liberado)"""
+        if self._state != CircuitState.OPEN or self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self._cooldown - self._clock())
+
+    def allow_request(self) -> bool:
+        """Verifica se uma nova requisição pode ser feita"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN:
+            if self._half_open_calls < self.config.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+        return False
+
+    def release_probe(self):
+        """Devolve a vaga de teste de uma chamada sem resultado (ex: cancelada)"""
+        if self._state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    # ------------------------------------------------------------------
+    # Registro de resultados
+    # ------------------------------------------------------------------
+
+    def record_success(self, latency: float = 0.0):
+        """Registra chamada bem-sucedida"""
+        self._record(True, latency)
+        self._consecutive_failures = 0
+
+        if self._state == CircuitState.HALF_OPEN:
+            # Teste passou - fecha circuito e reseta backoff
+            self._close()
+
+    def record_failure(self, latency: float = 0.0, error: Optional[object] = None):
+        """Registra chamada com falha"""
+        self._record(False, latency)
+        self._consecutive_failures += 1
+        self._total_failures += 1
+        self._last_error = str(error) if error is not None else None
+
+        if self._state == CircuitState.HALF_OPEN:
+            # Teste falhou - reabre com cooldown maior
+            self._cooldown = min(self._cooldown * 2, self.config.max_cooldown_seconds)
+            self._open()
+        elif self._state == CircuitState.CLOSED and self._should_open():
+            self._open()
+
+    def reset(self):
+        """Volta ao estado inicial (fechado, sem histórico)"""
+        self._calls.clear()
+        self._consecutive_failures = 0
+        self._close()
+
+    def _record(self, success: bool, latency: float):
+        now = self._clock()
+        self._calls.append((now, success, latency))
+        self._total_calls += 1
+        self._trim(now)
+
+    def _trim(self, now: float):
+        """Remove chamadas fora da janela"""
+        cutoff = now - self.config.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _should_open(self) -> bool:
+        if self._consecutive_failures >= self.config.consecutive_failures:
+            return True
+        if len(self._calls) >= self.config.min_calls:
+            return self.failure_rate >= self.config.failure_rate_threshold
+        return False
+
+    def _open(self):
+        self._state = CircuitState.OPEN
+        self._opened_at = self._clock()
+        self._half_open_calls = 0
+
+    def _close(self):
+        self._state = CircuitState.CLOSED
+        self._opened_at = None
+        self._cooldown = self.config.cooldown_seconds
+        self._half_open_calls = 0
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    @property
+    def failure_rate(self) -> float:
+        """Taxa de falhas dentro da janela (0-1)"""
+        self._trim(self._clock())
+        if not self._calls:
+            return 0.0
+        failures = sum(1 for _, success, _ in self._calls if not success)
+        return failures / len(self._calls)
+
+    @property
+    def avg_latency(self) -> float:
+        """Latência média das chamadas na janela (segundos)"""
+        self._trim(self._clock())
+        if not self._calls:
+            return 0.0
+        return sum(latency for _, _, latency in self._calls) / len(self._calls)
+
+    @property
+    def health_score(self) -> float:
+        """
+        Score de saúde (0-1)
+
+        - 0.0 com circuito aberto
+        - Taxa de sucesso na janela, penalizada por latência alta
+        - Limitado a 0.5 em HALF_OPEN (ainda em teste)
+        """
+        state = self.state
+        if state == CircuitState.OPEN:
+            return 0.0
+
+        score = 1.0 - self.failure_rate
+
+        # Penaliza latência acima do limite de chamada lenta (até 50%)
+        latency = self.avg_latency
+        slow = self.config.slow_call_seconds
+        if slow > 0 and latency > slow:
+            score *= max(0.5, slow / latency)
+
+        if state == CircuitState.HALF_OPEN:
+            score = min(score, 0.5)
+
+        return round(score, 3)
+
+    def snapshot(self) -> Dict:
+        """Resumo serializável do estado do circuito"""
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "health_score": self.health_score,
+            "failure_rate": round(self.failure_rate, 3),
+            "avg_latency": round(self.avg_latency, 3),
+            "consecutive_failures": self._consecutive_failures,
+            "retry_in": round(self.retry_in(), 1),
+            "total_calls": self._total_calls,
+            "total_failures": self._total_failures,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,172 @@
+"""
+Descoberta e memorização de endpoints para adapters de APIs instáveis
+
+PolyRouter, FinFeed e Seer não têm um endpoint de mercados estável, então os
+adapters tentavam vários candidatos em sequência a cada ciclo. Um primeiro
+candidato quebrado custava um timeout por poll.
+
+EndpointDiscovery sonda os candidatos uma vez, persiste o endpoint vencedor e
+o formato da resposta (lista direta ou chave "data"/"markets") em disco, e só
+volta a sondar quando o endpoint memorizado falhar. Em regime estável é uma
+única requisição por ciclo.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+import httpx
+from config import DISCOVERY_CACHE_PATH
+
+# Chaves onde as APIs agregadas costumam colocar a lista de mercados
+SHAPE_KEYS = ("data", "markets", "results", "items")
+
+# Status que indicam problema de credencial/plano: sondar outros endpoints não adianta
+AUTH_STATUSES = (401, 403)
+
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class DiscoveredEndpoint:
+    """Endpoint vencedor e formato da resposta"""
+    endpoint: str
+    shape: str  # "list" ou a chave que contém a lista (ex: "data")
+    discovered_at: str
+    hits: int = 0
+
+
+def detect_shape(data) -> Optional[str]:
+    """Identifica onde está a lista de mercados na resposta (None se vazia)"""
+    if isinstance(data, list):
+        return "list" if data else None
+    if isinstance(data, dict):
+        for key in SHAPE_KEYS:
+            value = data.get(key)
+            if isinstance(value, list) and value:
+                return key
+    return None
+
+
+def extract_items(data, shape: str) -> List[dict]:
+    """Extrai lista de mercados usando o formato memorizado"""
+    if shape == "list":
+        return data if isinstance(data, list) else []
+    if isinstance(data, dict):
+        value = data.get(shape)
+        return value if isinstance(value, list) else []
+    return []
+
+
+def _load_cache(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache_entry(path: str, name: str, entry: Optional[dict]):
+    """Atualiza uma entrada do cache compartilhado (escrita atômica)"""
+    with _cache_lock:
+        cache = _load_cache(path)
+        if entry is None:
+            cache.pop(name, None)
+        else:
+            cache[name] = entry
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class EndpointDiscovery:
+    """Sonda endpoints candidatos uma vez e memoriza o vencedor"""
+
+    def __init__(self, name: str, candidates: Sequence[str], cache_path: str = DISCOVERY_CACHE_PATH):
+        self.name = name
+        self.candidates = list(candidates)
+        self.cache_path = cache_path
+        self.last_status: Optional[int] = None
+        self.probes = 0
+
+        entry = _load_cache(cache_path).get(name)
+        self.current: Optional[DiscoveredEndpoint] = None
+        if entry and entry.get("endpoint") in self.candidates:
+            try:
+                self.current = DiscoveredEndpoint(**entry)
+            except TypeError:
+                self.current = None
+
+    def invalidate(self):
+        """Esquece o endpoint memorizado (próxima busca sonda de novo)"""
+        if self.current is not None:
+            self.current = None
+            _save_cache_entry(self.cache_path, self.name, None)
+
+    def _remember(self, endpoint: str, shape: str):
+        self.current = DiscoveredEndpoint(endpoint, shape, datetime.now().isoformat())
+        _save_cache_entry(self.cache_path, self.name, asdict(self.current))
+
+    async def _try(self, request: Callable[[str], Awaitable[httpx.Response]], endpoint: str):
+        """Faz uma requisição; retorna (resposta JSON, status) ou (None, status)"""
+        try:
+            response = await request(endpoint)
+        except httpx.TimeoutException:
+            print(f"{self.name}: timeout no endpoint {endpoint}")
+            self.last_status = None
+            return None
+        except Exception:
+            self.last_status = None
+            return None
+
+        self.last_status = response.status_code
+        if response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    async def fetch(self, request: Callable[[str], Awaitable[httpx.Response]]) -> List[dict]:
+        """
+        Busca a lista de mercados
+
+        request recebe o endpoint (ex: "/markets") e faz a requisição HTTP.
+        Usa o endpoint memorizado; se falhar (erro, status != 200, formato
+        diferente ou lista vazia), invalida e sonda os demais candidatos.
+        """
+        failed = None
+        if self.current is not None:
+            data = await self._try(request, self.current.endpoint)
+            items = extract_items(data, self.current.shape) if data is not None else []
+            if items:
+                self.current.hits += 1
+                return items
+            if self.last_status in AUTH_STATUSES:
+                return []
+            failed = self.current.endpoint
+            print(f"{self.name}: endpoint {failed} falhou, sondando alternativas")
+            self.invalidate()
+
+        self.probes += 1
+        for endpoint in self.candidates:
+            if endpoint == failed:
+                continue
+            data = await self._try(request, endpoint)
+            if self.last_status in AUTH_STATUSES:
+                return []
+            if data is None:
+                continue
+            shape = detect_shape(data)
+            if shape is None:
+                continue
+            self._remember(endpoint, shape)
+            return extract_items(data, shape)
+
+        return []
@@ -1,7 +1,8 @@
 """Integração com FinFeedAPI - API agregada de prediction markets"""
-import httpx
 from typing import List, Dict, Optional
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
+from exchanges.discovery import EndpointDiscovery
 from datetime import datetime
 import re
 
@@ -16,6 +17,11 @@ class FinFeedExchange(ExchangeBase):
         # Alternativa: usar endpoint público se disponível
         # Nota: Pode precisar de API key
         self.api_key = None  # Configurar via .env se necessário
+        self.discovery = EndpointDiscovery(self.name, [
+            "/markets",
+            "/prediction-markets",
+            "/markets/active"
+        ])
     
     def normalize_question(self, question: str) -> str:
         """Normaliza pergunta"""
@@ -28,47 +34,27 @@ class FinFeedExchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with create_client(timeout=15.0) as client:
                 headers = {"Accept": "application/json"}
                 if self.api_key:
                     headers["Authorization"] = f"Bearer {self.api_key}"
                 
-                # Tenta diferentes endpoints
-                endpoints = [
-                    "/markets",
-                    "/prediction-markets",
-                    "/markets/active"
-                ]
+                async def request(endpoint: str):
+                    return await client.get(
+                        f"{self.base_url}{endpoint}",
+                        params={"limit": 100, "active": "true"},
+                        headers=headers
+                    )
                 
-                for endpoint in endpoints:
+                # Endpoint memorizado; sonda candidatos só na primeira vez ou após falha
+                markets_data = await self.discovery.fetch(request)
+                for market_data in markets_data:
                     try:
-                        url = f"{self.base_url}{endpoint}"
-                        params = {"limit": 100, "active": "true"}
-                        
-                        response = await client.get(url, params=params, headers=headers)
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            
-                            # FinFeedAPI pode retornar em diferentes formatos
-                            if isinstance(data, dict):
-                                markets_data = data.get("data", data.get("markets", []))
-                            else:
-                                markets_data = data if isinstance(data, list) else []
-                            
-                            if markets_data:
-                                for market_data in markets_data:
-                                    try:
-                                        market = self._parse_market(market_data)
-                                        if market:
-                                            markets.append(market)
-                                    except Exception as e:
-                                        print(f"Erro ao processar mercado FinFeed: {e}")
-                                        continue
-                            
-                            if markets:
-                                break  # Se encontrou mercados, para de tentar outros endpoints
+                        market = self._parse_market(market_data)
+                        if market:
+                            markets.append(market)
                     except Exception as e:
+                        print(f"Erro ao processar mercado FinFeed: {e}")
                         continue
                 
                 # Se não encontrou nada, tenta buscar de exchanges específicas via FinFeed
@@ -0,0 +1,166 @@
+"""
+Camada HTTP compartilhada pelos adapters
+
+Todos os adapters criam seus clientes via create_client(), o que permite
+trocar o transporte de forma transparente:
+- off: requisições reais (padrão)
+- record: faz a requisição real e grava a resposta em fixture comprimida
+- replay: responde só com fixtures gravadas, sem rede
+
+Fixtures ficam em HTTP_FIXTURE_DIR/<host>/<chave>.json.gz, onde a chave é um
+hash de método + URL (query ordenada) + corpo. Headers de autenticação não
+entram na chave, então gravações feitas com credenciais reproduzem sem elas.
+"""
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+import httpx
+from config import HTTP_FIXTURE_MODE, HTTP_FIXTURE_DIR, HTTP_FIXTURE_LATENCY
+
+FIXTURE_MODES = ("off", "record", "replay")
+
+# Headers que não fazem sentido ao reproduzir (conteúdo é gravado já decodificado)
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+
+class FixtureNotFoundError(httpx.TransportError):
+    """Requisição sem fixture gravada no modo replay"""
+
+
+def fixture_key(request: httpx.Request) -> str:
+    """Chave determinística da requisição"""
+    url = request.url
+    query = urlencode(sorted(parse_qsl(url.query.decode("ascii"), keep_blank_values=True)))
+    body = request.content or b""
+    raw = f"{request.method.upper()} {url.scheme}://{url.host}{url.path}?{query}\n".encode() + body
+    return hashlib.sha256(raw).hexdigest()[:24]
+
+
+class RecordReplayTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que grava e reproduz respostas"""
+
+    def __init__(
+        self,
+        mode: str = "replay",
+        fixture_dir: str = HTTP_FIXTURE_DIR,
+        latency_scale: float = HTTP_FIXTURE_LATENCY,
+        inner: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Modo de fixture inválido: {mode}")
+        self.mode = mode
+        self.fixture_dir = fixture_dir
+        self.latency_scale = latency_scale
+        self.inner = inner if inner is not None else httpx.AsyncHTTPTransport()
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, request: httpx.Request) -> str:
+        return os.path.join(self.fixture_dir, request.url.host or "local", f"{fixture_key(request)}.json.gz")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = self.path_for(request)
+        if self.mode == "replay":
+            return await self._replay(request, path)
+        return await self._record(request, path)
+
+    async def _replay(self, request: httpx.Request, path: str) -> httpx.Response:
+        if not os.path.exists(path):
+            self.misses += 1
+            raise FixtureNotFoundError(f"Sem fixture para {request.method} {request.url}", request=request)
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            fixture = json.load(f)
+        self.hits += 1
+
+        # Time-warp: reproduz a latência gravada escalada (0 = instantâneo)
+        if self.latency_scale > 0:
+            await asyncio.sleep(fixture.get("elapsed", 0) * self.latency_scale)
+
+        return httpx.Response(
+            status_code=fixture["status"],
+            headers=fixture.get("headers", {}),
+            content=base64.b64decode(fixture["content"]),
+            request=request
+        )
+
+    async def _record(self, request: httpx.Request, path: str) -> httpx.Response:
+        started = time.monotonic()
+        response = await self.inner.handle_async_request(request)
+        # aread() já devolve o corpo decodificado (gzip/br removidos)
+        decoded = await response.aread()
+        elapsed = time.monotonic() - started
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        fixture = {
+            "method": request.method,
+            "url": str(request.url),
+            "status": response.status_code,
+            "headers": headers,
+            "elapsed": round(elapsed, 4),
+            "content": base64.b64encode(decoded).decode("ascii")
+        }
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(fixture, f)
+        os.replace(tmp_path, path)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=decoded,
+            request=request
+        )
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class RateLimiter:
+    """Limita o início de requisições a `rate` por segundo (compartilhável entre tasks)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        if self.interval <= 0:
+            return
+        # Reserva o próximo slot sem await no meio (atômico no event loop)
+        now = time.monotonic()
+        wait = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def create_transport(mode: str = HTTP_FIXTURE_MODE, fixture_dir: str = HTTP_FIXTURE_DIR) -> Optional[httpx.AsyncBaseTransport]:
+    """Transporte de acordo com o modo de fixture (None = padrão do httpx)"""
+    if mode not in FIXTURE_MODES:
+        raise ValueError(f"HTTP_FIXTURE_MODE deve ser um de {FIXTURE_MODES}, recebido: {mode}")
+    if mode == "off":
+        return None
+    return RecordReplayTransport(mode=mode, fixture_dir=fixture_dir)
+
+
+def create_client(timeout: float = 15.0, **kwargs) -> httpx.AsyncClient:
+    """Cria AsyncClient usado pelos adapters (respeita HTTP_FIXTURE_MODE)"""
+    transport = create_transport()
+    if transport is not None:
+        kwargs.setdefault("transport", transport)
+    return httpx.AsyncClient(timeout=timeout, **kwargs)
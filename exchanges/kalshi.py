@@ -1,7 +1,7 @@
 """Integração com Kalshi"""
-import httpx
 from typing import List
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
 from datetime import datetime
 import re
 
@@ -25,7 +25,7 @@ class KalshiExchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with create_client(timeout=15.0) as client:
                 # Kalshi API - busca eventos ativos
                 url = f"{self.base_url}/events"
                 params = {
@@ -6,8 +6,11 @@ Documentacao: https://docs.kalshi.com/welcome
 Kalshi e uma exchange regulada pela CFTC para prediction markets
 """
 import httpx
-from typing import List, Optional
+from typing import Dict, List, Optional
 from exchanges.base import ExchangeBase, Market
+from exchanges.orderbook import OrderBook
+from exchanges.http_client import create_client
+from config import KALSHI_BASE_URL
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -24,11 +27,13 @@ class KalshiV2Exchange(ExchangeBase):
     - Dados de mercado em tempo real
     - Order books detalhados
     - Execucao de trades (via API key)
-    - WebSocket para streaming
+    - WebSocket para streaming (ver exchanges.streaming.KalshiStream)
     
     Documentacao: https://docs.kalshi.com/
     """
     
+    supports_orderbooks = True
+    
     def __init__(self):
         super().__init__("kalshi")
         # API de producao
@@ -39,6 +44,9 @@ class KalshiV2Exchange(ExchangeBase):
         # Usa demo por padrao (mais seguro para testes)
         self.use_demo = os.getenv("KALSHI_USE_DEMO", "true").lower() == "true"
         self.api_url = self.demo_url if self.use_demo else self.base_url
+        if KALSHI_BASE_URL:
+            # Override explícito (ex: servidor fake local)
+            self.api_url = KALSHI_BASE_URL
         
         # API credentials (opcional para dados publicos)
         self.api_key = os.getenv("KALSHI_API_KEY")
@@ -62,7 +70,7 @@ class KalshiV2Exchange(ExchangeBase):
             return False
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with create_client(timeout=10.0) as client:
                 response = await client.post(
                     f"{self.api_url}/login",
                     json={
@@ -102,7 +110,7 @@ class KalshiV2Exchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
+            async with create_client(timeout=20.0) as client:
                 # Endpoint de mercados
                 url = f"{self.api_url}/markets"
                 
@@ -311,7 +319,7 @@ class KalshiV2Exchange(ExchangeBase):
         - Determinar tamanho maximo de trade
         """
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with create_client(timeout=10.0) as client:
                 url = f"{self.api_url}/markets/{ticker}/orderbook"
                 response = await client.get(url, headers=self._get_headers())
                 
@@ -321,3 +329,42 @@ class KalshiV2Exchange(ExchangeBase):
             print(f"Erro ao buscar orderbook: {e}")
         
         return None
+    
+    def orderbook_key(self, market: Market) -> Optional[str]:
+        """YES e NO de um ticker compartilham o mesmo book"""
+        return market.market_id.rsplit("_", 1)[0]
+    
+    async def fetch_orderbook(self, market: Market, client: httpx.AsyncClient) -> Dict[str, OrderBook]:
+        """Busca book do ticker e normaliza para os outcomes YES e NO"""
+        ticker = self.orderbook_key(market)
+        response = await client.get(f"{self.api_url}/markets/{ticker}/orderbook", headers=self._get_headers())
+        response.raise_for_status()
+        return self.parse_orderbook(ticker, response.json())
+    
+    def parse_orderbook(self, ticker: str, data: dict) -> Dict[str, OrderBook]:
+        """
+        Converte resposta do /orderbook em OrderBooks
+        
+        A Kalshi só publica bids dos dois lados: [preço, quantidade] em centavos
+        (ou *_dollars em decimal). O ask de YES a p é o bid de NO a 1 - p.
+        """
+        book = (data or {}).get("orderbook") or {}
+        
+        def levels(side: str) -> List[tuple]:
+            if book.get(f"{side}_dollars"):
+                return [(float(price), float(size)) for price, size in book[f"{side}_dollars"]]
+            return [(float(price) / 100.0, float(size)) for price, size in (book.get(side) or [])]
+        
+        yes_bids = levels("yes")
+        no_bids = levels("no")
+        
+        yes_book = OrderBook.from_levels(
+            f"{ticker}_YES",
+            self.name,
+            bids=yes_bids,
+            asks=[(round(1.0 - price, 6), size) for price, size in no_bids]
+        )
+        return {
+            yes_book.market_id: yes_book,
+            f"{ticker}_NO": yes_book.mirrored(f"{ticker}_NO")
+        }
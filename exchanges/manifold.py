@@ -1,7 +1,8 @@
 """Integração com Manifold Markets"""
-import httpx
 from typing import List
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
+from config import MANIFOLD_BASE_URL
 from datetime import datetime
 import re
 
@@ -11,7 +12,7 @@ class ManifoldExchange(ExchangeBase):
     
     def __init__(self):
         super().__init__("manifold")
-        self.base_url = "https://api.manifold.markets/v0"
+        self.base_url = MANIFOLD_BASE_URL or "https://api.manifold.markets/v0"
     
     def normalize_question(self, question: str) -> str:
         """Normaliza pergunta"""
@@ -24,7 +25,7 @@ class ManifoldExchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with create_client(timeout=15.0) as client:
                 # Manifold API - busca mercados
                 url = f"{self.base_url}/markets"
                 params = {
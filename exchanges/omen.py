@@ -1,7 +1,8 @@
 """Integração com Omen (Gnosis) - Prediction markets descentralizado"""
-import httpx
 from typing import List
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
+from exchanges.subgraph import SubgraphPaginator, SubgraphSnapshot, hex_shards
 from datetime import datetime
 import re
 
@@ -14,6 +15,31 @@ class OmenExchange(ExchangeBase):
         # Omen usa The Graph na Gnosis Chain
         self.base_url = "https://api.thegraph.com/subgraphs/name/protofire/omen-xdai"
         
+        # IDs são endereços de contrato: shards por prefixo hex em paralelo
+        self.paginator = SubgraphPaginator(
+            self.base_url,
+            entity="fixedProductMarketMakers",
+            filter_type="FixedProductMarketMaker_filter",
+            fields=[
+                "id",
+                "title",
+                "outcomes",
+                "outcomeTokenMarginalPrices",
+                "outcomeTokenAmounts",
+                "collateralVolume",
+                "liquidityParameter",
+                "answerFinalizedTimestamp",
+            ],
+            where={"answerFinalizedTimestamp": None},
+            shards=hex_shards(4),
+            changed_field="lastActiveDay",
+            changed_value=lambda ts: int(ts // 86400)  # lastActiveDay = dias desde epoch
+        )
+        self.snapshot = SubgraphSnapshot(
+            self.paginator,
+            is_active=lambda fpmm: fpmm.get("answerFinalizedTimestamp") is None
+        )
+        
     def normalize_question(self, question: str) -> str:
         """Normaliza pergunta"""
         normalized = re.sub(r'[^\w\s]', '', question.lower())
@@ -21,110 +47,77 @@ class OmenExchange(ExchangeBase):
         return normalized
     
     async def fetch_markets(self) -> List[Market]:
-        """Busca mercados ativos do Omen"""
+        """Busca mercados ativos do Omen (paginado, incremental entre ciclos)"""
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # GraphQL query para mercados ativos
-                query = """
-                {
-                  fixedProductMarketMakers(
-                    first: 100
-                    orderBy: creationTimestamp
-                    orderDirection: desc
-                    where: {
-                      answerFinalizedTimestamp: null
-                    }
-                  ) {
-                    id
-                    question {
-                      id
-                      title
-                      outcomes
-                      answerFinalizedTimestamp
-                    }
-                    outcomeTokenAmounts
-                    collateralVolume
-                    liquidityParameter
-                    openingTimestamp
-                  }
-                }
-                """
-                
-                response = await client.post(
-                    self.base_url,
-                    json={"query": query},
-                    headers={"Content-Type": "application/json"},
-                    timeout=15.0
-                )
-                
-                if response.status_code != 200:
-                    return markets
-                
-                data = response.json()
-                fpmms = data.get("data", {}).get("fixedProductMarketMakers", [])
-                
-                for fpmm in fpmms:
-                    try:
-                        market_id = fpmm.get("id", "")
-                        question_data = fpmm.get("question", {})
-                        
-                        if not question_data:
-                            continue
-                        
-                        question = question_data.get("title", "")
-                        outcomes = question_data.get("outcomes", [])
-                        
-                        if not question or not outcomes:
-                            continue
-                        
-                        # Volumes e liquidez
-                        volume = float(fpmm.get("collateralVolume", 0) or 0)
-                        liquidity = float(fpmm.get("liquidityParameter", 0) or 0)
-                        
-                        # Amounts para cada outcome (usado para calcular probabilidade)
-                        amounts = fpmm.get("outcomeTokenAmounts", [])
-                        
-                        # Cria mercado para cada outcome
-                        for i, outcome_name in enumerate(outcomes):
-                            try:
-                                # Calcula probabilidade baseada nos amounts
-                                if amounts and len(amounts) > i:
-                                    total = sum(float(a) for a in amounts if a)
-                                    if total > 0:
-                                        price = float(amounts[i]) / total
-                                    else:
-                                        price = 1.0 / len(outcomes)
-                                else:
-                                    price = 1.0 / len(outcomes)
-                                
-                                # Pula mercados com certeza absoluta
-                                if price >= 0.99 or price <= 0.01:
-                                    continue
-                                
-                                # Normaliza outcome
-                                outcome = "YES" if "yes" in outcome_name.lower() else "NO"
-                                
-                                market = Market(
-                                    exchange=self.name,
-                                    market_id=f"{market_id}_{i}",
-                                    question=question,
-                                    outcome=outcome,
-                                    price=price,
-                                    volume_24h=volume / 7,  # Estimativa diária
-                                    liquidity=liquidity,
-                                    expires_at=None,  # Omen não expõe facilmente
-                                    url=f"https://omen.eth.limo/#/{market_id}"
-                                )
-                                markets.append(market)
-                            except Exception as e:
-                                continue
-                    except Exception as e:
-                        continue
+            async with create_client(timeout=15.0) as client:
+                fpmms = await self.snapshot.refresh(client)
+            
+            for fpmm in fpmms:
+                try:
+                    markets.extend(self._parse_fpmm(fpmm))
+                except Exception as e:
+                    continue
         
         except Exception as e:
             print(f"Erro ao buscar mercados do Omen: {e}")
         
         return markets
-
+    
+    def _parse_fpmm(self, fpmm: dict) -> List[Market]:
+        """Converte um FixedProductMarketMaker em mercados (um por outcome)"""
+        markets = []
+        market_id = fpmm.get("id", "")
+        question = fpmm.get("title", "")
+        outcomes = fpmm.get("outcomes") or []
+        
+        if not question or not outcomes:
+            return markets
+        
+        # Volumes e liquidez
+        volume = float(fpmm.get("collateralVolume", 0) or 0)
+        liquidity = float(fpmm.get("liquidityParameter", 0) or 0)
+        
+        # Preço marginal do AMM; amounts só como fallback
+        marginal_prices = fpmm.get("outcomeTokenMarginalPrices") or []
+        amounts = fpmm.get("outcomeTokenAmounts", [])
+        
+        # Cria mercado para cada outcome
+        for i, outcome_name in enumerate(outcomes):
+            try:
+                if len(marginal_prices) > i and marginal_prices[i] is not None:
+                    price = float(marginal_prices[i])
+                # Calcula probabilidade baseada nos amounts
+                elif amounts and len(amounts) > i:
+                    total = sum(float(a) for a in amounts if a)
+                    if total > 0:
+                        price = float(amounts[i]) / total
+                    else:
+                        price = 1.0 / len(outcomes)
+                else:
+                    price = 1.0 / len(outcomes)
+                
+                # Pula mercados com certeza absoluta
+                if price >= 0.99 or price <= 0.01:
+                    continue
+                
+                # Normaliza outcome
+                outcome = "YES" if "yes" in outcome_name.lower() else "NO"
+                
+                market = Market(
+                    exchange=self.name,
+                    market_id=f"{market_id}_{i}",
+                    question=question,
+                    outcome=outcome,
+                    price=price,
+                    volume_24h=volume / 7,  # Estimativa diária
+                    liquidity=liquidity,
+                    expires_at=None,  # Omen não expõe facilmente
+                    url=f"https://omen.eth.limo/#/{market_id}"
+                )
+                markets.append(market)
+            except Exception as e:
+                continue
+        
+        return markets
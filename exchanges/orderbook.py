@@ -1,7 +1,8 @@
 """Suporte a order books para análise de liquidez real"""
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+import numpy as np
 
 
 @dataclass
@@ -22,6 +23,72 @@ class OrderBook:
     asks: List[Order]  # Ordens de venda (ordem crescente de preço)
     last_update: Optional[datetime] = None
     
+    @classmethod
+    def from_levels(
+        cls,
+        market_id: str,
+        exchange: str,
+        bids: Iterable[Tuple[float, float]],
+        asks: Iterable[Tuple[float, float]],
+        timestamp: Optional[datetime] = None
+    ) -> "OrderBook":
+        """Cria book a partir de níveis (preço, tamanho) em qualquer ordem"""
+        timestamp = timestamp or datetime.now()
+        return cls(
+            market_id=market_id,
+            exchange=exchange,
+            bids=[Order(p, s, "buy", timestamp) for p, s in sorted(bids, key=lambda l: -l[0]) if s > 0],
+            asks=[Order(p, s, "sell", timestamp) for p, s in sorted(asks, key=lambda l: l[0]) if s > 0],
+            last_update=timestamp
+        )
+    
+    def mirrored(self, market_id: str) -> "OrderBook":
+        """
+        Book do outcome complementar (YES <-> NO)
+        
+        Comprar NO a p equivale a vender YES a 1 - p: bids viram asks e vice-versa.
+        """
+        return OrderBook.from_levels(
+            market_id,
+            self.exchange,
+            bids=[(round(1.0 - o.price, 6), o.size) for o in self.asks],
+            asks=[(round(1.0 - o.price, 6), o.size) for o in self.bids],
+            timestamp=self.last_update
+        )
+    
+    def average_buy_price(self, amount: float) -> Optional[float]:
+        """
+        Preço médio para comprar `amount` USD consumindo os asks
+        
+        Retorna None se não há profundidade suficiente.
+        """
+        remaining = amount
+        shares = 0.0
+        for order in self.asks:
+            cost = order.price * order.size
+            if cost >= remaining:
+                shares += remaining / order.price
+                return amount / shares
+            remaining -= cost
+            shares += order.size
+        return None
+    
+    def average_sell_price(self, shares: float) -> Optional[float]:
+        """
+        Preço médio para vender `shares` consumindo os bids
+        
+        Retorna None se não há profundidade suficiente.
+        """
+        remaining = shares
+        revenue = 0.0
+        for order in self.bids:
+            filled = min(order.size, remaining)
+            revenue += filled * order.price
+            remaining -= filled
+            if remaining <= 0:
+                return revenue / shares
+        return None
+    
     def get_best_bid(self) -> Optional[Order]:
         """Retorna melhor oferta de compra"""
         return self.bids[0] if self.bids else None
@@ -65,3 +132,271 @@ class OrderBook:
         
         return total
 
+    
+    def to_array(self) -> "ArrayOrderBook":
+        """Converte para representação em arrays (consultas em O(log n))"""
+        return ArrayOrderBook.from_orderbook(self)
+
+
+class _BookSide:
+    """
+    Um lado do book em arrays contíguos, do melhor preço para o pior
+    
+    `keys` é sempre crescente (preço para asks, -preço para bids) para permitir
+    busca binária; cum_size/cum_notional são somas acumuladas a partir do topo.
+    """
+    
+    def __init__(self, prices, sizes, is_bid: bool):
+        self.is_bid = is_bid
+        prices = np.asarray(prices, dtype=np.float64)
+        sizes = np.asarray(sizes, dtype=np.float64)
+        mask = sizes > 0
+        prices, sizes = prices[mask], sizes[mask]
+        order = np.argsort(-prices if is_bid else prices, kind="stable")
+        self.prices = prices[order]
+        self.sizes = sizes[order]
+        self._rebuild_cumulative()
+    
+    def _rebuild_cumulative(self):
+        self.cum_size = np.cumsum(self.sizes)
+        self.cum_notional = np.cumsum(self.prices * self.sizes)
+    
+    @property
+    def keys(self) -> np.ndarray:
+        return -self.prices if self.is_bid else self.prices
+    
+    def __len__(self) -> int:
+        return len(self.prices)
+    
+    @property
+    def total_size(self) -> float:
+        return float(self.cum_size[-1]) if len(self.cum_size) else 0.0
+    
+    @property
+    def total_notional(self) -> float:
+        return float(self.cum_notional[-1]) if len(self.cum_notional) else 0.0
+    
+    def cost_to_fill(self, size: float) -> Optional[float]:
+        """Custo (notional) para consumir `size` a partir do topo; None sem profundidade"""
+        if size <= 0:
+            return 0.0
+        if size > self.total_size + 1e-12:
+            return None
+        idx = int(np.searchsorted(self.cum_size, size, side="left"))
+        idx = min(idx, len(self.prices) - 1)
+        before_size = self.cum_size[idx - 1] if idx > 0 else 0.0
+        before_notional = self.cum_notional[idx - 1] if idx > 0 else 0.0
+        return float(before_notional + (size - before_size) * self.prices[idx])
+    
+    def size_for_notional(self, notional: float) -> Optional[float]:
+        """Quantidade obtida gastando/recebendo `notional`; None sem profundidade"""
+        if notional <= 0:
+            return 0.0
+        if notional > self.total_notional + 1e-9:
+            return None
+        idx = int(np.searchsorted(self.cum_notional, notional, side="left"))
+        idx = min(idx, len(self.prices) - 1)
+        before_size = self.cum_size[idx - 1] if idx > 0 else 0.0
+        before_notional = self.cum_notional[idx - 1] if idx > 0 else 0.0
+        return float(before_size + (notional - before_notional) / self.prices[idx])
+    
+    def size_up_to(self, price: float) -> float:
+        """Quantidade em níveis iguais ou melhores que `price`"""
+        key = -price if self.is_bid else price
+        idx = int(np.searchsorted(self.keys, key, side="right"))
+        return float(self.cum_size[idx - 1]) if idx > 0 else 0.0
+    
+    def size_at(self, price: float) -> float:
+        """Quantidade no nível exato `price` (0 se não existir)"""
+        key = -price if self.is_bid else price
+        keys = self.keys
+        idx = int(np.searchsorted(keys, key, side="left"))
+        if idx < len(keys) and abs(keys[idx] - key) < 1e-12:
+            return float(self.sizes[idx])
+        return 0.0
+    
+    def set_level(self, price: float, size: float):
+        """
+        Insere, altera ou remove (size <= 0) um nível
+        
+        Desloca os arrays e ajusta as somas acumuladas só a partir do nível
+        alterado, sem reordenar nem recalcular o book inteiro.
+        """
+        keys = self.keys
+        key = -price if self.is_bid else price
+        idx = int(np.searchsorted(keys, key, side="left"))
+        exists = idx < len(keys) and abs(keys[idx] - key) < 1e-12
+        
+        if exists:
+            delta = (size if size > 0 else 0.0) - self.sizes[idx]
+            if size > 0:
+                self.sizes[idx] = size
+                self.cum_size[idx:] += delta
+                self.cum_notional[idx:] += delta * price
+            else:
+                self.prices = np.delete(self.prices, idx)
+                self.sizes = np.delete(self.sizes, idx)
+                self.cum_size = np.delete(self.cum_size, idx)
+                self.cum_notional = np.delete(self.cum_notional, idx)
+                self.cum_size[idx:] += delta
+                self.cum_notional[idx:] += delta * price
+        elif size > 0:
+            before_size = self.cum_size[idx - 1] if idx > 0 else 0.0
+            before_notional = self.cum_notional[idx - 1] if idx > 0 else 0.0
+            self.prices = np.insert(self.prices, idx, price)
+            self.sizes = np.insert(self.sizes, idx, size)
+            self.cum_size = np.insert(self.cum_size, idx, before_size + size)
+            self.cum_notional = np.insert(self.cum_notional, idx, before_notional + size * price)
+            self.cum_size[idx + 1:] += size
+            self.cum_notional[idx + 1:] += size * price
+    
+    def orders(self, side: str, timestamp: Optional[datetime]) -> List[Order]:
+        return [Order(float(p), float(s), side, timestamp) for p, s in zip(self.prices, self.sizes)]
+
+
+class ArrayOrderBook:
+    """
+    Order book com níveis em arrays NumPy e profundidade acumulada
+    
+    Alternativa ao OrderBook de dataclasses para consultas repetidas: custo de
+    execução, quantidade até um preço e VWAP saem por busca binária sobre as
+    somas acumuladas. Mesma interface de leitura do OrderBook (get_best_bid,
+    get_mid_price, average_buy_price, ...), então as engines aceitam os dois.
+    
+    Convenção de lado nas consultas de execução: "buy" = comprar consumindo
+    asks; "sell" = vender consumindo bids.
+    """
+    
+    def __init__(
+        self,
+        market_id: str,
+        exchange: str,
+        bid_prices=(),
+        bid_sizes=(),
+        ask_prices=(),
+        ask_sizes=(),
+        last_update: Optional[datetime] = None
+    ):
+        self.market_id = market_id
+        self.exchange = exchange
+        self._bids = _BookSide(bid_prices, bid_sizes, is_bid=True)
+        self._asks = _BookSide(ask_prices, ask_sizes, is_bid=False)
+        self.last_update = last_update or datetime.now()
+    
+    @classmethod
+    def from_orderbook(cls, book: OrderBook) -> "ArrayOrderBook":
+        return cls(
+            book.market_id,
+            book.exchange,
+            [o.price for o in book.bids], [o.size for o in book.bids],
+            [o.price for o in book.asks], [o.size for o in book.asks],
+            last_update=book.last_update
+        )
+    
+    def to_orderbook(self) -> OrderBook:
+        return OrderBook(self.market_id, self.exchange, self.bids, self.asks, self.last_update)
+    
+    def _side(self, side: str) -> _BookSide:
+        if side not in ("buy", "sell"):
+            raise ValueError(f"Lado inválido: {side}")
+        return self._asks if side == "buy" else self._bids
+    
+    # --- Interface compatível com OrderBook ---
+    
+    @property
+    def bids(self) -> List[Order]:
+        return self._bids.orders("buy", self.last_update)
+    
+    @property
+    def asks(self) -> List[Order]:
+        return self._asks.orders("sell", self.last_update)
+    
+    def get_best_bid(self) -> Optional[Order]:
+        if not len(self._bids):
+            return None
+        return Order(float(self._bids.prices[0]), float(self._bids.sizes[0]), "buy", self.last_update)
+    
+    def get_best_ask(self) -> Optional[Order]:
+        if not len(self._asks):
+            return None
+        return Order(float(self._asks.prices[0]), float(self._asks.sizes[0]), "sell", self.last_update)
+    
+    def get_mid_price(self) -> Optional[float]:
+        best_bid = self.get_best_bid()
+        best_ask = self.get_best_ask()
+        if best_bid and best_ask:
+            return (best_bid.price + best_ask.price) / 2.0
+        if best_bid:
+            return best_bid.price
+        if best_ask:
+            return best_ask.price
+        return None
+    
+    def get_spread(self) -> Optional[float]:
+        best_bid = self.get_best_bid()
+        best_ask = self.get_best_ask()
+        if best_bid and best_ask:
+            return best_ask.price - best_bid.price
+        return None
+    
+    def get_liquidity_at_price(self, price: float, side: str) -> float:
+        """Mesma semântica do OrderBook: side é o lado das ordens no book"""
+        return (self._bids if side == "buy" else self._asks).size_up_to(price)
+    
+    def average_buy_price(self, amount: float) -> Optional[float]:
+        """Preço médio para comprar `amount` USD (None sem profundidade)"""
+        shares = self._asks.size_for_notional(amount)
+        return amount / shares if shares else None
+    
+    def average_sell_price(self, shares: float) -> Optional[float]:
+        """Preço médio para vender `shares` (None sem profundidade)"""
+        revenue = self._bids.cost_to_fill(shares)
+        return revenue / shares if revenue and shares > 0 else None
+    
+    # --- Consultas de profundidade ---
+    
+    def cost_to_fill(self, size: float, side: str = "buy") -> Optional[float]:
+        """Custo para comprar (ou receita para vender) `size` contratos"""
+        return self._side(side).cost_to_fill(size)
+    
+    def size_available_up_to(self, price: float, side: str = "buy") -> float:
+        """Contratos executáveis sem passar de `price` (máximo ao comprar, mínimo ao vender)"""
+        return self._side(side).size_up_to(price)
+    
+    def vwap(self, size: float, side: str = "buy") -> Optional[float]:
+        """Preço médio ponderado para executar `size` contratos"""
+        if size <= 0:
+            return None
+        cost = self.cost_to_fill(size, side)
+        return cost / size if cost is not None else None
+    
+    def depth(self, side: str = "buy") -> float:
+        """Total de contratos disponíveis no lado"""
+        return self._side(side).total_size
+    
+    def depth_curve(self, side: str = "buy") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (contratos acumulados, notional acumulado) a partir do topo, com 0 na frente
+        
+        Custo/receita de executar q contratos é a interpolação linear da curva.
+        """
+        book_side = self._side(side)
+        return (np.concatenate(([0.0], book_side.cum_size)),
+                np.concatenate(([0.0], book_side.cum_notional)))
+    
+    # --- Atualização incremental ---
+    
+    def update_level(self, side: str, price: float, size: float, timestamp: Optional[datetime] = None):
+        """
+        Aplica um nível do book (side = "bid" ou "ask"; size 0 remove o nível)
+        """
+        if side not in ("bid", "ask"):
+            raise ValueError(f"Lado inválido: {side}")
+        (self._bids if side == "bid" else self._asks).set_level(price, size)
+        self.last_update = timestamp or datetime.now()
+    
+    def size_at(self, side: str, price: float) -> float:
+        """Quantidade no nível exato (side = "bid" ou "ask")"""
+        if side not in ("bid", "ask"):
+            raise ValueError(f"Lado inválido: {side}")
+        return (self._bids if side == "bid" else self._asks).size_at(price)
@@ -1,8 +1,10 @@
 """Integração com Polymarket"""
-import httpx
 import asyncio
-from typing import List
+from typing import List, Dict, Optional
 from exchanges.base import ExchangeBase, Market
+from exchanges.orderbook import OrderBook
+from exchanges.http_client import create_client
+from config import POLYMARKET_BASE_URL
 from datetime import datetime
 import re
 
@@ -10,9 +12,13 @@ import re
 class PolymarketExchange(ExchangeBase):
     """Cliente para Polymarket API"""
     
+    supports_orderbooks = True
+    
     def __init__(self):
         super().__init__("polymarket")
-        self.base_url = "https://clob.polymarket.com"
+        self.base_url = POLYMARKET_BASE_URL or "https://clob.polymarket.com"
+        # market_id -> token_id do CLOB (usado por streaming e order books)
+        self.token_ids: Dict[str, str] = {}
     
     def normalize_question(self, question: str) -> str:
         """Normaliza pergunta removendo caracteres especiais e lowercase"""
@@ -28,7 +34,7 @@ class PolymarketExchange(ExchangeBase):
         max_pages = 5  # Limita a 5 páginas (5000 mercados) para não demorar muito
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with create_client(timeout=30.0) as client:
                 # Polymarket API v2 - busca mercados ativos
                 url = f"{self.base_url}/markets"
                 
@@ -213,6 +219,10 @@ class PolymarketExchange(ExchangeBase):
                                             url=market_url
                                         )
                                         markets.append(market)
+                                        
+                                        token_id = token_data.get("token_id") if isinstance(token_data, dict) else None
+                                        if token_id:
+                                            self.token_ids[market.market_id] = str(token_id)
                             except Exception as e:
                                 # Silencia erros individuais para não poluir logs
                                 continue
@@ -233,4 +243,23 @@ class PolymarketExchange(ExchangeBase):
         
         print(f"Polymarket: Total de {len(markets)} mercados encontrados")
         return markets
-
+    
+    def orderbook_key(self, market: Market) -> Optional[str]:
+        """Book do CLOB é por token (preenchido em fetch_markets)"""
+        return self.token_ids.get(market.market_id)
+    
+    async def fetch_orderbook(self, market: Market, client) -> Dict[str, OrderBook]:
+        """Busca book do token no CLOB (GET /book)"""
+        token_id = self.orderbook_key(market)
+        if not token_id:
+            return {}
+        response = await client.get(f"{self.base_url}/book", params={"token_id": token_id})
+        response.raise_for_status()
+        data = response.json()
+        book = OrderBook.from_levels(
+            market.market_id,
+            self.name,
+            bids=[(float(level["price"]), float(level["size"])) for level in data.get("bids", [])],
+            asks=[(float(level["price"]), float(level["size"])) for level in data.get("asks", [])]
+        )
+        return {market.market_id: book}
@@ -1,7 +1,10 @@
 """Integração com PolyRouter - API unificada para múltiplos prediction markets"""
 import httpx
-from typing import List, Optional
+from typing import Dict, List, Optional
 from exchanges.base import ExchangeBase, Market
+from exchanges.orderbook import OrderBook
+from exchanges.http_client import create_client
+from exchanges.discovery import EndpointDiscovery
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -22,10 +25,19 @@ class PolyRouterExchange(ExchangeBase):
     - Histórico de preços
     """
     
+    supports_orderbooks = True
+    
     def __init__(self):
         super().__init__("polyrouter")
         self.base_url = "https://api.polyrouter.io/v1"
         self.api_key = os.getenv("POLYROUTER_API_KEY")
+        # Endpoint de mercados agregados (descoberto e memorizado)
+        self.discovery = EndpointDiscovery(self.name, [
+            "/markets",
+            "/markets/active",
+            "/aggregated/markets",
+            "/v1/markets"
+        ])
         
         if not self.api_key:
             print("⚠️  POLYROUTER_API_KEY não encontrada no .env")
@@ -52,70 +64,38 @@ class PolyRouterExchange(ExchangeBase):
             return markets
         
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
+            async with create_client(timeout=20.0) as client:
                 headers = {
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json"
                 }
+                params = {
+                    "status": "active",
+                    "limit": 200,
+                    "include_orderbook": True,
+                    "include_liquidity": True
+                }
                 
-                # Endpoint de mercados agregados
-                endpoints_to_try = [
-                    "/markets",
-                    "/markets/active",
-                    "/aggregated/markets",
-                    "/v1/markets"
-                ]
+                async def request(endpoint: str) -> httpx.Response:
+                    return await client.get(f"{self.base_url}{endpoint}", headers=headers, params=params)
+                
+                # Endpoint memorizado; sonda candidatos só na primeira vez ou após falha
+                markets_data = await self.discovery.fetch(request)
                 
-                for endpoint in endpoints_to_try:
+                if self.discovery.last_status == 401:
+                    print("❌ PolyRouter: API Key inválida")
+                    return markets
+                if self.discovery.last_status == 403:
+                    print("❌ PolyRouter: Acesso negado - verificar plano")
+                    return markets
+                
+                if markets_data:
+                    print(f"✓ PolyRouter: {len(markets_data)} mercados agregados")
+                
+                for market_data in markets_data:
                     try:
-                        url = f"{self.base_url}{endpoint}"
-                        params = {
-                            "status": "active",
-                            "limit": 200,
-                            "include_orderbook": True,
-                            "include_liquidity": True
-                        }
-                        
-                        response = await client.get(
-                            url,
-                            headers=headers,
-                            params=params
-                        )
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            
-                            # PolyRouter pode retornar em diferentes formatos
-                            if isinstance(data, dict):
-                                markets_data = data.get("data", data.get("markets", []))
-                            else:
-                                markets_data = data if isinstance(data, list) else []
-                            
-                            if not markets_data:
-                                continue
-                            
-                            print(f"✓ PolyRouter: {len(markets_data)} mercados agregados")
-                            
-                            for market_data in markets_data:
-                                try:
-                                    parsed_markets = self._parse_market(market_data)
-                                    markets.extend(parsed_markets)
-                                except Exception as e:
-                                    continue
-                            
-                            if markets:
-                                break  # Sucesso, para de tentar outros endpoints
-                                
-                        elif response.status_code == 401:
-                            print("❌ PolyRouter: API Key inválida")
-                            return markets
-                        elif response.status_code == 403:
-                            print("❌ PolyRouter: Acesso negado - verificar plano")
-                            return markets
-                            
-                    except httpx.TimeoutException:
-                        print(f"⏱️  PolyRouter timeout no endpoint {endpoint}")
-                        continue
+                        parsed_markets = self._parse_market(market_data)
+                        markets.extend(parsed_markets)
                     except Exception as e:
                         continue
         
@@ -237,7 +217,7 @@ class PolyRouterExchange(ExchangeBase):
             return None
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with create_client(timeout=10.0) as client:
                 headers = {
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json"
@@ -253,4 +233,39 @@ class PolyRouterExchange(ExchangeBase):
             print(f"Erro ao buscar orderbook: {e}")
         
         return None
-
+    
+    def orderbook_key(self, market: Market) -> Optional[str]:
+        """Book é do mercado (YES); NO é o espelho"""
+        if not self.api_key:
+            return None
+        return market.market_id.rsplit("_", 1)[0]
+    
+    async def fetch_orderbook(self, market: Market, client: httpx.AsyncClient) -> Dict[str, OrderBook]:
+        """Busca book do mercado e normaliza para YES e NO"""
+        market_id = self.orderbook_key(market)
+        if not market_id:
+            return {}
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        response = await client.get(f"{self.base_url}/markets/{market_id}/orderbook", headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        book = data.get("orderbook", data) if isinstance(data, dict) else {}
+        
+        def levels(side: str) -> List[tuple]:
+            parsed = []
+            for level in book.get(side) or []:
+                if isinstance(level, dict):
+                    parsed.append((float(level.get("price", 0)), float(level.get("size", level.get("quantity", 0)))))
+                elif isinstance(level, (list, tuple)) and len(level) >= 2:
+                    parsed.append((float(level[0]), float(level[1])))
+            return parsed
+        
+        exchange = market.exchange
+        yes_book = OrderBook.from_levels(f"{market_id}_YES", exchange, bids=levels("bids"), asks=levels("asks"))
+        return {
+            yes_book.market_id: yes_book,
+            f"{market_id}_NO": yes_book.mirrored(f"{market_id}_NO")
+        }
@@ -1,7 +1,7 @@
 ﻿"""Integração com PredictIt"""
-import httpx
 from typing import List
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
 from datetime import datetime
 import re
 
@@ -24,7 +24,7 @@ class PredictItExchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with create_client(timeout=10.0) as client:
                 # PredictIt pode precisar de headers específicos
                 headers = {
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -3,9 +3,10 @@
 Integracao com PredictIt API
 API Endpoint: https://www.predictit.org/api/marketdata/all/
 """
-import httpx
 from typing import List
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
+from config import PREDICTIT_BASE_URL
 from datetime import datetime
 import re
 
@@ -20,7 +21,7 @@ class PredictItV2Exchange(ExchangeBase):
     
     def __init__(self):
         super().__init__("predictit")
-        self.base_url = "https://www.predictit.org/api/marketdata"
+        self.base_url = PREDICTIT_BASE_URL or "https://www.predictit.org/api/marketdata"
     
     def normalize_question(self, question: str) -> str:
         """Normaliza pergunta"""
@@ -37,7 +38,7 @@ class PredictItV2Exchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
+            async with create_client(timeout=20.0) as client:
                 url = f"{self.base_url}/all/"
                 
                 response = await client.get(
@@ -1,7 +1,8 @@
 """Integração com Seer - Prediction markets na Gnosis Chain"""
-import httpx
 from typing import List
 from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import create_client
+from exchanges.discovery import EndpointDiscovery
 from datetime import datetime
 import re
 
@@ -13,6 +14,7 @@ class SeerExchange(ExchangeBase):
         super().__init__("seer")
         # API pública do Seer
         self.base_url = "https://api.seer.pm/v1"
+        self.discovery = EndpointDiscovery(self.name, ["/markets", "/markets/active"])
         
     def normalize_question(self, question: str) -> str:
         """Normaliza pergunta"""
@@ -25,66 +27,56 @@ class SeerExchange(ExchangeBase):
         markets = []
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Tenta diferentes endpoints
-                endpoints = ["/markets", "/markets/active"]
+            async with create_client(timeout=15.0) as client:
+                async def request(endpoint: str):
+                    return await client.get(
+                        f"{self.base_url}{endpoint}",
+                        params={"status": "open", "limit": 100},
+                        headers={"Accept": "application/json"}
+                    )
                 
-                for endpoint in endpoints:
+                # Endpoint memorizado; sonda candidatos só na primeira vez ou após falha
+                markets_data = await self.discovery.fetch(request)
+                
+                for market_data in markets_data:
                     try:
-                        response = await client.get(
-                            f"{self.base_url}{endpoint}",
-                            params={"status": "open", "limit": 100},
-                            headers={"Accept": "application/json"}
-                        )
+                        market_id = str(market_data.get("id", ""))
+                        question = market_data.get("question", market_data.get("title", ""))
+                        
+                        if not question:
+                            continue
+                        
+                        # Outcomes
+                        outcomes = market_data.get("outcomes", [])
                         
-                        if response.status_code == 200:
-                            data = response.json()
-                            markets_data = data if isinstance(data, list) else data.get("markets", [])
+                        for outcome_data in outcomes:
+                            if isinstance(outcome_data, dict):
+                                outcome_name = outcome_data.get("name", "")
+                                price = float(outcome_data.get("price", outcome_data.get("probability", 0.5)) or 0.5)
+                            else:
+                                continue
+                            
+                            # Pula mercados resolvidos
+                            if price >= 0.99 or price <= 0.01:
+                                continue
+                            
+                            volume = float(market_data.get("volume", 0) or 0)
+                            liquidity = float(market_data.get("liquidity", 0) or 0)
                             
-                            for market_data in markets_data:
-                                try:
-                                    market_id = str(market_data.get("id", ""))
-                                    question = market_data.get("question", market_data.get("title", ""))
-                                    
-                                    if not question:
-                                        continue
-                                    
-                                    # Outcomes
-                                    outcomes = market_data.get("outcomes", [])
-                                    
-                                    for outcome_data in outcomes:
-                                        if isinstance(outcome_data, dict):
-                                            outcome_name = outcome_data.get("name", "")
-                                            price = float(outcome_data.get("price", outcome_data.get("probability", 0.5)) or 0.5)
-                                        else:
-                                            continue
-                                        
-                                        # Pula mercados resolvidos
-                                        if price >= 0.99 or price <= 0.01:
-                                            continue
-                                        
-                                        volume = float(market_data.get("volume", 0) or 0)
-                                        liquidity = float(market_data.get("liquidity", 0) or 0)
-                                        
-                                        outcome = "YES" if "yes" in outcome_name.lower() else "NO"
-                                        
-                                        market = Market(
-                                            exchange=self.name,
-                                            market_id=f"{market_id}_{outcome_name}",
-                                            question=question,
-                                            outcome=outcome,
-                                            price=price,
-                                            volume_24h=volume,
-                                            liquidity=liquidity,
-                                            expires_at=None,
-                                            url=f"https://seer.pm/market/{market_id}"
-                                        )
-                                        markets.append(market)
-                                except Exception as e:
-                                    continue
+                            outcome = "YES" if "yes" in outcome_name.lower() else "NO"
                             
-                            if markets:
-                                break
+                            market = Market(
+                                exchange=self.name,
+                                market_id=f"{market_id}_{outcome_name}",
+                                question=question,
+                                outcome=outcome,
+                                price=price,
+                                volume_24h=volume,
+                                liquidity=liquidity,
+                                expires_at=None,
+                                url=f"https://seer.pm/market/{market_id}"
+                            )
+                            markets.append(market)
                     except Exception as e:
                         continue
         
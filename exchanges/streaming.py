@@ -0,0 +1,557 @@
+"""
+Ingestão de market data via WebSocket (Kalshi e Polymarket)
+
+Mantém estado de preço e topo do book por mercado a partir de um feed
+streaming, com reconexão automática e re-assinatura dos mercados.
+
+Canais de book (orderbook_delta da Kalshi, book/price_change da Polymarket)
+passam por um BookMaintainer, que aplica os deltas nível a nível, detecta
+lacunas de sequência (re-assinando o mercado para receber novo snapshot) e
+emite BestPriceChange quando o topo do book muda.
+
+Para desenvolvimento/testes offline, ReplayConnection reproduz um feed
+gravado (JSONL com {"t": timestamp, "msg": {...}}) no lugar do websocket.
+Feeds reais podem ser gravados com o parâmetro record_path.
+"""
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from exchanges.base import Market
+from exchanges.book_maintainer import BestPriceChange, BookMaintainer
+
+
+@dataclass
+class TopOfBook:
+    """Estado ao vivo de um mercado (preços em 0-1 do book da chave: YES do ticker na Kalshi, outcome do token na Polymarket)"""
+    exchange: str
+    key: str  # Ticker (Kalshi) ou asset_id (Polymarket)
+    best_bid: Optional[float] = None
+    best_ask: Optional[float] = None
+    bid_size: Optional[float] = None
+    ask_size: Optional[float] = None
+    last_price: Optional[float] = None
+    updated_at: float = 0.0
+    sequence: Optional[int] = None
+
+    @property
+    def mid(self) -> Optional[float]:
+        """Preço médio entre bid e ask (ou o lado disponível / último trade)"""
+        if self.best_bid and self.best_ask:
+            return (self.best_bid + self.best_ask) / 2.0
+        return self.best_bid or self.best_ask or self.last_price
+
+    def age(self) -> float:
+        """Segundos desde a última atualização"""
+        return time.time() - self.updated_at
+
+
+# ============================================================================
+# Conexões
+# ============================================================================
+
+async def websocket_connect(url: str, headers: Optional[Dict[str, str]] = None):
+    """Abre conexão websocket (compatível com versões novas e antigas do websockets)"""
+    import websockets
+    if not headers:
+        return await websockets.connect(url)
+    try:
+        return await websockets.connect(url, additional_headers=headers)
+    except TypeError:
+        return await websockets.connect(url, extra_headers=headers)
+
+
+class ReplayConnection:
+    """
+    Conexão fake que reproduz um feed gravado
+
+    Args:
+        path: Arquivo JSONL com linhas {"t": epoch, "msg": {...}}
+        speed: Fator de velocidade (1.0 = tempo real, 0 = sem espera)
+    """
+
+    def __init__(self, path: str, speed: float = 0.0):
+        self.path = path
+        self.speed = speed
+        self.sent: List[dict] = []  # Mensagens enviadas (assinaturas)
+
+    async def send(self, message: str):
+        self.sent.append(json.loads(message))
+
+    async def close(self):
+        pass
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        last_t = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                t = record.get("t")
+                if self.speed > 0 and last_t is not None and t is not None:
+                    await asyncio.sleep(max(0.0, (t - last_t) / self.speed))
+                last_t = t
+                yield json.dumps(record.get("msg", record))
+
+
+def replay_connector(path: str, speed: float = 0.0):
+    """Retorna função connect(url, headers) que abre um ReplayConnection"""
+    async def connect(url: str, headers: Optional[Dict[str, str]] = None):
+        return ReplayConnection(path, speed)
+    return connect
+
+
+# ============================================================================
+# Stream base
+# ============================================================================
+
+class MarketDataStream(ABC):
+    """
+    Base para streams de market data
+
+    - Conecta, assina todos os mercados conhecidos e processa mensagens
+    - Em desconexão, reconecta com backoff exponencial e re-assina tudo
+    - Notifica listeners a cada atualização de topo do book
+    - Mantém books completos via BookMaintainer e pede novo snapshot
+      (re-assinatura) dos mercados com lacuna de sequência
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        connect: Callable = websocket_connect,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        record_path: Optional[str] = None
+    ):
+        self.name = name
+        self.url = url
+        self._connect = connect
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.record_path = record_path
+        self._record_file = None
+
+        self.books: Dict[str, TopOfBook] = {}
+        self.subscribed: Set[str] = set()
+        self._listeners: List[Callable[[TopOfBook], None]] = []
+        self.maintainer = BookMaintainer(name, resnapshot=self._request_resync)
+        self.maintainer.on_best_change(self._apply_best_change)
+        self._resync: Set[str] = set()
+        self._ws = None
+        self._running = False
+        self.reconnects = 0
+        self.messages = 0
+
+    # ------------------------------------------------------------------
+    # Interface para subclasses
+    # ------------------------------------------------------------------
+
+    @abstractmethod
+    def subscribe_messages(self, keys: List[str]) -> List[dict]:
+        """Mensagens de assinatura para as chaves informadas"""
+        pass
+
+    @abstractmethod
+    def handle_message(self, message: dict) -> List[TopOfBook]:
+        """Processa mensagem do feed e retorna books atualizados"""
+        pass
+
+    @abstractmethod
+    def market_keys(self, markets: Iterable[Market]) -> Dict[str, str]:
+        """Mapeia market_id -> chave do stream para os mercados desta exchange"""
+        pass
+
+    def headers(self) -> Optional[Dict[str, str]]:
+        """Headers de autenticação (se necessário)"""
+        return None
+
+    def outcome_price(self, market: Market, mid: float) -> float:
+        """Preço do outcome do mercado a partir do mid do book da sua chave (padrão: book do próprio outcome)"""
+        return mid
+
+    def resync_messages(self, keys: List[str]) -> List[dict]:
+        """Mensagens que fazem o servidor reenviar snapshot (padrão: re-assinar)"""
+        return self.subscribe_messages(keys)
+
+    # ------------------------------------------------------------------
+    # Assinaturas e listeners
+    # ------------------------------------------------------------------
+
+    def on_update(self, callback: Callable[[TopOfBook], None]):
+        """Registra callback chamado a cada atualização de book"""
+        self._listeners.append(callback)
+
+    def on_best_change(self, callback: Callable[[BestPriceChange], None]):
+        """Registra callback chamado só quando melhor bid/ask de um mercado muda"""
+        self.maintainer.on_best_change(callback)
+
+    async def subscribe(self, keys: Iterable[str]):
+        """Assina novas chaves (envia imediatamente se conectado)"""
+        new_keys = [k for k in keys if k and k not in self.subscribed]
+        if not new_keys:
+            return
+        self.subscribed.update(new_keys)
+        if self._ws is not None:
+            await self._send_subscriptions(new_keys)
+
+    async def sync_markets(self, markets: Iterable[Market]):
+        """Assina todos os mercados desta exchange presentes no snapshot"""
+        await self.subscribe(set(self.market_keys(markets).values()))
+
+    async def _send_subscriptions(self, keys: List[str]):
+        for message in self.subscribe_messages(sorted(keys)):
+            await self._ws.send(json.dumps(message))
+
+    def _request_resync(self, key: str):
+        # Chamado pelo maintainer durante o processamento; envio fica para o loop
+        if key in self.subscribed:
+            self._resync.add(key)
+
+    async def _send_resync(self):
+        keys, self._resync = sorted(self._resync), set()
+        for message in self.resync_messages(keys):
+            await self._ws.send(json.dumps(message))
+
+    # ------------------------------------------------------------------
+    # Loop principal
+    # ------------------------------------------------------------------
+
+    async def run(self):
+        """Loop de conexão com reconexão e re-assinatura automáticas"""
+        self._running = True
+        backoff = self.initial_backoff
+
+        while self._running:
+            try:
+                self._ws = await self._connect(self.url, self.headers())
+                self._resync.clear()  # A assinatura completa já traz snapshots
+                if self.subscribed:
+                    await self._send_subscriptions(list(self.subscribed))
+                backoff = self.initial_backoff
+
+                async for raw in self._ws:
+                    self._process_raw(raw)
+                    if self._resync:
+                        await self._send_resync()
+                    if not self._running:
+                        break
+
+                # Feed terminou (replay acabou ou servidor fechou)
+                if isinstance(self._ws, ReplayConnection):
+                    break
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"[Stream {self.name}] conexão perdida: {e}")
+            finally:
+                ws, self._ws = self._ws, None
+                if ws is not None:
+                    try:
+                        await ws.close()
+                    except Exception:
+                        pass
+
+            if not self._running:
+                break
+
+            # Reconecta com backoff exponencial
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+        self._running = False
+        self._close_record()
+
+    def stop(self):
+        """Interrompe o loop"""
+        self._running = False
+
+    def _process_raw(self, raw):
+        try:
+            payload = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+
+        if self.record_path:
+            self._record(payload)
+
+        # Polymarket pode enviar lista de eventos numa mensagem
+        messages = payload if isinstance(payload, list) else [payload]
+        for message in messages:
+            if not isinstance(message, dict):
+                continue
+            self.messages += 1
+            for book in self.handle_message(message):
+                for listener in self._listeners:
+                    try:
+                        listener(book)
+                    except Exception as e:
+                        print(f"[Stream {self.name}] erro no listener: {e}")
+
+    def _record(self, payload):
+        # Um handle só durante o loop (aberto na primeira mensagem)
+        if self._record_file is None:
+            self._record_file = open(self.record_path, "a", encoding="utf-8")
+        self._record_file.write(json.dumps({"t": time.time(), "msg": payload}) + "\n")
+
+    def _close_record(self):
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
+
+    def _book(self, key: str) -> TopOfBook:
+        book = self.books.get(key)
+        if book is None:
+            book = TopOfBook(exchange=self.name, key=key)
+            self.books[key] = book
+        return book
+
+    def _apply_best_change(self, change: BestPriceChange):
+        book = self._book(change.key)
+        book.best_bid, book.best_ask = change.best_bid, change.best_ask
+        book.bid_size, book.ask_size = change.bid_size, change.ask_size
+        if change.sequence is not None:
+            book.sequence = change.sequence
+        book.updated_at = change.timestamp
+
+    # ------------------------------------------------------------------
+    # Aplicação nos mercados
+    # ------------------------------------------------------------------
+
+    def apply_to_markets(self, markets: List[Market], max_age: float = 60.0) -> List[Market]:
+        """
+        Retorna lista com preços atualizados pelo stream
+
+        Mercados sem book recente são mantidos como vieram do REST.
+        Instâncias de Market não são modificadas (cria cópias).
+        """
+        keys = self.market_keys(markets)
+        if not keys:
+            return markets
+
+        updated = []
+        for market in markets:
+            key = keys.get(market.market_id)
+            book = self.books.get(key) if key else None
+            mid = book.mid if book else None
+            if mid is None or book.age() > max_age:
+                updated.append(market)
+                continue
+
+            price = self.outcome_price(market, mid)
+            if 0.0 < price < 1.0 and price != market.price:
+                market = replace(market, price=price)
+            updated.append(market)
+        return updated
+
+
+# ============================================================================
+# Kalshi
+# ============================================================================
+
+class KalshiStream(MarketDataStream):
+    """
+    Stream dos canais "ticker" e "orderbook_delta" da Kalshi
+
+    Docs: https://docs.kalshi.com/websockets
+    Preços chegam em centavos (yes_bid/yes_ask/price) ou em *_dollars. O book
+    mantido é o do YES: bids YES e asks a 1 - bid do NO (como parse_orderbook).
+    Deltas trazem a variação da quantidade e a sequência é por assinatura (sid).
+    """
+
+    def __init__(self, exchange=None, url: Optional[str] = None, **kwargs):
+        from config import KALSHI_WS_URL
+        super().__init__("kalshi", url or KALSHI_WS_URL, **kwargs)
+        self.exchange = exchange
+        self._command_id = 0
+
+    def headers(self) -> Optional[Dict[str, str]]:
+        if self.exchange is not None and getattr(self.exchange, "session_token", None):
+            return {"Authorization": f"Bearer {self.exchange.session_token}"}
+        return None
+
+    def subscribe_messages(self, keys: List[str]) -> List[dict]:
+        self._command_id += 1
+        return [{
+            "id": self._command_id,
+            "cmd": "subscribe",
+            "params": {"channels": ["ticker", "orderbook_delta"], "market_tickers": keys}
+        }]
+
+    def market_keys(self, markets: Iterable[Market]) -> Dict[str, str]:
+        # market_id da Kalshi = "{ticker}_YES" / "{ticker}_NO"
+        return {
+            m.market_id: m.market_id.rsplit("_", 1)[0]
+            for m in markets if m.exchange == "kalshi"
+        }
+
+    def outcome_price(self, market: Market, mid: float) -> float:
+        # YES e NO compartilham o book do ticker (preços do YES)
+        return mid if market.outcome == "YES" else 1.0 - mid
+
+    def handle_message(self, message: dict) -> List[TopOfBook]:
+        message_type = message.get("type")
+        if message_type not in ("ticker", "orderbook_snapshot", "orderbook_delta"):
+            return []
+        msg = message.get("msg", {})
+        ticker = msg.get("market_ticker")
+        if not ticker:
+            return []
+
+        seq = message.get("seq")
+        channel = f"sid:{message['sid']}" if message.get("sid") is not None else ticker
+
+        if message_type == "orderbook_snapshot":
+            no_bids = self._levels(msg, "no")
+            self.maintainer.apply_snapshot(
+                ticker,
+                bids=self._levels(msg, "yes"),
+                asks=[(round(1.0 - price, 6), size) for price, size in no_bids],
+                sequence=seq,
+                channel=channel
+            )
+        elif message_type == "orderbook_delta":
+            if msg.get("price_dollars") is not None:
+                price = float(msg["price_dollars"])
+            else:
+                price = float(msg.get("price", 0)) / 100.0
+            # Bid de NO a p = ask de YES a 1 - p
+            side, price = ("bid", price) if msg.get("side") == "yes" else ("ask", round(1.0 - price, 6))
+            self.maintainer.apply_delta(ticker, side, price, float(msg.get("delta", 0)),
+                                        sequence=seq, channel=channel, relative=True)
+        else:
+            self.maintainer.set_top(
+                ticker,
+                float(msg["yes_bid"]) / 100.0 if msg.get("yes_bid") is not None else None,
+                float(msg["yes_ask"]) / 100.0 if msg.get("yes_ask") is not None else None,
+                sequence=seq
+            )
+
+        book = self._book(ticker)
+        if message_type == "ticker" and msg.get("price") is not None:
+            book.last_price = float(msg["price"]) / 100.0
+        book.sequence = seq if seq is not None else book.sequence
+        book.updated_at = time.time()
+        return [book]
+
+    @staticmethod
+    def _levels(msg: dict, side: str) -> List[tuple]:
+        """Níveis [preço, quantidade] do snapshot em 0-1"""
+        if msg.get(f"{side}_dollars"):
+            return [(float(price), float(size)) for price, size in msg[f"{side}_dollars"]]
+        return [(float(price) / 100.0, float(size)) for price, size in (msg.get(side) or [])]
+
+
+# ============================================================================
+# Polymarket
+# ============================================================================
+
+class PolymarketStream(MarketDataStream):
+    """
+    Stream do canal "market" do CLOB da Polymarket
+
+    Chaves são asset_ids: cada mercado (YES, NO ou outcome nomeado) usa o
+    token_id do próprio outcome, mapeado a partir de PolymarketExchange.token_ids,
+    então o mid do book já é o preço daquele outcome. O evento "book" é
+    snapshot completo e "price_change" traz a quantidade nova de cada nível alterado.
+    """
+
+    def __init__(self, exchange=None, url: Optional[str] = None, **kwargs):
+        from config import POLYMARKET_WS_URL
+        super().__init__("polymarket", url or POLYMARKET_WS_URL, **kwargs)
+        self.exchange = exchange
+
+    def subscribe_messages(self, keys: List[str]) -> List[dict]:
+        return [{"assets_ids": keys, "type": "market"}]
+
+    def market_keys(self, markets: Iterable[Market]) -> Dict[str, str]:
+        token_ids = getattr(self.exchange, "token_ids", {}) if self.exchange is not None else {}
+        return {
+            m.market_id: token_ids[m.market_id]
+            for m in markets if m.exchange == "polymarket" and m.market_id in token_ids
+        }
+
+    def handle_message(self, message: dict) -> List[TopOfBook]:
+        event_type = message.get("event_type")
+
+        if event_type == "book":
+            asset_id = str(message.get("asset_id", ""))
+            self.maintainer.apply_snapshot(
+                asset_id,
+                bids=[(float(level["price"]), float(level["size"])) for level in message.get("bids", [])],
+                asks=[(float(level["price"]), float(level["size"])) for level in message.get("asks", [])]
+            )
+            book = self._book(asset_id)
+            book.updated_at = time.time()
+            return [book]
+
+        if event_type == "price_change":
+            updated = []
+            changes = message.get("price_changes") or message.get("changes") or []
+            for change in changes:
+                asset_id = str(change.get("asset_id", message.get("asset_id", "")))
+                if change.get("price") is not None and change.get("size") is not None:
+                    side = "bid" if str(change.get("side", "")).upper() == "BUY" else "ask"
+                    self.maintainer.apply_delta(asset_id, side, float(change["price"]), float(change["size"]))
+                if self.maintainer.get(asset_id) is None:
+                    # Sem book mantido (snapshot pendente): usa o topo informado
+                    self.maintainer.set_top(
+                        asset_id,
+                        float(change["best_bid"]) if change.get("best_bid") is not None else None,
+                        float(change["best_ask"]) if change.get("best_ask") is not None else None
+                    )
+                book = self._book(asset_id)
+                book.updated_at = time.time()
+                if book not in updated:
+                    updated.append(book)
+            return updated
+
+        if event_type == "last_trade_price":
+            book = self._book(str(message.get("asset_id", "")))
+            book.last_price = float(message.get("price", 0) or 0) or book.last_price
+            book.updated_at = time.time()
+            return [book]
+
+        return []
+
+
+def create_streams(exchanges: List, replay_dir: Optional[str] = None,
+                   record_dir: Optional[str] = None) -> List[MarketDataStream]:
+    """
+    Cria streams para as exchanges que suportam WebSocket
+
+    Args:
+        replay_dir: Se informado, usa <replay_dir>/<exchange>.jsonl no lugar do websocket
+        record_dir: Se informado, grava o feed recebido em <record_dir>/<exchange>.jsonl
+    """
+    import os
+    streams: List[MarketDataStream] = []
+    stream_classes = {"kalshi": KalshiStream, "polymarket": PolymarketStream}
+
+    for exchange in exchanges:
+        stream_cls = stream_classes.get(exchange.name)
+        if not stream_cls:
+            continue
+
+        kwargs = {}
+        if replay_dir:
+            path = os.path.join(replay_dir, f"{exchange.name}.jsonl")
+            if not os.path.exists(path):
+                continue
+            kwargs["connect"] = replay_connector(path)
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+            kwargs["record_path"] = os.path.join(record_dir, f"{exchange.name}.jsonl")
+
+        streams.append(stream_cls(exchange, **kwargs))
+
+    return streams
@@ -0,0 +1,222 @@
+"""
+Paginação de subgraphs (The Graph) para adapters on-chain
+
+Os adapters de Omen e Azuro faziam uma única query com `first: 100` e
+campos aninhados que não eram usados. SubgraphPaginator:
+- Pagina por cursor `id_gt` (orderBy: id), estável mesmo com inserções
+- Divide o espaço de IDs em shards (ex: prefixos hex de endereços) e busca
+  os shards em paralelo, limitado por semáforo e rate limit
+- Projeta só os campos pedidos pelo adapter
+- Suporta busca incremental ("alterados desde") via campo de timestamp
+
+SubgraphSnapshot mantém os registros em memória entre ciclos: faz uma busca
+completa de tempos em tempos e, no meio, só busca o que mudou.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import httpx
+from exchanges.http_client import RateLimiter
+from config import (SUBGRAPH_PAGE_SIZE, SUBGRAPH_MAX_PAGES, SUBGRAPH_CONCURRENCY,
+                    SUBGRAPH_RATE_LIMIT, SUBGRAPH_FULL_REFRESH)
+
+Shard = Tuple[Optional[str], Optional[str]]  # (id_gte, id_lt); None = sem limite
+
+
+class SubgraphError(Exception):
+    """Erro retornado pelo subgraph (campo "errors" ou status HTTP)"""
+
+
+def hex_shards(count: int) -> List[Shard]:
+    """
+    Divide IDs hexadecimais (endereços 0x...) em `count` faixas
+
+    Só faz sentido para entidades cujo ID é um endereço/hash uniforme.
+    """
+    if count <= 1:
+        return [(None, None)]
+    count = min(count, 16)
+    bounds = [f"0x{int(i * 16 / count):x}" for i in range(1, count)]
+    lowers = [None] + bounds
+    uppers = bounds + [None]
+    return list(zip(lowers, uppers))
+
+
+class SubgraphPaginator:
+    """Busca todas as entidades de um subgraph por cursor id_gt"""
+
+    def __init__(
+        self,
+        url: str,
+        entity: str,
+        filter_type: str,
+        fields: Sequence[str],
+        where: Optional[Dict[str, Any]] = None,
+        page_size: int = SUBGRAPH_PAGE_SIZE,
+        max_pages: int = SUBGRAPH_MAX_PAGES,
+        shards: Optional[List[Shard]] = None,
+        concurrency: int = SUBGRAPH_CONCURRENCY,
+        rate_limit: float = SUBGRAPH_RATE_LIMIT,
+        changed_field: Optional[str] = None,
+        changed_value: Optional[Callable[[float], Any]] = None
+    ):
+        """
+        Args:
+            entity: Campo de coleção na query (ex: "fixedProductMarketMakers")
+            filter_type: Tipo GraphQL do filtro (ex: "FixedProductMarketMaker_filter")
+            fields: Campos projetados (aceita seleções aninhadas, ex: "sport { name }")
+            where: Filtro base da busca completa
+            changed_field: Campo de timestamp usado na busca incremental
+            changed_value: Converte timestamp unix para o valor do filtro (padrão: int)
+        """
+        self.url = url
+        self.entity = entity
+        self.filter_type = filter_type
+        self.fields = list(fields)
+        if "id" not in self.fields:
+            self.fields.insert(0, "id")
+        self.where = dict(where or {})
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.shards = shards or [(None, None)]
+        self.concurrency = max(concurrency, 1)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.limiter = RateLimiter(rate_limit)
+        self.changed_field = changed_field
+        self.changed_value = changed_value or (lambda ts: int(ts))
+        self.requests = 0
+
+    @property
+    def query(self) -> str:
+        fields = "\n    ".join(self.fields)
+        return (
+            f"query Page($first: Int!, $where: {self.filter_type}) {{\n"
+            f"  {self.entity}(first: $first, orderBy: id, orderDirection: asc, where: $where) {{\n"
+            f"    {fields}\n"
+            f"  }}\n"
+            f"}}"
+        )
+
+    async def _request(self, client: httpx.AsyncClient, where: Dict[str, Any]) -> List[dict]:
+        async with self._semaphore:
+            await self.limiter.acquire()
+            self.requests += 1
+            response = await client.post(
+                self.url,
+                json={"query": self.query, "variables": {"first": self.page_size, "where": where}},
+                headers={"Content-Type": "application/json"}
+            )
+
+        if response.status_code != 200:
+            raise SubgraphError(f"{self.entity}: status {response.status_code}")
+        payload = response.json()
+        if payload.get("errors"):
+            message = payload["errors"][0].get("message", payload["errors"])
+            raise SubgraphError(f"{self.entity}: {message}")
+        return (payload.get("data") or {}).get(self.entity) or []
+
+    async def _fetch_shard(self, client: httpx.AsyncClient, shard: Shard, where: Dict[str, Any]) -> List[dict]:
+        """Pagina um shard sequencialmente (cada página depende do último id)"""
+        lower, upper = shard
+        base = dict(where)
+        if lower is not None:
+            base["id_gte"] = lower
+        if upper is not None:
+            base["id_lt"] = upper
+
+        records = []
+        cursor = None
+        for _ in range(self.max_pages):
+            page_where = dict(base)
+            if cursor is not None:
+                page_where["id_gt"] = cursor
+            page = await self._request(client, page_where)
+            records.extend(page)
+            if len(page) < self.page_size:
+                break
+            cursor = page[-1]["id"]
+        return records
+
+    async def fetch(
+        self,
+        client: httpx.AsyncClient,
+        where: Optional[Dict[str, Any]] = None,
+        changed_since: Optional[float] = None
+    ) -> List[dict]:
+        """
+        Busca todas as entidades (shards em paralelo)
+
+        Com changed_since (timestamp unix), filtra por changed_field em vez do
+        filtro base, para capturar também mercados que saíram do filtro
+        (ex: finalizados) e precisam ser removidos do cache.
+        """
+        if changed_since is not None:
+            if not self.changed_field:
+                raise ValueError(f"{self.entity}: busca incremental requer changed_field")
+            query_where = {f"{self.changed_field}_gte": self.changed_value(changed_since)}
+        else:
+            query_where = dict(self.where)
+        if where:
+            query_where.update(where)
+
+        # Semáforo criado por busca (fica preso ao event loop corrente)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._fetch_shard(client, shard, query_where) for shard in self.shards))
+
+        # Shards não se sobrepõem, mas deduplica por segurança
+        seen = {}
+        for records in results:
+            for record in records:
+                seen[record["id"]] = record
+        return list(seen.values())
+
+
+class SubgraphSnapshot:
+    """Registros de um subgraph mantidos entre ciclos (busca completa + incremental)"""
+
+    def __init__(
+        self,
+        paginator: SubgraphPaginator,
+        is_active: Callable[[dict], bool],
+        full_refresh: float = SUBGRAPH_FULL_REFRESH,
+        overlap: float = 60.0,
+        clock=time.time
+    ):
+        """
+        Args:
+            is_active: Decide se um registro atualizado continua no snapshot
+            full_refresh: Segundos entre buscas completas
+            overlap: Margem (s) subtraída do último sync na busca incremental
+        """
+        self.paginator = paginator
+        self.is_active = is_active
+        self.full_refresh = full_refresh
+        self.overlap = overlap
+        self.clock = clock
+        self.records: Dict[str, dict] = {}
+        self.last_full: Optional[float] = None
+        self.last_sync: Optional[float] = None
+
+    async def refresh(self, client: httpx.AsyncClient) -> List[dict]:
+        """Atualiza e retorna os registros ativos"""
+        now = self.clock()
+        incremental = (
+            self.paginator.changed_field is not None
+            and self.last_full is not None
+            and now - self.last_full < self.full_refresh
+        )
+
+        if incremental:
+            changed = await self.paginator.fetch(client, changed_since=self.last_sync - self.overlap)
+            for record in changed:
+                if self.is_active(record):
+                    self.records[record["id"]] = record
+                else:
+                    self.records.pop(record["id"], None)
+        else:
+            records = await self.paginator.fetch(client)
+            self.records = {r["id"]: r for r in records if self.is_active(r)}
+            self.last_full = now
+
+        self.last_sync = now
+        return list(self.records.values())
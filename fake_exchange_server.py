@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local que imita as APIs das exchanges (testes de carga e escala)
+
+Gera um universo sintético de eventos listados em várias exchanges com
+perguntas sobrepostas (redação diferente por venue), preços que derivam ao
+longo do tempo e injeção de latência/erros. Os adapters existentes apontam
+para ele via *_BASE_URL:
+
+    python fake_exchange_server.py --events 5000 --port 8765
+    # em outro terminal (o servidor imprime os exports):
+    export POLYMARKET_BASE_URL=http://127.0.0.1:8765/polymarket
+    ...
+
+Endpoints:
+- /polymarket/markets                         (CLOB, paginação por next_cursor)
+- /polymarket/book?token_id=...
+- /kalshi/trade-api/v2/markets                (paginação por cursor)
+- /kalshi/trade-api/v2/markets/{ticker}/orderbook
+- /predictit/api/marketdata/all/
+- /manifold/v0/markets                        (paginação por before=<id>)
+"""
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+VENUES = ("polymarket", "kalshi", "predictit", "manifold")
+
+# Cursor de fim de paginação da API CLOB do Polymarket
+POLYMARKET_END_CURSOR = "LTE="
+
+SUBJECTS = [
+    "Bitcoin", "Ethereum", "Solana", "Tesla", "Apple", "Nvidia", "the Fed", "the ECB",
+    "Donald Trump", "Gavin Newsom", "J.D. Vance", "Kamala Harris", "Elon Musk",
+    "the S&P 500", "the Nasdaq", "US inflation", "US unemployment", "OpenAI", "SpaceX",
+    "Real Madrid", "the Lakers", "the Chiefs", "France", "Germany", "Brazil", "Japan",
+]
+
+ACTIONS = [
+    "reach a new all-time high", "announce a rate cut", "win the election",
+    "be above its current level", "launch a new product", "announce layoffs",
+    "hold a press conference", "win the championship", "sign a trade deal",
+    "exceed analyst expectations", "face a lawsuit", "be mentioned in the State of the Union",
+]
+
+
+@dataclass
+class SyntheticEvent:
+    """Evento sintético listado em um subconjunto de exchanges"""
+    event_id: int
+    subject: str
+    action: str
+    deadline: datetime
+    probability: float
+    volatility: float
+    venues: Dict[str, float] = field(default_factory=dict)  # venue -> desvio de preço
+    volume: float = 0.0
+    liquidity: float = 0.0
+    updated_at: float = 0.0  # Relógio do universo na última aplicação de drift
+    rng: random.Random = field(default=None, repr=False)  # Drift próprio (independe da ordem de acesso)
+
+    @property
+    def question(self) -> str:
+        return f"Will {self.subject} {self.action} by {self.deadline:%B %d, %Y}?"
+
+    @property
+    def manifold_id(self) -> str:
+        return f"synth{self.event_id:06d}"
+
+    @property
+    def ticker(self) -> str:
+        letters = re.sub(r"[^A-Z]", "", self.subject.upper())[:6] or "EVT"
+        return f"K{letters}-{self.deadline:%y%b%d}".upper() + f"-E{self.event_id}"
+
+    def venue_price(self, venue: str) -> float:
+        return min(max(self.probability + self.venues.get(venue, 0.0), 0.02), 0.98)
+
+
+class SyntheticUniverse:
+    """
+    Gera eventos e aplica drift de preço (random walk em logit)
+
+    O drift é preguiçoso: cada evento guarda quando foi atualizado e só anda
+    quando é servido, pelo tempo decorrido desde então (a variância do passeio
+    cresce com o tempo, então um passo longo equivale a vários curtos). Listas
+    por venue e índices por id/ticker/token são montados uma vez, então cada
+    requisição custa O(página), não O(universo).
+    """
+
+    def __init__(self, events: int = 500, overlap: float = 0.6, seed: int = 42,
+                 volatility: float = 0.05, clock=time.monotonic):
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.lock = threading.Lock()
+        started = clock()
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+
+        self.events: List[SyntheticEvent] = []
+        for i in range(events):
+            event = SyntheticEvent(
+                event_id=i,
+                subject=self.rng.choice(SUBJECTS),
+                action=self.rng.choice(ACTIONS),
+                deadline=now + timedelta(hours=self.rng.randint(2, 24 * 120)),
+                probability=self.rng.uniform(0.05, 0.95),
+                volatility=volatility * self.rng.uniform(0.5, 2.0),
+                volume=round(self.rng.lognormvariate(8, 1.5), 2),
+                liquidity=round(self.rng.lognormvariate(8.5, 1.2), 2),
+                updated_at=started,
+                rng=random.Random(f"{seed}:{i}")
+            )
+            # Cada evento aparece em pelo menos uma venue; demais com probabilidade overlap
+            home = self.rng.choice(VENUES)
+            for venue in VENUES:
+                if venue == home or self.rng.random() < overlap:
+                    event.venues[venue] = self.rng.gauss(0, 0.03)
+            self.events.append(event)
+
+        # Índices fixos (o conjunto de eventos não muda depois de gerado)
+        self.by_venue: Dict[str, List[SyntheticEvent]] = {
+            venue: [e for e in self.events if venue in e.venues] for venue in VENUES
+        }
+        self.by_id: Dict[int, SyntheticEvent] = {e.event_id: e for e in self.events}
+        self.by_ticker: Dict[str, SyntheticEvent] = {e.ticker: e for e in self.by_venue["kalshi"]}
+        self.manifold_positions: Dict[str, int] = {
+            e.manifold_id: i for i, e in enumerate(self.by_venue["manifold"])
+        }
+
+    def advance(self, events: Optional[Iterable[SyntheticEvent]] = None):
+        """Aplica aos eventos (padrão: todos) drift proporcional a sqrt(horas desde a última atualização)"""
+        with self.lock:
+            now = self.clock()
+            for event in self.events if events is None else events:
+                elapsed_hours = (now - event.updated_at) / 3600
+                if elapsed_hours <= 0:
+                    continue
+                event.updated_at = now
+                p = min(max(event.probability, 0.01), 0.99)
+                step = event.rng.gauss(0, event.volatility * math.sqrt(elapsed_hours) * 4)
+                event.probability = 1 / (1 + math.exp(-(math.log(p / (1 - p)) + step)))
+
+    def listed_on(self, venue: str) -> List[SyntheticEvent]:
+        return self.by_venue.get(venue, [])
+
+    def polymarket_event(self, token_id: str) -> Optional[SyntheticEvent]:
+        """Evento de um token_id (YES = 10^12 + 2 * id, NO = YES + 1)"""
+        event = self.by_id.get((int(token_id) - 10 ** 12) // 2)
+        return event if event is not None and "polymarket" in event.venues else None
+
+    # --- Payloads no formato de cada API ---
+
+    @staticmethod
+    def _quote(price: float, spread: float = 0.02) -> Tuple[float, float]:
+        bid = max(round(price - spread / 2, 2), 0.01)
+        ask = min(round(price + spread / 2, 2), 0.99)
+        return bid, ask
+
+    def polymarket_market(self, event: SyntheticEvent) -> dict:
+        price = round(event.venue_price("polymarket"), 3)
+        condition_id = f"0x{event.event_id:064x}"
+        return {
+            "condition_id": condition_id,
+            "question_id": f"0x{event.event_id + 1:064x}",
+            "question": event.question,
+            "market_slug": f"synthetic-{event.event_id}",
+            "end_date_iso": event.deadline.isoformat().replace("+00:00", "Z"),
+            "active": True,
+            "closed": False,
+            "archived": False,
+            "accepting_orders": True,
+            "volume": event.volume,
+            "liquidity": event.liquidity,
+            "tokens": [
+                {"token_id": str(10 ** 12 + event.event_id * 2), "outcome": "Yes", "price": price},
+                {"token_id": str(10 ** 12 + event.event_id * 2 + 1), "outcome": "No", "price": round(1 - price, 3)},
+            ]
+        }
+
+    def kalshi_market(self, event: SyntheticEvent) -> dict:
+        yes_bid, yes_ask = self._quote(event.venue_price("kalshi"))
+        return {
+            "ticker": event.ticker,
+            "event_ticker": event.ticker.rsplit("-", 1)[0],
+            "title": f"Will {event.subject} {event.action}?",
+            "subtitle": f"Before {event.deadline:%b %d, %Y}",
+            "status": "active",
+            "yes_bid": int(round(yes_bid * 100)),
+            "yes_ask": int(round(yes_ask * 100)),
+            "no_bid": int(round((1 - yes_ask) * 100)),
+            "no_ask": int(round((1 - yes_bid) * 100)),
+            "volume_24h": int(event.volume),
+            "open_interest": int(event.liquidity / 10),
+            "liquidity_dollars": f"{event.liquidity:.2f}",
+            "close_time": event.deadline.isoformat().replace("+00:00", "Z"),
+        }
+
+    def kalshi_orderbook(self, event: SyntheticEvent, depth: int = 5) -> dict:
+        yes_bid, yes_ask = self._quote(event.venue_price("kalshi"))
+        rng = random.Random(event.event_id)
+        yes = [[int(round(yes_bid * 100)) - i, rng.randint(10, 500)] for i in range(depth)]
+        no = [[int(round((1 - yes_ask) * 100)) - i, rng.randint(10, 500)] for i in range(depth)]
+        return {"orderbook": {
+            "yes": [level for level in reversed(yes) if level[0] > 0],
+            "no": [level for level in reversed(no) if level[0] > 0]
+        }}
+
+    def polymarket_book(self, event: SyntheticEvent, token_id: str, depth: int = 5) -> dict:
+        price = event.venue_price("polymarket")
+        if int(token_id) % 2:  # Token NO
+            price = 1 - price
+        bid, ask = self._quote(price)
+        rng = random.Random(token_id)
+        return {
+            "market": f"0x{event.event_id:064x}",
+            "asset_id": token_id,
+            # CLOB lista bids crescentes e asks decrescentes (melhor preço no fim)
+            "bids": [{"price": f"{bid - 0.01 * i:.2f}", "size": str(rng.randint(10, 500))}
+                     for i in reversed(range(depth)) if bid - 0.01 * i > 0],
+            "asks": [{"price": f"{ask + 0.01 * i:.2f}", "size": str(rng.randint(10, 500))}
+                     for i in reversed(range(depth)) if ask + 0.01 * i < 1],
+        }
+
+    def predictit_market(self, event: SyntheticEvent) -> dict:
+        yes_bid, yes_ask = self._quote(event.venue_price("predictit"))
+        market_id = 8000 + event.event_id
+        return {
+            "id": market_id,
+            "name": event.question,
+            "shortName": f"{event.subject} {event.action} by {event.deadline:%b %d}?",
+            "url": f"https://www.predictit.org/markets/detail/{market_id}",
+            "status": "Open",
+            "timeStamp": datetime.now(timezone.utc).isoformat(),
+            "contracts": [{
+                "id": 30000 + event.event_id,
+                "name": event.question,
+                "shortName": event.subject,
+                "status": "Open",
+                "dateEnd": event.deadline.isoformat(),
+                "lastTradePrice": round((yes_bid + yes_ask) / 2, 2),
+                "bestBuyYesCost": yes_ask,
+                "bestSellYesCost": yes_bid,
+                "bestBuyNoCost": round(1 - yes_bid, 2),
+                "bestSellNoCost": round(1 - yes_ask, 2),
+            }]
+        }
+
+    def manifold_market(self, event: SyntheticEvent) -> dict:
+        return {
+            "id": event.manifold_id,
+            "question": event.question,
+            "slug": f"will-{event.subject.lower().replace(' ', '-')}-{event.event_id}",
+            "creatorUsername": "synthetic",
+            "url": f"https://manifold.markets/synthetic/{event.event_id}",
+            "outcomeType": "BINARY",
+            "mechanism": "cpmm-1",
+            "probability": round(event.venue_price("manifold"), 4),
+            "volume24Hours": event.volume / 10,
+            "totalLiquidity": event.liquidity,
+            "isResolved": False,
+            "closeTime": int(event.deadline.timestamp() * 1000),
+        }
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.b64encode(str(offset).encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(base64.b64decode(cursor).decode())
+    except (ValueError, UnicodeDecodeError):
+        return 0
+
+
+class FakeExchangeHandler(BaseHTTPRequestHandler):
+    """Roteia requisições para o payload de cada exchange"""
+
+    server_version = "FakeExchange/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+
+        # Latência e erros injetados
+        delay = server.latency + server.rng_uniform(-server.jitter, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if server.error_rate and server.rng_uniform(0, 1) < server.error_rate:
+            status = server.rng_choice(server.error_statuses)
+            server.count_error()
+            self._send_json(status, {"error": "falha injetada", "status": status})
+            return
+
+        parsed = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        path = parsed.path.rstrip("/")
+
+        try:
+            payload = self._route(path, params)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        if payload is None:
+            self._send_json(404, {"error": f"rota desconhecida: {parsed.path}"})
+        else:
+            self._send_json(200, payload)
+
+    def _route(self, path: str, params: Dict[str, str]):
+        universe = self.server.universe
+
+        if path == "/polymarket/markets":
+            events = universe.listed_on("polymarket")
+            limit = min(int(params.get("limit", 1000)), 1000)
+            cursor = params.get("next_cursor") or params.get("cursor")
+            if cursor == POLYMARKET_END_CURSOR:
+                return {"data": [], "next_cursor": POLYMARKET_END_CURSOR, "limit": limit, "count": 0}
+            offset = _decode_cursor(cursor)
+            page = events[offset:offset + limit]
+            universe.advance(page)
+            end = offset + limit >= len(events)
+            return {
+                "data": [universe.polymarket_market(e) for e in page],
+                "next_cursor": POLYMARKET_END_CURSOR if end else _encode_cursor(offset + limit),
+                "limit": limit,
+                "count": len(page)
+            }
+
+        if path == "/polymarket/book":
+            token_id = params.get("token_id", "")
+            if not token_id.isdigit():
+                raise ValueError("token_id inválido")
+            event = universe.polymarket_event(token_id)
+            if event is None:
+                return None
+            universe.advance([event])
+            return universe.polymarket_book(event, token_id)
+
+        if path == "/kalshi/trade-api/v2/markets":
+            events = universe.listed_on("kalshi")
+            limit = min(int(params.get("limit", 100)), 1000)
+            offset = _decode_cursor(params.get("cursor"))
+            page = events[offset:offset + limit]
+            universe.advance(page)
+            next_offset = offset + limit
+            return {
+                "markets": [universe.kalshi_market(e) for e in page],
+                "cursor": _encode_cursor(next_offset) if next_offset < len(events) else ""
+            }
+
+        match = re.fullmatch(r"/kalshi/trade-api/v2/markets/([^/]+)/orderbook", path)
+        if match:
+            event = universe.by_ticker.get(match.group(1))
+            if event is None:
+                return None
+            universe.advance([event])
+            return universe.kalshi_orderbook(event, depth=int(params.get("depth", 5)))
+
+        if path == "/predictit/api/marketdata/all":
+            events = universe.listed_on("predictit")
+            universe.advance(events)  # Endpoint devolve a venue inteira
+            return {"markets": [universe.predictit_market(e) for e in events]}
+
+        if path == "/manifold/v0/markets":
+            events = universe.listed_on("manifold")
+            limit = min(int(params.get("limit", 500)), 1000)
+            before = params.get("before")
+            start = 0
+            if before:
+                position = universe.manifold_positions.get(before)
+                start = position + 1 if position is not None else len(events)
+            page = events[start:start + limit]
+            universe.advance(page)
+            return [universe.manifold_market(e) for e in page]
+
+        return None
+
+
+class FakeExchangeServer(ThreadingHTTPServer):
+    """Servidor fake com controle de latência e erros"""
+
+    daemon_threads = True
+
+    def __init__(self, universe: SyntheticUniverse, host: str = "127.0.0.1", port: int = 8765,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (500, 502, 503, 429), verbose: bool = False):
+        super().__init__((host, port), FakeExchangeHandler)
+        self.universe = universe
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.verbose = verbose
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(universe.rng.random())
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def rng_uniform(self, a: float, b: float) -> float:
+        with self._lock:
+            return self._rng.uniform(a, b)
+
+    def rng_choice(self, options):
+        with self._lock:
+            return self._rng.choice(options)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_error(self):
+        with self._lock:
+            self.errors += 1
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Variáveis de ambiente para apontar os adapters para este servidor"""
+        return {
+            "POLYMARKET_BASE_URL": f"{self.url}/polymarket",
+            "KALSHI_BASE_URL": f"{self.url}/kalshi/trade-api/v2",
+            "PREDICTIT_BASE_URL": f"{self.url}/predictit/api/marketdata",
+            "MANIFOLD_BASE_URL": f"{self.url}/manifold/v0",
+        }
+
+    def start(self):
+        """Inicia em thread de background (uso em testes)"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor fake de exchanges para testes de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--events", type=int, default=500, help="Número de eventos sintéticos")
+    parser.add_argument("--overlap", type=float, default=0.6, help="Probabilidade de um evento estar em cada venue")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--volatility", type=float, default=0.05, help="Volatilidade do drift (logit por hora)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência injetada por requisição")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de requisições com erro (0-1)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    universe = SyntheticUniverse(args.events, args.overlap, args.seed, args.volatility)
+    server = FakeExchangeServer(
+        universe, args.host, args.port,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, verbose=args.verbose
+    )
+
+    counts = ", ".join(f"{venue}: {len(universe.listed_on(venue))}" for venue in VENUES)
+    print(f"Servidor fake em {server.url} ({args.events} eventos - {counts})")
+    print("Para apontar os adapters:")
+    for key, value in server.env().items():
+        print(f"  export {key}={value}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{server.requests} requisições, {server.errors} erros injetados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Arbitragem em escadas de strikes (Kalshi "Acima de X" / faixas)
+
+A Kalshi publica cada strike de um evento como um mercado próprio, com a
+pergunta "título - subtítulo" (ex: "How high will unemployment get? - Above 8%").
+Os strikes de um mesmo evento formam uma escada: com S(K) = P(valor > K), os
+preços YES de "Acima de K" precisam cair conforme K sobe, e uma faixa [a, b)
+precisa valer S(a) - S(b).
+
+Cada escada é tratada como uma estrutura só (não par a par). Os strikes são
+ordenados e, em uma passada vetorizada:
+
+- monotonicidade: para cada strike j, o strike i < j de menor custo para
+  ficar "comprado" em S(K_i) (mínimo acumulado). Comprado em S(K_i) + vendido
+  em S(K_j) paga ao menos $1 em qualquer cenário; custo < $1 é lucro garantido.
+- butterfly: faixa [a, b) contra o spread vertical S(a) - S(b). Faixa barata:
+  compra a faixa, vende S(a) e compra S(b) (paga exatamente $1). Faixa cara:
+  vende a faixa, compra S(a) e vende S(b) (paga exatamente $2).
+
+"Comprado em S(K)" é YES de "Acima de K" ou NO de "Abaixo de K"; "vendido" é
+o contrário. Sem o mercado NO correspondente, usa 1 - preço do YES. Assume que
+os strikes de um evento usam a mesma convenção de fronteira (> ou >=).
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from exchanges.base import Market
+from config import EXCHANGE_FEES
+
+DEFAULT_FEE = 0.02  # Mesmo padrão das engines combinatórias para exchanges sem taxa configurada
+
+_NUMBER = r"(-?\$?\d[\d,]*(?:\.\d+)?)\s*(k|m|b|bn)?\b%?"
+_RANGE_RE = re.compile(rf"^(?:between\s+)?{_NUMBER}\s*(?:-|–|to|and)\s*{_NUMBER}")
+_ABOVE_RE = re.compile(rf"^(?:above|over|more than|greater than|higher than|at least|>=?|≥)\s*{_NUMBER}|"
+                       rf"^{_NUMBER}\s*(?:or (?:above|more|higher)|\+)")
+_BELOW_RE = re.compile(rf"^(?:below|under|less than|fewer than|lower than|at most|<=?|≤)\s*{_NUMBER}|"
+                       rf"^{_NUMBER}\s*or (?:below|less|lower|fewer)")
+_MULTIPLIERS = {"k": 1e3, "m": 1e6, "b": 1e9, "bn": 1e9, None: 1.0}
+
+LadderKey = Tuple[str, str, str]  # (exchange, event ticker, título)
+
+
+def _number(value: str, suffix: Optional[str]) -> float:
+    return float(value.replace("$", "").replace(",", "")) * _MULTIPLIERS[suffix]
+
+
+def parse_strike(subtitle: str) -> Optional[Tuple[str, float, Optional[float]]]:
+    """
+    Strike do subtítulo: ("above", K, None), ("below", K, None) ou ("range", a, b)
+
+    None quando o subtítulo não é numérico.
+    """
+    text = " ".join(subtitle.lower().split())
+    match = _RANGE_RE.match(text)
+    if match:
+        low, high = _number(match.group(1), match.group(2)), _number(match.group(3), match.group(4))
+        return ("range", low, high) if low < high else None
+    for kind, pattern in (("above", _ABOVE_RE), ("below", _BELOW_RE)):
+        match = pattern.match(text)
+        if match:
+            groups = match.groups()
+            value, suffix = groups[:2] if groups[0] is not None else groups[2:]
+            return kind, _number(value, suffix), None
+    return None
+
+
+def ladder_key(market: Market) -> Optional[Tuple[LadderKey, str]]:
+    """(chave da escada, subtítulo) de uma pergunta "título - subtítulo" """
+    if " - " not in market.question:
+        return None
+    title, subtitle = market.question.rsplit(" - ", 1)
+    # market_id da Kalshi: <SÉRIE>-<EVENTO>-<STRIKE>_YES/_NO; o evento é tudo antes do último "-"
+    ticker = market.market_id.rsplit("_", 1)[0] if market.market_id.endswith(("_YES", "_NO")) else market.market_id
+    event = ticker.rsplit("-", 1)[0] if "-" in ticker else ""
+    return (market.exchange, event, title.strip().lower()), subtitle
+
+
+@dataclass
+class LadderLeg:
+    """Contrato comprado em uma perna do trade"""
+    market: Market   # Mercado do outcome comprado (ou o YES, se o NO não existe)
+    outcome: str     # "YES" ou "NO"
+    price: float
+
+
+@dataclass
+class LadderTrade:
+    """Trade sem risco em uma escada"""
+    strategy: str            # "ladder_monotonicity" ou "ladder_butterfly"
+    legs: List[LadderLeg]
+    cost: float              # Soma dos preços (1 contrato por perna)
+    payout: float            # Pagamento garantido
+    fees: float
+    net_profit: float
+    explanation: str
+
+    @property
+    def profit_pct(self) -> float:
+        return self.net_profit / self.cost if self.cost > 0 else 0.0
+
+    @property
+    def markets(self) -> List[Market]:
+        return [leg.market for leg in self.legs]
+
+
+@dataclass
+class _Contract:
+    """YES e NO (se cotado) de um strike"""
+    yes: Market
+    no: Optional[Market] = None
+
+    def leg(self, outcome: str) -> LadderLeg:
+        if outcome == "YES":
+            return LadderLeg(self.yes, "YES", self.yes.price)
+        if self.no is not None:
+            return LadderLeg(self.no, "NO", self.no.price)
+        return LadderLeg(self.yes, "NO", 1.0 - self.yes.price)
+
+
+@dataclass
+class Ladder:
+    """Strikes de um evento, ordenados"""
+    key: LadderKey
+    strikes: np.ndarray                    # K crescente (pontos de S)
+    points: List[Tuple[str, _Contract]]    # ("above"/"below", contrato) por strike
+    ranges: List[Tuple[float, float, _Contract]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _long(self, i: int) -> LadderLeg:
+        """Perna que paga $1 se valor > K_i"""
+        kind, contract = self.points[i]
+        return contract.leg("YES" if kind == "above" else "NO")
+
+    def _short(self, i: int) -> LadderLeg:
+        """Perna que paga $1 se valor <= K_i"""
+        kind, contract = self.points[i]
+        return contract.leg("NO" if kind == "above" else "YES")
+
+    def survival(self) -> np.ndarray:
+        """S(K) implícita por strike (preço YES de "acima" ou 1 - YES de "abaixo")"""
+        return np.array([c.yes.price if kind == "above" else 1.0 - c.yes.price for kind, c in self.points])
+
+
+def build_ladders(markets: Sequence[Market], min_points: int = 2) -> List[Ladder]:
+    """
+    Agrupa mercados em escadas por (exchange, evento, título)
+
+    Strikes repetidos ficam com o primeiro mercado; strikes sem YES cotado e
+    escadas com menos de `min_points` strikes são descartados.
+    """
+    yes: Dict[LadderKey, Dict[Tuple[str, float, Optional[float]], Market]] = {}
+    no: Dict[LadderKey, Dict[Tuple[str, float, Optional[float]], Market]] = {}
+    for market in markets:
+        if not market.price or not 0 < market.price < 1:
+            continue
+        outcome = market.outcome.upper()
+        if outcome not in ("YES", "NO"):
+            continue
+        parsed = ladder_key(market)
+        if parsed is None:
+            continue
+        key, subtitle = parsed
+        strike = parse_strike(subtitle)
+        if strike is not None:
+            (yes if outcome == "YES" else no).setdefault(key, {}).setdefault(strike, market)
+
+    ladders = []
+    for key, group in yes.items():
+        strikes, points, ranges = [], [], []
+        quoted_no = no.get(key, {})
+        for strike, market in sorted(group.items(), key=lambda item: (item[0][1], item[0][0])):
+            kind, low, high = strike
+            contract = _Contract(yes=market, no=quoted_no.get(strike))
+            if kind == "range":
+                ranges.append((low, high, contract))
+            elif not strikes or strikes[-1] != low:
+                strikes.append(low)
+                points.append((kind, contract))
+        if len(points) < min_points:
+            continue
+        ladders.append(Ladder(key=key, strikes=np.array(strikes, dtype=np.float64), points=points, ranges=ranges))
+    return ladders
+
+
+def _fee(market: Market) -> float:
+    return EXCHANGE_FEES.get(market.exchange, DEFAULT_FEE)
+
+
+def _trade(strategy: str, legs: List[LadderLeg], payout: float, explanation: str) -> LadderTrade:
+    cost = sum(leg.price for leg in legs)
+    fees = sum(leg.price * _fee(leg.market) for leg in legs)
+    return LadderTrade(strategy=strategy, legs=legs, cost=cost, payout=payout, fees=fees,
+                       net_profit=payout - cost - fees, explanation=explanation)
+
+
+def _leg_costs(ladder: Ladder) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(ladder)
+    long_cost = np.fromiter((ladder._long(i).price for i in range(n)), dtype=np.float64, count=n)
+    short_cost = np.fromiter((ladder._short(i).price for i in range(n)), dtype=np.float64, count=n)
+    return long_cost, short_cost
+
+
+def monotonicity_trades(ladder: Ladder, min_profit: float = 0.0) -> List[LadderTrade]:
+    """
+    Comprado em S(K_i) + vendido em S(K_j), i < j: paga $1 (ou $2 entre os strikes)
+
+    Para cada j, o melhor i é o de menor custo entre os strikes abaixo
+    (mínimo acumulado), então a escada inteira sai em O(n).
+    """
+    if len(ladder) < 2:
+        return []
+    long_cost, short_cost = _leg_costs(ladder)
+    best_long = np.minimum.accumulate(long_cost)
+    # Índice do mínimo acumulado: última posição onde o custo igualou o mínimo
+    best_index = np.maximum.accumulate(np.where(long_cost == best_long, np.arange(len(ladder)), 0))
+    cost = best_long[:-1] + short_cost[1:]
+
+    trades = []
+    for j in np.flatnonzero(cost < 1.0) + 1:
+        i = int(best_index[j - 1])
+        trade = _trade(
+            "ladder_monotonicity",
+            [ladder._long(i), ladder._short(j)],
+            1.0,
+            f"S({ladder.strikes[i]:g}) custa {long_cost[i]:.4f} e o complemento de S({ladder.strikes[j]:g}) "
+            f"{short_cost[j]:.4f}: ${cost[j - 1]:.4f} garante $1.00 (preços da escada fora de ordem)"
+        )
+        if trade.profit_pct > min_profit:
+            trades.append(trade)
+    return trades
+
+
+def butterfly_trades(ladder: Ladder, min_profit: float = 0.0) -> List[LadderTrade]:
+    """Faixas [a, b) contra S(a) - S(b), quando os dois strikes estão na escada"""
+    if not ladder.ranges or len(ladder) < 2:
+        return []
+    low = np.array([r[0] for r in ladder.ranges])
+    high = np.array([r[1] for r in ladder.ranges])
+    a = np.searchsorted(ladder.strikes, low)
+    b = np.searchsorted(ladder.strikes, high)
+    n = len(ladder)
+    found = (a < n) & (b < n)
+    found[found] &= (ladder.strikes[a[found]] == low[found]) & (ladder.strikes[b[found]] == high[found])
+    if not found.any():
+        return []
+
+    long_cost, short_cost = _leg_costs(ladder)
+    range_yes = np.array([r[2].leg("YES").price for r in ladder.ranges])
+    range_no = np.array([r[2].leg("NO").price for r in ladder.ranges])
+    a_safe, b_safe = np.where(found, a, 0), np.where(found, b, 0)
+    # Faixa barata: YES da faixa + vendido em S(a) + comprado em S(b) -> paga $1
+    cheap = range_yes + short_cost[a_safe] + long_cost[b_safe]
+    # Faixa cara: NO da faixa + comprado em S(a) + vendido em S(b) -> paga $2
+    rich = range_no + long_cost[a_safe] + short_cost[b_safe]
+
+    trades = []
+    for r in np.flatnonzero(found & ((cheap < 1.0) | (rich < 2.0))):
+        i, j = int(a[r]), int(b[r])
+        contract = ladder.ranges[r][2]
+        if cheap[r] < 1.0:
+            trade = _trade("ladder_butterfly", [contract.leg("YES"), ladder._short(i), ladder._long(j)], 1.0,
+                           f"Faixa {low[r]:g}-{high[r]:g} a {range_yes[r]:.4f} abaixo de S({low[r]:g}) - S({high[r]:g}): "
+                           f"${cheap[r]:.4f} garante $1.00")
+        else:
+            trade = _trade("ladder_butterfly", [contract.leg("NO"), ladder._long(i), ladder._short(j)], 2.0,
+                           f"Faixa {low[r]:g}-{high[r]:g} a {range_yes[r]:.4f} acima de S({low[r]:g}) - S({high[r]:g}): "
+                           f"${rich[r]:.4f} garante $2.00")
+        if trade.profit_pct > min_profit:
+            trades.append(trade)
+    return trades
+
+
+def find_ladder_arbitrage(markets: Sequence[Market], min_profit: float = 0.0) -> List[LadderTrade]:
+    """Trades sem risco de todas as escadas, do maior para o menor lucro percentual"""
+    trades = []
+    for ladder in build_ladders(markets):
+        trades.extend(monotonicity_trades(ladder, min_profit))
+        trades.extend(butterfly_trades(ladder, min_profit))
+    trades.sort(key=lambda t: t.profit_pct, reverse=True)
+    return trades
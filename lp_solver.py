@@ -0,0 +1,273 @@
+"""
+Programação linear para arbitragem em conjuntos de outcomes mutuamente exclusivos
+
+Um conjunto mutex (ex: "Quem vence a eleição?" com N candidatos, cotado em uma
+ou mais exchanges) paga exatamente 1 no outcome vencedor. Para cada cotação
+(perna) o solver decide quantos contratos comprar do outcome (paga 1 se ele
+vencer) e quantos comprar do contrário (vender o outcome a p = comprar NO a
+1 - p, paga 1 se ele perder). O LP maximiza o lucro garantido t:
+
+    max t
+    s.a. t <= payoff(s) - custo        para cada outcome s vencedor
+         custo da perna <= liquidez    (teto por perna, em USD)
+         custo total <= orçamento
+         quantidades >= 0, t >= 0
+
+Custo inclui a taxa da exchange sobre o valor pago. Como a origem é sempre
+viável, basta um simplex primal sem fase 1 (sem dependências). Com SciPy
+instalado, todos os grupos do ciclo são resolvidos em uma única chamada HiGHS
+com as matrizes em blocos diagonais (os problemas são independentes, então o
+ótimo conjunto é a soma dos ótimos).
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from exchanges.base import Market
+from config import EXCHANGE_FEES, MAX_TRADE_INVESTMENT, LP_BACKEND
+
+try:
+    from scipy import sparse
+    from scipy.optimize import linprog
+except ImportError:  # SciPy é opcional: sem ele usa o simplex próprio
+    sparse = None
+    linprog = None
+
+DEFAULT_FEE = 0.02  # Mesmo padrão do ArbitrageExpert para exchanges sem taxa configurada
+
+
+# ----------------------------------------------------------------------
+# LP genérico: max c·x s.a. A x <= b, x >= 0, com b >= 0
+# ----------------------------------------------------------------------
+
+@dataclass
+class LinearProgram:
+    c: np.ndarray  # Objetivo (maximização)
+    A: np.ndarray  # Restrições <=
+    b: np.ndarray  # Lado direito (>= 0: origem viável)
+
+
+def simplex_max(c: np.ndarray, A: np.ndarray, b: np.ndarray, max_iterations: int = 5000) -> Tuple[np.ndarray, float]:
+    """
+    Simplex primal em tableau denso com regra de Bland (sem ciclagem)
+
+    Returns:
+        (x ótimo, valor ótimo)
+
+    Raises:
+        ValueError: b negativo (origem inviável) ou problema ilimitado
+    """
+    c = np.asarray(c, dtype=np.float64)
+    A = np.asarray(A, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    m, n = A.shape
+    if np.any(b < 0):
+        raise ValueError("simplex_max exige b >= 0")
+    eps = 1e-12
+
+    # Tableau [A | I | b] com a linha de custos reduzidos no fim
+    tableau = np.zeros((m + 1, n + m + 1))
+    tableau[:m, :n] = A
+    tableau[:m, n:n + m] = np.eye(m)
+    tableau[:m, -1] = b
+    tableau[m, :n] = -c
+    basis = list(range(n, n + m))
+
+    for _ in range(max_iterations):
+        entering = next((j for j in range(n + m) if tableau[m, j] < -eps), None)
+        if entering is None:
+            break
+        column = tableau[:m, entering]
+        positive = column > eps
+        if not positive.any():
+            raise ValueError("LP ilimitado")
+        ratios = np.full(m, np.inf)
+        ratios[positive] = tableau[:m, -1][positive] / column[positive]
+        best = ratios.min()
+        # Empate na razão: menor índice de variável básica (Bland)
+        leaving = min((i for i in range(m) if ratios[i] <= best + eps), key=lambda i: basis[i])
+
+        tableau[leaving] /= tableau[leaving, entering]
+        for i in range(m + 1):
+            if i != leaving and tableau[i, entering] != 0:
+                tableau[i] -= tableau[i, entering] * tableau[leaving]
+        basis[leaving] = entering
+    else:
+        raise ValueError("Simplex não convergiu")
+
+    x = np.zeros(n + m)
+    x[basis] = tableau[:m, -1]
+    return x[:n], float(tableau[m, -1])
+
+
+def _scipy_available() -> bool:
+    return linprog is not None
+
+
+def solve_batch(problems: Sequence[LinearProgram], backend: str = LP_BACKEND) -> List[Tuple[np.ndarray, float]]:
+    """
+    Resolve vários LPs independentes
+
+    backend: "simplex" (sempre o próprio), "scipy" (exige SciPy) ou "auto"
+    (SciPy quando instalado). Com SciPy, uma única chamada com blocos diagonais.
+    """
+    if not problems:
+        return []
+    if backend == "scipy" and not _scipy_available():
+        raise ImportError("LP_BACKEND=scipy requer o pacote scipy")
+    if backend == "simplex" or not _scipy_available():
+        return [simplex_max(p.c, p.A, p.b) for p in problems]
+
+    result = linprog(
+        -np.concatenate([p.c for p in problems]),
+        A_ub=sparse.block_diag([sparse.csr_matrix(p.A) for p in problems], format="csr"),
+        b_ub=np.concatenate([p.b for p in problems]),
+        bounds=(0, None),
+        method="highs",
+    )
+    if result.status != 0:
+        # Algum bloco problemático: resolve um a um para isolar
+        return [simplex_max(p.c, p.A, p.b) for p in problems]
+    solutions = []
+    offset = 0
+    for p in problems:
+        x = np.clip(result.x[offset:offset + len(p.c)], 0.0, None)
+        solutions.append((x, float(p.c @ x)))
+        offset += len(p.c)
+    return solutions
+
+
+# ----------------------------------------------------------------------
+# Formulação mutex
+# ----------------------------------------------------------------------
+
+@dataclass
+class MutexPosition:
+    """Posição de uma perna do portfólio"""
+    market: Market
+    side: str        # "buy" (compra o outcome) ou "sell" (compra o contrário a 1 - p)
+    contracts: float
+    price: float     # Preço pago por contrato (p ou 1 - p)
+    cost: float      # USD pagos, com taxa
+
+
+@dataclass
+class MutexPortfolio:
+    """Portfólio de lucro garantido em um conjunto mutex"""
+    outcomes: List[str]
+    positions: List[MutexPosition] = field(default_factory=list)
+    cost: float = 0.0               # USD investidos, com taxas
+    fees: float = 0.0
+    guaranteed_payout: float = 0.0  # Menor pagamento entre os outcomes possíveis
+    profit: float = 0.0             # guaranteed_payout - cost
+
+    @property
+    def profit_pct(self) -> float:
+        return self.profit / self.cost if self.cost > 0 else 0.0
+
+    @property
+    def strategy(self) -> str:
+        sides = {p.side for p in self.positions}
+        if sides == {"buy"}:
+            return "mutex_buy"
+        if sides == {"sell"}:
+            return "mutex_sell"
+        return "mutex_lp"
+
+
+def _fee(market: Market) -> float:
+    return EXCHANGE_FEES.get(market.exchange, DEFAULT_FEE)
+
+
+def mutex_program(
+    legs: Sequence[Tuple[str, Market]],
+    budget: float = MAX_TRADE_INVESTMENT
+) -> Tuple[LinearProgram, List[str]]:
+    """
+    LP de um conjunto mutex
+
+    Args:
+        legs: (outcome, mercado) de cada cotação; o mesmo outcome pode aparecer
+            em várias exchanges
+        budget: Custo total máximo em USD
+
+    Variáveis: [compra_0..compra_{J-1}, venda_0..venda_{J-1}, t]
+    """
+    outcomes = sorted({outcome for outcome, _ in legs})
+    J = len(legs)
+    prices = np.array([m.price for _, m in legs], dtype=np.float64)
+    fees = np.array([_fee(m) for _, m in legs], dtype=np.float64)
+    caps = np.array([max(m.liquidity or 0.0, 0.0) for _, m in legs], dtype=np.float64)
+    unit_cost = np.concatenate([prices * (1 + fees), (1 - prices) * (1 + fees)])
+
+    rows, rhs = [], []
+    # t <= payoff(s) - custo  ->  t - payoff(s) + custo <= 0
+    for outcome in outcomes:
+        wins = np.array([o == outcome for o, _ in legs])
+        payoff = np.concatenate([wins, ~wins]).astype(np.float64)
+        rows.append(np.concatenate([unit_cost - payoff, [1.0]]))
+        rhs.append(0.0)
+    # Teto de liquidez por perna (compra e venda consomem o mesmo mercado)
+    for j in range(J):
+        row = np.zeros(2 * J + 1)
+        row[j] = unit_cost[j]
+        row[J + j] = unit_cost[J + j]
+        rows.append(row)
+        rhs.append(caps[j])
+    # Orçamento
+    rows.append(np.concatenate([unit_cost, [0.0]]))
+    rhs.append(max(budget, 0.0))
+
+    c = np.zeros(2 * J + 1)
+    c[-1] = 1.0
+    return LinearProgram(c=c, A=np.array(rows), b=np.array(rhs)), outcomes
+
+
+def _portfolio(legs: Sequence[Tuple[str, Market]], outcomes: List[str], x: np.ndarray) -> MutexPortfolio:
+    J = len(legs)
+    portfolio = MutexPortfolio(outcomes=outcomes)
+    payouts = dict.fromkeys(outcomes, 0.0)
+    for j, (outcome, market) in enumerate(legs):
+        fee = _fee(market)
+        for side, contracts, price in (("buy", x[j], market.price), ("sell", x[J + j], 1 - market.price)):
+            if contracts <= 1e-9:
+                continue
+            cost = contracts * price * (1 + fee)
+            portfolio.positions.append(MutexPosition(market, side, float(contracts), float(price), float(cost)))
+            portfolio.cost += cost
+            portfolio.fees += contracts * price * fee
+            for s in outcomes:
+                if (s == outcome) == (side == "buy"):
+                    payouts[s] += contracts
+    portfolio.guaranteed_payout = min(payouts.values()) if payouts else 0.0
+    portfolio.profit = portfolio.guaranteed_payout - portfolio.cost
+    return portfolio
+
+
+def solve_mutex_groups(
+    groups: Sequence[Sequence[Tuple[str, Market]]],
+    budget: float = MAX_TRADE_INVESTMENT,
+    backend: str = LP_BACKEND
+) -> List[Optional[MutexPortfolio]]:
+    """
+    Portfólio de lucro garantido de cada grupo (None sem lucro), em lote
+
+    Pernas com preço fora de (0, 1) são ignoradas.
+    """
+    valid = [[(o, m) for o, m in legs if m.price and 0 < m.price < 1] for legs in groups]
+    programs, indices, outcome_sets = [], [], []
+    for i, legs in enumerate(valid):
+        if len({o for o, _ in legs}) < 2:
+            continue
+        program, outcomes = mutex_program(legs, budget)
+        programs.append(program)
+        indices.append(i)
+        outcome_sets.append(outcomes)
+
+    results: List[Optional[MutexPortfolio]] = [None] * len(groups)
+    for i, outcomes, (x, value) in zip(indices, outcome_sets, solve_batch(programs, backend)):
+        if value <= 1e-9:
+            continue
+        portfolio = _portfolio(valid[i], outcomes, x)
+        if portfolio.profit > 1e-9:
+            results[i] = portfolio
+    return results
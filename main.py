@@ -30,6 +30,12 @@ async def monitor_continuous():
     await monitor.run()
 
 
+async def monitor_scheduled():
+    """Executa monitor com polling independente por exchange"""
+    monitor = ArbitrageMonitor()
+    await monitor.run_scheduled()
+
+
 async def search_event(query: str):
     """Busca eventos específicos"""
     monitor = ArbitrageMonitor()
@@ -52,6 +58,11 @@ def main():
         action="store_true",
         help="Monitoramento contínuo"
     )
+    parser.add_argument(
+        "--scheduled",
+        action="store_true",
+        help="Monitoramento com cadência própria por exchange"
+    )
     parser.add_argument(
         "--analyze",
         action="store_true",
@@ -67,6 +78,8 @@ def main():
     
     if args.monitor:
         asyncio.run(monitor_continuous())
+    elif args.scheduled:
+        asyncio.run(monitor_scheduled())
     elif args.search:
         asyncio.run(search_event(args.search))
     else:
@@ -0,0 +1,144 @@
+"""
+Diferença entre snapshots de mercados de ciclos consecutivos
+
+Compara o snapshot anterior com o atual por (exchange, market_id) e classifica
+cada mercado em novo, removido, preço movido (além de um epsilon), liquidez
+alterada ou texto alterado (pergunta, outcome, URL ou expiração). O resultado
+(MarketDiff) é publicado pelo MarketRegistry para que matching, arbitragem e o
+broadcast via WebSocket trabalhem só sobre o que mudou.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from exchanges.base import Market
+from config import MARKET_DIFF_PRICE_EPSILON, MARKET_DIFF_LIQUIDITY_PCT
+
+MarketKey = Tuple[str, str]  # (exchange, market_id)
+MarketChange = Tuple[Market, Market]  # (anterior, atual)
+
+
+def market_key(market: Market) -> MarketKey:
+    return (market.exchange, market.market_id)
+
+
+@dataclass
+class MarketDiff:
+    """
+    Mudanças de um ciclo para o seguinte
+
+    Um mercado pode aparecer em mais de uma categoria de alteração (ex: preço e
+    liquidez); `changed_keys` reúne todas as chaves afetadas.
+    """
+    added: List[Market] = field(default_factory=list)
+    removed: List[Market] = field(default_factory=list)
+    price_moved: List[MarketChange] = field(default_factory=list)
+    liquidity_changed: List[MarketChange] = field(default_factory=list)
+    text_changed: List[MarketChange] = field(default_factory=list)
+    unchanged: int = 0
+    initial: bool = False  # Primeiro snapshot: tudo é novo, sem base para incremental
+
+    @property
+    def changed_keys(self) -> Set[MarketKey]:
+        keys = {market_key(m) for m in self.added}
+        keys.update(market_key(m) for m in self.removed)
+        for changes in (self.price_moved, self.liquidity_changed, self.text_changed):
+            keys.update(market_key(new) for _, new in changes)
+        return keys
+
+    @property
+    def rematch_keys(self) -> Set[MarketKey]:
+        """Mercados cujo matching precisa ser refeito (novos ou com texto alterado)"""
+        keys = {market_key(m) for m in self.added}
+        keys.update(market_key(new) for _, new in self.text_changed)
+        return keys
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.price_moved or self.liquidity_changed or self.text_changed)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "price_moved": len(self.price_moved),
+            "liquidity_changed": len(self.liquidity_changed),
+            "text_changed": len(self.text_changed),
+            "unchanged": self.unchanged,
+        }
+
+    def to_dict(self, limit: int = 200) -> Dict:
+        """Versão serializável para broadcast (até `limit` itens por categoria)"""
+        def ref(market: Market) -> Dict:
+            return {"exchange": market.exchange, "market_id": market.market_id}
+
+        return {
+            **self.summary(),
+            "added_markets": [ref(m) for m in self.added[:limit]],
+            "removed_markets": [ref(m) for m in self.removed[:limit]],
+            "price_changes": [
+                {**ref(new), "old_price": old.price, "price": new.price}
+                for old, new in self.price_moved[:limit]
+            ],
+            "liquidity_changes": [
+                {**ref(new), "old_liquidity": old.liquidity, "liquidity": new.liquidity}
+                for old, new in self.liquidity_changed[:limit]
+            ],
+            "text_changes": [ref(new) for _, new in self.text_changed[:limit]],
+        }
+
+
+def _text_changed(old: Market, new: Market) -> bool:
+    return (old.question != new.question or old.outcome != new.outcome or
+            old.url != new.url or old.expires_at != new.expires_at)
+
+
+def diff_markets(
+    previous: Optional[Mapping[MarketKey, Market]],
+    current: Iterable[Market],
+    price_epsilon: float = MARKET_DIFF_PRICE_EPSILON,
+    liquidity_pct: float = MARKET_DIFF_LIQUIDITY_PCT
+) -> MarketDiff:
+    """
+    Classifica os mercados de `current` em relação a `previous`
+
+    Args:
+        previous: Índice (exchange, market_id) -> Market do ciclo anterior
+            (None = primeiro ciclo)
+        price_epsilon: Variação absoluta mínima de preço para contar como movida
+        liquidity_pct: Variação relativa mínima de liquidez para contar como alterada
+    """
+    current = list(current)
+    if previous is None:
+        return MarketDiff(added=current, initial=True)
+
+    diff = MarketDiff()
+    seen: Set[MarketKey] = set()
+    for market in current:
+        key = (market.exchange, market.market_id)
+        if key in seen:
+            continue  # Chave repetida: vale a primeira, como no índice do registro
+        seen.add(key)
+
+        old = previous.get(key)
+        if old is None:
+            diff.added.append(market)
+            continue
+        if old is market:
+            diff.unchanged += 1
+            continue
+
+        changed = False
+        if abs(market.price - old.price) > price_epsilon:
+            diff.price_moved.append((old, market))
+            changed = True
+        base = max(abs(old.liquidity), 1e-9)
+        if abs(market.liquidity - old.liquidity) / base > liquidity_pct:
+            diff.liquidity_changed.append((old, market))
+            changed = True
+        if _text_changed(old, market):
+            diff.text_changed.append((old, market))
+            changed = True
+        if not changed:
+            diff.unchanged += 1
+
+    diff.removed = [market for key, market in previous.items() if key not in seen]
+    return diff
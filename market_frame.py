@@ -0,0 +1,120 @@
+"""
+Snapshot colunar dos mercados de um ciclo
+
+MarketFrame guarda os campos numéricos dos mercados em arrays NumPy (preço,
+liquidez, volume, expiração em epoch, código da exchange, taxa e gas), com
+índice de volta para os objetos Market. É montado uma vez por ciclo e permite
+que filtros e a aritmética de lucro por par rodem como operações vetorizadas
+em vez de laços atributo por atributo.
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from exchanges.base import Market
+from config import EXCHANGE_FEES, GAS_FEES
+from pair_kernel import DEFAULT_FEE, PairLegs, pair_profit_kernel
+
+
+def _epoch(expires_at: Optional[datetime]) -> float:
+    # Datas sem timezone são hora local, como datetime.now() nas engines
+    return expires_at.timestamp() if expires_at else np.nan
+
+
+class MarketFrame:
+    """
+    Arrays paralelos à lista de mercados (posição i = markets[i])
+
+    Colunas: price, liquidity, volume, expiry (epoch, NaN sem expiração),
+    exchange_code (índice em `exchanges`), fee_rate, gas_fee (ETH) e is_yes.
+    """
+
+    def __init__(self, markets: Sequence[Market]):
+        self.markets: List[Market] = list(markets)
+        n = len(self.markets)
+
+        self.price = np.fromiter((m.price for m in self.markets), dtype=np.float64, count=n)
+        self.liquidity = np.fromiter((m.liquidity for m in self.markets), dtype=np.float64, count=n)
+        self.volume = np.fromiter((m.volume_24h for m in self.markets), dtype=np.float64, count=n)
+        self.expiry = np.fromiter((_epoch(m.expires_at) for m in self.markets), dtype=np.float64, count=n)
+        self.is_yes = np.fromiter((m.outcome.upper() == "YES" for m in self.markets), dtype=bool, count=n)
+
+        # Exchanges codificadas: taxas consultadas uma vez por exchange, não por mercado
+        codes: Dict[str, int] = {}
+        self.exchange_code = np.fromiter(
+            (codes.setdefault(m.exchange, len(codes)) for m in self.markets), dtype=np.int32, count=n
+        )
+        self.exchanges: List[str] = list(codes)
+        fee_table = np.array([EXCHANGE_FEES.get(name.lower(), DEFAULT_FEE) for name in self.exchanges], dtype=np.float64)
+        gas_table = np.array([GAS_FEES.get(name.lower(), 0) for name in self.exchanges], dtype=np.float64)
+        self.fee_rate = fee_table[self.exchange_code] if n else np.zeros(0)
+        self.gas_fee = gas_table[self.exchange_code] if n else np.zeros(0)
+
+        self._positions: Optional[Dict[Market, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+
+    def position(self, market: Market) -> int:
+        """Posição do mercado no frame (KeyError se ausente)"""
+        if self._positions is None:
+            self._positions = {m: i for i, m in enumerate(self.markets)}
+        return self._positions[market]
+
+    def positions(self, markets: Sequence[Market]) -> np.ndarray:
+        return np.fromiter((self.position(m) for m in markets), dtype=np.intp, count=len(markets))
+
+    def select(self, mask: np.ndarray) -> List[Market]:
+        """Mercados onde a máscara (ou lista de posições) é verdadeira"""
+        indices = np.flatnonzero(mask) if mask.dtype == bool else mask
+        markets = self.markets
+        return [markets[i] for i in indices]
+
+    def exchange_mask(self, name: str) -> np.ndarray:
+        code = self.exchanges.index(name) if name in self.exchanges else -1
+        return self.exchange_code == code
+
+    # ------------------------------------------------------------------
+    # Filtros
+    # ------------------------------------------------------------------
+
+    def hours_to_expiry(self, now: Optional[float] = None) -> np.ndarray:
+        """Horas até a expiração (NaN sem data; NaN falha em qualquer comparação)"""
+        now = time.time() if now is None else now
+        return (self.expiry - now) / 3600.0
+
+    def expiring_between(self, min_hours: float, max_hours: float, now: Optional[float] = None) -> np.ndarray:
+        hours = self.hours_to_expiry(now)
+        return (hours >= min_hours) & (hours <= max_hours)
+
+    # ------------------------------------------------------------------
+    # Aritmética por par
+    # ------------------------------------------------------------------
+
+    def pair_profit(
+        self,
+        first: np.ndarray,
+        second: np.ndarray,
+        investment: float = 100.0
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Lucro de comprar o mais barato e vender o mais caro de cada par
+
+        Mesma conta de ArbitrageEngine.calculate_arbitrage a preço de mercado
+        (taxa sobre investimento e receita + gas convertido em USD).
+
+        Returns:
+            (posições de compra, posições de venda, lucro líquido / investimento)
+        """
+        first = np.asarray(first, dtype=np.intp)
+        second = np.asarray(second, dtype=np.intp)
+        result = pair_profit_kernel(PairLegs.from_frame(self, first, second),
+                                    normalize_outcomes=False, investment=investment)
+        # Empate de preço compra no segundo, como a engine
+        buy = np.where(result.low_is_a, first, second)
+        sell = np.where(result.low_is_a, second, first)
+        return buy, sell, result.profit_pct
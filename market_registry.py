@@ -0,0 +1,158 @@
+"""
+Registro global de mercados do ciclo
+
+MarketRegistry guarda o snapshot mais recente de mercados com índice por
+(exchange, market_id) e índices secundários por exchange, outcome e faixa de
+expiração. Cada ciclo monta um MarketSnapshot novo (imutável) e troca a
+referência de uma vez: leitores da API pegam `registry.snapshot` e enxergam um
+conjunto consistente sem locks, mesmo com o monitor publicando em outra thread.
+Cada snapshot carrega o MarketDiff em relação ao anterior.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from exchanges.base import Market
+from market_diff import MarketDiff, diff_markets
+
+MarketKey = Tuple[str, str]  # (exchange, market_id)
+
+# Faixas de expiração (limite superior em horas a partir da criação do snapshot)
+EXPIRY_BUCKETS: Tuple[Tuple[str, float], ...] = (
+    ("24h", 24),
+    ("7d", 24 * 7),
+    ("30d", 24 * 30),
+    ("90d", 24 * 90),
+)
+EXPIRY_LATER = "later"
+EXPIRY_EXPIRED = "expired"
+EXPIRY_NONE = "none"
+
+
+def expiry_bucket(expires_at: Optional[datetime], now: datetime) -> str:
+    """Faixa de expiração do mercado em relação a `now`"""
+    if not expires_at:
+        return EXPIRY_NONE
+    if expires_at.tzinfo is not None and now.tzinfo is None:
+        now = now.astimezone()
+    elif expires_at.tzinfo is None and now.tzinfo is not None:
+        now = now.replace(tzinfo=None)
+    hours = (expires_at - now).total_seconds() / 3600
+    if hours < 0:
+        return EXPIRY_EXPIRED
+    for name, limit in EXPIRY_BUCKETS:
+        if hours <= limit:
+            return name
+    return EXPIRY_LATER
+
+
+@dataclass(frozen=True, eq=False)
+class MarketSnapshot:
+    """Conjunto imutável de mercados de um ciclo, com índices"""
+    markets: Tuple[Market, ...] = ()
+    version: int = 0
+    created_at: Optional[datetime] = None
+    by_key: Dict[MarketKey, Market] = field(default_factory=dict)
+    by_exchange: Dict[str, Tuple[Market, ...]] = field(default_factory=dict)
+    by_outcome: Dict[str, Tuple[Market, ...]] = field(default_factory=dict)
+    by_expiry: Dict[str, Tuple[Market, ...]] = field(default_factory=dict)
+    diff: MarketDiff = field(default_factory=lambda: MarketDiff(initial=True))  # Em relação ao snapshot anterior
+
+    @classmethod
+    def build(
+        cls,
+        markets: Iterable[Market],
+        version: int = 0,
+        now: Optional[datetime] = None,
+        previous: Optional["MarketSnapshot"] = None
+    ) -> "MarketSnapshot":
+        now = now or datetime.now()
+        markets = tuple(markets)
+        by_key: Dict[MarketKey, Market] = {}
+        by_exchange: Dict[str, List[Market]] = {}
+        by_outcome: Dict[str, List[Market]] = {}
+        by_expiry: Dict[str, List[Market]] = {}
+
+        for market in markets:
+            # Chave repetida: vale a primeira ocorrência
+            by_key.setdefault((market.exchange, market.market_id), market)
+            by_exchange.setdefault(market.exchange, []).append(market)
+            by_outcome.setdefault(market.outcome.upper(), []).append(market)
+            by_expiry.setdefault(expiry_bucket(market.expires_at, now), []).append(market)
+
+        return cls(
+            markets=markets,
+            version=version,
+            created_at=now,
+            by_key=by_key,
+            by_exchange={k: tuple(v) for k, v in by_exchange.items()},
+            by_outcome={k: tuple(v) for k, v in by_outcome.items()},
+            by_expiry={k: tuple(v) for k, v in by_expiry.items()},
+            diff=diff_markets(previous.by_key if previous is not None else None, markets),
+        )
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def get(self, exchange: str, market_id: str) -> Optional[Market]:
+        """Mercado por (exchange, market_id) em O(1)"""
+        return self.by_key.get((exchange, market_id))
+
+    def filter(
+        self,
+        exchange: Optional[str] = None,
+        outcome: Optional[str] = None,
+        expiry: Optional[str] = None
+    ) -> Tuple[Market, ...]:
+        """Mercados que atendem a todos os critérios informados (ordem original)"""
+        groups = []
+        if exchange is not None:
+            groups.append(self.by_exchange.get(exchange, ()))
+        if outcome is not None:
+            groups.append(self.by_outcome.get(outcome.upper(), ()))
+        if expiry is not None:
+            groups.append(self.by_expiry.get(expiry, ()))
+        if not groups:
+            return self.markets
+
+        # Parte do menor índice e confere os demais por identidade
+        groups.sort(key=len)
+        result = groups[0]
+        for other in groups[1:]:
+            ids = {id(m) for m in other}
+            result = tuple(m for m in result if id(m) in ids)
+        return result
+
+
+class MarketRegistry:
+    """Dono do snapshot atual; publish() troca a referência atomicamente"""
+
+    def __init__(self):
+        self._snapshot = MarketSnapshot.build(())
+        self._listeners: List[Callable[[MarketSnapshot], None]] = []
+
+    def on_publish(self, callback: Callable[[MarketSnapshot], None]):
+        """Registra callback chamado com cada snapshot novo (e seu diff)"""
+        self._listeners.append(callback)
+
+    @property
+    def snapshot(self) -> MarketSnapshot:
+        """Snapshot atual (guarde a referência para leituras consistentes)"""
+        return self._snapshot
+
+    def publish(self, markets: Iterable[Market], now: Optional[datetime] = None) -> MarketSnapshot:
+        """Monta snapshot novo fora do lugar e o publica com uma única atribuição"""
+        previous = self._snapshot if self._snapshot.version else None
+        snapshot = MarketSnapshot.build(markets, version=self._snapshot.version + 1, now=now, previous=previous)
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"[Registry] erro no listener: {e}")
+        return snapshot
+
+    def get(self, exchange: str, market_id: str) -> Optional[Market]:
+        return self._snapshot.get(exchange, market_id)
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
@@ -1,15 +1,49 @@
 """Validador de equivalência de mercados para evitar falsas arbitragens"""
-from typing import List, Tuple, Dict
+import threading
+from collections import OrderedDict
+from typing import List, Tuple, Dict, Optional
 from exchanges.base import Market
 from datetime import datetime, timedelta
+from matcher import EventMatcher
+from config import VALIDATION_CACHE_SIZE
 import re
 
 
 class MarketValidator:
-    """Valida se dois mercados representam o mesmo evento"""
+    """
+    Valida se dois mercados representam o mesmo evento
     
-    def __init__(self):
+    O matcher de texto é criado uma vez e os veredictos ficam em cache LRU por
+    par (exchange, market_id), junto com a versão dos campos que os decidem
+    (pergunta, outcome, expiração, preço e liquidez): o mesmo par com os mesmos
+    dados não é revalidado, e um par cujo preço mudou é. O cache é compartilhado
+    entre a API (event loop) e a análise (asyncio.to_thread), então leitura,
+    inserção e despejo passam por um lock; a validação em si roda fora dele.
+    """
+    
+    def __init__(self, matcher: Optional[EventMatcher] = None, cache_size: int = VALIDATION_CACHE_SIZE):
         self.date_tolerance_days = 1  # Tolerância de 1 dia para datas de resolução
+        self.matcher = matcher or EventMatcher()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple, Tuple[Tuple, bool, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        # Cópias (ex: engine enviada a outro processo) não levam o cache nem o lock
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        del state["_lock"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _version(market: Market) -> Tuple:
+        return (market.question, market.outcome, market.expires_at, market.price, market.liquidity)
     
     def validate_equivalence(
         self, 
@@ -17,8 +51,43 @@ class MarketValidator:
         market2: Market,
         min_similarity: float = 0.70
     ) -> Tuple[bool, Dict]:
-        """Valida se dois mercados são equivalentes"""
-        
+        """Valida se dois mercados são equivalentes (memoizado por par e versão)"""
+        key = (market1.exchange, market1.market_id, market2.exchange, market2.market_id, min_similarity)
+        version = (self._version(market1), self._version(market2))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            else:
+                self.misses += 1
+                cached = None
+        if cached is not None:
+            equivalent, result = cached[1], cached[2]
+        else:
+            equivalent, result = self._validate(market1, market2, min_similarity)
+            with self._lock:
+                self._cache[key] = (version, equivalent, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        # Cópia rasa: quem chama pode acrescentar campos sem alterar o cache
+        return equivalent, {**result, "issues": list(result["issues"]), "checks": dict(result["checks"])}
+    
+    def cache_info(self) -> Dict:
+        with self._lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+    
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+    
+    def _validate(
+        self,
+        market1: Market,
+        market2: Market,
+        min_similarity: float
+    ) -> Tuple[bool, Dict]:
         validation_result = {
             "equivalent": False,
             "confidence": 0.0,
@@ -27,9 +96,7 @@ class MarketValidator:
         }
         
         # Check 1: Similaridade de texto
-        from matcher import EventMatcher
-        matcher = EventMatcher()
-        similarity = matcher.calculate_similarity(market1.question, market2.question)
+        similarity = self.matcher.calculate_similarity(market1.question, market2.question)
         validation_result["checks"]["text_similarity"] = similarity
         
         if similarity < min_similarity:
@@ -137,6 +137,13 @@ class ImprovedEventMatcher:
             "egypt": ["egypt", "egyptian"],
         }
     
+    def __getstate__(self):
+        # Cópias (ex: engine enviada a outro processo) não levam os caches
+        state = self.__dict__.copy()
+        state["_similarity_cache"] = {}
+        state["_entity_cache"] = {}
+        return state
+    
     def expand_with_synonyms(self, word: str) -> Set[str]:
         """Expande uma palavra com seus sinonimos"""
         word_lower = word.lower()
@@ -584,6 +591,57 @@ class ImprovedEventMatcher:
         
         print(f"[Matcher] {total_comparisons} total, {quick_filtered} filtrados, {len(matches)} matches")
         return matches
+    
+    def update_matches(
+        self,
+        previous_matches: List[Tuple[Market, Market]],
+        markets: List[Market],
+        rematch_keys: Set[Tuple[str, str]]
+    ) -> List[Tuple[Market, Market]]:
+        """
+        Atualiza os matches do ciclo anterior sem comparar todos os pares
+        
+        Matching depende só de pergunta, expiração e exchange: pares cujos dois
+        mercados continuam no snapshot e não estão em `rematch_keys` (novos ou
+        com texto alterado) são mantidos, com as instâncias atuais. Só os
+        mercados de `rematch_keys` são comparados com os das outras exchanges.
+        """
+        current = {}
+        for m in markets:
+            current.setdefault((m.exchange, m.market_id), m)
+        
+        matches = []
+        for market1, market2 in previous_matches:
+            key1 = (market1.exchange, market1.market_id)
+            key2 = (market2.exchange, market2.market_id)
+            if key1 in rematch_keys or key2 in rematch_keys:
+                continue
+            if key1 in current and key2 in current:
+                matches.append((current[key1], current[key2]))
+        
+        dirty = [current[key] for key in rematch_keys if key in current]
+        checked = set()
+        comparisons = 0
+        for market1 in dirty:
+            ex1 = market1.exchange.lower()
+            key1 = f"{market1.exchange}:{market1.market_id}"
+            for market2 in current.values():
+                if market2.exchange.lower() == ex1:
+                    continue
+                pair_key = tuple(sorted([key1, f"{market2.exchange}:{market2.market_id}"]))
+                if pair_key in checked:
+                    continue
+                checked.add(pair_key)
+                comparisons += 1
+                
+                if not self._quick_filter(market1.question, market2.question):
+                    continue
+                is_match, similarity, details = self.are_markets_equivalent(market1, market2)
+                if is_match:
+                    matches.append((market1, market2))
+        
+        print(f"[Matcher] incremental: {len(dirty)} mercados refeitos, {comparisons} comparações, {len(matches)} matches")
+        return matches
 
 
 # Funcao para testar com o exemplo do usuario
@@ -1,11 +1,12 @@
 """Monitor em tempo real de oportunidades de arbitragem"""
 import asyncio
-from typing import List
+import copy
+from typing import Dict, List, Optional, Callable, Awaitable
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from datetime import datetime
-from exchanges.base import Market
+from exchanges.base import Market, FrozenMarket
 from exchanges import (PolymarketExchange, PredictItV2Exchange, KalshiV2Exchange,
                        AugurExchange, ManifoldExchange, AzuroExchange, 
                        OmenExchange, SeerExchange)
@@ -15,7 +16,36 @@ from arbitrage_combinatorial import CombinatorialArbitrage, CombinatorialOpportu
 from arbitrage_probability import ProbabilityArbitrageEngine, ProbabilityArbitrageOpportunity
 from arbitrage_short_term import ShortTermArbitrageEngine, ShortTermArbitrageOpportunity
 from email_notifier import EmailNotifier
-from config import UPDATE_INTERVAL
+from exchanges.circuit_breaker import CircuitOpenError
+from exchanges.streaming import MarketDataStream, create_streams
+from scheduler import ExchangeScheduler
+from orderbook_service import OrderBookService
+from market_frame import MarketFrame
+from market_registry import MarketRegistry
+from price_history import PriceHistory, market_key
+from opportunity_lifecycle import OpportunityLifecycle, LifecycleEvent, OPENED, CLOSED
+from topk import TopK, score_key
+from engine_pool import EnginePool
+from config import (UPDATE_INTERVAL, EXCHANGE_FETCH_TIMEOUT, STREAMING_ENABLED,
+                    STREAM_REPLAY_DIR, STREAM_RECORD_DIR, STREAM_MAX_AGE, ORDERBOOK_ENABLED,
+                    INCREMENTAL_FULL_EVERY, TOP_K_SCORE)
+
+
+MIN_HEALTH = 0.25  # Piso da saúde (mesmo do scheduler): venue doente é buscada até 4x menos
+
+# Atributo do monitor e rótulo de log de cada engine do pool
+ENGINE_RESULTS = {
+    "traditional": "opportunities",
+    "combinatorial": "combinatorial_opportunities",
+    "probability": "probability_opportunities",
+    "short_term": "short_term_opportunities",
+}
+ENGINE_LABELS = {
+    "traditional": "tradicionais",
+    "combinatorial": "combinatórias",
+    "probability": "por probabilidade",
+    "short_term": "de curto prazo",
+}
 
 
 class ArbitrageMonitor:
@@ -34,34 +64,85 @@ class ArbitrageMonitor:
             # AugurExchange(),  # API descontinuada
         ]
         self.matcher = ImprovedEventMatcher(similarity_threshold=0.55, max_date_diff_days=21)
-        self.engine = ArbitrageEngine()
+        # Order books dos mercados com match (preço executável em vez de mid)
+        self.orderbooks: Optional[OrderBookService] = OrderBookService(self.exchanges) if ORDERBOOK_ENABLED else None
+        self.engine = ArbitrageEngine(orderbooks=self.orderbooks)
         self.combinatorial = CombinatorialArbitrage()  # Arbitragem combinatória
         self.probability_engine = ProbabilityArbitrageEngine(self.matcher)  # Arbitragem por probabilidade
-        self.short_term_engine = ShortTermArbitrageEngine(self.matcher)  # Arbitragem de curto prazo
+        self.history = PriceHistory()  # Ring buffers de preço por mercado entre ciclos
+        self.short_term_engine = ShortTermArbitrageEngine(self.matcher, history=self.history)  # Arbitragem de curto prazo
         self.last_update = None
         self.opportunities: List[ArbitrageOpportunity] = []
         self.combinatorial_opportunities: List[CombinatorialOpportunity] = []
         self.probability_opportunities: List[ProbabilityArbitrageOpportunity] = []
         self.short_term_opportunities: List[ShortTermArbitrageOpportunity] = []  # NOVO
-        self._cached_markets: List[Market] = []  # Cache de mercados
+        self.registry = MarketRegistry()  # Snapshot de mercados do ciclo (indexado, troca atômica)
+        self.matches: List[tuple] = []  # Pares do último ciclo (base do matching incremental)
+        self.engine_pool = EnginePool()  # Execução das engines (ENGINE_EXECUTOR: serial, thread ou process)
+        self._cycles_since_full = 0  # Ciclos incrementais desde a última análise completa
+        self._force_full = False  # Alguma engine falhou no ciclo anterior: o próximo refaz tudo
+        self._has_full_cycle = False  # Já houve análise completa (o registry pode ter snapshot sem ela)
+        self.lifecycle = OpportunityLifecycle()  # IDs estáveis e histórico das oportunidades entre ciclos
+        self.lifecycle_events: List[LifecycleEvent] = []  # Transições do último ciclo
+        self._last_markets: Dict[str, List[Market]] = {}  # Última busca boa por exchange (venues adiadas)
+        self._skipped_cycles: Dict[str, int] = {}  # Ciclos seguidos em que a exchange foi adiada
+        self.scheduler: Optional[ExchangeScheduler] = None  # Usado em run_scheduled()
+        self.streams: List[MarketDataStream] = []  # Streams WebSocket (STREAMING_ENABLED)
+    
+    @property
+    def _cached_markets(self) -> List[Market]:
+        """Mercados do último snapshot publicado (compatibilidade)"""
+        return self.registry.snapshot.markets
+    
+    @_cached_markets.setter
+    def _cached_markets(self, markets: List[Market]):
+        self.registry.publish(markets)
     
     async def fetch_all_markets(self) -> List[Market]:
-        """Busca mercados de todas as exchanges em paralelo com timeout"""
+        """Busca mercados de todas as exchanges em paralelo com timeout e circuit breaker"""
         all_markets = []
         
-        # Executa todas as exchanges em paralelo com timeout de 10s cada
-        tasks = [exchange.fetch_markets() for exchange in self.exchanges]
+        # Venues doentes são despriorizadas como no scheduler: com saúde h, a busca
+        # roda a cada int(1 / h) ciclos (até 4x menos) e nos demais vale a última
+        # busca boa. Exchanges com circuito aberto falham na hora (sem pagar timeout);
+        # as demais rodam juntas, então o ciclo espera no máximo um timeout
+        due = []
+        for exchange in self.exchanges:
+            stride = int(1 / max(exchange.health_score, MIN_HEALTH))
+            skipped = self._skipped_cycles.get(exchange.name, 0)
+            cached = self._last_markets.get(exchange.name)
+            if exchange.circuit_breaker.retry_in() <= 0 and cached and skipped + 1 < stride:
+                self._skipped_cycles[exchange.name] = skipped + 1
+                all_markets.extend(cached)
+                self.console.print(f"[yellow]{exchange.__class__.__name__} adiada (saúde {exchange.health_score:.2f}): "
+                                   f"{len(cached)} mercados da última busca[/yellow]")
+                continue
+            self._skipped_cycles[exchange.name] = 0
+            due.append(exchange)
+        
+        tasks = [exchange.fetch_markets_guarded(timeout=EXCHANGE_FETCH_TIMEOUT) for exchange in due]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        for exchange, result in zip(self.exchanges, results):
+        for exchange, result in zip(due, results):
+            name = exchange.__class__.__name__
             if isinstance(result, list):
                 all_markets.extend(result)
-                self.console.print(f"[green]{exchange.__class__.__name__}: {len(result)} mercados[/green]")
+                if result:
+                    self._last_markets[exchange.name] = result
+                self.console.print(f"[green]{name}: {len(result)} mercados (saúde {exchange.health_score:.2f})[/green]")
+            elif isinstance(result, CircuitOpenError):
+                self.console.print(f"[yellow]{name} pulada: {result}[/yellow]")
+            elif isinstance(result, asyncio.TimeoutError):
+                self.console.print(f"[red]{name} erro: timeout de {EXCHANGE_FETCH_TIMEOUT:.0f}s[/red]")
             elif isinstance(result, Exception):
-                self.console.print(f"[red]{exchange.__class__.__name__} erro: {result}[/red]")
+                self.console.print(f"[red]{name} erro: {result}[/red]")
         
         return all_markets
     
+    def get_exchange_health(self) -> List[dict]:
+        """Retorna estado do circuit breaker e health score de cada exchange"""
+        return [exchange.circuit_breaker.snapshot() for exchange in self.exchanges]
+    
     async def update(self):
         """Atualiza dados e encontra oportunidades (OTIMIZADO)"""
         start_time = datetime.now()
@@ -69,14 +150,50 @@ class ArbitrageMonitor:
         
         # 1. Busca mercados em paralelo
         markets = await self.fetch_all_markets()
-        self._cached_markets = markets  # Atualiza cache
         self.console.print(f"[green]✓ Encontrados {len(markets)} mercados em {(datetime.now() - start_time).total_seconds():.1f}s[/green]")
         
+        # Engines e busca de order books bloqueiam: roda fora do event loop (API e WebSocket seguem respondendo)
+        await asyncio.to_thread(self.analyze, markets, start_time)
+    
+    def analyze(self, markets: List[Market], start_time: Optional[datetime] = None):
+        """Executa matching e engines de arbitragem sobre um snapshot de mercados"""
+        start_time = start_time or datetime.now()
+        if self.engine_pool.concurrent:
+            # Engines em paralelo recebem mercados imutáveis (compartilhados entre workers)
+            markets = [m if isinstance(m, FrozenMarket) else m.freeze() for m in markets]
+        snapshot = self.registry.publish(markets)  # Atualiza cache
+        diff = snapshot.diff
+        frame = MarketFrame(markets)  # Colunas NumPy do ciclo, compartilhadas pelas engines
+        self.history.record(frame.markets, prices=frame.price, liquidity=frame.liquidity)
+        
+        # Incremental: só o que mudou desde o ciclo anterior; a cada
+        # INCREMENTAL_FULL_EVERY ciclos (ou sem análise completa anterior, ou depois
+        # de uma engine falhar e perder o diff daquele ciclo) refaz tudo
+        incremental = (self._has_full_cycle and not diff.initial and INCREMENTAL_FULL_EVERY > 0
+                       and not self._force_full and self._cycles_since_full < INCREMENTAL_FULL_EVERY)
+        self._cycles_since_full = self._cycles_since_full + 1 if incremental else 0
+        if not diff.initial:
+            changes = diff.summary()
+            self.console.print(f"[cyan]Δ {changes['added']} novos, {changes['removed']} removidos, "
+                               f"{changes['price_moved']} preços, {changes['liquidity_changed']} liquidez, "
+                               f"{changes['text_changed']} textos ({'incremental' if incremental else 'completo'})[/cyan]")
+        
         # 2. Encontra matches (rápido - só compara strings)
         match_start = datetime.now()
-        matches = self.matcher.find_matching_events(markets)
+        if incremental:
+            matches = self.matcher.update_matches(self.matches, markets, diff.rematch_keys)
+        else:
+            matches = self.matcher.find_matching_events(markets)
+        self.matches = matches
         self.console.print(f"[green]✓ Encontrados {len(matches)} pares em {(datetime.now() - match_start).total_seconds():.1f}s[/green]")
         
+        # 2b. Order books só dos mercados com match (cache com TTL por mercado)
+        if self.orderbooks is not None and matches:
+            book_start = datetime.now()
+            matched = {m for pair in matches for m in pair}
+            fetched = self.orderbooks.refresh_blocking(matched)
+            self.console.print(f"[green]✓ {fetched} order books atualizados em {(datetime.now() - book_start).total_seconds():.1f}s[/green]")
+        
         # 3. Calcula confiança (otimizado - cache interno do matcher)
         confidence_start = datetime.now()
         market_pairs = []
@@ -88,31 +205,85 @@ class ArbitrageMonitor:
             market_pairs.append((market1, market2, confidence))
         self.console.print(f"[green]✓ Confiança calculada em {(datetime.now() - confidence_start).total_seconds():.1f}s[/green]")
         
-        # 4. Encontra oportunidades tradicionais (rápido - só calcula lucros)
-        opp_start = datetime.now()
-        self.opportunities = self.engine.find_opportunities(market_pairs)
-        self.console.print(f"[green]✓ {len(self.opportunities)} oportunidades tradicionais em {(datetime.now() - opp_start).total_seconds():.1f}s[/green]")
-        
-        # 5. Arbitragem combinatória (Yes/No, relacionados)
-        comb_start = datetime.now()
-        self.combinatorial_opportunities = self.combinatorial.find_all_opportunities(markets)
-        self.console.print(f"[green]✓ {len(self.combinatorial_opportunities)} oportunidades combinatórias em {(datetime.now() - comb_start).total_seconds():.1f}s[/green]")
+        # 4-7. Engines são independentes dado o snapshot e os matches: o pool
+        # as executa em série (padrão) ou em paralelo, com timeout por engine
+        tasks = {}
+        # 4. Oportunidades tradicionais (rápido - só calcula lucros)
+        if incremental:
+            tasks["traditional"] = (self.engine.update_opportunities,
+                                    (self.opportunities, market_pairs, diff.changed_keys, frame))
+        else:
+            tasks["traditional"] = (self.engine.find_opportunities, (market_pairs, frame))
+        # 5 e 6 dependem só dos mercados: sem nenhuma mudança, resultado do ciclo anterior vale
+        if incremental and diff.is_empty:
+            self.console.print("[green]✓ Nenhuma mudança: combinatória e probabilidade reaproveitadas[/green]")
+        else:
+            # 5. Arbitragem combinatória (Yes/No, relacionados)
+            tasks["combinatorial"] = (self.combinatorial.find_all_opportunities, (markets,))
+            # 6. Arbitragem por probabilidade (compara % entre exchanges)
+            tasks["probability"] = (self.probability_engine.find_opportunities, (markets,))
+        # 7. Arbitragem de curto prazo (trades rápidos/diários)
+        short_term_engine = self.short_term_engine
+        if self.engine_pool.mode == "process":
+            # Cópia com o histórico só dos candidatos: não serializa os ring buffers inteiros
+            short_term_engine = copy.copy(short_term_engine)
+            candidates = short_term_engine._filter_short_term_markets(markets, frame)
+            short_term_engine.history = self.history.subset(market_key(m) for m in candidates)
+        tasks["short_term"] = (short_term_engine.find_opportunities, (markets, frame))
         
-        # 6. Arbitragem por probabilidade (compara % entre exchanges)
-        prob_start = datetime.now()
-        self.probability_opportunities = self.probability_engine.find_opportunities(markets)
-        self.console.print(f"[green]✓ {len(self.probability_opportunities)} oportunidades por probabilidade em {(datetime.now() - prob_start).total_seconds():.1f}s[/green]")
+        engines_start = datetime.now()
+        runs = self.engine_pool.run(tasks)
+        for name, run in runs.items():
+            label = ENGINE_LABELS[name]
+            if run.ok:
+                setattr(self, ENGINE_RESULTS[name], run.result)
+                self.console.print(f"[green]✓ {len(run.result)} oportunidades {label} em {run.wall_time:.1f}s "
+                                   f"(CPU {run.cpu_time:.1f}s)[/green]")
+            else:
+                # Falha, timeout ou execução anterior pendente: mantém o resultado do ciclo anterior
+                self.console.print(f"[red]✗ Engine {label}: {run.status} ({run.error}); resultado anterior mantido[/red]")
+        # Resultado mantido não viu as mudanças deste ciclo: o próximo não pode ser incremental
+        self._force_full = not all(run.ok for run in runs.values())
+        if not incremental:
+            self._has_full_cycle = True
+        if self.engine_pool.concurrent:
+            self.console.print(f"[green]✓ Engines em paralelo ({self.engine_pool.mode}): "
+                               f"{(datetime.now() - engines_start).total_seconds():.1f}s[/green]")
         
-        # 7. NOVO: Arbitragem de curto prazo (trades rápidos/diários)
-        short_start = datetime.now()
-        self.short_term_opportunities = self.short_term_engine.find_opportunities(markets)
-        self.console.print(f"[green]✓ {len(self.short_term_opportunities)} oportunidades de curto prazo em {(datetime.now() - short_start).total_seconds():.1f}s[/green]")
+        # 8. Ciclo de vida: só transições (aberta/fechada) viram eventos
+        self.lifecycle_events = self.lifecycle.update({
+            "traditional": self.opportunities,
+            "combinatorial": self.combinatorial_opportunities,
+            "probability": self.probability_opportunities,
+            "short_term": self.short_term_opportunities,
+        })
+        opened = sum(1 for event in self.lifecycle_events if event.type == OPENED)
+        closed = sum(1 for event in self.lifecycle_events if event.type == CLOSED)
+        self.console.print(f"[green]✓ Ciclo de vida: {opened} novas, {closed} fechadas, {len(self.lifecycle)} ativas[/green]")
         
         self.last_update = datetime.now()
         total_time = (self.last_update - start_time).total_seconds()
         total_opps = len(self.opportunities) + len(self.combinatorial_opportunities) + len(self.probability_opportunities) + len(self.short_term_opportunities)
         self.console.print(f"[bold green]✓ TOTAL: {total_opps} oportunidades em {total_time:.1f}s[/bold green]")
     
+    def top_opportunities(self, k: Optional[int] = 10, score: str = TOP_K_SCORE) -> List[tuple]:
+        """
+        As K melhores entre todas as engines por `score` (ver topk.SCORES)
+        
+        Retorna (tipo, oportunidade); percorre as listas do ciclo com um heap
+        de tamanho K, sem concatenar nem ordenar tudo.
+        """
+        key = score_key(score)
+        best = TopK(k, key=lambda item: key(item[1]))
+        for kind, opportunities in (
+            ("traditional", self.opportunities),
+            ("combinatorial", self.combinatorial_opportunities),
+            ("probability", self.probability_opportunities),
+            ("short_term", self.short_term_opportunities),
+        ):
+            best.extend((kind, opp) for opp in opportunities)
+        return best.items()
+    
     def render_dashboard(self) -> Table:
         """Renderiza dashboard de oportunidades"""
         table = Table(title="🚀 Oportunidades de Arbitragem")
@@ -137,6 +308,45 @@ class ArbitrageMonitor:
         
         return table
     
+    async def run_scheduled(self, on_update: Optional[Callable[[], Awaitable]] = None):
+        """
+        Executa monitor com polling independente por exchange
+        
+        Cada exchange é consultada na sua própria cadência (POLL_INTERVALS) e a
+        análise roda quando o snapshot muda (com debounce), não em sleep fixo.
+        """
+        self.console.print("[bold green]Iniciando monitor com scheduler por exchange...[/bold green]")
+        
+        async def on_change(markets: List[Market]):
+            # Preços do stream (mais recentes) sobrescrevem os do REST
+            for stream in self.streams:
+                await stream.sync_markets(markets)
+                markets = stream.apply_to_markets(markets, max_age=STREAM_MAX_AGE)
+            
+            # Engines são CPU-bound - roda fora do event loop para não atrasar os polls
+            await asyncio.to_thread(self.analyze, markets)
+            if on_update:
+                await on_update()
+        
+        self.scheduler = ExchangeScheduler(self.exchanges, on_change, console=self.console)
+        
+        stream_tasks = []
+        if STREAMING_ENABLED or STREAM_REPLAY_DIR:
+            self.streams = create_streams(self.exchanges, STREAM_REPLAY_DIR, STREAM_RECORD_DIR)
+            for stream in self.streams:
+                # Só mudanças de melhor bid/ask disparam nova análise (com debounce do scheduler)
+                stream.on_best_change(lambda change: self.scheduler.mark_changed())
+                stream_tasks.append(asyncio.create_task(stream.run()))
+            self.console.print(f"[green]Streaming ativo: {', '.join(s.name for s in self.streams) or 'nenhum'}[/green]")
+        
+        try:
+            await self.scheduler.run()
+        finally:
+            for stream in self.streams:
+                stream.stop()
+            for task in stream_tasks:
+                task.cancel()
+    
     async def run(self):
         """Executa monitor contínuo"""
         self.console.print("[bold green]Iniciando monitor de arbitragem...[/bold green]")
@@ -0,0 +1,232 @@
+"""
+Identidade estável e ciclo de vida das oportunidades entre ciclos
+
+Cada ciclo do monitor recalcula as listas de oportunidades do zero, então sem
+este módulo não dá para saber há quanto tempo um spread existe nem se um
+alerta é novo. Aqui cada oportunidade recebe um ID estável (hash dos mercados
+e da estratégia, como o _generate_opportunity_id do ArbitrageExpert) e um
+registro com first_seen, last_seen, lucro de pico, lucro atual e taxa de
+decaimento.
+
+OpportunityLifecycle.update recebe as oportunidades do ciclo e atualiza os
+registros em O(oportunidades). Só as transições viram eventos:
+
+- "opened": ID novo (ou reaberto depois de fechado)
+- "closed": ausente por LIFECYCLE_CLOSE_AFTER ciclos seguidos
+
+Alertas e UI reagem aos eventos em vez de às listas completas.
+"""
+import hashlib
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from exchanges.base import Market
+from config import LIFECYCLE_CLOSE_AFTER, LIFECYCLE_HISTORY_SIZE
+
+DECAY_ALPHA = 0.3  # Peso da observação nova na média móvel da taxa de decaimento
+
+OPENED = "opened"
+CLOSED = "closed"
+
+
+def opportunity_id(markets: Iterable[Market], strategy: str) -> str:
+    """ID estável: hash da estratégia e dos mercados (ordem não importa)"""
+    market_ids = sorted(f"{m.exchange}:{m.market_id}" for m in markets)
+    key = f"{strategy}:{':'.join(market_ids)}"
+    return hashlib.md5(key.encode()).hexdigest()[:12]
+
+
+def describe(kind: str, opp) -> Tuple[List[Market], str, float]:
+    """
+    (mercados, estratégia, lucro percentual) de uma oportunidade de qualquer engine
+
+    kind: "traditional", "combinatorial", "probability", "short_term" ou "expert"
+    """
+    if kind == "traditional":
+        return [opp.market_buy, opp.market_sell], "traditional", opp.profit_pct
+    if kind in ("probability", "short_term"):
+        return [opp.market_low, opp.market_high], kind, opp.profit_pct
+    if kind == "combinatorial":
+        return list(opp.markets), opp.strategy, opp.expected_profit_pct
+    if kind == "expert":
+        return list(opp.markets), opp.strategy, opp.net_profit_pct
+    raise ValueError(f"Tipo de oportunidade desconhecido: {kind}")
+
+
+def identify(kind: str, opp) -> str:
+    """ID estável de uma oportunidade de `kind` (ver describe)"""
+    if kind == "expert":
+        return opp.id
+    markets, strategy, _ = describe(kind, opp)
+    return opportunity_id(markets, f"{kind}:{strategy}")
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+@dataclass
+class OpportunityRecord:
+    """Histórico de uma oportunidade enquanto ela existe (e depois de fechada)"""
+    id: str
+    kind: str
+    strategy: str
+    markets: List[Tuple[str, str]]   # (exchange, market_id)
+    first_seen: float                # Epoch
+    last_seen: float
+    peak_profit_pct: float
+    current_profit_pct: float
+    decay_rate: float = 0.0          # Queda do lucro por minuto (média móvel; positivo = encolhendo)
+    cycles_seen: int = 1
+    missed_cycles: int = 0           # Ciclos seguidos sem aparecer
+    closed_at: Optional[float] = None
+    opportunity: object = field(default=None, repr=False)  # Objeto da engine no último ciclo
+
+    @property
+    def active(self) -> bool:
+        return self.closed_at is None
+
+    @property
+    def age_seconds(self) -> float:
+        return self.last_seen - self.first_seen
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "strategy": self.strategy,
+            "markets": [{"exchange": exchange, "market_id": market_id} for exchange, market_id in self.markets],
+            "status": "active" if self.active else "closed",
+            "first_seen": _iso(self.first_seen),
+            "last_seen": _iso(self.last_seen),
+            "closed_at": _iso(self.closed_at),
+            "age_seconds": self.age_seconds,
+            "cycles_seen": self.cycles_seen,
+            "peak_profit_pct": self.peak_profit_pct,
+            "current_profit_pct": self.current_profit_pct,
+            "decay_rate": self.decay_rate,
+        }
+
+
+@dataclass
+class LifecycleEvent:
+    """Transição de uma oportunidade em um ciclo"""
+    version: int        # Ciclo do lifecycle em que ocorreu
+    type: str           # OPENED ou CLOSED
+    record: OpportunityRecord
+    timestamp: float
+
+    def to_dict(self) -> Dict:
+        return {"version": self.version, "type": self.type, "timestamp": _iso(self.timestamp),
+                "opportunity": self.record.to_dict()}
+
+
+class OpportunityLifecycle:
+    """
+    Registros de oportunidades mantidos entre ciclos
+
+    Args:
+        close_after: Ciclos seguidos de ausência até fechar (evita alertas
+            repetidos quando um spread pisca)
+        history_size: Registros fechados e eventos guardados para consulta
+    """
+
+    def __init__(self, close_after: int = LIFECYCLE_CLOSE_AFTER, history_size: int = LIFECYCLE_HISTORY_SIZE):
+        self.close_after = max(close_after, 1)
+        self.version = 0
+        self.records: Dict[str, OpportunityRecord] = {}  # Ativos
+        self.closed: Dict[str, OpportunityRecord] = {}   # Fechados mais recentes (ordem de fechamento)
+        self.events: deque = deque(maxlen=max(history_size, 1))
+        self._history_size = max(history_size, 1)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, opp_id: str) -> Optional[OpportunityRecord]:
+        return self.records.get(opp_id) or self.closed.get(opp_id)
+
+    def update(self, cycle: Dict[str, Sequence], now: Optional[float] = None) -> List[LifecycleEvent]:
+        """
+        Atualiza os registros com as oportunidades de um ciclo
+
+        Args:
+            cycle: {kind: oportunidades da engine} (kinds de describe)
+            now: Epoch do ciclo (padrão: agora)
+
+        Returns:
+            Eventos de transição deste ciclo
+        """
+        now = time.time() if now is None else now
+        self.version += 1
+        events: List[LifecycleEvent] = []
+        seen = set()
+
+        for kind, opportunities in cycle.items():
+            for opp in opportunities:
+                markets, strategy, profit = describe(kind, opp)
+                opp_id = identify(kind, opp)
+                if opp_id in seen:
+                    continue  # Mesma oportunidade duas vezes no ciclo: vale a primeira
+                seen.add(opp_id)
+
+                record = self.records.get(opp_id)
+                if record is None:
+                    record = OpportunityRecord(
+                        id=opp_id, kind=kind, strategy=strategy,
+                        markets=[(m.exchange, m.market_id) for m in markets],
+                        first_seen=now, last_seen=now,
+                        peak_profit_pct=profit, current_profit_pct=profit,
+                        opportunity=opp,
+                    )
+                    self.records[opp_id] = record
+                    self.closed.pop(opp_id, None)
+                    events.append(LifecycleEvent(self.version, OPENED, record, now))
+                    continue
+
+                elapsed_minutes = (now - record.last_seen) / 60
+                if elapsed_minutes > 0:
+                    rate = (record.current_profit_pct - profit) / elapsed_minutes
+                    record.decay_rate = (rate if record.cycles_seen == 1
+                                         else DECAY_ALPHA * rate + (1 - DECAY_ALPHA) * record.decay_rate)
+                record.current_profit_pct = profit
+                record.peak_profit_pct = max(record.peak_profit_pct, profit)
+                record.last_seen = now
+                record.cycles_seen += 1
+                record.missed_cycles = 0
+                record.opportunity = opp
+
+        for opp_id in [i for i in self.records if i not in seen]:
+            record = self.records[opp_id]
+            record.missed_cycles += 1
+            if record.missed_cycles >= self.close_after:
+                record.closed_at = now
+                del self.records[opp_id]
+                self._remember_closed(record)
+                events.append(LifecycleEvent(self.version, CLOSED, record, now))
+
+        self.events.extend(events)
+        return events
+
+    def _remember_closed(self, record: OpportunityRecord):
+        self.closed[record.id] = record
+        while len(self.closed) > self._history_size:
+            del self.closed[next(iter(self.closed))]
+
+    def active(self) -> List[OpportunityRecord]:
+        """Registros ativos, do lucro atual maior para o menor"""
+        return sorted(self.records.values(), key=lambda r: r.current_profit_pct, reverse=True)
+
+    def events_since(self, version: int) -> List[LifecycleEvent]:
+        """Eventos de ciclos posteriores a `version` (limitado ao histórico guardado)"""
+        return [event for event in self.events if event.version > version]
+
+    def status(self) -> Dict:
+        return {
+            "version": self.version,
+            "active": len(self.records),
+            "closed": len(self.closed),
+            "events": len(self.events),
+            "close_after": self.close_after,
+        }
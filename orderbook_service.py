@@ -0,0 +1,155 @@
+"""
+Serviço de snapshots de order book
+
+Busca os books de todos os mercados do conjunto de matches em paralelo, com
+orçamento de requisições por exchange, normaliza em exchanges.orderbook.OrderBook
+e mantém cache com TTL por mercado (como ArrayOrderBook, com profundidade
+acumulada). As engines usam os books para precificar profundidade executável
+em vez de mid price.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from exchanges.base import ExchangeBase, Market
+from exchanges.http_client import RateLimiter, create_client
+from exchanges.orderbook import ArrayOrderBook
+from config import ORDERBOOK_TTL, ORDERBOOK_CONCURRENCY, ORDERBOOK_TIMEOUT, ORDERBOOK_RATE_LIMITS
+
+BookKey = Tuple[str, str]  # (exchange do mercado, market_id)
+
+
+@dataclass
+class CachedBook:
+    """Book em cache com instante de expiração"""
+    book: ArrayOrderBook
+    fetched_at: float
+    expires_at: float
+
+
+class OrderBookService:
+    """Busca e mantém order books dos mercados em análise"""
+
+    def __init__(
+        self,
+        exchanges: List[ExchangeBase],
+        ttl: float = ORDERBOOK_TTL,
+        concurrency: int = ORDERBOOK_CONCURRENCY,
+        timeout: float = ORDERBOOK_TIMEOUT,
+        rate_limits: Optional[Dict[str, float]] = None,
+        clock=time.monotonic
+    ):
+        self.exchanges = [ex for ex in exchanges if ex.supports_orderbooks]
+        self.ttl = ttl
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout
+        self.rate_limits = rate_limits if rate_limits is not None else ORDERBOOK_RATE_LIMITS
+        self.clock = clock
+        self.cache: Dict[BookKey, CachedBook] = {}
+        self.stats = {"requests": 0, "errors": 0, "cache_hits": 0}
+
+    def _exchange_for(self, market: Market) -> Optional[ExchangeBase]:
+        # Mercados agregados usam nome composto (ex: polyrouter_kalshi)
+        name = market.exchange.lower()
+        for exchange in self.exchanges:
+            if name == exchange.name or name.startswith(f"{exchange.name}_"):
+                return exchange
+        return None
+
+    def get(self, market: Market) -> Optional[ArrayOrderBook]:
+        """Book em cache ainda válido (None se ausente ou expirado)"""
+        cached = self.cache.get((market.exchange, market.market_id))
+        if cached and cached.expires_at > self.clock():
+            return cached.book
+        return None
+
+    def _pending(self, markets: Iterable[Market]) -> Dict[Tuple[str, str], Tuple[ExchangeBase, Market]]:
+        """Agrupa mercados sem book válido por requisição (exchange, chave)"""
+        pending = {}
+        for market in markets:
+            if self.get(market) is not None:
+                self.stats["cache_hits"] += 1
+                continue
+            exchange = self._exchange_for(market)
+            if exchange is None:
+                continue
+            key = exchange.orderbook_key(market)
+            if key is None:
+                continue
+            pending.setdefault((exchange.name, key), (exchange, market))
+        return pending
+
+    async def refresh(self, markets: Iterable[Market]) -> int:
+        """
+        Atualiza books expirados dos mercados informados
+
+        Retorna o número de books novos. Falhas individuais são contadas e
+        ignoradas (o mercado fica sem book e as engines usam o mid price).
+        """
+        pending = self._pending(markets)
+        if not pending:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiters = {name: RateLimiter(self.rate_limits.get(name, 5.0)) for name, _ in pending}
+        fetched = 0
+
+        async def fetch(exchange: ExchangeBase, market: Market, client):
+            nonlocal fetched
+            async with semaphore:
+                await limiters[exchange.name].acquire()
+                self.stats["requests"] += 1
+                try:
+                    books = await exchange.fetch_orderbook(market, client)
+                except Exception:
+                    self.stats["errors"] += 1
+                    return
+            now = self.clock()
+            for market_id, book in books.items():
+                # Arrays com profundidade acumulada: preço de execução em O(log n)
+                self.cache[(market.exchange, market_id)] = CachedBook(book.to_array(), now, now + self.ttl)
+                fetched += 1
+
+        async with create_client(timeout=10.0) as client:
+            tasks = [fetch(exchange, market, client) for exchange, market in pending.values()]
+            try:
+                await asyncio.wait_for(asyncio.gather(*tasks), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                # Books que chegaram a tempo já estão no cache
+                self.stats["errors"] += 1
+
+        self._evict()
+        return fetched
+
+    def refresh_blocking(self, markets: Iterable[Market]) -> int:
+        """
+        Versão síncrona de refresh (para as engines, que rodam fora do event loop)
+
+        Chamada de dentro de um loop, bloqueia esse loop até o fim da busca:
+        código assíncrono deve usar `await refresh(...)` ou rodar a análise em
+        asyncio.to_thread.
+        """
+        markets = list(markets)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.refresh(markets))
+        # Chamado de dentro de um event loop: roda num loop próprio em outra thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.refresh(markets)).result()
+
+    def _evict(self):
+        """Remove books expirados há mais de um TTL"""
+        limit = self.clock() - self.ttl
+        for key in [k for k, v in self.cache.items() if v.expires_at < limit]:
+            del self.cache[key]
+
+    def status(self) -> Dict:
+        now = self.clock()
+        return {
+            **self.stats,
+            "cached": len(self.cache),
+            "fresh": sum(1 for v in self.cache.values() if v.expires_at > now),
+            "ttl": self.ttl
+        }
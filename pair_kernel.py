@@ -0,0 +1,174 @@
+"""
+Kernel vetorizado de lucro por par de mercados
+
+As três engines (tradicional, probabilidade e curto prazo) fazem a mesma conta
+para cada par casado: normalizam outcomes (YES vs 1 - NO), escolhem a perna
+barata para comprar e a cara para vender, aplicam EXCHANGE_FEES/GAS_FEES sobre
+um investimento de $100 e comparam com o lucro mínimo. Aqui essa conta roda
+para todos os pares de uma vez: PairLegs junta os arrays das duas pernas e
+pair_profit_kernel devolve spreads, lucro líquido e a máscara de aprovados; as
+engines só montam objetos de oportunidade para os sobreviventes.
+"""
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from exchanges.base import Market
+from config import EXCHANGE_FEES, GAS_FEES
+
+DEFAULT_FEE = 0.05  # Taxa das engines para exchanges sem taxa configurada
+ETH_PRICE = 3000.0  # Conversão de gas (ETH) para USD usada pelas engines
+INVESTMENT = 100.0  # Investimento de referência das engines
+
+
+@dataclass
+class PairLegs:
+    """
+    Arrays paralelos das pernas A e B de cada par (posição i = par i)
+
+    `same_outcome` indica outcomes iguais (comparação exata das strings, como
+    nas engines); `yes_a` decide qual perna é convertida quando diferem.
+    """
+    price_a: np.ndarray
+    price_b: np.ndarray
+    fee_a: np.ndarray
+    fee_b: np.ndarray
+    gas_a: np.ndarray
+    gas_b: np.ndarray
+    liquidity_a: np.ndarray
+    liquidity_b: np.ndarray
+    yes_a: np.ndarray
+    same_outcome: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.price_a)
+
+    @classmethod
+    def from_pairs(cls, pairs: Sequence[Tuple[Market, Market]]) -> "PairLegs":
+        """Monta as pernas a partir de pares (market_a, market_b, ...)"""
+        n = len(pairs)
+        fees: Dict[str, Tuple[float, float]] = {}
+
+        def fee_and_gas(exchange: str) -> Tuple[float, float]:
+            # Taxas consultadas uma vez por exchange, não por par
+            if exchange not in fees:
+                name = exchange.lower()
+                fees[exchange] = (EXCHANGE_FEES.get(name, DEFAULT_FEE), GAS_FEES.get(name, 0))
+            return fees[exchange]
+
+        def column(values) -> np.ndarray:
+            return np.fromiter(values, dtype=np.float64, count=n)
+
+        legs_a = [fee_and_gas(pair[0].exchange) for pair in pairs]
+        legs_b = [fee_and_gas(pair[1].exchange) for pair in pairs]
+        return cls(
+            price_a=column(pair[0].price for pair in pairs),
+            price_b=column(pair[1].price for pair in pairs),
+            fee_a=column(fee for fee, _ in legs_a),
+            fee_b=column(fee for fee, _ in legs_b),
+            gas_a=column(gas for _, gas in legs_a),
+            gas_b=column(gas for _, gas in legs_b),
+            liquidity_a=column(pair[0].liquidity for pair in pairs),
+            liquidity_b=column(pair[1].liquidity for pair in pairs),
+            yes_a=np.fromiter((pair[0].outcome.upper() == "YES" for pair in pairs), dtype=bool, count=n),
+            same_outcome=np.fromiter((pair[0].outcome == pair[1].outcome for pair in pairs), dtype=bool, count=n),
+        )
+
+    @classmethod
+    def from_frame(cls, frame, first: np.ndarray, second: np.ndarray) -> "PairLegs":
+        """
+        Pernas a partir das colunas de um MarketFrame (posições dos pares)
+
+        O frame só guarda is_yes: `same_outcome` compara YES/não-YES.
+        """
+        first = np.asarray(first, dtype=np.intp)
+        second = np.asarray(second, dtype=np.intp)
+        return cls(
+            price_a=frame.price[first], price_b=frame.price[second],
+            fee_a=frame.fee_rate[first], fee_b=frame.fee_rate[second],
+            gas_a=frame.gas_fee[first], gas_b=frame.gas_fee[second],
+            liquidity_a=frame.liquidity[first], liquidity_b=frame.liquidity[second],
+            yes_a=frame.is_yes[first],
+            same_outcome=frame.is_yes[first] == frame.is_yes[second],
+        )
+
+
+@dataclass
+class PairProfit:
+    """
+    Resultado do kernel por par
+
+    `low_is_a` diz se a perna A é a de compra (probabilidade menor); empate
+    compra na perna B, como as engines. `passed` combina liquidez, spread e
+    lucro mínimos.
+    """
+    low_is_a: np.ndarray
+    prob_low: np.ndarray
+    prob_high: np.ndarray
+    spread: np.ndarray
+    revenue: np.ndarray
+    fees: np.ndarray
+    net_profit: np.ndarray
+    profit_pct: np.ndarray
+    passed: np.ndarray
+
+    def survivors(self) -> np.ndarray:
+        """Índices dos pares aprovados"""
+        return np.flatnonzero(self.passed)
+
+
+def pair_profit_kernel(
+    legs: PairLegs,
+    min_profit: float = -np.inf,
+    min_spread: float = 0.0,
+    min_liquidity: float = 0.0,
+    normalize_outcomes: bool = True,
+    investment: float = INVESTMENT
+) -> PairProfit:
+    """
+    Lucro de comprar a perna barata e vender a cara, para todos os pares
+
+    Args:
+        legs: Pernas dos pares
+        min_profit: Lucro mínimo (fração do investimento)
+        min_spread: Diferença mínima de probabilidade entre as pernas
+        min_liquidity: Liquidez mínima exigida das duas pernas
+        normalize_outcomes: Converte NO em YES (1 - p) quando os outcomes
+            diferem; sem isso compara os preços diretamente
+        investment: Investimento de referência
+
+    Pares com preço de compra zero ficam com lucro NaN/inf e não passam.
+    """
+    prob_a = legs.price_a
+    prob_b = legs.price_b
+    if normalize_outcomes:
+        differs = ~legs.same_outcome
+        prob_a = np.where(differs & ~legs.yes_a, 1.0 - prob_a, prob_a)
+        prob_b = np.where(differs & legs.yes_a, 1.0 - prob_b, prob_b)
+
+    low_is_a = prob_a < prob_b
+    prob_low = np.where(low_is_a, prob_a, prob_b)
+    prob_high = np.where(low_is_a, prob_b, prob_a)
+    fee_buy = np.where(low_is_a, legs.fee_a, legs.fee_b)
+    fee_sell = np.where(low_is_a, legs.fee_b, legs.fee_a)
+    spread = np.abs(prob_a - prob_b)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        revenue = (investment / prob_low) * prob_high
+        fees = (investment * fee_buy) + (revenue * fee_sell) + (legs.gas_a + legs.gas_b) * ETH_PRICE
+        net_profit = revenue - investment - fees
+    profit_pct = net_profit / investment
+
+    passed = (legs.liquidity_a >= min_liquidity) & (legs.liquidity_b >= min_liquidity)
+    passed &= spread >= min_spread
+    passed &= np.isfinite(profit_pct) & (profit_pct >= min_profit)
+    return PairProfit(
+        low_is_a=low_is_a,
+        prob_low=prob_low,
+        prob_high=prob_high,
+        spread=spread,
+        revenue=revenue,
+        fees=fees,
+        net_profit=net_profit,
+        profit_pct=profit_pct,
+        passed=passed,
+    )
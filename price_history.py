@@ -0,0 +1,265 @@
+"""
+Histórico de preços por mercado em ring buffers NumPy
+
+Cada mercado (chave (exchange, market_id)) ocupa uma linha de matrizes de
+tamanho fixo com (timestamp, preço, liquidez): o append de um ciclo inteiro é
+uma escrita vetorizada e a memória por mercado é limitada pela capacidade.
+Consultas de volatilidade, drift e z-score rodam sobre várias linhas de uma
+vez, para as engines e a API.
+
+Definições (janela = últimas `window` observações):
+- volatilidade: desvio padrão das variações de preço entre observações
+- drift: variação de preço por hora entre a primeira e a última observação
+- z-score: (último preço - média) / desvio padrão dos preços
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from exchanges.base import Market
+from config import PRICE_HISTORY_SIZE, PRICE_HISTORY_MAX_MARKETS, VOLATILITY_WINDOW
+
+HistoryKey = Tuple[str, str]  # (exchange, market_id)
+
+
+def market_key(market: Market) -> HistoryKey:
+    return (market.exchange, market.market_id)
+
+
+class PriceHistory:
+    """
+    Ring buffers por mercado
+
+    Args:
+        capacity: Observações guardadas por mercado (as mais antigas são sobrescritas)
+        max_markets: Limite de mercados; acima dele, os sem atualização há mais
+            tempo liberam a linha para mercados novos
+    """
+
+    def __init__(self, capacity: int = PRICE_HISTORY_SIZE, max_markets: int = PRICE_HISTORY_MAX_MARKETS):
+        self.capacity = max(capacity, 2)
+        self.max_markets = max(max_markets, 1)
+        self._rows: Dict[HistoryKey, int] = {}
+        self._free: List[int] = []
+        rows = min(1024, self.max_markets)
+        # Timestamps em float64 (epoch); preço e liquidez em float32 bastam
+        self.timestamps = np.zeros((rows, self.capacity), dtype=np.float64)
+        self.prices = np.zeros((rows, self.capacity), dtype=np.float32)
+        self.liquidity = np.zeros((rows, self.capacity), dtype=np.float32)
+        self.head = np.zeros(rows, dtype=np.int64)   # Próxima posição de escrita
+        self.count = np.zeros(rows, dtype=np.int64)  # Observações válidas (<= capacity)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: HistoryKey) -> bool:
+        return key in self._rows
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        markets: Sequence[Market],
+        timestamp: Optional[float] = None,
+        prices: Optional[np.ndarray] = None,
+        liquidity: Optional[np.ndarray] = None
+    ):
+        """
+        Registra uma observação de cada mercado do ciclo
+
+        `prices`/`liquidity` aceitam as colunas de um MarketFrame dos mesmos
+        mercados para não reler os atributos.
+        """
+        if not markets:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        rows = self._rows_for(markets)
+        if prices is None:
+            prices = np.fromiter((m.price for m in markets), dtype=np.float64, count=len(markets))
+        if liquidity is None:
+            liquidity = np.fromiter((m.liquidity for m in markets), dtype=np.float64, count=len(markets))
+
+        # Mercado repetido no ciclo: vale a última ocorrência, uma escrita por linha
+        rows, last = np.unique(rows[::-1], return_index=True)
+        last = len(markets) - 1 - last
+
+        positions = self.head[rows]
+        self.timestamps[rows, positions] = timestamp
+        self.prices[rows, positions] = np.asarray(prices)[last]
+        self.liquidity[rows, positions] = np.asarray(liquidity)[last]
+        self.head[rows] = (positions + 1) % self.capacity
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.capacity)
+
+    def _rows_for(self, markets: Sequence[Market]) -> np.ndarray:
+        lookup = self._rows.get
+        rows = np.fromiter((lookup((m.exchange, m.market_id), -1) for m in markets),
+                           dtype=np.int64, count=len(markets))
+        missing = np.flatnonzero(rows < 0)
+        if len(missing):
+            self._make_room(len(missing), protect=rows[rows >= 0])
+            for i in missing:
+                key = market_key(markets[i])
+                row = self._rows.get(key)  # Chave repetida no mesmo ciclo
+                if row is None:
+                    row = self._allocate()
+                    self._rows[key] = row
+                rows[i] = row
+        return rows
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        row = len(self._rows)
+        if row >= len(self.head):
+            # Limite é flexível só se um único ciclo trouxer mais mercados que max_markets
+            self._grow(max(row + 1, min(len(self.head) * 2, self.max_markets)))
+        return row
+
+    def _grow(self, rows: int):
+        extra = rows - len(self.head)
+        self.timestamps = np.vstack([self.timestamps, np.zeros((extra, self.capacity), dtype=np.float64)])
+        self.prices = np.vstack([self.prices, np.zeros((extra, self.capacity), dtype=np.float32)])
+        self.liquidity = np.vstack([self.liquidity, np.zeros((extra, self.capacity), dtype=np.float32)])
+        self.head = np.concatenate([self.head, np.zeros(extra, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+
+    def _make_room(self, needed: int, protect: np.ndarray):
+        """Libera as linhas atualizadas há mais tempo quando o limite seria excedido"""
+        excess = len(self._rows) + needed - self.max_markets
+        if excess <= 0:
+            return
+        protected = set(protect.tolist())
+        rows_by_key = [(key, row) for key, row in self._rows.items() if row not in protected]
+        last_seen = np.array([self._last_timestamp(row) for _, row in rows_by_key])
+        for index in np.argsort(last_seen, kind="stable")[:excess]:
+            key, row = rows_by_key[index]
+            self._release(key, row)
+
+    def _last_timestamp(self, row: int) -> float:
+        if not self.count[row]:
+            return 0.0
+        return float(self.timestamps[row, (self.head[row] - 1) % self.capacity])
+
+    def _release(self, key: HistoryKey, row: int):
+        del self._rows[key]
+        self.head[row] = 0
+        self.count[row] = 0
+        self._free.append(row)
+
+    def subset(self, keys: Iterable[HistoryKey]) -> "PriceHistory":
+        """Cópia compacta só com os mercados informados (ex: para enviar a outro processo)"""
+        known = list(dict.fromkeys(tuple(key) for key in keys if tuple(key) in self._rows))
+        rows = np.array([self._rows[key] for key in known], dtype=np.int64)
+        history = PriceHistory(self.capacity, max(len(known), 1))
+        history.max_markets = self.max_markets
+        history._rows = {key: i for i, key in enumerate(known)}
+        history.timestamps = self.timestamps[rows]
+        history.prices = self.prices[rows]
+        history.liquidity = self.liquidity[rows]
+        history.head = self.head[rows]
+        history.count = self.count[rows]
+        return history
+
+    def prune(self, older_than: float) -> int:
+        """Remove mercados sem observação desde `older_than` (epoch)"""
+        stale = [(key, row) for key, row in self._rows.items() if self._last_timestamp(row) < older_than]
+        for key, row in stale:
+            self._release(key, row)
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def series(self, key: HistoryKey) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(timestamps, preços, liquidez) do mercado, do mais antigo ao mais recente"""
+        row = self._rows.get(key)
+        if row is None:
+            empty = np.zeros(0)
+            return empty, empty, empty
+        count = int(self.count[row])
+        order = (self.head[row] - count + np.arange(count)) % self.capacity
+        return (self.timestamps[row, order],
+                self.prices[row, order].astype(np.float64),
+                self.liquidity[row, order].astype(np.float64))
+
+    def _window(self, keys: Sequence[HistoryKey], window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Matrizes (len(keys), window) em ordem cronológica, NaN onde não há dado
+
+        Chaves desconhecidas viram linhas só de NaN.
+        """
+        window = max(min(window, self.capacity), 1)
+        rows = np.array([self._rows.get(tuple(key), -1) for key in keys], dtype=np.int64)
+        known = rows >= 0
+        safe_rows = np.where(known, rows, 0)
+
+        offsets = np.arange(window) - window  # -window .. -1 em relação ao head
+        columns = (self.head[safe_rows][:, None] + offsets[None, :]) % self.capacity
+        times = self.timestamps[safe_rows[:, None], columns]
+        prices = self.prices[safe_rows[:, None], columns].astype(np.float64)
+
+        # Posições além do que já foi gravado (ou de chaves desconhecidas) ficam NaN
+        counts = np.where(known, self.count[safe_rows], 0)
+        valid = offsets[None, :] >= -counts[:, None]
+        times[~valid] = np.nan
+        prices[~valid] = np.nan
+        return times, prices
+
+    def volatility(self, keys: Sequence[HistoryKey], window: int = VOLATILITY_WINDOW) -> np.ndarray:
+        """Desvio padrão das variações de preço (NaN com menos de 3 observações)"""
+        _, prices = self._window(keys, window)
+        changes = np.diff(prices, axis=1)
+        enough = np.sum(~np.isnan(changes), axis=1) >= 2
+        result = np.full(len(keys), np.nan)
+        if enough.any():
+            result[enough] = np.nanstd(changes[enough], axis=1)
+        return result
+
+    def drift(self, keys: Sequence[HistoryKey], window: int = VOLATILITY_WINDOW) -> np.ndarray:
+        """Variação de preço por hora na janela (NaN com menos de 2 observações)"""
+        times, prices = self._window(keys, window)
+        first = np.argmax(~np.isnan(prices), axis=1)
+        index = np.arange(len(keys))
+        elapsed = times[index, -1] - times[index, first]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = (prices[index, -1] - prices[index, first]) / elapsed * 3600.0
+        return np.where(elapsed > 0, result, np.nan)
+
+    def zscore(self, keys: Sequence[HistoryKey], window: int = VOLATILITY_WINDOW) -> np.ndarray:
+        """Desvio do último preço em relação à média da janela (NaN sem variação)"""
+        _, prices = self._window(keys, window)
+        enough = np.sum(~np.isnan(prices), axis=1) >= 3
+        result = np.full(len(keys), np.nan)
+        if enough.any():
+            sample = prices[enough]
+            std = np.nanstd(sample, axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[enough] = np.where(std > 0, (sample[:, -1] - np.nanmean(sample, axis=1)) / std, np.nan)
+        return result
+
+    def stats(self, keys: Iterable[HistoryKey], window: int = VOLATILITY_WINDOW) -> Dict[HistoryKey, Dict]:
+        """Volatilidade, drift e z-score por chave (None onde não há histórico suficiente)"""
+        keys = [tuple(key) for key in keys]
+        columns = {
+            "volatility": self.volatility(keys, window),
+            "drift_per_hour": self.drift(keys, window),
+            "zscore": self.zscore(keys, window),
+        }
+        result = {}
+        for i, key in enumerate(keys):
+            row = self._rows.get(key)
+            result[key] = {
+                "observations": int(self.count[row]) if row is not None else 0,
+                **{name: (None if np.isnan(values[i]) else float(values[i])) for name, values in columns.items()}
+            }
+        return result
+
+    def status(self) -> Dict:
+        return {
+            "markets": len(self._rows),
+            "capacity": self.capacity,
+            "max_markets": self.max_markets,
+            "memory_mb": round((self.timestamps.nbytes + self.prices.nbytes + self.liquidity.nbytes) / 1e6, 2)
+        }
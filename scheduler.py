@@ -0,0 +1,202 @@
+"""
+Scheduler de polling independente por exchange
+
+Substitui o loop único baseado em UPDATE_INTERVAL:
+- Cada exchange é consultada na sua própria cadência (config.POLL_INTERVALS)
+- Resultados são mesclados num snapshot compartilhado assim que chegam
+- A análise (matching/arbitragem) roda quando o snapshot muda, com debounce,
+  em vez de dormir um intervalo fixo
+- Exchanges doentes (health score baixo) são consultadas com menos frequência
+  e exchanges com circuito aberto esperam o fim do cooldown
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from exchanges.base import ExchangeBase, Market
+from exchanges.circuit_breaker import CircuitOpenError
+from config import (POLL_INTERVALS, DEFAULT_POLL_INTERVAL, ANALYSIS_DEBOUNCE,
+                    ANALYSIS_MAX_DELAY, EXCHANGE_FETCH_TIMEOUT)
+
+
+class ExchangeScheduler:
+    """Faz polling de cada exchange na sua cadência e dispara análise com debounce"""
+
+    min_delay = 0.5  # Intervalo mínimo entre polls da mesma exchange (segundos)
+
+    def __init__(
+        self,
+        exchanges: List[ExchangeBase],
+        on_change: Callable[[List[Market]], Awaitable],
+        intervals: Optional[Dict[str, float]] = None,
+        debounce: float = ANALYSIS_DEBOUNCE,
+        max_delay: float = ANALYSIS_MAX_DELAY,
+        timeout: float = EXCHANGE_FETCH_TIMEOUT,
+        console=None
+    ):
+        self.exchanges = exchanges
+        self.on_change = on_change
+        self.intervals = intervals if intervals is not None else POLL_INTERVALS
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.console = console
+
+        # Snapshot compartilhado: exchange -> mercados da última busca bem-sucedida
+        self.snapshot: Dict[str, List[Market]] = {}
+        self.fetched_at: Dict[str, datetime] = {}
+        self._signatures: Dict[str, int] = {}
+        self._errors: Dict[str, str] = {}
+
+        self._changed = asyncio.Event()
+        self._first_change_at: Optional[float] = None
+        self._running = False
+        self._tasks: List[asyncio.Task] = []
+        self.analysis_count = 0
+
+    def interval_for(self, exchange: ExchangeBase) -> float:
+        """Cadência base da exchange (config ou DEFAULT_POLL_INTERVAL)"""
+        return self.intervals.get(exchange.name.lower(), DEFAULT_POLL_INTERVAL)
+
+    def _next_delay(self, exchange: ExchangeBase) -> float:
+        """Próximo intervalo considerando saúde da exchange"""
+        breaker = exchange.circuit_breaker
+        retry_in = breaker.retry_in()
+        if retry_in > 0:
+            # Circuito aberto: só volta quando o cooldown terminar
+            return retry_in
+
+        # Despriorizar venues doentes: intervalo cresce até 4x
+        health = max(exchange.health_score, 0.25)
+        return self.interval_for(exchange) / health
+
+    def markets(self) -> List[Market]:
+        """Retorna snapshot atual mesclado de todas as exchanges"""
+        all_markets = []
+        for markets in self.snapshot.values():
+            all_markets.extend(markets)
+        return all_markets
+
+    def _log(self, message: str):
+        if self.console:
+            self.console.print(message)
+
+    @staticmethod
+    def _signature(markets: List[Market]) -> int:
+        """Assinatura barata para detectar mudança de preços/liquidez"""
+        return hash(tuple((m.market_id, m.outcome, m.price, m.liquidity) for m in markets))
+
+    def merge(self, exchange_name: str, markets: List[Market]) -> bool:
+        """Mescla resultado de uma exchange no snapshot; retorna True se mudou"""
+        self.fetched_at[exchange_name] = datetime.now()
+        signature = self._signature(markets)
+        if self._signatures.get(exchange_name) == signature:
+            return False
+
+        self.snapshot[exchange_name] = markets
+        self._signatures[exchange_name] = signature
+        self.mark_changed()
+        return True
+
+    def mark_changed(self):
+        """Sinaliza mudança no snapshot (ex: update vindo de stream)"""
+        if self._first_change_at is None:
+            self._first_change_at = time.monotonic()
+        self._changed.set()
+
+    async def poll_once(self, exchange: ExchangeBase) -> bool:
+        """Busca uma exchange e mescla no snapshot"""
+        name = exchange.name.lower()
+        try:
+            markets = await exchange.fetch_markets_guarded(timeout=self.timeout)
+        except CircuitOpenError as e:
+            self._errors[name] = str(e)
+            return False
+        except asyncio.TimeoutError:
+            self._errors[name] = f"timeout de {self.timeout:.0f}s"
+            self._log(f"[red]{exchange.__class__.__name__} erro: timeout[/red]")
+            return False
+        except Exception as e:
+            self._errors[name] = str(e)
+            self._log(f"[red]{exchange.__class__.__name__} erro: {e}[/red]")
+            return False
+
+        if not markets:
+            # Adapters engolem erros e retornam []: mantém os últimos mercados bons no snapshot
+            self._errors[name] = "nenhum mercado retornado"
+            self._log(f"[yellow]{exchange.__class__.__name__}: nenhum mercado retornado; snapshot anterior mantido[/yellow]")
+            return False
+
+        self._errors.pop(name, None)
+        changed = self.merge(name, markets)
+        if changed:
+            self._log(f"[green]{exchange.__class__.__name__}: {len(markets)} mercados atualizados[/green]")
+        return changed
+
+    async def _poll_loop(self, exchange: ExchangeBase):
+        """Loop de polling de uma exchange"""
+        while self._running:
+            await self.poll_once(exchange)
+            await asyncio.sleep(max(self._next_delay(exchange), self.min_delay))
+
+    async def _analysis_loop(self):
+        """Roda análise quando o snapshot muda (debounced)"""
+        while self._running:
+            await self._changed.wait()
+
+            # Debounce: espera mudanças pararem de chegar, até max_delay
+            while True:
+                self._changed.clear()
+                elapsed = time.monotonic() - (self._first_change_at or time.monotonic())
+                remaining = self.max_delay - elapsed
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=min(self.debounce, remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            self._changed.clear()
+            self._first_change_at = None
+
+            try:
+                await self.on_change(self.markets())
+                self.analysis_count += 1
+            except Exception as e:
+                self._log(f"[red]Erro na análise: {e}[/red]")
+
+    async def run(self):
+        """Inicia polling de todas as exchanges e o loop de análise"""
+        self._running = True
+        self._tasks = [asyncio.create_task(self._poll_loop(ex)) for ex in self.exchanges]
+        self._tasks.append(asyncio.create_task(self._analysis_loop()))
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Para todos os loops"""
+        self._running = False
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+
+    def status(self) -> List[Dict]:
+        """Estado de cada exchange no scheduler"""
+        result = []
+        for exchange in self.exchanges:
+            name = exchange.name.lower()
+            fetched = self.fetched_at.get(name)
+            result.append({
+                "exchange": name,
+                "interval": self.interval_for(exchange),
+                "next_delay": round(self._next_delay(exchange), 1),
+                "markets": len(self.snapshot.get(name, [])),
+                "fetched_at": fetched.isoformat() if fetched else None,
+                "health_score": exchange.health_score,
+                "error": self._errors.get(name)
+            })
+        return result
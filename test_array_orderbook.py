@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Testa ArrayOrderBook contra o OrderBook de referência (offline)"""
+import random
+from exchanges.orderbook import ArrayOrderBook, OrderBook
+
+
+def _random_book(rng, levels=20):
+    bids = {round(rng.uniform(0.05, 0.49), 2): rng.randint(1, 500) for _ in range(levels)}
+    asks = {round(rng.uniform(0.51, 0.95), 2): rng.randint(1, 500) for _ in range(levels)}
+    return OrderBook.from_levels("m", "teste", bids=bids.items(), asks=asks.items())
+
+
+def _walk_cost(orders, size):
+    """Custo por varredura linear (referência)"""
+    remaining, cost = size, 0.0
+    for order in orders:
+        filled = min(order.size, remaining)
+        cost += filled * order.price
+        remaining -= filled
+        if remaining <= 0:
+            return cost
+    return None
+
+
+def test_matches_reference_book():
+    """Consultas por busca binária batem com a varredura linear"""
+    rng = random.Random(3)
+    for _ in range(20):
+        book = _random_book(rng)
+        array = book.to_array()
+
+        assert array.get_best_bid().price == book.get_best_bid().price
+        assert array.get_best_ask().price == book.get_best_ask().price
+        assert abs(array.get_mid_price() - book.get_mid_price()) < 1e-12
+
+        for size in (1, 10, 100, 1000, 5000, 20000):
+            expected = _walk_cost(book.asks, size)
+            cost = array.cost_to_fill(size, "buy")
+            assert (cost is None) == (expected is None)
+            if cost is not None:
+                assert abs(cost - expected) < 1e-6
+                assert abs(array.vwap(size, "buy") - expected / size) < 1e-9
+
+            expected_sell = _walk_cost(book.bids, size)
+            revenue = array.cost_to_fill(size, "sell")
+            assert (revenue is None) == (expected_sell is None)
+            if revenue is not None:
+                assert abs(revenue - expected_sell) < 1e-6
+
+        for amount in (5, 50, 500):
+            expected = book.average_buy_price(amount)
+            actual = array.average_buy_price(amount)
+            assert (actual is None) == (expected is None)
+            if actual is not None:
+                assert abs(actual - expected) < 1e-9
+
+        for price in (0.1, 0.3, 0.5, 0.6, 0.9):
+            assert array.get_liquidity_at_price(price, "buy") == book.get_liquidity_at_price(price, "buy")
+            assert array.get_liquidity_at_price(price, "sell") == book.get_liquidity_at_price(price, "sell")
+            assert array.size_available_up_to(price, "buy") == sum(o.size for o in book.asks if o.price <= price)
+            assert array.size_available_up_to(price, "sell") == sum(o.size for o in book.bids if o.price >= price)
+
+
+def test_incremental_updates_match_rebuild():
+    """Updates incrementais produzem o mesmo book que reconstruir do zero"""
+    rng = random.Random(9)
+    book = _random_book(rng)
+    array = book.to_array()
+    levels = {"bid": {o.price: o.size for o in book.bids}, "ask": {o.price: o.size for o in book.asks}}
+
+    for _ in range(300):
+        side = rng.choice(["bid", "ask"])
+        if levels[side] and rng.random() < 0.3:
+            price = rng.choice(list(levels[side]))
+            size = 0  # Remove nível existente
+        else:
+            price = round(rng.uniform(0.05, 0.49) if side == "bid" else rng.uniform(0.51, 0.95), 2)
+            size = rng.randint(1, 500)
+        array.update_level(side, price, size)
+        if size:
+            levels[side][price] = size
+        else:
+            levels[side].pop(price, None)
+
+    rebuilt = OrderBook.from_levels("m", "teste", bids=levels["bid"].items(), asks=levels["ask"].items()).to_array()
+    assert [(o.price, o.size) for o in array.bids] == [(o.price, o.size) for o in rebuilt.bids]
+    assert [(o.price, o.size) for o in array.asks] == [(o.price, o.size) for o in rebuilt.asks]
+    for size in (10, 100, 1000):
+        a, b = array.cost_to_fill(size), rebuilt.cost_to_fill(size)
+        assert (a is None and b is None) or abs(a - b) < 1e-6
+
+
+def test_empty_and_edge_cases():
+    """Book vazio e tamanhos no limite da profundidade"""
+    empty = ArrayOrderBook("m", "teste")
+    assert empty.get_best_bid() is None and empty.get_mid_price() is None
+    assert empty.cost_to_fill(1) is None
+    assert empty.size_available_up_to(0.9) == 0.0
+
+    book = ArrayOrderBook("m", "teste", ask_prices=[0.6, 0.5], ask_sizes=[10, 10])
+    assert book.cost_to_fill(20) == 0.5 * 10 + 0.6 * 10
+    assert book.cost_to_fill(20.5) is None
+    assert book.depth("buy") == 20
+
+
+if __name__ == "__main__":
+    test_matches_reference_book()
+    test_incremental_updates_match_rebuild()
+    test_empty_and_edge_cases()
+    print("PASSOU - ArrayOrderBook")
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Testa manutenção incremental de books por deltas e sequência (offline)"""
+import asyncio
+import json
+import os
+import tempfile
+from exchanges.book_maintainer import BookMaintainer
+from exchanges.streaming import KalshiStream, PolymarketStream, ReplayConnection
+
+
+def test_deltas_and_best_change_events():
+    """Deltas alteram níveis no lugar e só mudanças de topo geram evento"""
+    maintainer = BookMaintainer("teste")
+    events = []
+    maintainer.on_best_change(events.append)
+
+    maintainer.apply_snapshot("m", bids=[(0.40, 100), (0.38, 50)], asks=[(0.45, 80), (0.47, 20)])
+    assert len(events) == 1 and events[0].best_bid == 0.40 and events[0].previous_bid is None
+
+    # Nível abaixo do topo: book muda, topo não
+    assert maintainer.apply_delta("m", "bid", 0.38, 75) is None
+    assert maintainer.apply_delta("m", "ask", 0.50, 10) is None
+    assert len(events) == 1
+
+    # Novo melhor bid
+    change = maintainer.apply_delta("m", "bid", 0.42, 30)
+    assert change.best_bid == 0.42 and change.previous_bid == 0.40 and change.bid_size == 30
+
+    # Remoção do melhor ask expõe o próximo nível
+    change = maintainer.apply_delta("m", "ask", 0.45, 0)
+    assert change.best_ask == 0.47 and change.previous_ask == 0.45
+
+    # Delta relativo (Kalshi): soma à quantidade atual e remove ao zerar
+    maintainer.apply_delta("m", "bid", 0.38, -75, relative=True)
+    book = maintainer.get("m")
+    assert [(o.price, o.size) for o in book.bids] == [(0.42, 30), (0.40, 100)]
+    assert [(o.price, o.size) for o in book.asks] == [(0.47, 20), (0.50, 10)]
+    assert len(events) == 3
+
+
+def test_sequence_gap_triggers_resnapshot():
+    """Lacuna de sequência invalida os books do canal até novo snapshot"""
+    requested = []
+    maintainer = BookMaintainer("teste", resnapshot=requested.append)
+    maintainer.apply_snapshot("a", bids=[(0.40, 10)], asks=[(0.60, 10)], sequence=1, channel="sid:1")
+    maintainer.apply_snapshot("b", bids=[(0.20, 10)], asks=[(0.30, 10)], sequence=2, channel="sid:1")
+
+    maintainer.apply_delta("a", "bid", 0.41, 5, sequence=3, channel="sid:1")
+    # Duplicada: descartada sem lacuna
+    maintainer.apply_delta("a", "bid", 0.45, 5, sequence=3, channel="sid:1")
+    assert maintainer.get("a").get_best_bid().price == 0.41
+    assert maintainer.stats["duplicates"] == 1 and maintainer.stats["gaps"] == 0
+
+    # Sequência 5 sem a 4: os dois books do canal ficam inválidos
+    assert maintainer.apply_delta("b", "bid", 0.25, 5, sequence=5, channel="sid:1") is None
+    assert maintainer.stats["gaps"] == 1
+    assert sorted(requested) == ["a", "b"]
+    assert maintainer.get("a") is None and maintainer.get("b") is None
+
+    # Deltas seguintes não se aplicam a books inválidos
+    maintainer.apply_delta("a", "bid", 0.50, 5, sequence=6, channel="sid:1")
+    assert maintainer.books["a"].get_best_bid().price == 0.41
+    assert sorted(requested) == ["a", "b"]
+
+    # Novo snapshot restaura o book
+    maintainer.apply_snapshot("a", bids=[(0.44, 10)], asks=[(0.60, 10)], sequence=7, channel="sid:1")
+    maintainer.apply_delta("a", "ask", 0.55, 10, sequence=8, channel="sid:1")
+    assert maintainer.get("a").get_best_ask().price == 0.55
+
+    # Delta sem snapshot de base também pede snapshot
+    maintainer.apply_delta("c", "bid", 0.10, 5)
+    assert requested[-1] == "c"
+
+
+def _write_feed(records):
+    fd, path = tempfile.mkstemp(suffix=".jsonl")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for i, msg in enumerate(records):
+            f.write(json.dumps({"t": 1000.0 + i * 0.1, "msg": msg}) + "\n")
+    return path
+
+
+def test_kalshi_stream_resubscribes_on_gap():
+    """Feed Kalshi com lacuna: re-assina o ticker e aplica o novo snapshot"""
+    path = _write_feed([
+        {"type": "orderbook_snapshot", "sid": 2, "seq": 1,
+         "msg": {"market_ticker": "RATE-5", "yes": [[40, 100], [38, 50]], "no": [[55, 80]]}},
+        {"type": "orderbook_delta", "sid": 2, "seq": 2, "msg": {"market_ticker": "RATE-5", "price": 42, "delta": 20, "side": "yes"}},
+        {"type": "orderbook_delta", "sid": 2, "seq": 3, "msg": {"market_ticker": "RATE-5", "price": 55, "delta": -80, "side": "no"}},
+        {"type": "orderbook_delta", "sid": 2, "seq": 5, "msg": {"market_ticker": "RATE-5", "price": 30, "delta": 10, "side": "yes"}},
+        {"type": "orderbook_snapshot", "sid": 3, "seq": 1,
+         "msg": {"market_ticker": "RATE-5", "yes": [[45, 10]], "no": [[50, 10]]}},
+    ])
+    connections = []
+
+    async def connect(url, headers=None):
+        connections.append(ReplayConnection(path))
+        return connections[-1]
+
+    stream = KalshiStream(connect=connect)
+    changes = []
+    stream.on_best_change(changes.append)
+
+    async def run():
+        await stream.subscribe(["RATE-5"])
+        await stream.run()
+
+    asyncio.run(run())
+    os.remove(path)
+
+    # Assinatura inicial + re-assinatura após a lacuna
+    sent = connections[0].sent
+    assert len(sent) == 2 and sent[1]["params"]["market_tickers"] == ["RATE-5"]
+    assert stream.maintainer.stats["gaps"] == 1
+
+    # Topos: snapshot, novo bid 0.42, ask some (só o bid), novo snapshot
+    assert [(c.best_bid, c.best_ask) for c in changes] == [(0.40, 0.45), (0.42, 0.45), (0.42, None), (0.45, 0.50)]
+    top = stream.books["RATE-5"]
+    assert top.best_bid == 0.45 and top.best_ask == 0.50
+    assert stream.maintainer.get("RATE-5") is not None
+
+
+def test_polymarket_price_change_deltas():
+    """price_change altera a quantidade dos níveis do book mantido"""
+    stream = PolymarketStream()
+    stream.handle_message({"event_type": "book", "asset_id": "tok", "bids": [{"price": "0.60", "size": "10"}],
+                           "asks": [{"price": "0.64", "size": "5"}, {"price": "0.66", "size": "50"}]})
+    stream.handle_message({"event_type": "price_change", "price_changes": [
+        {"asset_id": "tok", "price": "0.64", "size": "0", "side": "SELL"},
+        {"asset_id": "tok", "price": "0.61", "size": "7", "side": "BUY"},
+    ]})
+    book = stream.maintainer.get("tok")
+    assert [(o.price, o.size) for o in book.asks] == [(0.66, 50)]
+    top = stream.books["tok"]
+    assert top.best_bid == 0.61 and top.bid_size == 7 and top.best_ask == 0.66
+
+
+if __name__ == "__main__":
+    test_deltas_and_best_change_events()
+    test_sequence_gap_triggers_resnapshot()
+    test_kalshi_stream_resubscribes_on_gap()
+    test_polymarket_price_change_deltas()
+    print("PASSOU - Manutenção de books")
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Testa circuit breaker e health score das exchanges"""
+import asyncio
+from typing import List
+from exchanges.base import ExchangeBase, Market
+from exchanges.circuit_breaker import (CircuitBreaker, CircuitBreakerConfig,
+                                       CircuitOpenError, CircuitState)
+
+
+class FakeClock:
+    """Relógio controlado manualmente"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FailingExchange(ExchangeBase):
+    """Exchange que sempre retorna vazio (como adapters com API fora do ar)"""
+
+    def __init__(self):
+        super().__init__("failing")
+        self.calls = 0
+
+    def normalize_question(self, question: str) -> str:
+        return question.lower()
+
+    async def fetch_markets(self) -> List[Market]:
+        self.calls += 1
+        return []
+
+
+def test_circuit_breaker_transitions():
+    """CLOSED -> OPEN -> HALF_OPEN -> CLOSED/OPEN com backoff"""
+    clock = FakeClock()
+    config = CircuitBreakerConfig(consecutive_failures=3, cooldown_seconds=60, max_cooldown_seconds=200)
+    breaker = CircuitBreaker("teste", config, clock=clock)
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.health_score == 1.0
+
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure(1.0, "erro")
+
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.health_score == 0.0
+
+    # Cooldown termina -> HALF_OPEN com uma única chamada de teste
+    clock.now += 61
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # Teste falha -> reabre com cooldown dobrado
+    breaker.record_failure(1.0, "erro")
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 61
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 60
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    # Teste passa -> fecha
+    assert breaker.allow_request()
+    breaker.record_success(0.5)
+    assert breaker.state == CircuitState.CLOSED
+    print("PASSOU - Transicoes do circuit breaker")
+
+
+def test_failure_rate_window():
+    """Taxa de falhas só considera chamadas dentro da janela"""
+    clock = FakeClock()
+    config = CircuitBreakerConfig(window_seconds=100, min_calls=4, failure_rate_threshold=0.5,
+                                  consecutive_failures=10)
+    breaker = CircuitBreaker("janela", config, clock=clock)
+
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.CLOSED  # Menos que min_calls
+
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitState.OPEN  # 2/4 = 50%
+
+    breaker.reset()
+    breaker.record_failure(0.1)
+    clock.now += 200  # Falha antiga sai da janela
+    breaker.record_success(0.1)
+    assert breaker.failure_rate == 0.0
+    print("PASSOU - Janela de taxa de falhas")
+
+
+def test_guarded_fetch_skips_open_exchange():
+    """Exchange com circuito aberto não é chamada"""
+    exchange = FailingExchange()
+
+    for _ in range(exchange.circuit_breaker.config.consecutive_failures):
+        asyncio.run(exchange.fetch_markets_guarded())
+
+    assert exchange.circuit_breaker.state == CircuitState.OPEN
+    calls = exchange.calls
+
+    try:
+        asyncio.run(exchange.fetch_markets_guarded())
+        assert False, "Deveria levantar CircuitOpenError"
+    except CircuitOpenError:
+        pass
+
+    assert exchange.calls == calls
+    assert exchange.health_score == 0.0
+    print("PASSOU - Exchange com circuito aberto foi pulada")
+
+
+class HangingExchange(FailingExchange):
+    """Exchange cuja busca nunca termina (cancelada de fora)"""
+
+    async def fetch_markets(self) -> List[Market]:
+        self.calls += 1
+        await asyncio.sleep(10)
+        return []
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    """Teste do half-open cancelado não deixa a exchange bloqueada para sempre"""
+    exchange = HangingExchange()
+    clock = FakeClock()
+    exchange.circuit_breaker = CircuitBreaker("hanging", CircuitBreakerConfig(consecutive_failures=1, cooldown_seconds=60),
+                                              clock=clock)
+    exchange.circuit_breaker.record_failure(error="fora do ar")
+    clock.now += 61
+    assert exchange.circuit_breaker.state == CircuitState.HALF_OPEN
+
+    async def cancel_probe():
+        task = asyncio.create_task(exchange.fetch_markets_guarded())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancel_probe())
+    assert exchange.circuit_breaker.state == CircuitState.HALF_OPEN
+    assert exchange.circuit_breaker.allow_request()  # Vaga de teste devolvida
+    print("PASSOU - Teste cancelado libera o half-open")
+
+
+class SteadyExchange(FailingExchange):
+    """Exchange que sempre responde um mercado"""
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+
+    async def fetch_markets(self) -> List[Market]:
+        self.calls += 1
+        return [Market(exchange=self.name, market_id=f"{self.name}_1", question="Will it work?", outcome="YES",
+                       price=0.5, volume_24h=100, liquidity=1000, expires_at=None)]
+
+
+def test_monitor_deprioritises_unhealthy_exchange():
+    """No loop padrão, venue com saúde baixa é buscada com menos frequência (última busca boa vale)"""
+    from monitor import ArbitrageMonitor
+    healthy, sick = SteadyExchange("healthy"), SteadyExchange("sick")
+    monitor = ArbitrageMonitor()
+    monitor.exchanges = [healthy, sick]
+
+    asyncio.run(monitor.fetch_all_markets())
+    # 3 de 4 chamadas falharam na janela: saúde 0.25, busca a cada 4 ciclos
+    for _ in range(3):
+        sick.circuit_breaker._record(False, 0.0)
+    assert sick.health_score == 0.25
+
+    sizes = [len(asyncio.run(monitor.fetch_all_markets())) for _ in range(4)]
+    assert sizes == [2, 2, 2, 2]  # Venue adiada entra com os mercados da última busca
+    assert healthy.calls == 5 and sick.calls == 2
+    print("PASSOU - Venue doente despriorizada no monitor")
+
+
+if __name__ == "__main__":
+    test_circuit_breaker_transitions()
+    test_failure_rate_window()
+    test_guarded_fetch_skips_open_exchange()
+    test_cancelled_probe_releases_half_open_slot()
+    test_monitor_deprioritises_unhealthy_exchange()
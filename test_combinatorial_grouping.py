@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Testa detecção agrupada de mercados complementares contra o laço O(n²) (offline)"""
+import random
+from arbitrage_combinatorial import CombinatorialArbitrage
+from exchanges.base import Market
+
+
+def _markets(count=600, seed=3):
+    rng = random.Random(seed)
+    outcomes = ["Yes", "No", "YES", "no", "True", "False", "Republican", "Democratic", "Maybe"]
+    markets = []
+    for i in range(count):
+        outcome = rng.choice(outcomes)
+        base = f"will event {rng.randrange(60)} happen"
+        # Algumas perguntas trazem o outcome no texto (removido na normalização)
+        question = f"{base}? - {outcome}" if rng.random() < 0.5 else f"{base.title()}?"
+        markets.append(Market(exchange=rng.choice(["polymarket", "kalshi", "manifold"]), market_id=f"m{i}",
+                              question=question, outcome=outcome, price=rng.uniform(0.05, 0.95),
+                              volume_24h=10.0, liquidity=1000.0, expires_at=None))
+    return markets
+
+
+def _reference(engine, markets):
+    """Laço original: todos os pares, mesma exchange e mesma pergunta sem outcome"""
+    pairs = []
+    for i, m1 in enumerate(markets):
+        for m2 in markets[i + 1:]:
+            if m1.exchange != m2.exchange:
+                continue
+            q1_clean = m1.question.lower().replace(m1.outcome.lower(), "").strip()
+            q2_clean = m2.question.lower().replace(m2.outcome.lower(), "").strip()
+            if q1_clean == q2_clean and engine._are_complementary_outcomes(m1.outcome, m2.outcome):
+                pairs.append((m1, m2))
+    return pairs
+
+
+def test_grouped_pairs_match_quadratic_loop():
+    """Mesmos pares e mesma ordem do laço original"""
+    engine = CombinatorialArbitrage()
+    markets = _markets()
+    pairs = engine.find_complementary_markets(markets)
+    assert pairs == _reference(engine, markets)
+    assert len(pairs) > 20
+
+    yes = Market(exchange="kalshi", market_id="a", question="Rain tomorrow? Yes", outcome="Yes", price=0.4,
+                 volume_24h=0, liquidity=0, expires_at=None)
+    no = Market(exchange="kalshi", market_id="b", question="Rain tomorrow? No", outcome="No", price=0.5,
+                volume_24h=0, liquidity=0, expires_at=None)
+    other = Market(exchange="manifold", market_id="c", question="Rain tomorrow? No", outcome="No", price=0.5,
+                   volume_24h=0, liquidity=0, expires_at=None)
+    assert engine.find_complementary_markets([yes, other, no]) == [(yes, no)]
+    assert engine.find_complementary_markets([]) == []
+
+
+if __name__ == "__main__":
+    test_grouped_pairs_match_quadratic_loop()
+    print("PASSOU - Mercados complementares agrupados")
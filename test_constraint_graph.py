@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Testa o grafo de restrições lógicas e as engines que o usam (offline)"""
+from arbitrage_combinatorial import CombinatorialArbitrage
+from arbitrage_expert import ArbitrageExpert
+from constraint_graph import ConstraintGraph, extract_facts, implication
+from exchanges.base import Market
+
+
+def _market(market_id, question, price, exchange="polymarket", outcome="YES"):
+    return Market(exchange=exchange, market_id=market_id, question=question, outcome=outcome, price=price,
+                  volume_24h=1000.0, liquidity=5000.0, expires_at=None)
+
+
+def _btc(market_id, threshold, price, exchange="polymarket"):
+    return _market(market_id, f"Will Bitcoin be above {threshold} on Dec 31 2026?", price, exchange)
+
+
+def test_extract_facts_and_implication():
+    high = extract_facts(_btc("a", "$120k", 0.3))
+    low = extract_facts(_btc("b", "$100,000", 0.5))
+    assert high.template == low.template
+    assert (high.threshold, low.threshold) == (120000.0, 100000.0)
+    assert implication(high, low) == "threshold"
+    assert implication(low, high) is None
+
+    below_low = extract_facts(_market("c", "Will ETH trade below 2000 in 2026?", 0.2))
+    below_high = extract_facts(_market("d", "Will ETH trade below 2500 in 2026?", 0.3))
+    assert implication(below_low, below_high) == "threshold"
+
+    texas = extract_facts(_market("e", "Measles cases in Texas more than 500 in 2026?", 0.4))
+    national = extract_facts(_market("f", "Measles cases in the US more than 500 in 2026?", 0.3))
+    assert implication(texas, national) == "state"
+    assert implication(national, texas) is None
+
+    trump = extract_facts(_market("g", "Will Trump win the 2028 presidential election?", 0.4))
+    gop = extract_facts(_market("h", "Will the Republicans win the 2028 presidential election?", 0.5))
+    dems = extract_facts(_market("i", "Will the Democrats win the 2028 presidential election?", 0.5))
+    senate = extract_facts(_market("j", "Will the Republicans win the 2028 Senate election?", 0.5))
+    assert implication(trump, gop) == "candidate_party"
+    assert implication(trump, dems) is None
+    assert implication(trump, senate) is None
+
+    # Nomeação, estado e voto popular são outras disputas: não implicam a eleição geral
+    for question in ("Will Trump win the 2028 Republican nomination?", "Will Vance win Pennsylvania in 2028?",
+                     "Will Vance win the 2028 Iowa caucus?", "Will Trump win the popular vote in 2028?"):
+        assert implication(extract_facts(_market("n", question, 0.9)), gop) is None, question
+    # "win" só como palavra: "Winter", "window", "twin" não são eleição
+    for question in ("Will Vance attend the 2028 Winter Olympics in Los Angeles?",
+                     "Will Trump open a window at the twin towers memorial in 2028?"):
+        facts = extract_facts(_market("w", question, 0.9))
+        assert facts.election is None and implication(facts, gop) is None, question
+    # Mesmo estado dos dois lados é implicação; nomeação nunca é
+    pa_vance = extract_facts(_market("p", "Will Vance win Pennsylvania in 2028?", 0.6))
+    pa_gop = extract_facts(_market("q", "Will the Republicans win Pennsylvania in 2028?", 0.5))
+    assert implication(pa_vance, pa_gop) == "candidate_party"
+    nominee = extract_facts(_market("s", "Will Trump win the 2028 Republican nomination?", 0.6))
+    assert implication(nominee, extract_facts(_market("u", "Will Republicans win the 2028 nomination?", 0.5))) is None
+
+    # Mesmo evento em outra exchange não é hierarquia
+    assert implication(high, extract_facts(_btc("k", "120k", 0.2, "kalshi"))) is None
+
+
+def test_violations_follow_chains():
+    graph = ConstraintGraph()
+    top, mid, bottom = _btc("a", "$120k", 0.5), _btc("b", "$110k", 0.45), _btc("c", "$100k", 0.4)
+    graph.update([top, mid, bottom, _market("x", "Will Bitcoin be above $120k?", 0.1, outcome="NO")])
+    assert len(graph) == 3  # Só outcomes YES
+    assert graph.edge_count == 3
+
+    violations = graph.violations()
+    by_consequent = {v.consequent.market_id: v for v in violations}
+    assert set(by_consequent) == {"b", "c"}
+    # Ancestral de maior preço, inclusive pela cadeia a -> b -> c
+    assert by_consequent["c"].antecedent is top
+    assert abs(by_consequent["c"].gap - 0.1) < 1e-12
+    assert violations[0].consequent is bottom  # Ordenadas por gap
+
+    assert graph.violations(tolerance=0.2) == []
+
+
+def test_incremental_update_and_prune():
+    graph = ConstraintGraph()
+    top, bottom = _btc("a", "$120k", 0.5), _btc("b", "$100k", 0.4)
+    assert graph.update([top, bottom]) == 2
+    assert len(graph.violations()) == 1
+
+    # Só o preço mudou: nada é reinserido e a violação some
+    assert graph.update([top, _btc("b", "$100k", 0.6)]) == 0
+    assert graph.violations() == []
+
+    # Pergunta alterada: nó reinserido com as arestas novas
+    assert graph.update([top, _market("b", "Will Bitcoin be above $130k on Dec 31 2026?", 0.6)]) == 1
+    assert graph.successors[("polymarket", "b")] == {("polymarket", "a"): "threshold"}
+    assert graph.violations()[0].antecedent.market_id == "b"
+
+    graph.update([top])
+    assert len(graph) == 1 and graph.edge_count == 0
+    assert graph.predecessors[("polymarket", "a")] == {}
+
+
+def test_combinatorial_engine_finds_implications():
+    engine = CombinatorialArbitrage()
+    texas = _market("tx", "Measles cases in Texas more than 500 in 2026?", 0.45)
+    national = _market("us", "Measles cases in the US more than 500 in 2026?", 0.3, exchange="kalshi")
+    unrelated = _market("z", "Will it rain in Paris tomorrow?", 0.9)
+
+    opportunities = engine.find_related_arbitrage([texas, national, unrelated])
+    assert len(opportunities) == 1
+    opp = opportunities[0]
+    assert opp.strategy == "logical_implication"
+    assert opp.markets == [texas, national]
+    assert abs(opp.total_probability - 0.85) < 1e-12
+    assert opp.expected_profit_pct > engine.min_profit
+
+    assert engine._check_logical_consistency(national, texas).markets == [texas, national]
+    assert engine._check_logical_consistency(texas, unrelated) is None
+
+
+def test_expert_uses_constraint_graph():
+    expert = ArbitrageExpert()
+    markets = [
+        _market("t", "Will Trump win the 2028 presidential election?", 0.6),
+        _market("r", "Will the Republicans win the 2028 presidential election?", 0.45),
+        _btc("a", "$120k", 0.5),
+        _btc("b", "$100k", 0.3),
+    ]
+    expert.constraints.update(markets)
+    violations = expert.constraints.violations()
+
+    party = expert._find_party_candidate_inconsistencies(violations)
+    hierarchy = expert._find_hierarchy_inconsistencies(violations)
+    assert [o.markets[0].market_id for o in party] == ["t"]
+    assert [o.markets[0].market_id for o in hierarchy] == ["a"]
+    assert all(o.strategy == "logical_inconsistency" for o in party + hierarchy)
+
+
+if __name__ == "__main__":
+    test_extract_facts_and_implication()
+    test_violations_follow_chains()
+    test_incremental_update_and_prune()
+    test_combinatorial_engine_finds_implications()
+    test_expert_uses_constraint_graph()
+    print("PASSOU - Grafo de restrições lógicas")
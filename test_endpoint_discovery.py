@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Testa descoberta e memorização de endpoints (offline)"""
+import asyncio
+import os
+import tempfile
+import httpx
+from exchanges.discovery import EndpointDiscovery
+
+
+class FakeApi:
+    """API onde só um endpoint responde com mercados"""
+
+    def __init__(self, working: str, shape: str = "data"):
+        self.working = working
+        self.shape = shape
+        self.calls = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request.url.path)
+        if request.url.path == self.working:
+            items = [{"id": 1, "question": "Will it work?"}]
+            return httpx.Response(200, json=items if self.shape == "list" else {self.shape: items})
+        if request.url.path == "/timeout":
+            raise httpx.ReadTimeout("lento", request=request)
+        return httpx.Response(404, json={"error": "not found"})
+
+
+def _fetch(discovery, api):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(api.handler), base_url="https://api.test") as client:
+            return await discovery.fetch(lambda endpoint: client.get(endpoint))
+    return asyncio.run(run())
+
+
+def test_probe_once_then_single_request():
+    """Sonda na primeira chamada e depois usa só o endpoint memorizado"""
+    cache_path = os.path.join(tempfile.mkdtemp(), "discovery.json")
+    api = FakeApi("/markets/active", shape="markets")
+    candidates = ["/timeout", "/markets", "/markets/active"]
+
+    discovery = EndpointDiscovery("teste", candidates, cache_path=cache_path)
+    assert len(_fetch(discovery, api)) == 1
+    assert api.calls == candidates
+    assert discovery.current.endpoint == "/markets/active"
+    assert discovery.current.shape == "markets"
+
+    api.calls.clear()
+    assert len(_fetch(discovery, api)) == 1
+    assert api.calls == ["/markets/active"]
+
+    # Nova instância (novo processo) reaproveita o cache em disco
+    restored = EndpointDiscovery("teste", candidates, cache_path=cache_path)
+    api.calls.clear()
+    _fetch(restored, api)
+    assert api.calls == ["/markets/active"]
+    assert restored.probes == 0
+
+
+def test_reprobe_after_failure():
+    """Endpoint memorizado que falha é invalidado e os demais são sondados"""
+    cache_path = os.path.join(tempfile.mkdtemp(), "discovery.json")
+    api = FakeApi("/markets")
+    discovery = EndpointDiscovery("teste", ["/markets", "/v1/markets"], cache_path=cache_path)
+    _fetch(discovery, api)
+    assert discovery.current.endpoint == "/markets"
+
+    # API muda de endpoint
+    api.working = "/v1/markets"
+    api.calls.clear()
+    items = _fetch(discovery, api)
+    assert len(items) == 1
+    assert api.calls == ["/markets", "/v1/markets"]
+    assert discovery.current.endpoint == "/v1/markets"
+    assert discovery.probes == 2
+
+
+def test_auth_error_stops_probing():
+    """401/403 não dispara sondagem dos outros endpoints"""
+    cache_path = os.path.join(tempfile.mkdtemp(), "discovery.json")
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(401, json={"error": "unauthorized"})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://api.test") as client:
+            return await discovery.fetch(lambda endpoint: client.get(endpoint))
+
+    discovery = EndpointDiscovery("teste", ["/a", "/b", "/c"], cache_path=cache_path)
+    assert asyncio.run(run()) == []
+    assert calls == ["/a"]
+    assert discovery.last_status == 401
+    assert discovery.current is None
+
+
+if __name__ == "__main__":
+    test_probe_once_then_single_request()
+    test_reprobe_after_failure()
+    test_auth_error_stops_probing()
+    print("PASSOU - Descoberta de endpoints")
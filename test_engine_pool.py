@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Testa execução das engines em pool: timeouts, erros, tempos e paridade com o modo serial (offline)"""
+import threading
+import time
+from dataclasses import replace
+import numpy as np
+from engine_pool import BUSY, ERROR, OK, TIMEOUT, EnginePool
+from exchanges.base import FrozenMarket, Market
+from monitor import ArbitrageMonitor
+from price_history import PriceHistory, market_key
+
+
+def _busy_work(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def _fail():
+    raise RuntimeError("falhou")
+
+
+def test_serial_and_thread_pools():
+    for mode in ("serial", "thread"):
+        pool = EnginePool(mode=mode, timeouts={})
+        runs = pool.run({"a": (_busy_work, (200000,)), "b": (sorted, ([3, 1, 2],)), "c": (_fail, ())})
+        assert list(runs) == ["a", "b", "c"]
+        assert runs["a"].status == OK and runs["a"].result == _busy_work(200000)
+        assert runs["a"].wall_time > 0 and runs["a"].cpu_time > 0
+        assert runs["b"].result == [1, 2, 3]
+        assert runs["c"].status == ERROR and "falhou" in runs["c"].error
+        assert pool.status()["engines"]["c"]["status"] == ERROR
+        pool.shutdown()
+
+    for kwargs in ({"mode": "fork"}, {"mode": "process", "orderbooks": True}):
+        try:
+            EnginePool(**kwargs)
+            assert False
+        except ValueError:
+            pass
+
+
+def test_timeouts_bound_cycle_and_block_overlap():
+    release = threading.Event()
+    pool = EnginePool(mode="thread", timeouts={"slow": 0.2}, default_timeout=5.0)
+    start = time.perf_counter()
+    runs = pool.run({"slow": (release.wait, (10,)), "fast": (sum, ([1, 2, 3],))})
+    elapsed = time.perf_counter() - start
+    assert runs["slow"].status == TIMEOUT and runs["fast"].result == 6
+    assert elapsed < 2.0  # Limitado pelo timeout da lenta, não pelos 10s
+
+    # Enquanto a execução anterior roda, a engine não é despachada de novo
+    runs = pool.run({"slow": (release.wait, (10,))})
+    assert runs["slow"].status == BUSY
+    assert pool.status()["running"] == ["slow"]
+
+    release.set()
+    time.sleep(0.05)
+    runs = pool.run({"slow": (release.wait, (10,))})
+    assert runs["slow"].status == OK and runs["slow"].result is True
+    pool.shutdown()
+
+
+def test_process_pool():
+    pool = EnginePool(mode="process", workers=2, timeouts={})
+    runs = pool.run({"a": (_busy_work, (100000,)), "b": (_busy_work, (10,))})
+    assert runs["a"].result == _busy_work(100000) and runs["b"].result == _busy_work(10)
+    assert runs["a"].cpu_time >= 0
+    pool.shutdown(wait=True)
+
+
+def _markets():
+    markets = []
+    for i in range(15):
+        question = f"Will candidate {i} win the 2028 election?"
+        markets.append(Market(exchange="kalshi", market_id=f"k{i}", question=question, outcome="YES",
+                              price=0.3 + i / 200, volume_24h=100, liquidity=5000, expires_at=None))
+        markets.append(Market(exchange="polymarket", market_id=f"p{i}", question=question, outcome="YES",
+                              price=0.6 - i / 200, volume_24h=100, liquidity=5000, expires_at=None))
+    return markets
+
+
+def _summary(monitor):
+    return (
+        [(o.market_buy.market_id, o.market_sell.market_id, round(o.profit_pct, 9)) for o in monitor.opportunities],
+        [(o.strategy, round(o.expected_profit_pct, 9)) for o in monitor.combinatorial_opportunities],
+        [(o.market_low.market_id, round(o.profit_pct, 9)) for o in monitor.probability_opportunities],
+        [(o.market_low.market_id, round(o.profit_pct, 9)) for o in monitor.short_term_opportunities],
+    )
+
+
+def test_monitor_thread_mode_matches_serial():
+    serial, threaded = ArbitrageMonitor(), ArbitrageMonitor()
+    threaded.engine_pool = EnginePool(mode="thread")
+    serial.analyze(_markets())
+    threaded.analyze(_markets())
+    assert _summary(threaded) == _summary(serial)
+    assert all(isinstance(m, FrozenMarket) for m in threaded.registry.snapshot.markets)
+    assert set(threaded.engine_pool.status()["engines"]) == {"traditional", "combinatorial", "probability", "short_term"}
+
+    # Engine com erro mantém o resultado do ciclo anterior
+    previous = list(threaded.opportunities)
+    threaded.engine.find_opportunities = lambda *args: _fail()
+    threaded.engine.update_opportunities = lambda *args: _fail()
+    threaded.analyze(_markets())
+    assert threaded.opportunities == previous
+    assert threaded.engine_pool.last_runs["traditional"].status == ERROR
+    threaded.engine_pool.shutdown()
+
+
+def test_failed_engine_forces_full_cycle():
+    monitor = ArbitrageMonitor()
+    monitor.analyze(_markets())
+    calls = []
+    find, update = monitor.engine.find_opportunities, monitor.engine.update_opportunities
+    monitor.engine.find_opportunities = lambda *args: calls.append("find") or find(*args)
+    monitor.engine.update_opportunities = lambda *args: calls.append("update") or update(*args)
+
+    def cycle(markets):
+        # Primeira chamada da engine tradicional: "update" = incremental, "find" = completo
+        calls.clear()
+        monitor.analyze(markets)
+        return calls[0]
+
+    assert cycle(_markets()) == "update"
+
+    # Combinatória falha no ciclo em que os preços mudam
+    moved = _markets()
+    moved[0] = replace(moved[0], price=0.05)
+    moved[1] = replace(moved[1], price=0.95)
+    monitor.combinatorial.find_all_opportunities = lambda *args: _fail()
+    assert cycle(moved) == "update"
+    assert monitor.engine_pool.last_runs["combinatorial"].status == ERROR
+    del monitor.combinatorial.find_all_opportunities
+
+    # Sem novas mudanças, o ciclo seguinte ainda refaz tudo (o diff perdido não é reaproveitado)
+    assert cycle(moved) == "find"
+    assert set(monitor.engine_pool.last_runs) == {"traditional", "combinatorial", "probability", "short_term"}
+    reference = ArbitrageMonitor()
+    reference.analyze(moved)
+    assert _summary(monitor) == _summary(reference)
+
+    # E volta ao incremental depois de um ciclo completo sem falhas
+    assert cycle(moved) == "update"
+
+
+def test_history_subset_for_process_workers():
+    history = PriceHistory(capacity=4, max_markets=100)
+    markets = _markets()
+    for step in range(6):
+        history.record(markets, timestamp=1000.0 + step, prices=np.full(len(markets), 0.3 + step * step / 100))
+    keys = [market_key(markets[0]), market_key(markets[3]), ("kalshi", "desconhecido", "YES")]
+    subset = history.subset(keys)
+    assert len(subset) == 2 and len(subset.head) == 2
+    for key in keys[:2]:
+        for ours, theirs in zip(subset.series(key), history.series(key)):
+            assert list(ours) == list(theirs)
+    assert list(subset.volatility(keys[:2])) == list(history.volatility(keys[:2]))
+
+
+if __name__ == "__main__":
+    test_serial_and_thread_pools()
+    test_timeouts_bound_cycle_and_block_overlap()
+    test_process_pool()
+    test_monitor_thread_mode_matches_serial()
+    test_failed_engine_forces_full_cycle()
+    test_history_subset_for_process_workers()
+    print("PASSOU - Pool de engines")
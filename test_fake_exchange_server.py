@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Testa adapters reais contra o servidor fake local (offline)"""
+import asyncio
+import httpx
+from fake_exchange_server import FakeExchangeServer, SyntheticUniverse
+from exchanges.polymarket import PolymarketExchange
+from exchanges.kalshi_v2 import KalshiV2Exchange
+from exchanges.predictit_v2 import PredictItV2Exchange
+from exchanges.manifold import ManifoldExchange
+
+
+def _adapters(server):
+    env = server.env()
+    polymarket = PolymarketExchange()
+    polymarket.base_url = env["POLYMARKET_BASE_URL"]
+    kalshi = KalshiV2Exchange()
+    kalshi.api_url = env["KALSHI_BASE_URL"]
+    predictit = PredictItV2Exchange()
+    predictit.base_url = env["PREDICTIT_BASE_URL"]
+    manifold = ManifoldExchange()
+    manifold.base_url = env["MANIFOLD_BASE_URL"]
+    return [polymarket, kalshi, predictit, manifold]
+
+
+def test_adapters_parse_fake_server():
+    """Cada adapter lê o formato servido e os eventos se sobrepõem entre venues"""
+    universe = SyntheticUniverse(events=60, overlap=0.7, seed=7)
+    server = FakeExchangeServer(universe, port=0).start()
+    try:
+        adapters = _adapters(server)
+
+        async def fetch_all():
+            return await asyncio.gather(*(a.fetch_markets() for a in adapters))
+
+        results = asyncio.run(fetch_all())
+        for adapter, markets in zip(adapters, results):
+            listed = len(universe.listed_on(adapter.name))
+            print(f"{adapter.name}: {listed} eventos -> {len(markets)} mercados")
+            assert markets, f"{adapter.name} não parseou nenhum mercado"
+
+        # Polymarket cria só YES para mercados Yes/No
+        assert len(results[0]) == len(universe.listed_on("polymarket"))
+        # Kalshi: YES + NO por mercado
+        assert len(results[1]) == 2 * len(universe.listed_on("kalshi"))
+        assert len(adapters[0].token_ids) == len(results[0])
+
+        # Orderbook Kalshi
+        ticker = results[1][0].market_id.rsplit("_", 1)[0]
+        book = asyncio.run(adapters[1].get_market_orderbook(ticker))
+        assert book["orderbook"]["yes"]
+    finally:
+        server.stop()
+
+
+def test_polymarket_cursor_pagination():
+    """Cursor do CLOB percorre todas as páginas até LTE="""
+    universe = SyntheticUniverse(events=50, overlap=1.0, seed=1)
+    server = FakeExchangeServer(universe, port=0).start()
+    try:
+        async def crawl():
+            ids = []
+            cursor = None
+            async with httpx.AsyncClient() as client:
+                while cursor != "LTE=":
+                    params = {"limit": 20}
+                    if cursor:
+                        params["next_cursor"] = cursor
+                    data = (await client.get(f"{server.url}/polymarket/markets", params=params)).json()
+                    ids.extend(m["condition_id"] for m in data["data"])
+                    cursor = data["next_cursor"]
+            return ids
+
+        ids = asyncio.run(crawl())
+        assert len(ids) == len(set(ids)) == 50
+    finally:
+        server.stop()
+
+
+def test_error_injection():
+    """Taxa de erro configurável retorna status de falha"""
+    universe = SyntheticUniverse(events=5, seed=3)
+    server = FakeExchangeServer(universe, port=0, error_rate=1.0, error_statuses=(503,)).start()
+    try:
+        response = httpx.get(f"{server.url}/manifold/v0/markets")
+        assert response.status_code == 503
+        assert server.errors == 1
+    finally:
+        server.stop()
+
+
+def test_price_drift():
+    """Preços derivam com o tempo (relógio controlado)"""
+    clock = {"now": 0.0}
+    universe = SyntheticUniverse(events=20, seed=5, clock=lambda: clock["now"])
+    before = [e.probability for e in universe.events]
+    clock["now"] += 3600
+    universe.advance()
+    after = [e.probability for e in universe.events]
+    assert before != after
+    assert all(0 < p < 1 for p in after)
+
+
+def test_lazy_drift_and_indexes():
+    """Drift só nos eventos servidos, independente da ordem de acesso; buscas por índice"""
+    clock = {"now": 0.0}
+    a = SyntheticUniverse(events=20, seed=5, clock=lambda: clock["now"])
+    b = SyntheticUniverse(events=20, seed=5, clock=lambda: clock["now"])
+    clock["now"] += 3600
+
+    a.advance(a.events[:5])
+    assert [e.probability for e in a.events[5:]] == [e.probability for e in b.events[5:]]
+    b.advance(reversed(b.events))
+    a.advance()
+    assert [e.probability for e in a.events] == [e.probability for e in b.events]
+    a.advance()  # Sem tempo decorrido: nada muda
+    assert [e.probability for e in a.events] == [e.probability for e in b.events]
+
+    kalshi = a.listed_on("kalshi")[0]
+    assert a.by_ticker[kalshi.ticker] is kalshi
+    polymarket = a.listed_on("polymarket")[0]
+    assert a.polymarket_event(str(10 ** 12 + polymarket.event_id * 2 + 1)) is polymarket
+    manifold = a.listed_on("manifold")
+    assert a.manifold_positions[manifold[1].manifold_id] == 1
+
+
+if __name__ == "__main__":
+    test_adapters_parse_fake_server()
+    test_polymarket_cursor_pagination()
+    test_error_injection()
+    test_price_drift()
+    test_lazy_drift_and_indexes()
+    print("PASSOU - Servidor fake")
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Testa escadas de strikes da Kalshi: monotonicidade e butterfly (offline)"""
+import itertools
+from arbitrage_combinatorial import CombinatorialArbitrage
+from exchanges.base import Market
+from ladder_arbitrage import build_ladders, butterfly_trades, find_ladder_arbitrage, monotonicity_trades, parse_strike
+
+TITLE = "How high will unemployment get?"
+
+
+def _kalshi(strike, subtitle, price, outcome="YES", event="KXUNEMP-26DEC", title=TITLE):
+    return Market(exchange="kalshi", market_id=f"{event}-{strike}_{outcome}", question=f"{title} - {subtitle}",
+                  outcome=outcome, price=price, volume_24h=100.0, liquidity=2000.0, expires_at=None)
+
+
+def _payoffs(trade, values):
+    """Pagamento do trade para cada valor final (strike como limite superior inclusivo)"""
+    result = []
+    for value in values:
+        total = 0.0
+        for leg in trade.legs:
+            kind, low, high = parse_strike(leg.market.question.rsplit(" - ", 1)[1])
+            if kind == "above":
+                event = value > low
+            elif kind == "below":
+                event = value <= low
+            else:
+                event = low < value <= high
+            total += 1.0 if event == (leg.outcome == "YES") else 0.0
+        result.append(total)
+    return result
+
+
+def test_parse_strike_and_grouping():
+    assert parse_strike("Above 8%") == ("above", 8.0, None)
+    assert parse_strike("9% or above") == ("above", 9.0, None)
+    assert parse_strike("Below $1,000") == ("below", 1000.0, None)
+    assert parse_strike("Between 4% and 5%") == ("range", 4.0, 5.0)
+    assert parse_strike("$100k or more") == ("above", 100000.0, None)
+    assert parse_strike("Trump") is None
+
+    markets = [
+        _kalshi("T8", "Above 8%", 0.3), _kalshi("T8", "Above 8%", 0.68, outcome="NO"),
+        _kalshi("T6", "Above 6%", 0.6), _kalshi("T7", "Above 7%", 0.4),
+        _kalshi("T7", "Above 7%", 0.4, event="KXUNEMP-27DEC"),  # Outro evento: escada de um strike só
+        Market(exchange="polymarket", market_id="x", question="Bitcoin above 100k?", outcome="YES", price=0.5,
+               volume_24h=0, liquidity=0, expires_at=None),
+    ]
+    ladders = build_ladders(markets)
+    assert len(ladders) == 1
+    ladder = ladders[0]
+    assert list(ladder.strikes) == [6.0, 7.0, 8.0]
+    assert list(ladder.survival()) == [0.6, 0.4, 0.3]
+    assert ladder.points[2][1].no.price == 0.68  # NO cotado é usado na perna vendida
+    assert monotonicity_trades(ladder) == []
+
+
+def test_monotonicity_violation_is_risk_free():
+    markets = [
+        _kalshi("T6", "Above 6%", 0.50), _kalshi("T7", "Above 7%", 0.30),
+        _kalshi("T8", "Above 8%", 0.45), _kalshi("T9", "Below 9%", 0.40),  # S(9) = 0.60
+    ]
+    trades = monotonicity_trades(build_ladders(markets)[0])
+    assert [t.legs[1].market.market_id for t in trades] == ["KXUNEMP-26DEC-T8_YES", "KXUNEMP-26DEC-T9_YES"]
+    for trade in trades:
+        # Comprado no strike barato (7%) e vendido no mais alto
+        assert trade.legs[0].market.market_id == "KXUNEMP-26DEC-T7_YES"
+        assert min(_payoffs(trade, [5, 6.5, 7.5, 8.5, 10])) >= trade.payout == 1.0
+        assert trade.cost < 1.0
+    assert abs(trades[0].cost - (0.30 + 0.55)) < 1e-12
+    assert abs(trades[1].cost - (0.30 + 0.40)) < 1e-12
+
+
+def test_butterfly_against_vertical_spread():
+    ladder_markets = [_kalshi("T6", "Above 6%", 0.60), _kalshi("T7", "Above 7%", 0.30)]
+    cheap = _kalshi("B6", "Between 6% and 7%", 0.15)   # Vale S(6) - S(7) = 0.30
+    rich = _kalshi("B6", "Between 6% and 7%", 0.55)
+
+    trade = butterfly_trades(build_ladders(ladder_markets + [cheap])[0])[0]
+    assert trade.payout == 1.0 and abs(trade.cost - 0.85) < 1e-12
+    assert set(_payoffs(trade, [5, 6.5, 8])) == {1.0}
+
+    trade = butterfly_trades(build_ladders(ladder_markets + [rich])[0])[0]
+    assert trade.payout == 2.0 and abs(trade.cost - 1.75) < 1e-12
+    assert set(_payoffs(trade, [5, 6.5, 8])) == {2.0}
+
+    fair = _kalshi("B6", "Between 6% and 7%", 0.30)
+    assert butterfly_trades(build_ladders(ladder_markets + [fair])[0]) == []
+    # Faixa sem os dois strikes na escada: ignorada
+    assert butterfly_trades(build_ladders(ladder_markets + [_kalshi("B5", "Between 5% and 6%", 0.01)])[0]) == []
+
+
+def test_vectorized_pass_matches_pairwise_check():
+    prices = [0.9, 0.7, 0.75, 0.5, 0.2, 0.55, 0.1, 0.3]
+    markets = [_kalshi(f"T{k}", f"Above {k}%", p) for k, p in enumerate(prices)]
+    trades = monotonicity_trades(build_ladders(markets)[0], min_profit=-1.0)  # Sem corte por taxas
+    # Referência par a par: para cada j, o i < j de menor preço
+    expected = {}
+    for i, j in itertools.combinations(range(len(prices)), 2):
+        cost = prices[i] + (1 - prices[j])
+        if cost < 1.0 and cost < expected.get(j, 1.0):
+            expected[j] = cost
+    assert {int(t.legs[1].market.market_id.split("-T")[1].split("_")[0]): round(t.cost, 12) for t in trades} == \
+        {j: round(cost, 12) for j, cost in expected.items()}
+
+
+def test_combinatorial_engine_reports_ladders():
+    engine = CombinatorialArbitrage()
+    markets = [_kalshi("T6", "Above 6%", 0.20), _kalshi("T7", "Above 7%", 0.60)]
+    opportunities = engine.find_ladder_opportunities(markets)
+    assert len(opportunities) == 1
+    opp = opportunities[0]
+    assert opp.strategy == "ladder_monotonicity"
+    assert opp.expected_profit_pct > engine.min_profit
+    assert abs(opp.total_probability - 0.60) < 1e-12
+    assert find_ladder_arbitrage(markets, min_profit=1.0) == []
+
+
+if __name__ == "__main__":
+    test_parse_strike_and_grouping()
+    test_monotonicity_violation_is_risk_free()
+    test_butterfly_against_vertical_spread()
+    test_vectorized_pass_matches_pairwise_check()
+    test_combinatorial_engine_reports_ladders()
+    print("PASSOU - Escadas de strikes")
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Testa simplex, formulação mutex e integração no ArbitrageExpert (offline)"""
+import itertools
+import random
+import numpy as np
+from arbitrage_expert import ArbitrageExpert
+from exchanges.base import Market
+from lp_solver import LinearProgram, simplex_max, solve_batch, solve_mutex_groups
+
+
+def _market(exchange, outcome, price, liquidity=10000.0, question="Who will win the 2028 election?"):
+    return Market(exchange=exchange, market_id=f"{exchange}_{outcome}", question=question, outcome=outcome,
+                  price=price, volume_24h=100.0, liquidity=liquidity, expires_at=None)
+
+
+def test_simplex_known_optimum():
+    """Simplex bate com ótimo conhecido e com enumeração de vértices"""
+    # max 3x + 5y s.a. x <= 4, 2y <= 12, 3x + 2y <= 18  ->  (2, 6), valor 36
+    x, value = simplex_max(np.array([3.0, 5.0]), np.array([[1, 0], [0, 2], [3, 2]]), np.array([4.0, 12.0, 18.0]))
+    assert np.allclose(x, [2, 6]) and abs(value - 36) < 1e-9
+
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        A = rng.uniform(0.1, 2.0, size=(4, 2))
+        b = rng.uniform(1.0, 5.0, size=4)
+        c = rng.uniform(-1.0, 3.0, size=2)
+        _, value = simplex_max(c, A, b)
+        # Vértices: interseções de pares de restrições (incluindo x >= 0)
+        rows = np.vstack([A, -np.eye(2)])
+        rhs = np.concatenate([b, np.zeros(2)])
+        best = 0.0
+        for i, j in itertools.combinations(range(len(rows)), 2):
+            M = rows[[i, j]]
+            if abs(np.linalg.det(M)) < 1e-12:
+                continue
+            point = np.linalg.solve(M, rhs[[i, j]])
+            if np.all(rows @ point <= rhs + 1e-9):
+                best = max(best, float(c @ point))
+        assert abs(value - best) < 1e-7
+
+    batch = solve_batch([LinearProgram(np.array([1.0]), np.array([[1.0]]), np.array([2.0]))] * 3, backend="simplex")
+    assert [round(v, 9) for _, v in batch] == [2.0, 2.0, 2.0]
+
+
+def test_mutex_portfolio_is_guaranteed():
+    """Portfólio paga o lucro garantido em qualquer outcome, dentro dos tetos"""
+    # Soma 0.85 na Polymarket: comprar todos
+    cheap = [("a", _market("polymarket", "a", 0.30)), ("b", _market("polymarket", "b", 0.25)),
+             ("c", _market("polymarket", "c", 0.30))]
+    # Soma 1.25 na Kalshi, com liquidez pequena em uma perna: vender (comprar NO)
+    rich = [("a", _market("kalshi", "a", 0.50, liquidity=30.0)), ("b", _market("kalshi", "b", 0.40)),
+            ("c", _market("kalshi", "c", 0.35))]
+    # Soma ~1.0: sem arbitragem
+    fair = [("a", _market("manifold", "a", 0.33)), ("b", _market("manifold", "b", 0.33)),
+            ("c", _market("manifold", "c", 0.34))]
+    # Cross-exchange: mais barato de cada outcome em exchanges diferentes
+    cross = [("a", _market("polymarket", "a", 0.30)), ("a", _market("kalshi", "a", 0.45)),
+             ("b", _market("kalshi", "b", 0.20)), ("b", _market("polymarket", "b", 0.40)),
+             ("c", _market("manifold", "c", 0.30))]
+
+    results = solve_mutex_groups([cheap, rich, fair, cross], budget=500, backend="simplex")
+    assert results[2] is None
+    assert results[0].strategy == "mutex_buy" and results[1].strategy == "mutex_sell"
+    for portfolio in (results[0], results[1], results[3]):
+        assert portfolio.cost <= 500 + 1e-6 and portfolio.profit > 0
+        for outcome in portfolio.outcomes:
+            payout = sum(p.contracts for p in portfolio.positions
+                         if (p.market.outcome == outcome) == (p.side == "buy"))
+            assert payout - portfolio.cost >= portfolio.profit - 1e-6
+        for position in portfolio.positions:
+            assert position.cost <= position.market.liquidity + 1e-6
+    # Usa só a perna mais barata de cada outcome no cross-exchange
+    assert {(p.market.exchange, p.market.outcome) for p in results[3].positions if p.side == "buy"} == \
+        {("polymarket", "a"), ("kalshi", "b"), ("manifold", "c")}
+
+
+def test_expert_reports_lp_portfolio():
+    """ArbitrageExpert usa o LP e ignora conjuntos sem lucro"""
+    markets = [_market("polymarket", o, p) for o, p in (("Alice", 0.30), ("Bob", 0.25), ("Carol", 0.30))]
+    markets += [_market("kalshi", o, p, question="Best picture 2027?") for o, p in (("X", 0.4), ("Y", 0.3), ("Z", 0.3))]
+    opportunities = ArbitrageExpert()._find_mutex_arbitrage(markets)
+    assert len(opportunities) == 1
+    opp = opportunities[0]
+    assert opp.strategy == "mutex_buy" and len(opp.markets) == 3 and opp.net_profit_pct > 0.1
+    assert opp.expected_return > opp.total_investment
+
+
+if __name__ == "__main__":
+    test_simplex_known_optimum()
+    test_mutex_portfolio_is_guaranteed()
+    test_expert_reports_lp_portfolio()
+    print("PASSOU - Solver LP mutex")
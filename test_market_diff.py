@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Testa diff de mercados entre ciclos e análise incremental (offline)"""
+from dataclasses import replace
+from datetime import datetime
+from arbitrage import ArbitrageEngine
+from exchanges.base import Market
+from market_diff import diff_markets, market_key
+from market_registry import MarketRegistry
+from matcher_improved import ImprovedEventMatcher
+from monitor import ArbitrageMonitor
+
+
+EXPIRES = datetime(2026, 11, 8, 12, 0)
+
+
+def _market(exchange, market_id, question, price=0.5, liquidity=1000.0):
+    return Market(exchange=exchange, market_id=market_id, question=question, outcome="YES",
+                  price=price, volume_24h=100.0, liquidity=liquidity, expires_at=EXPIRES)
+
+
+def _universe():
+    return [
+        _market("kalshi", "FED", "Will the Federal Reserve cut interest rates in November 2026?", 0.40),
+        _market("polymarket", "fed", "Federal Reserve cut interest rates November 2026?", 0.55),
+        _market("kalshi", "BTC", "Will Bitcoin price close above 100000 dollars on November 8 2026?", 0.30),
+        _market("polymarket", "btc", "Bitcoin price close above 100000 dollars November 8 2026?", 0.33),
+        _market("manifold", "rain", "Will it rain in London tomorrow morning?", 0.70),
+    ]
+
+
+def _copy(market, **changes):
+    return replace(market, **changes)
+
+
+def test_diff_classification():
+    """Cada mudança cai na categoria certa; primeiro ciclo é todo novo"""
+    old = _universe()
+    first = diff_markets(None, old)
+    assert first.initial and len(first.added) == 5
+
+    previous = {market_key(m): m for m in old}
+    current = [
+        _copy(old[0], price=old[0].price + 0.00001),                 # Abaixo do epsilon
+        _copy(old[1], price=0.60),                                   # Preço movido
+        _copy(old[2], liquidity=2000.0),                             # Liquidez alterada
+        _copy(old[3], question="Bitcoin above 120000 on November 8 2026?", price=0.20),
+        _market("predictit", "new", "Brand new market about elections"),
+    ]
+    diff = diff_markets(previous, current)
+
+    assert not diff.initial and diff.unchanged == 1
+    assert [m.market_id for m in diff.added] == ["new"]
+    assert [m.market_id for m in diff.removed] == ["rain"]
+    assert [new.market_id for _, new in diff.price_moved] == ["fed", "btc"]
+    assert [new.market_id for _, new in diff.liquidity_changed] == ["BTC"]
+    assert [new.market_id for _, new in diff.text_changed] == ["btc"]
+    assert diff.rematch_keys == {("predictit", "new"), ("polymarket", "btc")}
+    assert ("kalshi", "FED") not in diff.changed_keys and len(diff.changed_keys) == 5
+    assert diff.to_dict()["price_changes"][0] == {"exchange": "polymarket", "market_id": "fed",
+                                                   "old_price": 0.55, "price": 0.60}
+    assert diff_markets(previous, old).is_empty
+
+
+def test_incremental_matches_equal_full():
+    """Matching e oportunidades incrementais batem com a análise completa"""
+    matcher = ImprovedEventMatcher(similarity_threshold=0.55, max_date_diff_days=21)
+    engine = ArbitrageEngine()
+
+    def pairs(matches):
+        return [(m1, m2, matcher.calculate_enhanced_similarity(m1.question, m2.question)) for m1, m2 in matches]
+
+    def canonical(matches):
+        return sorted(tuple(sorted(market_key(m) for m in pair)) for pair in matches)
+
+    def summary(opportunities):
+        return sorted((market_key(o.market_buy), market_key(o.market_sell), round(o.profit_pct, 6))
+                      for o in opportunities)
+
+    old = _universe()
+    old_matches = matcher.find_matching_events(old)
+    old_opportunities = engine.find_opportunities(pairs(old_matches))
+
+    current = [
+        old[0],
+        _copy(old[1], price=0.70),
+        _copy(old[2], question="Will Ethereum price close above 5000 dollars on November 8 2026?"),
+        old[3],
+        _market("predictit", "fed", "Will the Federal Reserve cut interest rates in November 2026?", 0.30),
+    ]
+    diff = diff_markets({market_key(m): m for m in old}, current)
+
+    incremental = matcher.update_matches(old_matches, current, diff.rematch_keys)
+    full = matcher.find_matching_events(current)
+    assert canonical(incremental) == canonical(full)
+
+    updated = engine.update_opportunities(old_opportunities, pairs(incremental), diff.changed_keys)
+    assert summary(updated) == summary(engine.find_opportunities(pairs(full)))
+
+
+def test_registry_publishes_diff():
+    """Cada snapshot publicado traz o diff em relação ao anterior"""
+    registry = MarketRegistry()
+    seen = []
+    registry.on_publish(lambda snapshot: seen.append(snapshot.diff))
+
+    markets = _universe()
+    assert registry.publish(markets).diff.initial
+    second = registry.publish(markets[:4] + [_copy(markets[4], price=0.1)])
+    assert second.diff.is_empty is False and len(second.diff.price_moved) == 1
+    third = registry.publish(markets[:4])
+    assert [m.market_id for m in third.diff.removed] == ["rain"]
+    assert [d.initial for d in seen] == [True, False, False]
+
+
+def test_snapshot_published_before_first_cycle_runs_full():
+    """Snapshot publicado fora do monitor (ex: GET /markets) não torna o primeiro ciclo incremental"""
+    fresh = ArbitrageMonitor()
+    fresh.analyze(_universe())
+
+    monitor = ArbitrageMonitor()
+    monitor.registry.publish(_universe())
+    monitor.analyze(_universe())
+    assert monitor.matches and len(monitor.matches) == len(fresh.matches)
+    assert len(monitor.opportunities) == len(fresh.opportunities)
+
+
+if __name__ == "__main__":
+    test_diff_classification()
+    test_incremental_matches_equal_full()
+    test_registry_publishes_diff()
+    test_snapshot_published_before_first_cycle_runs_full()
+    print("PASSOU - Diff de mercados")
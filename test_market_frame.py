@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Testa snapshot colunar MarketFrame contra as contas por mercado (offline)"""
+import random
+from datetime import datetime, timedelta
+from arbitrage import ArbitrageEngine
+from arbitrage_short_term import ShortTermArbitrageEngine
+from exchanges.base import Market
+from market_frame import MarketFrame
+
+
+def _markets(count=400, seed=5):
+    rng = random.Random(seed)
+    now = datetime.now()
+    markets = []
+    for i in range(count):
+        expires = None if i % 17 == 0 else now + timedelta(hours=rng.uniform(-5, 100))
+        markets.append(Market(
+            exchange=rng.choice(["polymarket", "kalshi", "manifold", "predictit", "novaexchange"]),
+            market_id=f"m{i}",
+            question=f"Question {i % 50}?",
+            outcome=rng.choice(["YES", "NO"]),
+            price=rng.uniform(0.01, 0.99),
+            volume_24h=rng.uniform(0, 5000),
+            liquidity=rng.uniform(0, 5000),
+            expires_at=expires
+        ))
+    return markets
+
+
+def test_columns_and_index():
+    """Colunas paralelas à lista e índice de volta para os Markets"""
+    markets = _markets(50)
+    frame = MarketFrame(markets)
+    assert len(frame) == 50
+    for i in (0, 17, 49):
+        market = markets[i]
+        assert frame.price[i] == market.price and frame.liquidity[i] == market.liquidity
+        assert frame.exchanges[frame.exchange_code[i]] == market.exchange
+        assert frame.position(market) == i
+        assert frame.is_yes[i] == (market.outcome == "YES")
+    assert frame.fee_rate[frame.exchange_mask("kalshi")].tolist() == [0.07] * int(frame.exchange_mask("kalshi").sum())
+    assert set(frame.fee_rate[frame.exchange_mask("novaexchange")]) <= {0.05}
+    assert frame.select(frame.liquidity > 2500) == [m for m in markets if m.liquidity > 2500]
+
+    empty = MarketFrame([])
+    assert len(empty) == 0 and empty.select(empty.liquidity > 0) == []
+
+
+def test_short_term_filter_matches_loop():
+    """Filtro vetorizado de curto prazo seleciona os mesmos mercados do laço"""
+    markets = _markets()
+    engine = ShortTermArbitrageEngine(matcher=None)
+    now = datetime.now()
+    expected = [
+        m for m in markets
+        if m.expires_at
+        and engine.min_expiry_hours <= (m.expires_at - now).total_seconds() / 3600 <= engine.max_expiry_hours
+        and m.liquidity >= engine.min_liquidity
+    ]
+    assert engine._filter_short_term_markets(markets) == expected
+    assert engine._filter_short_term_markets(markets, MarketFrame(markets)) == expected
+
+
+def test_pair_profit_matches_engine():
+    """Lucro vetorizado igual ao de calculate_arbitrage e pré-filtro sem perdas"""
+    markets = _markets()
+    frame = MarketFrame(markets)
+    engine = ArbitrageEngine()
+    engine.validator.validate_equivalence = lambda m1, m2: (True, {"confidence": 1.0})
+    engine.min_liquidity = 0
+    engine.min_profit = -10.0
+
+    rng = random.Random(1)
+    pairs = [(markets[rng.randrange(400)], markets[rng.randrange(400)], 1.0) for _ in range(300)]
+    pairs = [p for p in pairs if p[0] is not p[1]]
+    buy, sell, profit = frame.pair_profit(frame.positions([p[0] for p in pairs]), frame.positions([p[1] for p in pairs]))
+    for k, (m1, m2, _) in enumerate(pairs):
+        opp = engine.calculate_arbitrage(m1, m2)
+        assert frame.markets[buy[k]] is opp.market_buy and frame.markets[sell[k]] is opp.market_sell
+        assert profit[k] == opp.profit_pct
+
+    # Com limites reais, pré-filtro não muda o resultado
+    engine.min_liquidity, engine.min_profit = 1000, 0.02
+    same_outcome = [p for p in pairs if p[0].outcome == p[1].outcome]
+    baseline = engine.find_opportunities(same_outcome)
+    screened = engine.find_opportunities(same_outcome, frame)
+    assert [(o.market_buy, o.market_sell, o.profit_pct) for o in screened] == \
+        [(o.market_buy, o.market_sell, o.profit_pct) for o in baseline]
+    assert len(engine._prescreen(same_outcome, frame)) < len(same_outcome)
+
+
+if __name__ == "__main__":
+    test_columns_and_index()
+    test_short_term_filter_matches_loop()
+    test_pair_profit_matches_engine()
+    print("PASSOU - MarketFrame")
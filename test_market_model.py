@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Testa Market com slots, hash pré-calculado e variante frozen"""
+import copy
+import dataclasses
+import pickle
+from datetime import datetime
+from exchanges.base import FrozenMarket, Market
+
+
+def _market(outcome="YES", price=0.4):
+    # Strings montadas em tempo de execução (como as lidas do JSON)
+    question = "".join(["Will it rain ", "tomorrow?"])
+    return Market("".join(["kal", "shi"]), f"RAIN_{outcome}", question, outcome, price, 100.0, 500.0,
+                  datetime(2026, 1, 1), url="".join(["https://kalshi.com/", "rain"]))
+
+
+def test_slots_and_interned_strings():
+    """Sem __dict__ por instância e strings repetidas compartilhadas"""
+    yes, no = _market("YES"), _market("NO", 0.6)
+    assert not hasattr(yes, "__dict__")
+    assert yes.question is no.question
+    assert yes.url is no.url and yes.exchange is no.exchange
+
+
+def test_hash_and_equality():
+    """Identidade por (exchange, market_id, outcome), igual ao Market anterior"""
+    a, b = _market(price=0.4), _market(price=0.9)
+    assert a == b and hash(a) == hash(b) == hash(("kalshi", "RAIN_YES", "YES"))
+    assert a != _market("NO") and a != "RAIN_YES"
+    assert len({a, b, _market("NO")}) == 2
+
+    # replace cria instância nova com hash recalculado
+    moved = dataclasses.replace(a, price=0.5)
+    assert moved.price == 0.5 and moved == a and a.price == 0.4
+
+
+def test_frozen_variant():
+    """FrozenMarket é imutável, compatível em hash/igualdade e serializável"""
+    market = _market()
+    frozen = market.freeze()
+    assert frozen == market and hash(frozen) == hash(market)
+    try:
+        frozen.price = 0.9
+        assert False, "FrozenMarket deveria ser imutável"
+    except dataclasses.FrozenInstanceError:
+        pass
+
+    for clone in (pickle.loads(pickle.dumps(frozen)), copy.deepcopy(frozen)):
+        assert clone == frozen and clone.price == frozen.price and isinstance(clone, FrozenMarket)
+    thawed = frozen.thaw()
+    thawed.price = 0.7
+    assert isinstance(thawed, Market) and pickle.loads(pickle.dumps(thawed)).price == 0.7
+
+
+if __name__ == "__main__":
+    test_slots_and_interned_strings()
+    test_hash_and_equality()
+    test_frozen_variant()
+    print("PASSOU - Market")
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Testa registro de mercados com índices e troca atômica de snapshot"""
+import threading
+from datetime import datetime, timedelta
+from exchanges.base import Market
+from market_registry import MarketRegistry, expiry_bucket
+
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+
+def _market(exchange, market_id, outcome="YES", hours=48):
+    return Market(exchange=exchange, market_id=market_id, question=f"Pergunta {market_id}", outcome=outcome,
+                  price=0.5, volume_24h=100.0, liquidity=1000.0,
+                  expires_at=NOW + timedelta(hours=hours) if hours is not None else None)
+
+
+def _universe(size=0):
+    markets = [
+        _market("kalshi", "RATE_YES", "YES", 12),
+        _market("kalshi", "RATE_NO", "NO", 12),
+        _market("polymarket", "0xabc_YES", "YES", 24 * 20),
+        _market("polymarket", "0xabc_NO", "NO", 24 * 20),
+        _market("manifold", "m1_YES", "YES", None),
+        _market("predictit", "old_YES", "YES", -5),
+    ]
+    markets += [_market("manifold", f"extra{i}_YES", "YES", 24 * 200) for i in range(size)]
+    return markets
+
+
+def test_lookup_and_indexes():
+    """Busca O(1) por (exchange, market_id) e índices secundários"""
+    registry = MarketRegistry()
+    snapshot = registry.publish(_universe(), now=NOW)
+
+    assert snapshot.version == 1 and len(registry) == 6
+    assert registry.get("kalshi", "RATE_NO").outcome == "NO"
+    assert registry.get("kalshi", "0xabc_YES") is None
+
+    assert [m.market_id for m in snapshot.filter(exchange="kalshi")] == ["RATE_YES", "RATE_NO"]
+    assert [m.market_id for m in snapshot.filter(outcome="no")] == ["RATE_NO", "0xabc_NO"]
+    assert [m.market_id for m in snapshot.filter(expiry="24h")] == ["RATE_YES", "RATE_NO"]
+    assert [m.market_id for m in snapshot.filter(exchange="polymarket", outcome="YES", expiry="30d")] == ["0xabc_YES"]
+    assert snapshot.filter(expiry="none")[0].market_id == "m1_YES"
+    assert snapshot.filter(expiry="expired")[0].market_id == "old_YES"
+    assert snapshot.filter(exchange="augur") == ()
+    assert snapshot.filter() == snapshot.markets
+
+    assert expiry_bucket(NOW + timedelta(days=60), NOW) == "90d"
+    assert expiry_bucket(NOW + timedelta(days=400), NOW) == "later"
+
+
+def test_atomic_swap_keeps_old_readers_consistent():
+    """Leitor com snapshot antigo não vê o novo; índices sempre batem com a lista"""
+    registry = MarketRegistry()
+    old = registry.publish(_universe(), now=NOW)
+    new = registry.publish(_universe(size=10)[2:], now=NOW)
+
+    assert old.get("kalshi", "RATE_YES") is not None and len(old) == 6
+    assert registry.snapshot is new and new.version == 2
+    assert new.get("kalshi", "RATE_YES") is None
+
+    # Publicação contínua em outra thread enquanto leitores conferem consistência
+    stop = threading.Event()
+    errors = []
+
+    def publisher():
+        size = 0
+        while not stop.is_set():
+            size = (size + 7) % 200
+            registry.publish(_universe(size), now=NOW)
+
+    def reader():
+        for _ in range(2000):
+            snapshot = registry.snapshot
+            if len(snapshot.markets) != sum(len(group) for group in snapshot.by_exchange.values()):
+                errors.append(snapshot.version)
+
+    thread = threading.Thread(target=publisher)
+    thread.start()
+    try:
+        reader()
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
+
+
+def test_monitor_cache_compatibility():
+    """_cached_markets do monitor lê e publica no registro"""
+    from monitor import ArbitrageMonitor
+    monitor = ArbitrageMonitor()
+    assert not monitor._cached_markets
+    monitor._cached_markets = _universe()
+    assert len(monitor._cached_markets) == 6
+    assert monitor.registry.get("polymarket", "0xabc_NO") is not None
+
+
+if __name__ == "__main__":
+    test_lookup_and_indexes()
+    test_atomic_swap_keeps_old_readers_consistent()
+    test_monitor_cache_compatibility()
+    print("PASSOU - Registro de mercados")
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Testa cache de veredictos do MarketValidator e reuso na serialização (offline)"""
+import threading
+from dataclasses import replace
+from datetime import datetime
+from arbitrage import ArbitrageEngine
+from exchanges.base import Market
+from market_validator import MarketValidator
+
+
+EXPIRES = datetime(2026, 11, 8, 12, 0)
+
+
+def _market(exchange, market_id, price, question="Will the Federal Reserve cut interest rates in November 2026?"):
+    return Market(exchange=exchange, market_id=market_id, question=question, outcome="YES",
+                  price=price, volume_24h=100.0, liquidity=5000.0, expires_at=EXPIRES)
+
+
+class _CountingMatcher:
+    """Conta chamadas de similaridade (o matcher real é determinístico)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def calculate_similarity(self, text1, text2):
+        self.calls += 1
+        return 0.95 if text1 == text2 else 0.1
+
+
+def test_verdicts_memoised_per_price_version():
+    """Mesmo par e mesmos dados: não revalida; preço mudou: revalida"""
+    matcher = _CountingMatcher()
+    validator = MarketValidator(matcher=matcher)
+    cheap, rich = _market("kalshi", "FED", 0.40), _market("polymarket", "fed", 0.60)
+
+    first = validator.validate_equivalence(cheap, rich)
+    again = validator.validate_equivalence(replace(cheap), replace(rich))  # Instâncias novas, mesmos dados
+    assert first == again and first[0] is True and matcher.calls == 1
+
+    # Quem chama pode alterar o dicionário sem contaminar o cache
+    again[1]["issues"].append("anotação")
+    again[1]["market1"] = {}
+    assert validator.validate_equivalence(cheap, rich)[1] == first[1]
+
+    resolved = replace(rich, price=0.995)
+    equivalent, result = validator.validate_equivalence(cheap, resolved)
+    assert not equivalent and "resolvido" in result["issues"][0] and matcher.calls == 2
+    assert validator.cache_info() == {"size": 1, "hits": 2, "misses": 2}
+
+    validator.validate_equivalence(cheap, replace(rich, question="Other question"))
+    assert matcher.calls == 3
+
+    # LRU limitado
+    small = MarketValidator(matcher=matcher, cache_size=2)
+    for i in range(5):
+        small.validate_equivalence(cheap, _market("polymarket", f"m{i}", 0.6))
+    assert small.cache_info()["size"] == 2
+
+
+def test_opportunity_carries_validation():
+    """Oportunidade leva o veredicto; serialização não revalida"""
+    engine = ArbitrageEngine()
+    engine.validator = MarketValidator(matcher=_CountingMatcher())
+    opp = engine.calculate_arbitrage(_market("kalshi", "FED", 0.30), _market("manifold", "fed", 0.60))
+    assert opp is not None and opp.validation["equivalent"] is True
+    assert opp.validation["confidence"] == 0.95
+
+    import api
+    calls = api.validator.cache_info()["misses"]
+    data = api.serialize_opportunity(opp)
+    assert data["validated"] is True and data["validation_details"]["confidence"] == 0.95
+    assert api.validator.cache_info()["misses"] == calls
+    assert api.validator is api.monitor.engine.validator
+
+
+def test_shared_cache_is_thread_safe():
+    """API e análise usam o mesmo validador em threads diferentes: despejo concorrente não quebra"""
+    validator = MarketValidator(cache_size=8)
+    pairs = [(_market("kalshi", f"K{i}", 0.40), _market("polymarket", f"P{i}", 0.55)) for i in range(64)]
+    errors = []
+
+    def worker(offset):
+        try:
+            for round_ in range(20):
+                for i in range(len(pairs)):
+                    m1, m2 = pairs[(i + offset + round_) % len(pairs)]
+                    validator.validate_equivalence(m1, m2)
+        except Exception as e:  # KeyError em move_to_end/popitem sem lock
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 7,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    info = validator.cache_info()
+    assert info["size"] <= 8 and info["hits"] + info["misses"] == 8 * 20 * len(pairs)
+
+
+if __name__ == "__main__":
+    test_verdicts_memoised_per_price_version()
+    test_opportunity_carries_validation()
+    test_shared_cache_is_thread_safe()
+    print("PASSOU - Cache do validador")
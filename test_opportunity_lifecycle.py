@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Testa IDs estáveis e ciclo de vida das oportunidades entre ciclos (offline)"""
+from arbitrage import ArbitrageOpportunity
+from arbitrage_combinatorial import CombinatorialOpportunity
+from exchanges.base import Market
+from opportunity_lifecycle import CLOSED, OPENED, OpportunityLifecycle, identify, opportunity_id
+
+
+def _market(exchange, market_id, price=0.5):
+    return Market(exchange=exchange, market_id=market_id, question="Will it rain?", outcome="YES", price=price,
+                  volume_24h=100.0, liquidity=1000.0, expires_at=None)
+
+
+def _traditional(profit_pct, buy_price=0.4):
+    # Objetos novos a cada ciclo, como as engines fazem
+    buy, sell = _market("kalshi", "K1", buy_price), _market("polymarket", "P1", 0.6)
+    return ArbitrageOpportunity(market_buy=buy, market_sell=sell, buy_price=buy_price, sell_price=0.6,
+                                profit_pct=profit_pct, profit_abs=profit_pct * 100, fees=1.0,
+                                net_profit=profit_pct * 100, confidence=0.9)
+
+
+def _combinatorial(profit_pct):
+    return CombinatorialOpportunity(markets=[_market("kalshi", "A"), _market("kalshi", "B")],
+                                    strategy="complementary_buy", total_probability=0.9,
+                                    expected_profit_pct=profit_pct, confidence=0.95, explanation="")
+
+
+def test_ids_are_stable_and_distinct():
+    a, b = _market("kalshi", "X"), _market("polymarket", "X")
+    assert opportunity_id([a, b], "s") == opportunity_id([b, a], "s")
+    assert opportunity_id([a, b], "s") != opportunity_id([a, b], "t")
+    assert opportunity_id([a], "s") != opportunity_id([b], "s")  # Mesmo market_id em exchanges diferentes
+
+    # Preço e lucro não entram no ID
+    assert identify("traditional", _traditional(0.05)) == identify("traditional", _traditional(0.02, buy_price=0.45))
+    assert identify("traditional", _traditional(0.05)) != identify("combinatorial", _combinatorial(0.05))
+
+
+def test_lifecycle_tracks_transitions_only():
+    lifecycle = OpportunityLifecycle(close_after=2, history_size=10)
+    events = lifecycle.update({"traditional": [_traditional(0.10)], "combinatorial": [_combinatorial(0.03)]}, now=0.0)
+    assert sorted(e.type for e in events) == [OPENED, OPENED]
+    trad_id = identify("traditional", _traditional(0.10))
+
+    # Ciclos seguintes sem transição: nenhum evento, registro atualizado
+    assert lifecycle.update({"traditional": [_traditional(0.08)], "combinatorial": [_combinatorial(0.03)]},
+                            now=60.0) == []
+    assert lifecycle.update({"traditional": [_traditional(0.05)], "combinatorial": [_combinatorial(0.03)]},
+                            now=120.0) == []
+    record = lifecycle.get(trad_id)
+    assert (record.first_seen, record.last_seen, record.cycles_seen) == (0.0, 120.0, 3)
+    assert record.peak_profit_pct == 0.10 and record.current_profit_pct == 0.05
+    # Decaimento por minuto: 0.02 e depois 0.03, média móvel com peso 0.3 na nova
+    assert abs(record.decay_rate - (0.3 * 0.03 + 0.7 * 0.02)) < 1e-12
+
+    # Uma ausência não fecha (close_after=2); a segunda fecha
+    assert lifecycle.update({"traditional": [_traditional(0.05)]}, now=180.0) == []
+    events = lifecycle.update({"traditional": [_traditional(0.05)]}, now=240.0)
+    assert [(e.type, e.record.strategy) for e in events] == [(CLOSED, "complementary_buy")]
+    assert len(lifecycle) == 1 and len(lifecycle.closed) == 1
+
+    # Volta depois de fechada: novo registro, novo "opened"
+    events = lifecycle.update({"traditional": [_traditional(0.05)], "combinatorial": [_combinatorial(0.04)]},
+                              now=300.0)
+    assert [e.type for e in events] == [OPENED]
+    assert events[0].record.first_seen == 300.0
+    assert not lifecycle.closed
+
+    # Eventos consultáveis por versão
+    assert [e.type for e in lifecycle.events_since(0)] == [OPENED, OPENED, CLOSED, OPENED]
+    assert [e.type for e in lifecycle.events_since(lifecycle.version - 1)] == [OPENED]
+    assert lifecycle.active()[0].id == trad_id
+    assert lifecycle.get(trad_id).to_dict()["status"] == "active"
+
+
+def test_history_is_bounded():
+    lifecycle = OpportunityLifecycle(close_after=1, history_size=3)
+    for i in range(5):
+        opp = CombinatorialOpportunity(markets=[_market("kalshi", f"M{i}")], strategy="s", total_probability=0.9,
+                                       expected_profit_pct=0.02, confidence=0.9, explanation="")
+        lifecycle.update({"combinatorial": [opp]}, now=float(i))
+    lifecycle.update({}, now=10.0)
+    assert len(lifecycle) == 0
+    assert len(lifecycle.closed) == 3
+    assert len(lifecycle.events) == 3
+
+
+if __name__ == "__main__":
+    test_ids_are_stable_and_distinct()
+    test_lifecycle_tracks_transitions_only()
+    test_history_is_bounded()
+    print("PASSOU - Ciclo de vida das oportunidades")
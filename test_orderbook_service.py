@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Testa serviço de order books e preço executável (offline)"""
+import asyncio
+from datetime import datetime, timedelta
+from arbitrage import ArbitrageEngine
+from exchanges.base import Market
+from exchanges.kalshi_v2 import KalshiV2Exchange
+from exchanges.orderbook import OrderBook
+from exchanges.polymarket import PolymarketExchange
+from fake_exchange_server import FakeExchangeServer, SyntheticUniverse
+from monitor import ArbitrageMonitor
+from orderbook_service import OrderBookService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_orderbook_fill_prices():
+    """Preço médio percorre os níveis e falha sem profundidade"""
+    book = OrderBook.from_levels("m", "teste", bids=[(0.40, 100), (0.45, 50)], asks=[(0.52, 100), (0.50, 100)])
+    assert book.get_best_bid().price == 0.45
+    assert book.get_best_ask().price == 0.50
+
+    # $50 cabem no primeiro nível; $100 consome 50 + 50 nos dois níveis
+    assert abs(book.average_buy_price(50) - 0.50) < 1e-9
+    assert 0.50 < book.average_buy_price(100) < 0.52
+    assert book.average_buy_price(1000) is None
+
+    assert abs(book.average_sell_price(150) - (50 * 0.45 + 100 * 0.40) / 150) < 1e-9
+    assert book.average_sell_price(151) is None
+
+    # Espelho: comprar NO = vender YES
+    no_book = book.mirrored("m_NO")
+    assert abs(no_book.get_best_ask().price - 0.55) < 1e-9
+    assert abs(no_book.get_best_bid().price - 0.50) < 1e-9
+
+
+def test_kalshi_orderbook_normalization():
+    """Bids YES/NO da Kalshi viram books YES e NO com asks implícitos"""
+    exchange = KalshiV2Exchange()
+    books = exchange.parse_orderbook("TICK", {"orderbook": {"yes": [[40, 10], [42, 5]], "no": [[55, 8]]}})
+    yes, no = books["TICK_YES"], books["TICK_NO"]
+    assert yes.get_best_bid().price == 0.42
+    assert abs(yes.get_best_ask().price - 0.45) < 1e-9
+    assert no.get_best_bid().price == 0.55
+    assert abs(no.get_best_ask().price - 0.58) < 1e-9
+
+
+def test_service_fetches_and_caches():
+    """Books de Kalshi e Polymarket via servidor fake, com TTL por mercado"""
+    universe = SyntheticUniverse(events=30, overlap=1.0, seed=11)
+    server = FakeExchangeServer(universe, port=0).start()
+    try:
+        env = server.env()
+        kalshi = KalshiV2Exchange()
+        kalshi.api_url = env["KALSHI_BASE_URL"]
+        polymarket = PolymarketExchange()
+        polymarket.base_url = env["POLYMARKET_BASE_URL"]
+
+        async def fetch():
+            return await asyncio.gather(kalshi.fetch_markets(), polymarket.fetch_markets())
+
+        kalshi_markets, poly_markets = asyncio.run(fetch())
+        markets = kalshi_markets[:10] + poly_markets[:5]
+
+        clock = FakeClock()
+        service = OrderBookService([kalshi, polymarket], ttl=10, clock=clock)
+        fetched = service.refresh_blocking(markets)
+
+        # Kalshi: um request por ticker cobre YES e NO
+        assert service.stats["requests"] == 5 + 5
+        assert fetched == 10 + 5
+        assert service.stats["errors"] == 0
+        for market in markets:
+            book = service.get(market)
+            assert book is not None and book.bids and book.asks
+            assert book.get_best_bid().price < book.get_best_ask().price
+
+        # Dentro do TTL nada é buscado de novo
+        assert service.refresh_blocking(markets) == 0
+        assert service.stats["requests"] == 10
+
+        # Após o TTL, busca de novo
+        clock.now += 11
+        assert service.get(markets[0]) is None
+        service.refresh_blocking(markets)
+        assert service.stats["requests"] == 20
+    finally:
+        server.stop()
+
+
+def _market(exchange, price):
+    return Market(exchange=exchange, market_id=f"{exchange}_1_YES", question="Will Bitcoin reach $200k by 2026?",
+                  outcome="YES", price=price, volume_24h=10000, liquidity=10000,
+                  expires_at=datetime.now() + timedelta(days=30))
+
+
+class StaticBooks:
+    def __init__(self, books):
+        self.books = books
+
+    def get(self, market):
+        return self.books.get(market.exchange)
+
+
+def test_engine_uses_executable_prices():
+    """Engine precifica pela profundidade e descarta trade sem liquidez"""
+    cheap, rich = _market("polymarket", 0.40), _market("kalshi", 0.60)
+    engine = ArbitrageEngine()
+    engine.validator.validate_equivalence = lambda m1, m2: (True, {"confidence": 1.0})
+    engine.min_profit = -1.0
+
+    mid = engine.calculate_arbitrage(cheap, rich)
+    assert not mid.executable and mid.buy_price == 0.40
+
+    engine.orderbooks = StaticBooks({
+        "polymarket": OrderBook.from_levels("p", "polymarket", bids=[(0.39, 500)], asks=[(0.42, 100), (0.45, 1000)]),
+        "kalshi": OrderBook.from_levels("k", "kalshi", bids=[(0.58, 200), (0.55, 1000)], asks=[(0.61, 500)]),
+    })
+    opp = engine.calculate_arbitrage(cheap, rich)
+    assert opp.executable
+    assert 0.42 < opp.buy_price < 0.45
+    assert 0.55 < opp.sell_price < 0.58
+    assert opp.net_profit < mid.net_profit
+
+    # Book raso: sem profundidade para $100, não há oportunidade executável
+    engine.orderbooks.books["polymarket"] = OrderBook.from_levels("p", "polymarket", bids=[], asks=[(0.42, 10)])
+    assert engine.calculate_arbitrage(cheap, rich) is None
+
+
+class SlowBooks(OrderBookService):
+    """Busca de books que demora (API lenta)"""
+    async def refresh(self, markets):
+        await asyncio.sleep(0.5)
+        return 0
+
+
+def test_monitor_update_keeps_event_loop_free():
+    """Busca de books no ciclo do monitor não trava o event loop (API/WebSocket)"""
+    monitor = ArbitrageMonitor()
+    monitor.orderbooks = SlowBooks([])
+    markets = [_market("kalshi", 0.40), _market("polymarket", 0.60)]
+
+    async def fetch_all_markets():
+        return markets
+    monitor.fetch_all_markets = fetch_all_markets
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await monitor.update()
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 20
+    assert monitor.matches  # Houve pares, então os books foram buscados
+
+
+if __name__ == "__main__":
+    test_orderbook_fill_prices()
+    test_kalshi_orderbook_normalization()
+    test_service_fetches_and_caches()
+    test_engine_uses_executable_prices()
+    test_monitor_update_keeps_event_loop_free()
+    print("PASSOU - Order books")
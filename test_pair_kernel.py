@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Testa kernel vetorizado de lucro por par contra a conta escalar das engines (offline)"""
+import random
+from datetime import datetime, timedelta
+from arbitrage_probability import ProbabilityArbitrageEngine
+from arbitrage_short_term import ShortTermArbitrageEngine
+from config import EXCHANGE_FEES, GAS_FEES
+from exchanges.base import Market
+from pair_kernel import PairLegs, pair_profit_kernel
+
+
+EXCHANGES = ["polymarket", "kalshi", "manifold", "predictit", "novaexchange"]
+
+
+def _pairs(count=300, seed=11, hours=(2, 40)):
+    rng = random.Random(seed)
+    now = datetime.now()
+    pairs = []
+    for i in range(count):
+        legs = []
+        for side in ("a", "b"):
+            legs.append(Market(
+                exchange=rng.choice(EXCHANGES),
+                market_id=f"{side}{i}",
+                question=f"Question {i}?",
+                outcome=rng.choice(["YES", "NO", "Yes"]),
+                price=rng.choice([0.0, rng.uniform(0.01, 0.99)]) if i % 40 == 0 else rng.uniform(0.01, 0.99),
+                volume_24h=100.0,
+                liquidity=rng.uniform(0, 40000),
+                expires_at=now + timedelta(hours=rng.uniform(*hours))
+            ))
+        pairs.append(tuple(legs))
+    return pairs
+
+
+def _reference(market1, market2, min_profit, min_spread, min_liquidity):
+    """Conta escalar original de _calculate_probability_arbitrage"""
+    if market1.liquidity < min_liquidity or market2.liquidity < min_liquidity:
+        return None
+    prob1, prob2 = market1.price, market2.price
+    if market1.outcome != market2.outcome:
+        if market1.outcome.upper() == "YES":
+            prob2 = 1.0 - prob2
+        else:
+            prob1 = 1.0 - prob1
+    spread = abs(prob1 - prob2)
+    if spread < min_spread:
+        return None
+    if prob1 < prob2:
+        low, high, prob_low, prob_high = market1, market2, prob1, prob2
+    else:
+        low, high, prob_low, prob_high = market2, market1, prob2, prob1
+    if prob_low == 0:
+        return None  # Divisão por zero na conta original
+    revenue = (100.0 / prob_low) * prob_high
+    fees = (100.0 * EXCHANGE_FEES.get(low.exchange, 0.05)) + (revenue * EXCHANGE_FEES.get(high.exchange, 0.05)) + \
+        (GAS_FEES.get(low.exchange, 0) + GAS_FEES.get(high.exchange, 0)) * 3000
+    profit_pct = (revenue - 100.0 - fees) / 100.0
+    if profit_pct < min_profit:
+        return None
+    return low, high, prob_low, prob_high, spread, profit_pct, fees
+
+
+class _FixedMatcher:
+    """Matcher falso: devolve os pares prontos e confiança fixa"""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+    def find_matching_events(self, markets):
+        present = {id(m) for m in markets}
+        return [pair for pair in self.pairs if id(pair[0]) in present and id(pair[1]) in present]
+
+    def calculate_enhanced_similarity(self, q1, q2):
+        return 0.9
+
+
+def test_kernel_matches_scalar_reference():
+    """Spreads, lucro e máscara iguais à conta par a par"""
+    pairs = _pairs()
+    result = pair_profit_kernel(PairLegs.from_pairs(pairs), min_profit=0.02, min_spread=0.02, min_liquidity=500)
+    survivors = set(result.survivors().tolist())
+    for i, (market1, market2) in enumerate(pairs):
+        expected = _reference(market1, market2, 0.02, 0.02, 500)
+        assert (i in survivors) == (expected is not None), i
+        if expected is None:
+            continue
+        low, high, prob_low, prob_high, spread, profit_pct, fees = expected
+        assert (market1 if result.low_is_a[i] else market2) is low
+        assert abs(result.prob_low[i] - prob_low) < 1e-12 and abs(result.prob_high[i] - prob_high) < 1e-12
+        assert abs(result.spread[i] - spread) < 1e-12
+        assert abs(result.profit_pct[i] - profit_pct) < 1e-9 and abs(result.fees[i] - fees) < 1e-9
+    assert survivors  # Amostra tem aprovados
+
+    # Sem normalização compara preços crus (engine tradicional)
+    raw = pair_profit_kernel(PairLegs.from_pairs(pairs), normalize_outcomes=False)
+    assert all(raw.prob_low[i] == min(m1.price, m2.price) for i, (m1, m2) in enumerate(pairs))
+
+
+def test_engines_materialise_only_survivors():
+    """Engines de probabilidade e curto prazo produzem o mesmo que a conta escalar"""
+    pairs = _pairs()
+    pairs = [(m1, m2) for m1, m2 in pairs if m1.exchange != m2.exchange]
+    markets = [m for pair in pairs for m in pair]
+
+    engine = ProbabilityArbitrageEngine(_FixedMatcher(pairs))
+    opportunities = engine.find_opportunities(markets)
+    expected = [_reference(m1, m2, engine.min_profit, engine.min_spread, engine.min_liquidity) for m1, m2 in pairs]
+    expected = [e for e in expected if e is not None]
+    assert len(opportunities) == len(expected) > 0
+    for opp, (low, high, prob_low, _, spread, profit_pct, _) in zip(opportunities, expected):
+        assert opp.market_low is low and opp.market_high is high
+        assert isinstance(opp.profit_pct, float) and abs(opp.profit_pct - profit_pct) < 1e-9
+        assert opp.probability_low == prob_low and opp.spread_pct == spread and opp.confidence == 0.9
+
+    short = ShortTermArbitrageEngine(_FixedMatcher(pairs))
+    found = short.find_opportunities(markets)
+    expected = {
+        (id(e[0]), id(e[1]))
+        for e in (_reference(m1, m2, short.min_profit, short.min_spread, short.min_liquidity) for m1, m2 in pairs)
+        if e is not None
+    }
+    assert {(id(o.market_low), id(o.market_high)) for o in found} == expected
+    assert all(1 <= o.time_to_expiry_hours <= 48 for o in found)
+
+    # Par único (API antiga) passa pelo mesmo kernel
+    m1, m2 = next((m1, m2) for m1, m2 in pairs
+                  if _reference(m1, m2, engine.min_profit, engine.min_spread, engine.min_liquidity))
+    assert engine._calculate_probability_arbitrage(m1, m2, 0.5).confidence == 0.5
+
+
+if __name__ == "__main__":
+    test_kernel_matches_scalar_reference()
+    test_engines_materialise_only_survivors()
+    print("PASSOU - Kernel de lucro por par")
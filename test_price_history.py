@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Testa histórico de preços em ring buffers e métricas vetorizadas (offline)"""
+import random
+import statistics
+from datetime import datetime, timedelta
+from arbitrage_short_term import ShortTermArbitrageEngine
+from exchanges.base import Market
+from price_history import PriceHistory
+
+
+def _market(market_id, price, exchange="kalshi", liquidity=1000.0):
+    return Market(exchange=exchange, market_id=market_id, question=f"Pergunta {market_id}", outcome="YES",
+                  price=price, volume_24h=100.0, liquidity=liquidity,
+                  expires_at=datetime.now() + timedelta(hours=10))
+
+
+def test_ring_buffer_wraps_and_keeps_order():
+    """Capacidade fixa: guarda só as últimas observações, em ordem"""
+    history = PriceHistory(capacity=5, max_markets=10)
+    for step in range(8):
+        history.record([_market("A", 0.10 + step / 100), _market("B", 0.50)], timestamp=1000.0 + step)
+
+    times, prices, liquidity = history.series(("kalshi", "A"))
+    assert times.tolist() == [1003.0, 1004.0, 1005.0, 1006.0, 1007.0]
+    assert [round(p, 4) for p in prices] == [0.13, 0.14, 0.15, 0.16, 0.17]
+    assert len(history.series(("kalshi", "B"))[0]) == 5
+    assert history.series(("kalshi", "C"))[0].size == 0
+
+    # Mercado novo entra no meio do histórico
+    history.record([_market("C", 0.3)], timestamp=2000.0)
+    prices = history.series(("kalshi", "C"))[1]
+    assert len(prices) == 1 and abs(prices[0] - 0.3) < 1e-6
+
+
+def test_metrics_match_reference():
+    """Volatilidade, drift e z-score batem com o cálculo direto"""
+    rng = random.Random(2)
+    history = PriceHistory(capacity=16, max_markets=100)
+    keys = [("polymarket", f"m{i}") for i in range(20)]
+    series = {key: [] for key in keys}
+    for step in range(25):
+        markets = []
+        for key in keys[:10 + step % 10]:  # Nem todo mercado aparece em todo ciclo
+            price = round(rng.uniform(0.2, 0.8), 3)
+            series[key].append((3600.0 * step, price))
+            markets.append(_market(key[1], price, exchange=key[0]))
+        history.record(markets, timestamp=3600.0 * step)
+
+    window = 8
+    volatility = history.volatility(keys + [("x", "desconhecido")], window)
+    drift = history.drift(keys, window)
+    zscore = history.zscore(keys, window)
+    for i, key in enumerate(keys):
+        recent = series[key][-window:]
+        prices = [p for _, p in recent]
+        if len(prices) < 3:
+            # Poucas observações: sem métrica
+            assert str(volatility[i]) == "nan" and str(zscore[i]) == "nan"
+            continue
+        changes = [b - a for a, b in zip(prices, prices[1:])]
+        assert abs(volatility[i] - statistics.pstdev(changes)) < 1e-6
+        expected_drift = (prices[-1] - prices[0]) / ((recent[-1][0] - recent[0][0]) / 3600.0)
+        assert abs(drift[i] - expected_drift) < 1e-6
+        expected_z = (prices[-1] - statistics.fmean(prices)) / statistics.pstdev(prices)
+        assert abs(zscore[i] - expected_z) < 1e-4
+    assert str(volatility[-1]) == "nan"
+
+    stats = history.stats([keys[0]], window)[keys[0]]
+    assert stats["observations"] == 16 and stats["volatility"] is not None
+
+
+def test_bounded_markets_and_engine_volatility():
+    """Limite de mercados descarta os mais antigos; engine usa volatilidade medida"""
+    history = PriceHistory(capacity=4, max_markets=3)
+    history.record([_market("A", 0.1), _market("B", 0.2)], timestamp=1.0)
+    history.record([_market("C", 0.3)], timestamp=2.0)
+    history.record([_market("D", 0.4)], timestamp=3.0)
+    assert len(history) == 3 and ("kalshi", "A") not in history and ("kalshi", "D") in history
+    assert history.prune(older_than=3.0) == 2 and len(history) == 1
+
+    engine = ShortTermArbitrageEngine(matcher=None, history=PriceHistory(capacity=8))
+    low, high = _market("L", 0.40), _market("H", 0.50, exchange="polymarket")
+    # Sem histórico: estimativa pelo spread
+    assert engine._volatility_score(low, high, 0.10) == 0.2
+    for step, price in enumerate([0.40, 0.45, 0.38, 0.47, 0.41]):
+        engine.history.record([_market("L", price), high], timestamp=float(step))
+    score = engine._volatility_score(low, high, 0.10)
+    assert 0.2 < score <= 1.0
+
+
+if __name__ == "__main__":
+    test_ring_buffer_wraps_and_keeps_order()
+    test_metrics_match_reference()
+    test_bounded_markets_and_engine_volatility()
+    print("PASSOU - Histórico de preços")
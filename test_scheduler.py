@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Testa scheduler de polling independente por exchange"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+from exchanges.base import ExchangeBase, Market
+from scheduler import ExchangeScheduler
+
+
+class TickingExchange(ExchangeBase):
+    """Exchange fake cujo preço muda a cada N chamadas"""
+
+    def __init__(self, name: str, change_every: int = 1):
+        super().__init__(name)
+        self.calls = 0
+        self.change_every = change_every
+
+    def normalize_question(self, question: str) -> str:
+        return question.lower()
+
+    async def fetch_markets(self) -> List[Market]:
+        self.calls += 1
+        price = 0.40 + 0.01 * (self.calls // self.change_every)
+        return [Market(
+            exchange=self.name,
+            market_id=f"{self.name}_1_YES",
+            question="Will the scheduler work?",
+            outcome="YES",
+            price=price,
+            volume_24h=1000,
+            liquidity=5000,
+            expires_at=datetime.now() + timedelta(days=1)
+        )]
+
+
+def test_scheduler_cadence_and_debounce():
+    """Exchanges rápidas são consultadas mais vezes e a análise é agrupada"""
+    fast = TickingExchange("fast")
+    slow = TickingExchange("slow")
+    snapshots = []
+
+    async def on_change(markets):
+        snapshots.append(markets)
+
+    scheduler = ExchangeScheduler(
+        [fast, slow],
+        on_change,
+        intervals={"fast": 0.05, "slow": 0.6},
+        debounce=0.2,
+        max_delay=0.4
+    )
+    scheduler.min_delay = 0.01
+
+    async def run_for(seconds):
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(seconds)
+        scheduler.stop()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run_for(1.5))
+
+    print(f"fast: {fast.calls} chamadas, slow: {slow.calls} chamadas, analises: {len(snapshots)}")
+    assert fast.calls > slow.calls
+    assert snapshots, "Análise deveria ter rodado"
+    # Debounce agrupa várias mudanças numa análise
+    assert len(snapshots) < fast.calls
+    # Snapshot mesclado contém as duas exchanges
+    assert {m.exchange for m in snapshots[-1]} == {"fast", "slow"}
+
+
+def test_merge_ignores_unchanged_snapshot():
+    """Resultado idêntico não dispara nova análise"""
+    async def noop(markets):
+        pass
+
+    exchange = TickingExchange("static", change_every=1000)
+    scheduler = ExchangeScheduler([exchange], noop, intervals={})
+    markets = asyncio.run(exchange.fetch_markets())
+
+    assert scheduler.merge("static", markets)
+    assert not scheduler.merge("static", list(markets))
+    assert len(scheduler.markets()) == 1
+
+
+def test_empty_poll_keeps_last_good_markets():
+    """Busca vazia (erro engolido pelo adapter) não apaga a exchange do snapshot"""
+    async def noop(markets):
+        pass
+
+    exchange = TickingExchange("flaky", change_every=1000)
+    scheduler = ExchangeScheduler([exchange], noop, intervals={})
+    assert asyncio.run(scheduler.poll_once(exchange))
+    good = scheduler.markets()
+
+    async def empty():
+        return []
+    exchange.fetch_markets = empty
+    assert not asyncio.run(scheduler.poll_once(exchange))
+    assert scheduler.markets() == good
+    assert scheduler._errors["flaky"] == "nenhum mercado retornado"
+
+
+if __name__ == "__main__":
+    test_scheduler_cadence_and_debounce()
+    test_merge_ignores_unchanged_snapshot()
+    test_empty_poll_keeps_last_good_markets()
+    print("PASSOU - Scheduler")
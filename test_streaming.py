@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Testa ingestão streaming com feed gravado (offline)"""
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from exchanges.base import Market
+from exchanges.streaming import (KalshiStream, PolymarketStream, ReplayConnection,
+                                 replay_connector)
+
+
+def _write_feed(records):
+    fd, path = tempfile.mkstemp(suffix=".jsonl")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for i, msg in enumerate(records):
+            f.write(json.dumps({"t": 1000.0 + i * 0.1, "msg": msg}) + "\n")
+    return path
+
+
+def _kalshi_market(ticker, outcome, price):
+    return Market(
+        exchange="kalshi",
+        market_id=f"{ticker}_{outcome}",
+        question="How high will unemployment get? - Above 8%",
+        outcome=outcome,
+        price=price,
+        volume_24h=1000,
+        liquidity=5000,
+        expires_at=datetime.now() + timedelta(days=1)
+    )
+
+
+def test_kalshi_replay_updates_books_and_prices():
+    """Feed gravado atualiza topo do book e preços YES/NO"""
+    path = _write_feed([
+        {"type": "subscribed", "msg": {"channel": "ticker", "sid": 1}},
+        {"type": "ticker", "sid": 1, "seq": 1, "msg": {"market_ticker": "UNEMP-8", "yes_bid": 40, "yes_ask": 44, "price": 42}},
+        {"type": "ticker", "sid": 1, "seq": 2, "msg": {"market_ticker": "UNEMP-8", "yes_bid": 50, "yes_ask": 54, "price": 52}},
+    ])
+    stream = KalshiStream(connect=replay_connector(path))
+    updates = []
+    stream.on_update(lambda book: updates.append(book.mid))
+
+    markets = [_kalshi_market("UNEMP-8", "YES", 0.30), _kalshi_market("UNEMP-8", "NO", 0.70)]
+
+    async def run():
+        await stream.sync_markets(markets)
+        await stream.run()
+
+    asyncio.run(run())
+    os.remove(path)
+
+    assert stream.subscribed == {"UNEMP-8"}
+    assert len(updates) == 2
+    assert abs(stream.books["UNEMP-8"].mid - 0.52) < 1e-9
+
+    updated = stream.apply_to_markets(markets)
+    assert abs(updated[0].price - 0.52) < 1e-9
+    assert abs(updated[1].price - 0.48) < 1e-9
+    # Instâncias originais não são modificadas
+    assert markets[0].price == 0.30
+    print("PASSOU - Replay Kalshi")
+
+
+def test_reconnect_resubscribes():
+    """Após falha de conexão, reconecta e re-envia assinaturas"""
+    path = _write_feed([
+        {"event_type": "book", "asset_id": "tok1", "bids": [{"price": "0.60", "size": "10"}], "asks": [{"price": "0.64", "size": "5"}]},
+    ])
+    connections = []
+    attempts = {"n": 0}
+
+    async def flaky_connect(url, headers=None):
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            raise ConnectionError("falha simulada")
+        conn = ReplayConnection(path)
+        connections.append(conn)
+        return conn
+
+    stream = PolymarketStream(connect=flaky_connect, initial_backoff=0.01)
+
+    async def run():
+        await stream.subscribe(["tok1"])
+        await stream.run()
+
+    asyncio.run(run())
+    os.remove(path)
+
+    assert stream.reconnects == 1
+    assert connections[0].sent == [{"assets_ids": ["tok1"], "type": "market"}]
+    book = stream.books["tok1"]
+    assert book.best_bid == 0.60 and book.best_ask == 0.64
+    print("PASSOU - Reconexao com re-assinatura")
+
+
+def test_polymarket_outcome_tokens_and_recording():
+    """Cada outcome da Polymarket tem token próprio: o mid já é o preço dele; feed gravado é reproduzível"""
+    path = _write_feed([
+        {"event_type": "book", "asset_id": "tok_yes", "bids": [{"price": "0.60", "size": "10"}], "asks": [{"price": "0.64", "size": "5"}]},
+        {"event_type": "book", "asset_id": "tok_no", "bids": [{"price": "0.36", "size": "10"}], "asks": [{"price": "0.40", "size": "5"}]},
+    ])
+    record_fd, record_path = tempfile.mkstemp(suffix=".jsonl")
+    os.close(record_fd)
+
+    class FakeExchange:
+        token_ids = {"cond_YES": "tok_yes", "cond_NO": "tok_no"}
+
+    stream = PolymarketStream(exchange=FakeExchange(), connect=replay_connector(path), record_path=record_path)
+    markets = [
+        Market(exchange="polymarket", market_id=f"cond_{outcome}", question="Will it rain?", outcome=outcome,
+               price=price, volume_24h=1000, liquidity=5000, expires_at=None)
+        for outcome, price in (("YES", 0.50), ("NO", 0.50))
+    ]
+
+    async def run():
+        await stream.sync_markets(markets)
+        await stream.run()
+
+    asyncio.run(run())
+    os.remove(path)
+
+    updated = stream.apply_to_markets(markets)
+    assert abs(updated[0].price - 0.62) < 1e-9
+    assert abs(updated[1].price - 0.38) < 1e-9  # Não é 1 - mid
+
+    # Gravação: um handle durante o loop, fechado ao final
+    assert stream._record_file is None
+    with open(record_path, encoding="utf-8") as f:
+        recorded = [json.loads(line)["msg"]["asset_id"] for line in f]
+    os.remove(record_path)
+    assert recorded == ["tok_yes", "tok_no"]
+    print("PASSOU - Tokens de outcome da Polymarket")
+
+
+if __name__ == "__main__":
+    test_kalshi_replay_updates_books_and_prices()
+    test_reconnect_resubscribes()
+    test_polymarket_outcome_tokens_and_recording()
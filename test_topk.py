@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Testa seleção top-K com heap limitado contra o sort completo (offline)"""
+import random
+from types import SimpleNamespace
+from arbitrage import ArbitrageEngine
+from exchanges.base import Market
+from topk import TopK, merge_top_k, score_key, top_k
+
+
+def _items(count=500, seed=11):
+    rng = random.Random(seed)
+    # Muitos empates para conferir a estabilidade
+    return [SimpleNamespace(profit_pct=rng.choice([0.01, 0.02, 0.03]) + rng.randrange(20) / 100, i=i)
+            for i in range(count)]
+
+
+def test_top_k_matches_stable_sort():
+    items = _items()
+    reference = sorted(items, key=lambda x: x.profit_pct, reverse=True)
+    for k in (1, 3, 10, 499, 500, 1000):
+        assert top_k(items, k) == reference[:k]
+    assert top_k(items, None) == reference
+    assert top_k(items, 0) == reference
+
+    heap = TopK(5)
+    assert heap.threshold is None
+    heap.extend(items)
+    assert len(heap) == 5 and heap.full
+    assert heap.threshold == reference[4].profit_pct
+    assert not heap.push(SimpleNamespace(profit_pct=heap.threshold, i=-1))  # Empate com o pior: chegou depois
+    assert heap.push(SimpleNamespace(profit_pct=10.0, i=-2))
+    assert heap.items()[0].i == -2
+
+
+def test_merge_and_scores():
+    items = _items()
+    a, b = top_k(items[:250], 40), top_k(items[250:], 40)
+    assert merge_top_k([a, b], 40) == top_k(items, 40)
+    assert merge_top_k([a, b], None) == sorted(a + b, key=lambda x: x.profit_pct, reverse=True)
+
+    traditional = SimpleNamespace(profit_pct=0.02, dollar_profit=7.0, net_profit=2.0)
+    combinatorial = SimpleNamespace(expected_profit_pct=0.05, quality_score=80.0)
+    expert = SimpleNamespace(net_profit_pct=0.03, quality_score=60.0)
+    assert [score_key("profit_pct")(o) for o in (traditional, combinatorial, expert)] == [0.02, 0.05, 0.03]
+    assert score_key("net_dollars")(traditional) == 7.0
+    assert abs(score_key("net_dollars")(combinatorial) - 5.0) < 1e-12
+    assert score_key("quality_score")(traditional) == 0.0
+    try:
+        score_key("bogus")
+        assert False
+    except ValueError:
+        pass
+
+
+def _pairs(count=80, seed=5):
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        question = f"Will event {i} happen?"
+        m1 = Market(exchange="kalshi", market_id=f"k{i}", question=question, outcome="YES",
+                    price=rng.uniform(0.2, 0.5), volume_24h=100, liquidity=5000, expires_at=None)
+        m2 = Market(exchange="polymarket", market_id=f"p{i}", question=question, outcome="YES",
+                    price=rng.uniform(0.5, 0.9), volume_24h=100, liquidity=5000, expires_at=None)
+        pairs.append((m1, m2, 0.95))
+    return pairs
+
+
+def _summary(opportunities):
+    return [(o.market_buy.market_id, round(o.dollar_profit, 9)) for o in opportunities]
+
+
+def test_engine_top_k_and_incremental_merge():
+    pairs = _pairs()
+    full = ArbitrageEngine(top_k=0).find_opportunities(pairs)
+    engine = ArbitrageEngine(top_k=10)
+    previous = engine.find_opportunities(pairs)
+    assert _summary(previous) == _summary(full[:10])
+
+    # Só mercados fora do top mudam: mantidas + recalculadas intercaladas
+    outside = {(o.market_buy.exchange, o.market_buy.market_id) for o in full[10:20]}
+    updated = engine.update_opportunities(previous, pairs, outside)
+    assert _summary(updated) == _summary(full[:10])
+
+    # Mercado do top muda e sai: a 11ª precisa voltar (recalcula tudo)
+    leader = full[0].market_buy
+    changed = [(m1 if m1 is not leader else Market(exchange=m1.exchange, market_id=m1.market_id, question=m1.question,
+                                                  outcome="YES", price=0.99, volume_24h=100, liquidity=5000,
+                                                  expires_at=None), m2, c) for m1, m2, c in pairs]
+    updated = engine.update_opportunities(previous, changed, {(leader.exchange, leader.market_id)})
+    assert _summary(updated) == _summary(ArbitrageEngine(top_k=0).find_opportunities(changed)[:10])
+
+
+if __name__ == "__main__":
+    test_top_k_matches_stable_sort()
+    test_merge_and_scores()
+    test_engine_top_k_and_incremental_merge()
+    print("PASSOU - Seleção top-K")
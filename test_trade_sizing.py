@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Testa dimensionamento ótimo de trades pela profundidade dos books (offline)"""
+import random
+from datetime import datetime, timedelta
+from arbitrage import ArbitrageEngine
+from exchanges.base import Market
+from exchanges.orderbook import ArrayOrderBook, OrderBook
+from trade_sizing import optimal_trade_size
+
+
+def _brute_force(book_buy, book_sell, fee_buy, fee_sell, gas, max_investment, steps=4000):
+    """Melhor lucro numa grade fina de tamanhos"""
+    buy, sell = book_buy.to_array(), book_sell.to_array()
+    limit = min(buy.depth("buy"), sell.depth("sell"))
+    best = 0.0
+    for i in range(1, steps + 1):
+        q = limit * i / steps
+        cost = buy.cost_to_fill(q, "buy")
+        if cost is None or cost > max_investment + 1e-9:
+            break
+        revenue = sell.cost_to_fill(q, "sell")
+        best = max(best, revenue * (1 - fee_sell) - cost * (1 + fee_buy) - gas)
+    return best
+
+
+def test_optimum_beats_grid_search():
+    """Tamanho ótimo em níveis dos books é pelo menos tão bom quanto a grade"""
+    rng = random.Random(4)
+    for _ in range(40):
+        asks = [(round(rng.uniform(0.30, 0.60), 3), rng.uniform(10, 400)) for _ in range(rng.randint(1, 8))]
+        bids = [(round(rng.uniform(0.40, 0.70), 3), rng.uniform(10, 400)) for _ in range(rng.randint(1, 8))]
+        book_buy = OrderBook.from_levels("a", "polymarket", bids=[], asks=asks)
+        book_sell = OrderBook.from_levels("b", "kalshi", bids=bids, asks=[])
+        gas = rng.choice([0.0, 1.5])
+        sizing = optimal_trade_size(book_buy, book_sell, 0.02, 0.07, gas, max_investment=300)
+
+        expected = _brute_force(book_buy, book_sell, 0.02, 0.07, gas, 300)
+        assert sizing.net_profit >= expected - 1e-6
+        assert sizing.cost <= 300 + 1e-9
+        if sizing.executable:
+            assert min(p for p, _ in asks) - 1e-12 <= sizing.buy_vwap <= max(p for p, _ in asks) + 1e-12
+            assert min(p for p, _ in bids) - 1e-12 <= sizing.sell_vwap <= max(p for p, _ in bids) + 1e-12
+            assert abs(sizing.revenue - sizing.cost - sizing.fees - sizing.net_profit) < 1e-9
+        else:
+            assert sizing.net_profit == 0.0
+
+
+def test_marginal_curve_and_limits():
+    """Curva marginal decrescente, para onde o marginal fica negativo"""
+    book_buy = ArrayOrderBook("a", "polymarket", ask_prices=[0.40, 0.45, 0.55], ask_sizes=[100, 100, 100])
+    book_sell = ArrayOrderBook("b", "kalshi", bid_prices=[0.60, 0.50], bid_sizes=[150, 500])
+    sizing = optimal_trade_size(book_buy, book_sell, 0.0, 0.0, max_investment=None)
+
+    # 100 a 0.40 e 50 a 0.45 vendendo a 0.60; depois 50 a 0.45 vendendo a 0.50; 0.55 > 0.50 não compensa
+    assert sizing.size == 200
+    assert abs(sizing.net_profit - (100 * 0.20 + 50 * 0.15 + 50 * 0.05)) < 1e-9
+    assert abs(sizing.buy_vwap - 0.425) < 1e-12 and abs(sizing.sell_vwap - 0.575) < 1e-12
+    marginals = [m for _, _, m in sizing.curve[:-1]]
+    assert marginals == sorted(marginals, reverse=True) and marginals[-1] < 0
+
+    capped = optimal_trade_size(book_buy, book_sell, 0.0, 0.0, max_investment=20)
+    assert capped.size == 50 and abs(capped.cost - 20) < 1e-9
+    assert optimal_trade_size(book_buy, book_sell, 0.0, 0.0, max_size=30).size == 30
+    assert not optimal_trade_size(book_buy, book_sell, 0.0, 0.0, gas_usd=100).executable
+
+
+def test_engine_ranks_by_dollar_profit():
+    """Com books, oportunidade traz o tamanho ótimo e o ranking usa lucro em USD"""
+    def market(exchange, market_id, price):
+        return Market(exchange=exchange, market_id=market_id, question="Will Bitcoin reach $200k by 2026?",
+                      outcome="YES", price=price, volume_24h=10000, liquidity=10000,
+                      expires_at=datetime.now() + timedelta(days=30))
+
+    books = {
+        # Spread maior mas raso
+        "thin_buy": OrderBook.from_levels("1", "polymarket", bids=[], asks=[(0.30, 400)]),
+        "thin_sell": OrderBook.from_levels("2", "kalshi", bids=[(0.60, 400)], asks=[]),
+        # Spread menor mas profundo
+        "deep_buy": OrderBook.from_levels("3", "polymarket", bids=[], asks=[(0.40, 5000)]),
+        "deep_sell": OrderBook.from_levels("4", "kalshi", bids=[(0.60, 5000)], asks=[]),
+    }
+
+    class StaticBooks:
+        def get(self, m):
+            return books[m.market_id]
+
+    engine = ArbitrageEngine(orderbooks=StaticBooks())
+    engine.validator.validate_equivalence = lambda m1, m2: (True, {"confidence": 1.0, "equivalent": True})
+    pairs = [
+        (market("polymarket", "thin_buy", 0.30), market("kalshi", "thin_sell", 0.60), 1.0),
+        (market("polymarket", "deep_buy", 0.40), market("kalshi", "deep_sell", 0.60), 1.0),
+    ]
+    opportunities = engine.find_opportunities(pairs)
+    assert [o.market_buy.market_id for o in opportunities] == ["deep_buy", "thin_buy"]
+    assert opportunities[0].profit_pct < opportunities[1].profit_pct
+    assert opportunities[0].sizing.cost <= 1000 + 1e-9
+    assert opportunities[0].dollar_profit > opportunities[1].dollar_profit
+
+
+if __name__ == "__main__":
+    test_optimum_beats_grid_search()
+    test_marginal_curve_and_limits()
+    test_engine_ranks_by_dollar_profit()
+    print("PASSOU - Dimensionamento de trades")
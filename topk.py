@@ -0,0 +1,127 @@
+"""
+Seleção top-K em streaming para listas de oportunidades
+
+As engines montavam a lista completa de candidatos e ordenavam tudo, mas o
+dashboard, o monitor diário e os alertas só mostram as 3-10 melhores. TopK
+mantém um heap mínimo de tamanho K: cada candidato custa O(log K) e só os K
+melhores ficam em memória. Com K = None (ou 0) guarda tudo e equivale ao
+sort completo.
+
+Ordem final igual à do sort estável decrescente: score maior primeiro e, em
+empate, quem entrou antes.
+
+Scores por nome (valem para qualquer engine):
+- "profit_pct": lucro percentual (profit_pct / expected_profit_pct / net_profit_pct)
+- "quality_score": score de qualidade 0-100 (0 para oportunidades sem score)
+- "net_dollars": lucro em USD (tamanho ótimo com books, senão os $100 de referência)
+"""
+import heapq
+from itertools import count, islice
+from typing import Any, Callable, Generic, Iterable, List, Optional, Sequence, TypeVar, Union
+
+T = TypeVar("T")
+Key = Callable[[Any], Any]
+
+REFERENCE_INVESTMENT = 100.0  # Investimento de referência das engines (lucro % -> USD)
+
+
+def _profit_pct(opp) -> float:
+    for name in ("profit_pct", "expected_profit_pct", "net_profit_pct"):
+        value = getattr(opp, name, None)
+        if value is not None:
+            return value
+    return 0.0
+
+
+def _quality_score(opp) -> float:
+    return getattr(opp, "quality_score", 0.0) or 0.0
+
+
+def _net_dollars(opp) -> float:
+    for name in ("dollar_profit", "net_profit"):
+        value = getattr(opp, name, None)
+        if value is not None:
+            return value
+    return _profit_pct(opp) * REFERENCE_INVESTMENT
+
+
+SCORES = {
+    "profit_pct": _profit_pct,
+    "quality_score": _quality_score,
+    "net_dollars": _net_dollars,
+}
+
+
+def score_key(score: Union[str, Key]) -> Key:
+    """Função de score pelo nome (ou a própria função)"""
+    if callable(score):
+        return score
+    try:
+        return SCORES[score]
+    except KeyError:
+        raise ValueError(f"Score desconhecido: {score} (use {', '.join(SCORES)})")
+
+
+class TopK(Generic[T]):
+    """
+    Os K itens de maior score vistos até agora
+
+    Args:
+        k: Tamanho máximo (None ou <= 0 = sem limite)
+        key: Nome do score (SCORES) ou função item -> valor comparável
+    """
+
+    def __init__(self, k: Optional[int], key: Union[str, Key] = "profit_pct"):
+        self.k = k if k and k > 0 else None
+        self.key = score_key(key)
+        self._heap: List[tuple] = []  # (score, -ordem de chegada, item): o topo é o pior
+        self._counter = count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def full(self) -> bool:
+        return self.k is not None and len(self._heap) >= self.k
+
+    @property
+    def threshold(self):
+        """Score mínimo para entrar (None enquanto há vaga)"""
+        return self._heap[0][0] if self.full else None
+
+    def push(self, item: T) -> bool:
+        """Oferece um item; retorna se ele entrou"""
+        entry = (self.key(item), -next(self._counter), item)
+        if not self.full:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def extend(self, items: Iterable[T]) -> "TopK[T]":
+        for item in items:
+            self.push(item)
+        return self
+
+    def items(self) -> List[T]:
+        """Itens do melhor para o pior"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+def top_k(items: Iterable[T], k: Optional[int], key: Union[str, Key] = "profit_pct") -> List[T]:
+    """Os K melhores de `items` em ordem decrescente (todos com k None/0)"""
+    if not k or k <= 0:
+        return sorted(items, key=score_key(key), reverse=True)
+    return TopK(k, key).extend(items).items()
+
+
+def merge_top_k(lists: Sequence[Sequence[T]], k: Optional[int], key: Union[str, Key] = "profit_pct") -> List[T]:
+    """
+    Junta listas já ordenadas (decrescente) pelo mesmo score e corta em K
+
+    Só percorre as cabeças das listas (heapq.merge): O(K log listas).
+    """
+    merged = heapq.merge(*lists, key=score_key(key), reverse=True)
+    return list(merged) if not k or k <= 0 else list(islice(merged, k))
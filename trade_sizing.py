@@ -0,0 +1,123 @@
+"""
+Dimensionamento ótimo de trades pela profundidade dos order books
+
+As engines avaliam um trade fixo de $100 ao preço exibido. Aqui o tamanho é
+escolhido caminhando pelos asks da perna de compra e pelos bids da perna de
+venda: custo e receita de q contratos são curvas lineares por partes
+(convexa e côncava), então o lucro líquido após taxas é côncavo em q e o
+máximo está em um dos níveis dos books. Todos os níveis são avaliados de uma
+vez com NumPy.
+
+Taxas seguem o modelo das engines: taxa da exchange de compra sobre o valor
+investido, taxa da exchange de venda sobre a receita e gas fixo em USD.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from exchanges.orderbook import ArrayOrderBook, OrderBook
+from config import MAX_TRADE_INVESTMENT
+
+Book = Union[OrderBook, ArrayOrderBook]
+
+
+@dataclass
+class TradeSize:
+    """Tamanho ótimo do trade e a curva de lucro por tamanho"""
+    size: float              # Contratos comprados em uma perna e vendidos na outra
+    cost: float              # USD gasto na compra
+    revenue: float           # USD recebido na venda
+    buy_vwap: Optional[float]
+    sell_vwap: Optional[float]
+    fees: float
+    net_profit: float        # USD após taxas e gas
+    profit_pct: float        # net_profit / cost
+    # (contratos, lucro líquido acumulado, lucro marginal por contrato até o próximo ponto)
+    curve: List[Tuple[float, float, float]] = field(default_factory=list)
+
+    @property
+    def executable(self) -> bool:
+        return self.size > 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "size": self.size,
+            "cost": self.cost,
+            "revenue": self.revenue,
+            "buy_vwap": self.buy_vwap,
+            "sell_vwap": self.sell_vwap,
+            "fees": self.fees,
+            "net_profit": self.net_profit,
+            "profit_pct": self.profit_pct,
+            "curve": [list(point) for point in self.curve],
+        }
+
+
+def _as_array(book: Book) -> ArrayOrderBook:
+    return book if isinstance(book, ArrayOrderBook) else ArrayOrderBook.from_orderbook(book)
+
+
+def optimal_trade_size(
+    book_buy: Book,
+    book_sell: Book,
+    fee_buy: float,
+    fee_sell: float,
+    gas_usd: float = 0.0,
+    max_investment: Optional[float] = MAX_TRADE_INVESTMENT,
+    max_size: Optional[float] = None
+) -> TradeSize:
+    """
+    Tamanho que maximiza o lucro líquido de comprar em `book_buy` e vender em `book_sell`
+
+    Args:
+        book_buy: Book da perna de compra (consome asks)
+        book_sell: Book da perna de venda (consome bids)
+        fee_buy: Taxa sobre o valor investido
+        fee_sell: Taxa sobre a receita
+        gas_usd: Custo fixo do trade (gas das duas pernas em USD)
+        max_investment: Limite de USD gastos na compra (None = sem limite)
+        max_size: Limite de contratos (None = sem limite)
+
+    Sem tamanho lucrativo, retorna size 0 (a curva continua disponível).
+    """
+    ask_size, ask_cost = _as_array(book_buy).depth_curve("buy")
+    bid_size, bid_revenue = _as_array(book_sell).depth_curve("sell")
+
+    limit = min(ask_size[-1], bid_size[-1])
+    if max_size is not None:
+        limit = min(limit, max_size)
+    if max_investment is not None and ask_cost[-1] > max_investment:
+        limit = min(limit, float(np.interp(max_investment, ask_cost, ask_size)))
+
+    # Lucro é linear entre níveis dos dois books: basta avaliar nos pontos de quebra
+    sizes = np.unique(np.concatenate((ask_size, bid_size, [limit])))
+    sizes = sizes[sizes <= limit]
+    cost = np.interp(sizes, ask_size, ask_cost)
+    revenue = np.interp(sizes, bid_size, bid_revenue)
+    gross = revenue * (1.0 - fee_sell) - cost * (1.0 + fee_buy)
+    net = np.where(sizes > 0, gross - gas_usd, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        marginal = np.diff(gross) / np.diff(sizes)
+    marginal = np.append(marginal, np.nan)  # Depois do último ponto não há mais profundidade
+    curve = [(float(q), float(p), float(m)) for q, p, m in zip(sizes, net, marginal)]
+
+    best = int(np.argmax(net)) if len(net) else 0
+    if not len(net) or net[best] <= 0:
+        return TradeSize(size=0.0, cost=0.0, revenue=0.0, buy_vwap=None, sell_vwap=None,
+                         fees=0.0, net_profit=0.0, profit_pct=0.0, curve=curve)
+
+    size = float(sizes[best])
+    spent = float(cost[best])
+    received = float(revenue[best])
+    fees = spent * fee_buy + received * fee_sell + gas_usd
+    return TradeSize(
+        size=size,
+        cost=spent,
+        revenue=received,
+        buy_vwap=spent / size,
+        sell_vwap=received / size,
+        fees=fees,
+        net_profit=float(net[best]),
+        profit_pct=float(net[best]) / spent if spent else 0.0,
+        curve=curve,
+    )